@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+实体链接器基准测试
+在 10k / 100k / 1M 规模的合成本体（见 synthetic_ontology.py）上测量索引构建耗时与内存，
+以及精确、大小写不敏感、部分、模糊匹配和批量链接各路径的延迟分布，结果写为 JSON。
+
+每类查询都按构造方式落在对应阶段（结果中的 match_types 可核对）；
+同一种子下合成本体和查询完全确定，不同提交、不同机器的结果可以直接对比。
+
+用法:
+  python benchmarks/bench_linker.py --sizes 10k 100k
+  python benchmarks/bench_linker.py --sizes 1m --fuzzy-queries 50 --output bench_1m.json
+  python benchmarks/bench_linker.py --data-dir ontology/data
+  python benchmarks/bench_linker.py --sizes 100k --linker-args '{"ngram_filter_fpr": 0.01}'
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import rapidfuzz
+
+from benchmarks.synthetic_ontology import DRUG_SYLLABLES, generate_ontology, parse_size
+from ontology.entity_linker import EntityLinker
+from ontology.ontology_loader import OntologyLoader
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORKLOADS = ("exact", "case_insensitive", "partial", "fuzzy", "batch")
+
+
+def build_queries(partitions, count, fuzzy_count, seed=0):
+    """
+    按本体构造各路径的查询：
+      exact: 标准名与别名原文（不含大写字母，索引键为小写）
+      case_insensitive: 含大写字母的别名
+      partial: 去掉末尾一个字的疾病名（是某个实体名称的一部分）
+      fuzzy: 替换中间一个字的名称（不是任何键的子串）
+      batch: 以上各类混合（用 link_batch 按块链接）
+    """
+    rng = random.Random(f"queries-{seed}")
+    names = []
+    for entities in partitions.values():
+        for name, info in entities.items():
+            names.append(name)
+            names.extend(info.get("aliases", []))
+    keys = {name.lower() for name in names}
+    lower_names = [name for name in names if name == name.lower()]
+    latin_aliases = [name for name in names if name != name.lower()]
+    diseases = [name for name in partitions.get("disease", {}) if len(name) >= 6]
+
+    def sample(pool, size, make):
+        queries = []
+        attempts = 0
+        while pool and len(queries) < size and attempts < size * 20:
+            attempts += 1
+            query = make(rng.choice(pool))
+            if query is not None:
+                queries.append(query)
+        return queries
+
+    def truncate(name):
+        query = name[:-1]
+        return None if query.lower() in keys else query
+
+    def typo(name):
+        if len(name) < 5:
+            return None
+        position = rng.randrange(1, len(name) - 1)
+        query = name[:position] + rng.choice(DRUG_SYLLABLES) + name[position + 1:]
+        return None if query.lower() in keys else query
+
+    queries = {
+        "exact": sample(lower_names, count, lambda name: name),
+        "case_insensitive": sample(latin_aliases, count, lambda name: name),
+        "partial": sample(diseases, count, truncate),
+        "fuzzy": sample(lower_names, fuzzy_count, typo),
+    }
+    batch = queries["exact"] + queries["case_insensitive"] + queries["partial"] + queries["fuzzy"]
+    rng.shuffle(batch)
+    queries["batch"] = batch[:count]
+    return queries
+
+
+def _latency_stats(latencies):
+    values = np.asarray(latencies) * 1e6
+    total = float(values.sum()) / 1e6
+    return {
+        "queries": len(latencies),
+        "seconds": round(total, 4),
+        "ops_per_second": round(len(latencies) / total, 1) if total > 0 else None,
+        "mean_us": round(float(values.mean()), 2),
+        "p50_us": round(float(np.percentile(values, 50)), 2),
+        "p95_us": round(float(np.percentile(values, 95)), 2),
+        "p99_us": round(float(np.percentile(values, 99)), 2),
+        "max_us": round(float(values.max()), 2),
+    }
+
+
+def bench_link(linker, queries, threshold, warmup=20):
+    """逐条 link() 的延迟分布与各匹配类型的命中数"""
+    for query in queries[:warmup]:
+        linker.link(query, threshold)
+    latencies = []
+    match_types = Counter()
+    for query in queries:
+        start = time.perf_counter()
+        result = linker.link(query, threshold)
+        latencies.append(time.perf_counter() - start)
+        match_types[result["match_type"] if result is not None else "none"] += 1
+    stats = _latency_stats(latencies)
+    stats["match_types"] = dict(match_types.most_common())
+    return stats
+
+
+def bench_batch(linker, queries, threshold, chunk_size, workers):
+    """按块调用 link_batch()；延迟按块计，吞吐量按文本数计"""
+    linker.link_batch(queries[:chunk_size], threshold, workers)
+    latencies = []
+    match_types = Counter()
+    for offset in range(0, len(queries), chunk_size):
+        chunk = queries[offset:offset + chunk_size]
+        start = time.perf_counter()
+        results = linker.link_batch(chunk, threshold, workers)
+        latencies.append(time.perf_counter() - start)
+        match_types.update(result["match_type"] if result is not None else "none" for result in results)
+    total = sum(latencies)
+    return {
+        "queries": len(queries),
+        "chunk_size": chunk_size,
+        "seconds": round(total, 4),
+        "ops_per_second": round(len(queries) / total, 1) if total > 0 else None,
+        "chunk_mean_ms": round(total / len(latencies) * 1000, 3),
+        "chunk_max_ms": round(max(latencies) * 1000, 3),
+        "match_types": dict(match_types.most_common()),
+    }
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark(partitions, label, threshold=85, queries=2000, fuzzy_queries=200,
+                  batch_chunk_size=500, workers=-1, linker_args=None, seed=0, workloads=WORKLOADS):
+    """在一份本体上构建链接器并运行各项基准，返回该规模的结果"""
+    gc.collect()
+    start = time.perf_counter()
+    linker = EntityLinker(**(linker_args or {}))
+    linker.load_partitions(partitions)
+    build_seconds = time.perf_counter() - start
+
+    query_sets = build_queries(partitions, queries, fuzzy_queries, seed)
+    results = {}
+    for workload in workloads:
+        if not query_sets[workload]:
+            continue
+        if workload == "batch":
+            results[workload] = bench_batch(linker, query_sets[workload], threshold,
+                                            batch_chunk_size, workers)
+        else:
+            results[workload] = bench_link(linker, query_sets[workload], threshold)
+
+    statistics = linker.get_statistics()
+    return {
+        "size": label,
+        "entities": sum(len(entities) for entities in partitions.values()),
+        "index_keys": statistics.get("total_keys"),
+        "build_seconds": round(build_seconds, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "workloads": results,
+    }
+
+
+def environment():
+    """运行环境信息（写入结果，便于对比不同提交与机器）"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "rapidfuzz": rapidfuzz.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def print_results(report):
+    """打印结果摘要"""
+    print("=" * 78)
+    print("  实体链接器基准测试")
+    print("=" * 78)
+    for run in report["runs"]:
+        print(f"\n[{run['size']}] 实体: {run['entities']:,}  索引键: {run['index_keys']:,}  "
+              f"构建: {run['build_seconds']}s  峰值RSS: {run['peak_rss_mb']} MB")
+        print(f"{'路径':<18}{'查询数':>8}{'次/秒':>12}{'P50(us)':>10}{'P95(us)':>10}{'P99(us)':>10}  命中类型")
+        for workload, stats in run["workloads"].items():
+            types = ", ".join(f"{name}={count}" for name, count in stats["match_types"].items())
+            if workload == "batch":
+                print(f"{workload:<18}{stats['queries']:>8}{stats['ops_per_second']:>12,.0f}"
+                      f"{'':>30}  {types}")
+            else:
+                print(f"{workload:<18}{stats['queries']:>8}{stats['ops_per_second']:>12,.0f}"
+                      f"{stats['p50_us']:>10}{stats['p95_us']:>10}{stats['p99_us']:>10}  {types}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='实体链接器基准测试（合成本体，输出 JSON）')
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'],
+                        help='合成本体规模：10k / 100k / 1m 或整数 (默认: 10k 100k)')
+    parser.add_argument('--data-dir', default=None,
+                        help='改用该目录下的真实本体（忽略 --sizes）')
+    parser.add_argument('--seed', type=int, default=0, help='合成本体与查询的随机种子 (默认: 0)')
+    parser.add_argument('--queries', type=int, default=2000,
+                        help='精确/大小写/部分/批量各路径的查询数 (默认: 2000)')
+    parser.add_argument('--fuzzy-queries', type=int, default=200,
+                        help='模糊匹配查询数 (默认: 200)')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS),
+                        help='要运行的路径 (默认: 全部)')
+    parser.add_argument('--threshold', type=int, default=85, help='模糊匹配阈值 (默认: 85)')
+    parser.add_argument('--batch-chunk-size', type=int, default=500,
+                        help='link_batch 每块文本数 (默认: 500)')
+    parser.add_argument('--workers', type=int, default=-1, help='link_batch 线程数 (默认: 全部CPU核心)')
+    parser.add_argument('--linker-args', default=None,
+                        help='EntityLinker 构造参数（JSON），如 \'{"ngram_filter_fpr": 0.01}\'')
+    parser.add_argument('--output', default='linker_benchmark.json',
+                        help='结果 JSON 路径 (默认: linker_benchmark.json，"-" 输出到标准输出)')
+    args = parser.parse_args()
+
+    try:
+        linker_args = json.loads(args.linker_args) if args.linker_args else {}
+        sizes = [] if args.data_dir else [parse_size(size) for size in args.sizes]
+    except ValueError as exc:
+        print(f"❌ 参数错误: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    options = {
+        "threshold": args.threshold,
+        "queries": args.queries,
+        "fuzzy_queries": args.fuzzy_queries,
+        "batch_chunk_size": args.batch_chunk_size,
+        "workers": args.workers,
+        "linker_args": linker_args,
+        "seed": args.seed,
+    }
+    runs = []
+    if args.data_dir:
+        loader = OntologyLoader(args.data_dir)
+        partitions = {"drug": loader.drugs, "disease": loader.diseases, "gene": loader.genes}
+        runs.append(run_benchmark(partitions, str(args.data_dir), workloads=args.workloads, **options))
+    for size, label in zip(sizes, args.sizes):
+        start = time.perf_counter()
+        partitions = generate_ontology(size, args.seed)
+        print(f"生成 {label} 合成本体: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        runs.append(run_benchmark(partitions, label, workloads=args.workloads, **options))
+        del partitions
+        gc.collect()
+
+    report = {"environment": environment(), "options": options, "runs": runs}
+    if args.output == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print_results(report)
+    print(f"\n结果已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+合成本体生成器
+按固定随机种子生成中文药物、疾病本体（格式同 ontology/data/*.json），用于离线测试链接器的扩展性
+
+同一种子下结果完全确定，且小规模是大规模的前缀（10k 的实体都出现在 100k 中），
+不同规模的基准结果可以直接对比。药物约占 35%（与真实本体比例相近），其余为疾病。
+
+用法:
+  python benchmarks/synthetic_ontology.py /tmp/synthetic_100k --size 100k
+  python benchmarks/synthetic_ontology.py /tmp/synthetic_1m --size 1m --seed 7
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DRUG_FRACTION = 0.35
+
+# 药名音节常用字（音译通用名的组成方式）
+DRUG_SYLLABLES = list("阿奥巴贝比苯丙泊布达地多厄伐非夫格果哈海环吉加卡坎克拉来兰雷利林磷"
+                      "硫仑罗洛氯马美米莫那奈尼诺帕哌培匹普齐羟曲瑞塞沙舒司索他泰坦特替酮托"
+                      "妥维文西昔辛溴亚伊依因英唑佐")
+# 药物类别词干（单抗、替尼等）
+DRUG_STEMS = ["单抗", "替尼", "沙星", "洛尔", "普利", "沙坦", "他汀", "西林", "霉素", "头孢", "地平",
+              "拉唑", "格列", "韦", "肽", "酯", "胺", "酮", "醇"]
+# 剂型后缀（均在 ontology/dosage_forms.py 词表中）；"注射用" 为前缀
+DOSAGE_FORMS = ["片", "胶囊", "注射液", "颗粒", "缓释片", "肠溶片", "分散片", "溶液", "软膏",
+                "滴眼液", "注射用", "混悬液", "控释片", "糖浆"]
+SALTS = ["盐酸", "硫酸", "马来酸", "甲磺酸", "枸橼酸", "磷酸", "酒石酸", "琥珀酸"]
+# 品牌名后缀与研发代号前缀（英文别名用于大小写不敏感路径）
+BRAND_SUFFIXES = ["达", "宁", "欣", "康", "乐", "泰", "平", "舒", "通", "清"]
+CODE_PREFIXES = ["ABX", "BGB", "HLX", "IBI", "JS", "SHR", "TQB", "CS", "HR", "ZG"]
+
+# 疾病名组成部分（病因 + 限定词 + 部位 + 病变 + 伴随情况）
+DISEASE_CAUSES = ["2型糖尿病性", "1型糖尿病性", "高血压性", "酒精性", "药物性", "妊娠期", "新生儿",
+                  "老年性", "病毒性", "细菌性", "真菌性", "自身免疫性", "外伤性", "放射性"]
+DISEASE_QUALIFIERS = ["急性", "慢性", "复发性", "继发性", "原发性", "先天性", "反流性", "化脓性",
+                      "出血性", "阻塞性", "糜烂性", "弥漫性", "局限性", "重度", "轻度", "双侧", "左侧",
+                      "右侧", "多发性", "间质性"]
+DISEASE_SITES = ["胃", "十二指肠", "结肠", "直肠", "肝", "胆囊", "胰腺", "肺", "支气管", "气管", "心脏",
+                 "冠状动脉", "主动脉", "肾", "膀胱", "输尿管", "前列腺", "甲状腺", "乳腺", "子宫", "卵巢",
+                 "宫颈", "食管", "脑", "脊髓", "周围神经", "视网膜", "角膜", "皮肤", "股骨", "膝关节",
+                 "髋关节", "腰椎", "颈椎", "淋巴结", "脾", "下肢静脉", "颈动脉", "鼻窦", "中耳", "肾上腺",
+                 "垂体", "腮腺", "舌", "喉", "胸膜", "腹膜", "心包", "骨髓", "肌肉"]
+DISEASE_LESIONS = ["炎", "恶性肿瘤", "良性肿瘤", "溃疡", "出血", "梗死", "结石", "囊肿", "息肉",
+                   "功能不全", "衰竭", "狭窄", "扩张", "纤维化", "硬化", "感染", "损伤", "骨折", "结核",
+                   "动脉瘤", "病变", "增生", "萎缩", "穿孔", "血栓形成", "脓肿", "畸形", "积液"]
+DISEASE_CLAUSES = ["伴出血", "伴穿孔", "伴梗阻", "伴感染", "伴有并发症", "不伴有并发症", "未特指",
+                   "伴急性加重", "伴功能障碍", "伴坏死"]
+# 以人名命名的综合征 / 病（音节取自药名常用字）
+EPONYM_SUFFIXES = ["综合征", "病", "氏病", "氏综合征"]
+DISEASE_ABBREVIATIONS = 0.05  # 带英文缩写别名的疾病比例
+
+
+def parse_size(size):
+    """规模参数："10k" / "100k" / "1m" 或整数"""
+    if isinstance(size, int):
+        return size
+    text = str(size).strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    try:
+        return int(text.replace("_", "").replace(",", ""))
+    except ValueError:
+        raise ValueError(f"无法识别的规模: {size}（可用 {' / '.join(SIZES)} 或整数）") from None
+
+
+def _syllables(rng, low, high):
+    return "".join(rng.choice(DRUG_SYLLABLES) for _ in range(rng.randint(low, high)))
+
+
+def _latin(rng, length):
+    return "".join(rng.choice("ABCDEFGHIJKLMNOPRSTUVWXYZ") for _ in range(length))
+
+
+def generate_drugs(count, seed=0):
+    """
+    生成 count 个药物实体 {名称: 实体信息}
+
+    名称为 [盐] + 通用名 + [剂型]，通用名为 2-4 个音节 + 类别词干；
+    部分实体带中文商品名和研发代号别名（代号为大写英文字母 + 数字）。
+    """
+    rng = random.Random(f"drugs-{seed}")
+    drugs = {}
+    used = set()
+    while len(drugs) < count:
+        generic = _syllables(rng, 2, 4) + rng.choice(DRUG_STEMS)
+        salt = rng.choice(SALTS) if rng.random() < 0.15 else ""
+        form = rng.choice(DOSAGE_FORMS) if rng.random() < 0.7 else ""
+        name = f"{form}{salt}{generic}" if form == "注射用" else f"{salt}{generic}{form}"
+        aliases = []
+        if rng.random() < 0.4:
+            aliases.append(_syllables(rng, 1, 2) + rng.choice(BRAND_SUFFIXES))
+        if rng.random() < 0.1:
+            aliases.append(f"{rng.choice(CODE_PREFIXES)}-{rng.randint(100, 9999)}")
+        aliases = [alias for alias in aliases if alias not in used and alias != name]
+        if name in used:
+            continue
+        used.add(name)
+        used.update(aliases)
+        drugs[name] = {
+            "standard_name": name,
+            "generic_name": salt + generic,
+            "type": "Drug",
+            "aliases": aliases,
+        }
+    return drugs
+
+
+def generate_diseases(count, seed=0):
+    """
+    生成 count 个疾病实体 {名称: 实体信息}
+
+    多数为 ICD 风格的组合名（[病因][限定词]部位病变[伴随情况]），其余为人名命名的综合征；
+    少量带英文缩写别名。
+    """
+    rng = random.Random(f"diseases-{seed}")
+    diseases = {}
+    used = set()
+    while len(diseases) < count:
+        if rng.random() < 0.2:
+            name = _syllables(rng, 2, 4) + rng.choice(EPONYM_SUFFIXES)
+        else:
+            name = "".join((
+                rng.choice(DISEASE_CAUSES) if rng.random() < 0.3 else "",
+                rng.choice(DISEASE_QUALIFIERS) if rng.random() < 0.6 else "",
+                rng.choice(DISEASE_SITES),
+                rng.choice(DISEASE_LESIONS),
+                rng.choice(DISEASE_CLAUSES) if rng.random() < 0.3 else "",
+            ))
+        if name in used:
+            continue
+        aliases = []
+        if rng.random() < DISEASE_ABBREVIATIONS:
+            abbreviation = _latin(rng, rng.randint(3, 5))
+            if abbreviation not in used:
+                aliases.append(abbreviation)
+        used.add(name)
+        used.update(aliases)
+        diseases[name] = {"standard_name": name, "type": "Disease", "aliases": aliases}
+    return diseases
+
+
+def generate_ontology(size, seed=0):
+    """生成 size 个实体的合成本体，返回 {"drug": 药物, "disease": 疾病}（可直接传给 load_partitions）"""
+    total = parse_size(size)
+    drug_count = int(total * DRUG_FRACTION)
+    return {
+        "drug": generate_drugs(drug_count, seed),
+        "disease": generate_diseases(total - drug_count, seed),
+    }
+
+
+def generate_gold(partitions, count, seed=0, nil_fraction=0.1):
+    """
+    由合成本体生成金标准 [{"mention", "standard_name", "variant"}, ...]（standard_name 为 None 表示不应链接）
+
+    提及按比例取原名、大写/小写变体、漏字、错字、截断、追加伴随情况和无关文本（NIL），
+    variant 记录构造方式，便于按变体类别分析错误。
+    """
+    rng = random.Random(f"gold-{seed}")
+    entities = [(name, info) for partition in partitions.values() for name, info in partition.items()]
+    keys = {key.lower() for name, info in entities for key in [name] + list(info.get("aliases", []))}
+
+    def variant(name, info):
+        roll = rng.random()
+        aliases = info.get("aliases", [])
+        if roll < 0.15:
+            return "exact", rng.choice([name] + aliases)
+        if roll < 0.25:
+            latin = [alias for alias in aliases if alias != alias.lower()]
+            return ("case", rng.choice(latin).lower()) if latin else ("exact", name)
+        if len(name) < 4:
+            return "exact", name
+        position = rng.randrange(1, len(name) - 1)
+        if roll < 0.45:
+            return "deletion", name[:position] + name[position + 1:]
+        if roll < 0.65:
+            return "substitution", name[:position] + rng.choice(DRUG_SYLLABLES) + name[position + 1:]
+        if roll < 0.8:
+            return "truncation", name[:-1]
+        if roll < 0.9:
+            return "insertion", name[:position] + rng.choice("的之性") + name[position:]
+        return "clause", f"{name}，{rng.choice(DISEASE_CLAUSES)}"
+
+    gold = []
+    while len(gold) < count:
+        if rng.random() < nil_fraction:
+            mention = _syllables(rng, 3, 6)
+            if mention.lower() not in keys:
+                gold.append({"mention": mention, "standard_name": None, "variant": "nil"})
+            continue
+        name, info = rng.choice(entities)
+        kind, mention = variant(name, info)
+        # 变体恰好是其他实体的名称时，正确答案不再唯一
+        if kind != "exact" and mention.lower() in keys:
+            continue
+        gold.append({"mention": mention, "standard_name": info.get("standard_name", name), "variant": kind})
+    return gold
+
+
+def write_ontology(output_dir, size, seed=0):
+    """把合成本体写为 drugs.json / diseases.json（可用 OntologyLoader / load_ontology 读取）"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    partitions = generate_ontology(size, seed)
+    for file_name, entities in (("drugs.json", partitions["drug"]), ("diseases.json", partitions["disease"])):
+        with open(output_dir / file_name, "w", encoding="utf-8") as f:
+            json.dump(entities, f, ensure_ascii=False)
+    return {name: len(entities) for name, entities in partitions.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成中文医学本体（药物 + 疾病）')
+    parser.add_argument('output_dir', help='输出目录（写入 drugs.json、diseases.json）')
+    parser.add_argument('--size', default='100k', help='实体总数：10k / 100k / 1m 或整数 (默认: 100k)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子 (默认: 0)')
+    args = parser.parse_args()
+
+    try:
+        counts = write_ontology(args.output_dir, args.size, args.seed)
+    except ValueError as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ 已生成 {counts['drug']:,} 个药物、{counts['disease']:,} 个疾病 -> {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -122,7 +122,7 @@ def demo_statistics(linker):
     print(f"索引键总数: {stats['total_keys']:,}")
 
 
-def demo_real_world_example(drug_linker, disease_linker):
+def demo_real_world_example(linker):
     """实际应用场景演示"""
     print_section("7. 实际应用：医疗文本标准化")
     
@@ -141,7 +141,7 @@ def demo_real_world_example(drug_linker, disease_linker):
     # 标准化药物
     standardized_drugs = []
     for drug in extracted_entities['drugs']:
-        result = drug_linker.link(drug)
+        result = linker.link(drug, entity_type="drug")
         if result:
             standardized_drugs.append(result['standard_name'])
     print(f"  药物: {', '.join(standardized_drugs)}")
@@ -149,7 +149,7 @@ def demo_real_world_example(drug_linker, disease_linker):
     # 标准化疾病
     standardized_diseases = []
     for disease in extracted_entities['diseases']:
-        result = disease_linker.link(disease)
+        result = linker.link(disease, entity_type="disease")
         if result:
             standardized_diseases.append(result['standard_name'])
         else:
@@ -196,9 +196,14 @@ def main():
     # 1. 加载数据
     loader = demo_basic_usage()
     
-    # 创建链接器
+    # 创建链接器（所有类型共用一套索引，按类型分区）
+    linker = EntityLinker()
+    linker.load_partitions({
+        "drug": loader.drugs,
+        "disease": loader.diseases,
+        "gene": loader.genes,
+    })
     drug_linker = EntityLinker(loader.drugs)
-    disease_linker = EntityLinker(loader.diseases)
     
     # 2-6. 各种匹配演示
     demo_exact_match(drug_linker)
@@ -208,7 +213,7 @@ def main():
     demo_statistics(drug_linker)
     
     # 7-8. 实际应用场景
-    demo_real_world_example(drug_linker, disease_linker)
+    demo_real_world_example(linker)
     demo_quality_check(drug_linker)
     
     print("\n" + "=" * 60)
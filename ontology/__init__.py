@@ -1,11 +1,17 @@
 """
 医学本体模块 - 轻量级实现
 """
+from .async_batcher import AsyncLinkerBatcher
 from .entity_linker import EntityLinker
+from .link_result import LinkResult
 from .ontology_loader import OntologyLoader
+from .parallel_linker import ParallelLinker
 
 __all__ = [
+    "AsyncLinkerBatcher",
     "EntityLinker",
+    "LinkResult",
     "OntologyLoader",
+    "ParallelLinker",
 ]
 
@@ -0,0 +1,138 @@
+"""
+Aho-Corasick 多模式匹配自动机
+
+直接复用 CompactTrie 已编译的排序边数组作为 goto 函数，只额外构建三个数组：
+  - fail[node]：失配时跳转的节点（最长真后缀对应的节点）
+  - output[node]：沿失配链最近的词尾节点（0 表示没有）
+  - depth[node]：节点深度，即匹配长度
+一次扫描即可找出文本中所有词典词条的出现位置。
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Tuple
+
+from .compact_trie import CompactTrie
+
+
+class AhoCorasick:
+    """基于 CompactTrie 的 Aho-Corasick 自动机"""
+
+    def __init__(self, trie: CompactTrie):
+        """
+        Args:
+            trie: 已 freeze() 的紧凑前缀树（待编译区的词条不会被匹配）
+        """
+        self.edge_start = trie.edge_start
+        self.edge_labels = trie.edge_labels
+        self.payloads = trie.payloads
+        self.alphabet = frozenset(chr(code) for code in self.edge_labels)
+        self._build()
+
+    def _goto(self, node: int, code: int) -> int:
+        """沿边转移，不存在返回 -1"""
+        lo = self.edge_start[node]
+        hi = self.edge_start[node + 1]
+        if lo == hi:
+            return -1
+        edge = bisect_left(self.edge_labels, code, lo, hi)
+        if edge == hi or self.edge_labels[edge] != code:
+            return -1
+        return edge + 1
+
+    def _build(self):
+        """按广度优先顺序计算失配链（节点编号本身就是广度优先顺序）"""
+        edge_start = self.edge_start
+        edge_labels = self.edge_labels
+        payloads = self.payloads
+        node_count = len(payloads)
+
+        fail = array("I", [0]) * node_count
+        output = array("I", [0]) * node_count
+        depth = array("I", [0]) * node_count
+
+        for node in range(node_count):
+            for edge in range(edge_start[node], edge_start[node + 1]):
+                child = edge + 1
+                code = edge_labels[edge]
+                depth[child] = depth[node] + 1
+
+                target = 0
+                if node != 0:
+                    state = fail[node]
+                    while True:
+                        next_state = self._goto(state, code)
+                        if next_state >= 0:
+                            target = next_state
+                            break
+                        if state == 0:
+                            break
+                        state = fail[state]
+                fail[child] = target
+                output[child] = target if target != 0 and payloads[target] >= 0 else output[target]
+
+        self.fail = fail
+        self.output = output
+        self.depth = depth
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        扫描文本，产出全部匹配 (起始位置, 结束位置, 实体ID)
+
+        text 应与词条使用相同的大小写归一化（EntityLinker 的词条均为小写）。
+        """
+        edge_start = self.edge_start
+        edge_labels = self.edge_labels
+        payloads = self.payloads
+        fail = self.fail
+        output = self.output
+        depth = self.depth
+        alphabet = self.alphabet
+
+        state = 0
+        for position, char in enumerate(text):
+            if char not in alphabet:
+                state = 0
+                continue
+
+            code = ord(char)
+            while True:
+                lo = edge_start[state]
+                hi = edge_start[state + 1]
+                if lo < hi:
+                    edge = bisect_left(edge_labels, code, lo, hi)
+                    if edge < hi and edge_labels[edge] == code:
+                        state = edge + 1
+                        break
+                if state == 0:
+                    break
+                state = fail[state]
+
+            node = state if payloads[state] >= 0 else output[state]
+            while node > 0:
+                end = position + 1
+                yield end - depth[node], end, payloads[node]
+                node = output[node]
+
+    def find_longest(self, text: str, min_length: int = 1) -> List[Tuple[int, int, int]]:
+        """
+        返回互不重叠的最长匹配（从左到右，同一起点取最长）
+
+        Returns:
+            [(起始位置, 结束位置, 实体ID), ...]，按起始位置升序
+        """
+        return select_longest(self.iter_matches(text), min_length)
+
+
+def select_longest(matches: Iterable[Tuple[int, int, int]],
+                   min_length: int = 1) -> List[Tuple[int, int, int]]:
+    """从全部匹配中选出互不重叠的最长匹配（从左到右，同一起点取最长）"""
+    matches = [m for m in matches if m[1] - m[0] >= min_length]
+    matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+
+    selected = []
+    covered_until = 0
+    for start, end, entity_id in matches:
+        if start >= covered_until:
+            selected.append((start, end, entity_id))
+            covered_until = end
+    return selected
@@ -0,0 +1,139 @@
+"""
+异步微批处理链接器
+
+异步服务中逐条 await link(text) 时，每次调用都要单独做一次全量模糊匹配，且会阻塞事件循环。
+AsyncLinkerBatcher 把一个时间窗口内的并发调用收集起来（相同文本只链接一次），
+在工作线程中调用一次 link_batch()，再分别唤醒各个调用方。
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.logger import get_logger
+
+from .entity_linker import EntityLinker
+from .link_result import LinkResult
+
+logger = get_logger(__name__)
+
+
+class _PendingBatch:
+    """收集中的一批调用：文本 -> 等待该文本结果的 future 列表"""
+
+    __slots__ = ("futures", "timer")
+
+    def __init__(self):
+        self.futures: Dict[str, List[asyncio.Future]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AsyncLinkerBatcher:
+    """asyncio 微批处理前端（同一阈值、同一实体类型的调用合并为一批）"""
+
+    def __init__(self, linker: EntityLinker, window_ms: float = 5.0, max_batch_size: int = 256,
+                 workers: int = -1, executor: Optional[Executor] = None):
+        """
+        Args:
+            linker: 已构建索引的链接器
+            window_ms: 收集窗口（毫秒），从一批的第一个调用开始计时
+            max_batch_size: 一批的最大不同文本数，达到后立即提交
+            workers: link_batch() 中 cdist 使用的线程数（-1 表示全部CPU核心）
+            executor: 执行 link_batch() 的线程池（默认新建单线程池，关闭时一并关闭）
+        """
+        if window_ms < 0 or max_batch_size < 1:
+            raise ValueError(f"无效的批处理参数: window_ms={window_ms}, max_batch_size={max_batch_size}")
+        self.linker = linker
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.workers = workers
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="linker-batch")
+        self._pending: Dict[Tuple[int, Optional[str]], _PendingBatch] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._closed = False
+        self.requests = 0
+        self.batches = 0
+        self.unique_texts = 0
+
+    async def link(self, entity_text: str, threshold: int = 85,
+                   entity_type: Optional[str] = None) -> Optional[LinkResult]:
+        """链接一条文本（参数与 EntityLinker.link() 相同），结果与单独调用 link() 一致"""
+        if self._closed:
+            raise RuntimeError("批处理器已关闭")
+        loop = asyncio.get_running_loop()
+        key = (threshold, entity_type)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            batch.timer = loop.call_later(self.window_ms / 1000, self._flush, key)
+        future = loop.create_future()
+        batch.futures.setdefault(entity_text, []).append(future)
+        self.requests += 1
+        if len(batch.futures) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[int, Optional[str]]):
+        """提交一批：取出收集中的调用，在线程池中执行"""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._run(key, batch.futures))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Tuple[int, Optional[str]], futures: Dict[str, List[asyncio.Future]]):
+        """执行一批并唤醒各调用方（出错时所有调用方都收到同一异常）"""
+        threshold, entity_type = key
+        texts = list(futures)
+        self.batches += 1
+        self.unique_texts += len(texts)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self.linker.link_batch, texts, threshold, self.workers, entity_type
+            )
+        except Exception as exc:
+            logger.error(f"批量链接失败（{len(texts)} 条）: {exc}")
+            for waiters in futures.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        for text, result in zip(texts, results):
+            for future in futures[text]:
+                if not future.done():  # 调用方可能已取消
+                    future.set_result(result)
+
+    async def flush(self):
+        """立即提交所有收集中的调用，并等待所有批次完成"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def aclose(self):
+        """提交剩余调用、等待完成后关闭（自建的线程池一并关闭）"""
+        self._closed = True
+        await self.flush()
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def get_statistics(self) -> Dict:
+        """获取批处理统计：调用数、批次数、平均批大小、去重比例"""
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "unique_texts": self.unique_texts,
+            "mean_batch_size": round(self.unique_texts / self.batches, 1) if self.batches else 0.0,
+            "dedup_ratio": round(1 - self.unique_texts / self.requests, 4) if self.requests else 0.0,
+        }
@@ -0,0 +1,196 @@
+"""
+字符 n-gram 布隆过滤器（查询预过滤）
+
+记录本体候选键中出现过的单字和 bigram。查询的单字 / bigram 大多不在本体中时，
+拼写纠错和模糊匹配都不可能达到阈值，可以直接跳过，不必扫描候选键。
+
+布隆过滤器只有假阳性（把没出现过的 n-gram 当成出现过），据此得到的得分上界只会偏大，
+因此只会少拒绝、不会误拒绝。
+"""
+import math
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+_MASK64 = (1 << 64) - 1
+_CODE_SPACE = 0x110001  # Unicode 码位数 + 1，单字和 bigram 编码不重叠
+
+
+def _mix(key: int) -> int:
+    """64 位整数混洗（splitmix64 终结函数，跨进程稳定）"""
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return key ^ (key >> 31)
+
+
+def gram_keys(text: str) -> List[int]:
+    """文本的单字和 bigram 编码（按位置，含重复）：单字为 码位+1，bigram 为 两字组合"""
+    codes = [ord(char) + 1 for char in text]
+    return codes + [a * _CODE_SPACE + b for a, b in zip(codes, codes[1:])]
+
+
+class BloomFilter:
+    """
+    分块布隆过滤器：每个元素的 k 个比特落在同一个 64 位字内
+
+    查询只需一次混洗、一次取字和一次按位与，不必逐个比特探测；
+    同样位数下假阳性率略高于标准布隆过滤器，按目标假阳性率选择位数时已计入。
+    """
+
+    WORD_BITS = 64
+    NUM_PATTERNS = 4096  # 预生成的比特模式数（取混洗值的高 12 位选择模式）
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        """
+        Args:
+            capacity: 预计元素数
+            false_positive_rate: 元素数达到 capacity 时的目标假阳性率
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"假阳性率应在 (0, 1) 之间: {false_positive_rate}")
+        capacity = max(1, capacity)
+        # 字数取 2 的幂（取模可以用位与），从标准布隆过滤器的位数起逐步加倍直到满足目标
+        bits = -capacity * math.log(false_positive_rate) / (math.log(2) ** 2)
+        num_words = 1 << max(0, math.ceil(math.log2(bits / self.WORD_BITS)))
+        while True:
+            # 块内比特有限，最优哈希数比标准公式小，直接取假阳性率最低的
+            num_hashes = min(range(1, 17), key=lambda k: _blocked_fpr(capacity, num_words, k))
+            if _blocked_fpr(capacity, num_words, num_hashes) <= false_positive_rate:
+                break
+            num_words *= 2
+        self.num_hashes = num_hashes
+        self.words = array("Q", bytes(8 * num_words))
+        self.count = 0
+        self._init_patterns()
+
+    @classmethod
+    def from_words(cls, words: Sequence[int], num_hashes: int, count: int) -> "BloomFilter":
+        """由已有的字数组（如快照中的内存映射数据段）构造"""
+        bloom = cls.__new__(cls)
+        bloom.num_hashes = num_hashes
+        bloom.words = words
+        bloom.count = count
+        bloom._init_patterns()
+        return bloom
+
+    def _init_patterns(self):
+        """预生成 NUM_PATTERNS 个恰有 num_hashes 个比特为 1 的 64 位模式（确定性）"""
+        patterns = []
+        for index in range(self.NUM_PATTERNS):
+            pattern = 0
+            state = index
+            while bin(pattern).count("1") < self.num_hashes:
+                state = _mix(state + 0x9E3779B97F4A7C15)
+                pattern |= 1 << (state & 63)
+            patterns.append(pattern)
+        self._patterns = patterns
+        self._word_mask = len(self.words) - 1
+
+    @property
+    def num_bits(self) -> int:
+        return len(self.words) * self.WORD_BITS
+
+    def add(self, key: int):
+        """添加元素"""
+        h = _mix(key)
+        self.words[h & self._word_mask] |= self._patterns[h >> 52]
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        h = _mix(key)
+        pattern = self._patterns[h >> 52]
+        return self.words[h & self._word_mask] & pattern == pattern
+
+    def count_present(self, keys: Iterable[int]) -> int:
+        """统计 keys 中判定为存在的个数（逐个调用 in 的内联版本，查询热路径使用）"""
+        words, patterns, word_mask = self.words, self._patterns, self._word_mask
+        present = 0
+        for key in keys:
+            key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+            key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & _MASK64
+            h = key ^ (key >> 31)
+            pattern = patterns[h >> 52]
+            if words[h & word_mask] & pattern == pattern:
+                present += 1
+        return present
+
+    def estimated_false_positive_rate(self) -> float:
+        """按已添加的元素数估计当前假阳性率"""
+        return _blocked_fpr(self.count, len(self.words), self.num_hashes)
+
+
+def _blocked_fpr(count: int, num_words: int, num_hashes: int) -> float:
+    """分块布隆过滤器的假阳性率：对每个字内的元素数（泊松分布）求平均"""
+    load = count / num_words
+    total = 0.0
+    probability = math.exp(-load)  # 字内恰有 i 个元素的概率
+    for i in range(int(load * 4 + 20)):
+        filled = 1 - (1 - 1 / BloomFilter.WORD_BITS) ** (i * num_hashes)
+        total += probability * filled ** num_hashes
+        probability *= load / (i + 1)
+    return total
+
+
+class NgramFilter:
+    """
+    查询预过滤：判断查询是否可能通过拼写纠错 / 模糊匹配
+
+    两者都要求 fuzz.ratio = 2·LCS / (len(q) + len(k)) >= t：
+    - LCS 不超过查询中出现在本体里的单字数 c，因此 ratio <= 2c / (len(q) + c)；
+    - t > 2/3 时，查询中原样保留在候选键里的 bigram 至少 (3t - 2) / (2 - t) · len(q) - 1 个
+      （每删除查询中的一个字最多破坏 2 个 bigram，每插入一个字最多破坏 1 个）。
+
+    部分匹配本身已是 bigram 倒排索引上的少量集合求交，不经过预过滤。
+    """
+
+    def __init__(self, bloom: BloomFilter):
+        self.bloom = bloom
+        self.fuzzy_rejected = 0  # 跳过拼写纠错和模糊匹配的查询数
+
+    @classmethod
+    def build(cls, texts: Iterable[str], false_positive_rate: float = 0.01) -> "NgramFilter":
+        """由本体词条构建（先统计不同 n-gram 的数量以确定位数组大小）"""
+        keys = set()
+        for text in texts:
+            keys.update(gram_keys(text))
+        bloom = BloomFilter(len(keys), false_positive_rate)
+        for key in keys:
+            bloom.add(key)
+        return cls(bloom)
+
+    def add(self, text: str):
+        """增量添加词条"""
+        for key in gram_keys(text):
+            self.bloom.add(key)
+
+    def may_fuzzy(self, text: str, threshold: float) -> bool:
+        """查询与某个候选键的 fuzz.ratio 是否可能达到阈值（原文和小写形式各判断一次）"""
+        for query in {text, text.lower()}:
+            if self._ratio_possible(query, threshold / 100.0):
+                return True
+        self.fuzzy_rejected += 1
+        return False
+
+    def _ratio_possible(self, query: str, t: float) -> bool:
+        """按单字和 bigram 上界判断 ratio 能否达到 t（t 为 0-1）"""
+        length = len(query)
+        if length == 0 or t <= 0:
+            return True
+        keys = gram_keys(query)
+        chars = self.bloom.count_present(keys[:length])
+        if 2 * chars < t * (length + chars) - 1e-9:
+            return False
+        if t > 2 / 3:
+            bigrams = self.bloom.count_present(keys[length:])
+            if bigrams < (3 * t - 2) / (2 - t) * length - 1 - 1e-9:
+                return False
+        return True
+
+    def get_statistics(self) -> Dict:
+        """获取过滤器统计"""
+        return {
+            "bytes": self.bloom.num_bits // 8,
+            "hashes": self.bloom.num_hashes,
+            "ngrams": self.bloom.count,
+            "estimated_false_positive_rate": round(self.bloom.estimated_false_positive_rate(), 6),
+            "fuzzy_rejected": self.fuzzy_rejected,
+        }
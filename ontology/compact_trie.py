@@ -0,0 +1,193 @@
+"""
+紧凑前缀树（排序边数组实现）
+
+节点按广度优先顺序编号，第 k 条边（k >= 0）指向节点 k + 1，因此只需三个数组：
+  - edge_start[node] .. edge_start[node + 1]：该节点的出边区间（标签升序）
+  - edge_labels[edge]：边上字符的码位
+  - payloads[node]：该节点对应的实体ID（-1 表示不是词尾）
+每个节点约 12 字节，而 dict-per-node 的 TrieNode 每个节点需要数百字节。
+
+新插入或删除的词条先进入待编译区（查找时优先），freeze() 时整体重新编译。
+三个数组作为一个元组整体替换，编译期间并发的只读查找看到的总是一致的版本。
+"""
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class CompactTrie:
+    """紧凑前缀树，用于快速精确匹配（与 Trie 的 insert/search 语义一致）"""
+
+    def __init__(self):
+        self.entities: List[Dict] = []  # 实体ID -> 实体信息
+        self._entity_ids: Dict[int, int] = {}  # id(实体信息) -> 实体ID（同一实体只存一份）
+        self._pending: Dict[str, int] = {}  # 尚未编译进数组的词条（-1 表示已删除）
+        self._arrays: Tuple[Sequence[int], Sequence[int], Sequence[int]] = (
+            array("I", [0, 0]), array("I"), array("i", [-1])
+        )
+
+    @property
+    def edge_start(self) -> Sequence[int]:
+        return self._arrays[0]
+
+    @property
+    def edge_labels(self) -> Sequence[int]:
+        return self._arrays[1]
+
+    @property
+    def payloads(self) -> Sequence[int]:
+        return self._arrays[2]
+
+    @classmethod
+    def from_arrays(cls, edge_start: Sequence[int], edge_labels: Sequence[int],
+                    payloads: Sequence[int], entities: Sequence[Dict]) -> "CompactTrie":
+        """直接使用已编译的数组构造（如内存映射的快照），不做任何复制"""
+        trie = cls()
+        trie._arrays = (edge_start, edge_labels, payloads)
+        trie.entities = entities
+        return trie
+
+    def _entity_id(self, entity_info: Dict) -> int:
+        """获取（或分配）实体ID"""
+        key = id(entity_info)
+        entity_id = self._entity_ids.get(key)
+        if entity_id is None:
+            entity_id = len(self.entities)
+            self.entities.append(entity_info)
+            self._entity_ids[key] = entity_id
+        return entity_id
+
+    def insert(self, word: str, entity_info: Dict):
+        """插入词条（先进入待编译区，freeze() 后写入数组）"""
+        self._pending[word] = self._entity_id(entity_info)
+
+    def insert_id(self, word: str, entity_id: int):
+        """按实体ID插入词条（调用方自行维护 entities 表）"""
+        self._pending[word] = entity_id
+
+    def remove(self, word: str):
+        """删除词条（在待编译区记录删除标记，freeze() 后从数组中移除）"""
+        self._pending[word] = -1
+
+    def search(self, word: str) -> Optional[Dict]:
+        """精确查找"""
+        entity_id = self.search_id(word)
+        return self.entities[entity_id] if entity_id >= 0 else None
+
+    def search_id(self, word: str) -> int:
+        """精确查找，返回实体ID（未找到返回 -1）"""
+        # 先读待编译区再读数组：freeze() 先替换数组再清空待编译区
+        pending = self._pending
+        if pending:
+            entity_id = pending.get(word)
+            if entity_id is not None:
+                return entity_id
+
+        edge_start, edge_labels, payloads = self._arrays
+        node = self._walk(word, edge_start, edge_labels)
+        return payloads[node] if node >= 0 else -1
+
+    def _walk(self, word: str, edge_start: Optional[Sequence[int]] = None,
+              edge_labels: Optional[Sequence[int]] = None) -> int:
+        """沿边数组走到 word 对应的节点，不存在返回 -1"""
+        if edge_start is None:
+            edge_start, edge_labels, _ = self._arrays
+        node = 0
+        for char in word:
+            lo = edge_start[node]
+            hi = edge_start[node + 1]
+            if lo == hi:
+                return -1
+            code = ord(char)
+            edge = bisect_left(edge_labels, code, lo, hi)
+            if edge == hi or edge_labels[edge] != code:
+                return -1
+            node = edge + 1
+        return node
+
+    def freeze(self):
+        """把待编译区的词条与已有数组合并，重新编译为紧凑数组"""
+        if not self._pending:
+            return
+
+        words = dict(self._iter_compiled())
+        words.update(self._pending)
+        self._compile(sorted(item for item in words.items() if item[1] >= 0))
+        self._pending = {}
+
+    def _compile(self, items: Sequence[Tuple[str, int]]):
+        """按广度优先顺序从有序词条编译数组"""
+        edge_start = array("I")
+        edge_labels = array("I")
+        payloads = array("i")
+
+        # 队列中的每个节点对应有序词条中的一个区间 [lo, hi)
+        queue = [(0, len(items), 0)]
+        head = 0
+        while head < len(queue):
+            lo, hi, depth = queue[head]
+            head += 1
+            edge_start.append(len(edge_labels))
+
+            # 有序词条中，恰好在此结束的词条排在区间最前
+            if lo < hi and len(items[lo][0]) == depth:
+                payloads.append(items[lo][1])
+                lo += 1
+            else:
+                payloads.append(-1)
+
+            # 按第 depth 个字符分组，每组对应一条出边
+            while lo < hi:
+                char = items[lo][0][depth]
+                end = lo + 1
+                while end < hi and items[end][0][depth] == char:
+                    end += 1
+                edge_labels.append(ord(char))
+                queue.append((lo, end, depth + 1))
+                lo = end
+
+        edge_start.append(len(edge_labels))
+        self._arrays = (edge_start, edge_labels, payloads)
+
+    def _iter_compiled(self) -> Iterator[Tuple[str, int]]:
+        """深度优先遍历已编译的数组，产出 (词条, 实体ID)"""
+        edge_start, edge_labels, payloads = self._arrays
+        stack = [(0, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if payloads[node] >= 0:
+                yield prefix, payloads[node]
+            for edge in range(edge_start[node + 1] - 1, edge_start[node] - 1, -1):
+                stack.append((edge + 1, prefix + chr(edge_labels[edge])))
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """遍历全部 (词条, 实体信息)"""
+        words = dict(self._iter_compiled())
+        words.update(self._pending)
+        for word, entity_id in words.items():
+            if entity_id >= 0:
+                yield word, self.entities[entity_id]
+
+    def __len__(self) -> int:
+        payloads = self.payloads
+        count = sum(1 for payload in payloads if payload >= 0)
+        for word, entity_id in self._pending.items():
+            node = self._walk(word)
+            compiled = node >= 0 and payloads[node] >= 0
+            if entity_id >= 0 and not compiled:
+                count += 1
+            elif entity_id < 0 and compiled:
+                count -= 1
+        return count
+
+    def __contains__(self, word: Any) -> bool:
+        return isinstance(word, str) and self.search_id(word) >= 0
+
+    @property
+    def node_count(self) -> int:
+        """已编译的节点数"""
+        return len(self.payloads)
+
+    def array_nbytes(self) -> int:
+        """已编译数组占用的字节数（不含实体信息本身）"""
+        return sum(len(buffer) * buffer.itemsize for buffer in self._arrays)
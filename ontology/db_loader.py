@@ -9,6 +9,10 @@ import json
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import numpy as np
+
+from .ngram_vectors import NgramVectorIndex
+
 
 class MedicalKnowledgeGraphDB:
     """医学知识图谱数据库接口"""
@@ -24,6 +28,9 @@ class MedicalKnowledgeGraphDB:
         
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.conn.row_factory = sqlite3.Row  # 返回字典式结果
+        self._vector_index: Optional[NgramVectorIndex] = None  # 名称 + 别名的向量索引，首次向量检索时构建
+        self._vector_entity_ids = np.zeros(0, dtype=np.int64)  # 向量索引行号 -> 实体ID
+        self._vector_types = np.zeros(0, dtype=str)  # 向量索引行号 -> 实体类型
     
     def _row_to_dict(self, row) -> Dict:
         """将SQLite Row转换为字典"""
@@ -171,7 +178,7 @@ class MedicalKnowledgeGraphDB:
         return None
     
     def fuzzy_search(self, name: str, entity_type: Optional[str] = None, 
-                    limit: int = 10) -> List[Dict]:
+                    limit: int = 10, method: str = 'like') -> List[Dict]:
         """
         模糊搜索实体
         
@@ -179,10 +186,17 @@ class MedicalKnowledgeGraphDB:
             name: 搜索关键词
             entity_type: 实体类型，可选
             limit: 返回结果数量限制
+            method: 'like' 为名称/别名子串匹配；'vector' 为 n-gram TF-IDF 向量近邻检索
+                （适合带限定语的长名称，结果按相似度降序并带 similarity 字段，首次调用时构建索引）
         
         Returns:
             实体列表
         """
+        if method == 'vector':
+            return self._vector_search(name, entity_type, limit)
+        if method != 'like':
+            raise ValueError(f"未知的模糊搜索方式: {method}")
+        
         cursor = self.conn.cursor()
         
         query = '''
@@ -201,6 +215,40 @@ class MedicalKnowledgeGraphDB:
         results = cursor.execute(query, params).fetchall()
         return [self._row_to_dict(row) for row in results]
     
+    def _build_vector_index(self) -> NgramVectorIndex:
+        """用全部实体名称和别名构建向量索引"""
+        rows = self.conn.execute('''
+            SELECT id, name, type FROM entities
+            UNION ALL
+            SELECT a.entity_id, a.alias, e.type FROM aliases a JOIN entities e ON e.id = a.entity_id
+        ''').fetchall()
+        self._vector_entity_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._vector_types = np.array([row[2] for row in rows], dtype=str)
+        self._vector_index = NgramVectorIndex().build([str(row[1]).lower() for row in rows])
+        return self._vector_index
+    
+    def _vector_search(self, name: str, entity_type: Optional[str], limit: int) -> List[Dict]:
+        """向量近邻检索：按相似度降序返回实体（同一实体只出现一次）"""
+        index = self._vector_index or self._build_vector_index()
+        key_filter = None
+        if entity_type:
+            key_filter = lambda rows: self._vector_types[rows] == entity_type
+        rows, similarities = index.search(name.lower(), max(4 * limit, 32), key_filter)
+        
+        results, seen = [], set()
+        for row, similarity in zip(rows.tolist(), similarities.tolist()):
+            entity_id = int(self._vector_entity_ids[row])
+            if entity_id in seen or similarity <= 0:
+                continue
+            seen.add(entity_id)
+            entity = self.get_entity_by_id(entity_id)
+            if entity:
+                entity['similarity'] = round(similarity, 4)
+                results.append(entity)
+            if len(results) == limit:
+                break
+        return results
+    
     def get_entity_by_id(self, entity_id: int) -> Optional[Dict]:
         """根据ID获取实体"""
         cursor = self.conn.cursor()
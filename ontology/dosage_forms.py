@@ -0,0 +1,98 @@
+"""
+药品剂型后缀识别
+
+剂型词表按字符逆序编译成一棵反向前缀树，从名称末尾向前走一遍即可找到最长的剂型后缀，
+耗时只与剂型长度有关，与剂型数量无关。
+例如: "阿司匹林注射液" → 通用名: "阿司匹林", 剂型: "注射液"
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+# 常见剂型列表
+DOSAGE_FORMS = [
+    '注射液', '注射剂', '针剂',
+    '片', '片剂',
+    '胶囊', '胶囊剂',
+    '颗粒', '颗粒剂',
+    '散', '散剂',
+    '丸', '丸剂',
+    '栓', '栓剂',
+    '软膏', '软膏剂',
+    '乳膏', '乳膏剂',
+    '凝胶', '凝胶剂',
+    '贴', '贴剂',
+    '喷雾', '喷雾剂',
+    '吸入', '吸入剂',
+    '滴眼', '滴眼液',
+    '滴耳', '滴耳液',
+    '滴鼻', '滴鼻液',
+    '肠溶片', '肠溶胶囊',
+    '缓释片', '缓释胶囊',
+    '控释片', '控释胶囊',
+    '分散片',
+    '咀嚼片',
+    '泡腾片',
+    '口含片',
+    '舌下片',
+    '薄膜衣片',
+    '糖衣片',
+    '溶液', '溶液剂',
+    '混悬液', '混悬剂',
+    '乳剂',
+    '糖浆', '糖浆剂',
+    '口服液',
+    '合剂',
+]
+
+_END = ""  # 节点上的词条结束标记（单字符的边不会与之冲突）
+
+
+class SuffixMatcher:
+    """反向前缀树：查找文本末尾最长的词条"""
+
+    def __init__(self, words: Iterable[str]):
+        self._root: Dict[str, Dict] = {}
+        for word in words:
+            node = self._root
+            for char in reversed(word):
+                node = node.setdefault(char, {})
+            node[_END] = word
+
+    def longest_suffix(self, text: str, min_prefix: int = 1) -> Optional[str]:
+        """
+        返回 text 末尾最长的词条（去掉后至少保留 min_prefix 个字符），没有则返回 None
+        """
+        node = self._root
+        best = None
+        for i in range(len(text) - 1, min_prefix - 1, -1):
+            node = node.get(text[i])
+            if node is None:
+                break
+            best = node.get(_END, best)
+        return best
+
+
+DOSAGE_FORM_SUFFIXES = SuffixMatcher(DOSAGE_FORMS)
+
+
+def extract_generic_name_and_dosage(drug_name: str) -> Tuple[str, Optional[str], bool]:
+    """
+    从药品名称中提取通用名和剂型
+
+    Args:
+        drug_name: 药品名称，如"阿司匹林注射液"
+
+    Returns:
+        (generic_name, dosage_form, is_generic)
+        - generic_name: 通用名，如"阿司匹林"
+        - dosage_form: 剂型，如"注射液"
+        - is_generic: 是否为通用名（无剂型后缀）
+    """
+    if not drug_name:
+        return drug_name, None, True
+
+    # 优先匹配长剂型（如"肠溶片"而不是"片"），且确保提取到通用名
+    form = DOSAGE_FORM_SUFFIXES.longest_suffix(drug_name)
+    if form is None:
+        # 如果没有匹配到剂型，可能是通用名
+        return drug_name, None, True
+    return drug_name[:-len(form)], form, False
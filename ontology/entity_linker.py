@@ -1,12 +1,61 @@
 """
 轻量级实体链接器
 """
-from typing import Dict, List, Optional, Tuple
+import heapq
+import json
+import os
+import threading
+import time
+from array import array
+from collections import ChainMap
+from itertools import chain, islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+import numpy as np
 from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
 from utils.logger import get_logger
+from .aho_corasick import AhoCorasick, select_longest
+from .bloom import BloomFilter, NgramFilter
+from .compact_trie import CompactTrie
+from .dosage_forms import DOSAGE_FORM_SUFFIXES
+from .link_cache import LinkCache
+from .link_metrics import CACHE_HIT, NO_MATCH, LinkMetrics
+from .link_result import RESULT_FIELDS, LinkResult
+from .ngram_vectors import NgramVectorIndex
+from .normalization import DEFAULT_STEPS, CanonicalIndex, TextNormalizer
+from .ontology_loader import OntologyLoader, normalize_entity_type
+from .pinyin import PinyinIndex
+from .symspell import DeletionIndex
+from . import index_snapshot
 
 logger = get_logger(__name__)
 
+# 部分匹配的最低相似度（搜索词长度 / 实体名称长度）
+PARTIAL_MIN_SIMILARITY = 0.3
+
+# 拼音键匹配（同音字）的置信度
+PINYIN_CONFIDENCE = 0.85
+
+# 向量检索阶段：只处理不短于该字数的查询，取余弦相似度最高的若干候选
+VECTOR_MIN_LENGTH = 6
+VECTOR_CANDIDATES = 32
+
+# 批量模糊匹配时单次 cdist 得分矩阵的最大单元数（float32，约32MB）
+BATCH_SCORE_CELLS = 8_000_000
+
+def char_bit(char: str) -> int:
+    """字符在 64 位字符集签名中对应的位（乘法哈希，跨进程稳定）"""
+    return 1 << (((ord(char) * 0x9E3779B1) >> 16) & 63)
+
+
+def char_signature(text: str) -> int:
+    """文本的 64 位字符集签名：出现过的字符对应的位为 1"""
+    signature = 0
+    for char in set(text):
+        signature |= char_bit(char)
+    return signature
+
 
 class TrieNode:
     """前缀树节点"""
@@ -17,7 +66,7 @@ class TrieNode:
 
 
 class Trie:
-    """前缀树，用于快速精确匹配"""
+    """前缀树，用于快速精确匹配（dict-per-node 实现，EntityLinker 已改用 CompactTrie）"""
     def __init__(self):
         self.root = TrieNode()
     
@@ -41,10 +90,116 @@ class Trie:
         return node.entity_info if node.is_end else None
 
 
+class NgramIndex:
+    """字符 n-gram 倒排索引，用于部分匹配的候选召回"""
+    def __init__(self, n: int = 2):
+        self.n = n
+        self.postings: Dict[str, List[int]] = {}  # gram -> 升序的文档ID列表
+    
+    def grams(self, text: str) -> Set[str]:
+        """切分文本的 n-gram（去重）"""
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+    
+    def add(self, doc_id: int, text: str):
+        """添加文档（doc_id 需按升序添加）"""
+        for gram in self.grams(text):
+            posting = self.postings.get(gram)
+            if posting is None:
+                self.postings[gram] = [doc_id]
+            elif posting[-1] != doc_id:
+                posting.append(doc_id)
+    
+    def candidates(self, text: str) -> Optional[Set[int]]:
+        """
+        返回包含 text 全部 n-gram 的文档ID集合
+        
+        text 短于 n 时无法使用索引，返回 None
+        """
+        grams = self.grams(text)
+        if not grams:
+            return None
+        
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        
+        # 从最短的倒排表开始求交集
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+
+class TopKCollector:
+    """按实体去重的有界小顶堆：保留置信度最高的 k 个实体（同分时先到者优先）"""
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, int]] = []  # (置信度, -序号, 实体ID)，含已被更新的过期条目
+        self._best: Dict[int, Tuple[float, int, str, str]] = {}  # 实体ID -> (置信度, 序号, 匹配类型, 匹配文本)
+        self._seq = 0
+    
+    def floor(self) -> float:
+        """进入前 k 名所需超过的置信度（未满 k 个时为 -1）"""
+        if len(self._best) < self.k:
+            return -1.0
+        self._drop_stale()
+        return self._heap[0][0]
+    
+    def offer(self, confidence: float, entity_id: int, match_type: str, matched_text: str):
+        """提交候选；同一实体只保留置信度最高的一次"""
+        current = self._best.get(entity_id)
+        if current is not None:
+            if current[0] >= confidence:
+                return
+        elif confidence <= self.floor():
+            return
+        
+        self._seq += 1
+        self._best[entity_id] = (confidence, self._seq, match_type, matched_text)
+        heapq.heappush(self._heap, (confidence, -self._seq, entity_id))
+        if len(self._best) > self.k:
+            self._drop_stale()
+            _, _, evicted = heapq.heappop(self._heap)
+            del self._best[evicted]
+    
+    def _drop_stale(self):
+        """弹出堆顶已被同一实体更高置信度替代的条目"""
+        heap = self._heap
+        while heap:
+            _, neg_seq, entity_id = heap[0]
+            current = self._best.get(entity_id)
+            if current is not None and current[1] == -neg_seq:
+                return
+            heapq.heappop(heap)
+    
+    def items(self) -> List[Tuple[int, float, str, str]]:
+        """按置信度降序返回 [(实体ID, 置信度, 匹配类型, 匹配文本), ...]"""
+        ranked = sorted(self._best.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [
+            (entity_id, confidence, match_type, matched_text)
+            for entity_id, (confidence, _, match_type, matched_text) in ranked
+        ]
+
+
 class EntityLinker:
-    """轻量级实体链接器"""
+    """
+    轻量级实体链接器
     
-    def __init__(self, ontology_dict: Dict[str, Dict]):
+    全部类型的实体共用一套索引，每个实体带有分区编号（由类型决定）。
+    指定 entity_type 时各匹配阶段只考虑该分区的候选，不指定时一次搜索全部分区。
+    """
+    
+    def __init__(self, ontology_dict: Optional[Dict[str, Dict]] = None, cache_size: int = 0,
+                 typo_max_distance: int = 0, normalization: Optional[Sequence] = DEFAULT_STEPS,
+                 ngram_filter_fpr: float = 0.0, pinyin_index: bool = False,
+                 metrics_sample_rate: float = 0.0, vector_index: bool = False):
         """
         Args:
             ontology_dict: {
@@ -55,81 +210,521 @@ class EntityLinker:
                     "metadata": {...}
                 }
             }
+                按 type 字段分区；可省略，之后用 load_ontology() 或 load_partitions() 加载
+            cache_size: link() 结果的 LRU 缓存容量（0 表示不缓存）；
+                命中时返回同一个 LinkResult，需要可修改的副本时用 result.to_dict()
+            typo_max_distance: 拼写纠错（删除邻域索引）的最大编辑距离（0 表示不启用）；
+                启用后在部分匹配与模糊匹配之间增加 typo 阶段，索引内存随词条数线性增长
+            normalization: 规范键的规范化步骤（见 ontology.normalization.NORMALIZATION_STEPS）；
+                小写匹配未命中时先按规范键查找（match_type 为 "canonical"），None 表示不启用
+            ngram_filter_fpr: 查询预过滤（本体单字 / bigram 布隆过滤器）的假阳性率（0 表示不启用）；
+                启用后，不可能达到拼写纠错或模糊匹配阈值的查询直接跳过这两个阶段，结果不变
+            pinyin_index: 是否启用拼音键匹配（同音字输入错误，如 "二甲双呱" -> "二甲双胍"）；
+                启用后在拼写纠错与模糊匹配之间增加 pinyin 阶段（置信度 0.85）
+            metrics_sample_rate: link() 的阶段统计采样率（0 表示不统计，1 表示每次调用都统计），
+                统计结果见 self.metrics 和 get_statistics()["metrics"]
+            vector_index: 是否启用 n-gram TF-IDF 向量近邻索引（见 ontology.ngram_vectors）；
+                启用后不短于 VECTOR_MIN_LENGTH 字的查询在模糊匹配之前先走 vector 阶段：
+                余弦相似度达到阈值的近邻直接返回（置信度不超过 0.95），否则先对近邻候选做模糊匹配，
+                仍未命中时照常执行全量模糊匹配（近邻只增加候选，不会漏掉全量匹配能找到的结果）
         """
-        self.ontology = ontology_dict
-        self.trie = Trie()
+        self._cache = LinkCache(cache_size) if cache_size > 0 else None
+        self.metrics = LinkMetrics(metrics_sample_rate) if metrics_sample_rate > 0 else None
+        self.typo_max_distance = typo_max_distance
+        self.normalization = tuple(normalization) if normalization else None
+        self.ngram_filter_fpr = ngram_filter_fpr
+        self.pinyin_index = pinyin_index
+        self.vector_index = vector_index
+        self._write_lock = threading.RLock()  # 增量更新之间互斥，查询不加锁
+        self._reset()
+        if ontology_dict is not None:
+            self.ontology = ontology_dict
+            self._build_index([(None, ontology_dict)])
+    
+    def _reset(self):
+        """清空全部索引"""
+        self.ontology: Dict[str, Dict] = {}  # 标准名 -> 实体信息（多个分区时为合并视图）
+        self._typo_index: Optional[DeletionIndex] = None  # 删除变体 -> 候选键ID
+        self._pinyin_index: Optional[PinyinIndex] = None  # 拼音键 -> 候选键ID
+        self._vector_index: Optional[NgramVectorIndex] = None  # 候选键 n-gram 向量，行号即候选键ID
+        self.ngram_filter: Optional[NgramFilter] = None  # 查询预过滤，含跳过次数统计
+        self.canonical_index: Optional[CanonicalIndex] = (  # 规范键 -> 词条，含命中统计
+            CanonicalIndex(TextNormalizer(self.normalization)) if self.normalization else None
+        )
+        self.trie = CompactTrie()
         self.alias_map = {}  # 别名 -> 标准名映射
-        self._build_index()
+        self._entity_names: List[str] = []  # 实体ID -> 实体名称
+        self._entity_infos: List[Dict] = []  # 实体ID -> 实体信息
+        self.trie.entities = self._entity_infos  # 前缀树载荷即实体ID
+        self._entity_types = array("H")  # 实体ID -> 分区编号
+        self._partition_names: List[str] = []  # 分区编号 -> 分区名
+        self._partition_codes: Dict[str, int] = {}  # 分区名 -> 分区编号
+        self._shared_keys: Dict[str, Dict[int, int]] = {}  # 多个分区共有的词条 -> {分区编号: 实体ID}
+        self._partition_dicts: Dict[int, Dict[str, Dict]] = {}  # 分区编号 -> 构建时传入的本体字典
+        self._removed_entities: Set[int] = set()  # 已删除的实体ID（实体表只追加，不回收）
+        self._ngram_index = NgramIndex(n=2)  # 名称/通用名 bigram -> 实体ID
+        self._short_entity_ids: List[int] = []  # 名称或通用名不超过3个字的实体（单字查询用）
+        self._generic_ids: Dict[str, int] = {}  # 通用名（小写）-> 实体ID（剥离剂型后缀后查找）
+        self._fuzzy_keys: List[str] = []  # 模糊匹配候选键（标准名 + 别名），只构建一次
+        self._key_entity_ids = np.zeros(0, dtype=np.uint32)  # 候选键 -> 实体ID
+        self._key_types = np.zeros(0, dtype=np.uint16)  # 候选键 -> 分区编号
+        self._key_lengths = np.zeros(0, dtype=np.int32)  # 候选键长度
+        self._key_signatures = np.zeros(0, dtype=np.uint64)  # 候选键字符集签名
+        self._keys_by_length = np.zeros(0, dtype=np.uint32)  # 按长度升序排列的候选键下标
+        self._sorted_key_lengths = np.zeros(0, dtype=np.int32)  # 与 _keys_by_length 对应的长度
+        self._key_dead = np.zeros(0, dtype=bool)  # 已删除（或被同分区同名别名替换）的候选键
+        self._partition_keys: Dict[Optional[int], Tuple[np.ndarray, List[str]]] = {}  # 批量匹配用的分区键表
+        self._automaton: Optional[AhoCorasick] = None  # 文本提及抽取用，首次调用时构建
+        self._version = 0  # 增量更新次数
+        self._name_ids: Optional[Dict[str, List[int]]] = None  # 名称 -> 实体ID（首次增量更新时构建）
+        self._alias_key_ids: Optional[Dict[Tuple[int, str], int]] = None  # (分区编号, 别名) -> 候选键ID
+        self._name_key_ids: Dict[int, int] = {}  # 增量添加的实体 -> 其标准名候选键ID
+        self._word_owners: Dict[str, List[int]] = {}  # 前缀树词条 -> 使用它的存活实体（按插入次序）
+        self._ranks: Dict[int, int] = {}  # 重新发布的实体 -> 沿用的插入次序（其余实体的次序即实体ID）
+    
+    def load_ontology(self, data_dir: Optional[str] = None, entity_types: Optional[Sequence[str]] = None):
+        """
+        从本体数据目录加载药物、疾病、基因和生产商本体，构建统一索引
+        
+        Args:
+            data_dir: 本体数据目录（默认 ontology/data）
+            entity_types: 只加载这些类型的分区（如 ["drug"]，其他数据文件不读取）；None 表示全部
+        """
+        loader = OntologyLoader(data_dir)
+        partition_names = ("drug", "disease", "gene", "manufacturer")
+        if entity_types is not None:
+            requested = {normalize_entity_type(entity_type) for entity_type in entity_types}
+            unknown = requested.difference(partition_names)
+            if unknown:
+                raise ValueError(f"未知的实体类型: {', '.join(sorted(unknown))}")
+            partition_names = [name for name in partition_names if name in requested]
+        self.load_partitions({name: getattr(loader, name + "s") for name in partition_names})
+    
+    def load_partitions(self, partitions: Dict[str, Dict[str, Dict]]):
+        """
+        按类型分区加载本体（替换已有索引）
+        
+        Args:
+            partitions: {分区名: ontology_dict}，分区名按 normalize_entity_type() 归一化
+        """
+        with self._write_lock:
+            self._reset()
+            # 合并视图不复制各分区的词典，同名实体以后加载的分区为准
+            self.ontology = ChainMap(*reversed(list(partitions.values())))
+            self._build_index(partitions.items())
+            if self._cache is not None:
+                self._cache.clear()
+    
+    def _partition_code(self, entity_type: Optional[str]) -> int:
+        """获取（或分配）分区编号"""
+        name = normalize_entity_type(entity_type)
+        code = self._partition_codes.get(name)
+        if code is None:
+            code = len(self._partition_names)
+            self._partition_names.append(name)
+            self._partition_codes[name] = code
+        return code
+    
+    def _type_code(self, entity_type: Optional[str]) -> Optional[int]:
+        """查询用的分区编号：None 表示搜索全部分区，-1 表示没有该类型的实体"""
+        if entity_type is None:
+            return None
+        return self._partition_codes.get(normalize_entity_type(entity_type), -1)
     
-    def _build_index(self):
-        """构建索引"""
+    def _build_index(self, partitions: Iterable[Tuple[Optional[str], Dict[str, Dict]]]):
+        """
+        构建索引
+        
+        Args:
+            partitions: [(分区名, ontology_dict), ...]，分区名为 None 时按实体的 type 字段分区
+        """
         logger.info(f"开始构建实体索引: {len(self.ontology)} 条")
+        alias_keys: Dict[Tuple[int, str], int] = {}  # (分区编号, 别名) -> 实体ID
         
-        for entity_text, entity_info in self.ontology.items():
-            # 插入标准名称
-            self.trie.insert(entity_text.lower(), entity_info)
-            
-            # 插入别名
-            aliases = entity_info.get("aliases", [])
-            for alias in aliases:
-                alias_lower = alias.lower()
-                self.trie.insert(alias_lower, entity_info)
-                self.alias_map[alias_lower] = entity_text
+        for partition, entities in partitions:
+            for entity_text, entity_info in entities.items():
+                entity_id = len(self._entity_names)
+                type_code = self._partition_code(
+                    partition if partition is not None else entity_info.get("type")
+                )
+                self._entity_names.append(entity_text)
+                self._entity_infos.append(entity_info)
+                self._entity_types.append(type_code)
+                self._partition_dicts.setdefault(type_code, entities)
+                
+                # 插入标准名称
+                self._insert_key(entity_text.lower(), entity_id, type_code)
+                
+                # 插入别名
+                aliases = entity_info.get("aliases", [])
+                for alias in aliases:
+                    alias_lower = alias.lower()
+                    self._insert_key(alias_lower, entity_id, type_code)
+                    self.alias_map[alias_lower] = entity_text
+                    alias_keys[(type_code, alias_lower)] = entity_id
+                
+                self._index_partial(entity_id, entity_text, entity_info)
+        
+        # 模糊匹配候选键：全部标准名 + 各分区内去重的别名
+        self._fuzzy_keys = self._entity_names + [alias for _, alias in alias_keys]
+        self._key_entity_ids = np.fromiter(
+            chain(range(len(self._entity_names)), alias_keys.values()),
+            dtype=np.uint32, count=len(self._fuzzy_keys),
+        )
+        self._key_types = np.array(self._entity_types, dtype=np.uint16)[self._key_entity_ids]
+        self._key_dead = np.zeros(len(self._fuzzy_keys), dtype=bool)
+        self._build_fuzzy_prefilter()
+        self._build_typo_index()
+        self._build_pinyin_index()
+        self._build_vector_index()
+        self._build_ngram_filter()
+        
+        # 编译紧凑前缀树
+        self.trie.freeze()
+        
+        logger.info(
+            f"实体索引构建完成: {len(self._ngram_index.postings)} 个 bigram, "
+            f"{len(self._partition_names)} 个分区"
+        )
+    
+    def _index_partial(self, entity_id: int, entity_text: str, entity_info: Dict):
+        """部分匹配候选索引（名称 + 通用名）和通用名索引"""
+        names = [entity_text.lower()]
+        generic_name = entity_info.get("generic_name", "")
+        if generic_name:
+            generic_key = generic_name.lower()
+            names.append(generic_key)
+            # 优先指向名称即通用名的实体（通用名条目本身），其次是最先加入的制剂
+            current = self._generic_ids.get(generic_key)
+            if (current is None or current in self._removed_entities
+                    or (names[0] == generic_key and self._entity_names[current].lower() != generic_key)):
+                self._generic_ids[generic_key] = entity_id
+        for name in names:
+            self._ngram_index.add(entity_id, name)
+        if min(len(name) for name in names) <= int(1 / PARTIAL_MIN_SIMILARITY):
+            self._short_entity_ids.append(entity_id)
+    
+    def _insert_key(self, word: str, entity_id: int, type_code: int):
+        """
+        插入前缀树词条（同一词条后插入的覆盖先插入的）
         
-        logger.info("实体索引构建完成")
+        被其他分区的实体覆盖时记录各分区各自的实体，指定类型的精确匹配仍能找到。
+        """
+        shared = self._shared_keys.get(word)
+        if shared is None:
+            previous_id = self.trie.search_id(word)
+            if previous_id >= 0 and self._entity_types[previous_id] != type_code:
+                shared = self._shared_keys[word] = {self._entity_types[previous_id]: previous_id}
+        if shared is not None:
+            shared[type_code] = entity_id
+        self.trie.insert_id(word, entity_id)
+        if self.canonical_index is not None:
+            self.canonical_index.add(word)
     
-    def link(self, entity_text: str, threshold: int = 85) -> Optional[Dict]:
+    def link(self, entity_text: str, threshold: int = 85,
+             entity_type: Optional[str] = None) -> Optional[LinkResult]:
         """
         链接实体到本体
         
         Args:
             entity_text: 待链接的实体文本
             threshold: 模糊匹配阈值 (0-100)
+            entity_type: 实体类型（如 "drug"、"disease"），只在该类型的分区中匹配；
+                None 表示搜索全部分区
         
         Returns:
-            匹配的实体信息，包含 standard_name, type, confidence 等
+            匹配结果（LinkResult，用法同 dict，引用本体记录而不复制），包含 standard_name, type, confidence 等
         """
         if not entity_text:
             return None
+        type_code = self._type_code(entity_type)
+        if type_code == -1:
+            return None
+        
+        trace = None
+        if self.metrics is not None and self.metrics.should_sample():
+            trace = []
+            start = time.perf_counter()
+        
+        if self._cache is None:
+            hit = False
+            result = self._link(entity_text, threshold, type_code, trace)
+        else:
+            key = (entity_text, threshold, type_code)
+            generation = self._cache.generation
+            hit, result = self._cache.get(key)
+            if not hit:
+                result = self._link(entity_text, threshold, type_code, trace)
+                self._cache.put(key, result, generation)
+        
+        if trace is not None:
+            outcome = CACHE_HIT if hit else (trace[-1][0] if result else NO_MATCH)
+            self.metrics.record(start, trace, outcome)
+        return result
+    
+    def link_topk(self, entity_text: str, k: int = 5, threshold: int = 60,
+                  entity_type: Optional[str] = None) -> List[LinkResult]:
+        """
+        返回置信度最高的 k 个候选实体（同一实体只出现一次）
+        
+        合并精确、部分和模糊匹配各阶段的候选，置信度与 link() 一致（精确 1.0，小写 0.99，规范键 0.98，剂型后缀剥离 0.9，
+        部分匹配不超过 0.95，拼音键 0.85，向量检索为余弦相似度且不超过 0.95，模糊匹配为 fuzz.ratio / 100）。
+        模糊匹配按预过滤得分上界从高到低打分，上界低于当前第 k 名时提前结束。
+        
+        Args:
+            entity_text: 待链接的实体文本
+            k: 返回的候选数
+            threshold: 模糊匹配阈值 (0-100)
+            entity_type: 实体类型，只在该类型的分区中匹配（None 表示全部分区）
+        
+        Returns:
+            按置信度降序的实体信息列表，每条包含 confidence, match_type, matched_text
+        """
+        type_code = self._type_code(entity_type)
+        if not entity_text or k <= 0 or type_code == -1:
+            return []
+        top = TopKCollector(k)
+        
+        # 1-3. 精确 / 小写 / 规范键匹配
+        words = [(entity_text, 1.0, "exact"), (entity_text.lower(), 0.99, "case_insensitive")]
+        if self.canonical_index is not None:
+            words.extend((word, 0.98, "canonical") for word in self._canonical_words(entity_text))
+        for word, confidence, match_type in words:
+            for entity_id in self._exact_ids(word, type_code):
+                top.offer(confidence, entity_id, match_type, word)
+        
+        # 4. 剂型后缀剥离
+        entity_id = self._generic_id(entity_text, type_code)
+        if entity_id >= 0:
+            top.offer(0.9, entity_id, "generic", self._entity_names[entity_id])
         
+        # 5. 部分匹配
+        for score, entity_id, match_type in self._partial_scores(entity_text, type_code):
+            top.offer(min(0.95, score), entity_id, match_type, self._entity_names[entity_id])
+        
+        # 6. 拼音键匹配
+        keys = self._fuzzy_choices()
+        for key_id, _ in self._pinyin_candidates(entity_text, type_code):
+            top.offer(PINYIN_CONFIDENCE, int(self._key_entity_ids[key_id]), "pinyin", keys[key_id])
+        
+        # 7. 向量检索（长查询）
+        if self._vector_eligible(entity_text):
+            for key_id, similarity in self._vector_candidates(entity_text, type_code, max(k, VECTOR_CANDIDATES)):
+                if similarity * 100 >= threshold:
+                    top.offer(min(0.95, similarity), int(self._key_entity_ids[key_id]), "vector", keys[key_id])
+        
+        # 8. 模糊匹配：按得分上界降序打分
+        if self._may_fuzzy(entity_text, threshold):
+            candidates, bounds = self._fuzzy_bounds(entity_text, max(threshold, 1), type_code)
+            order = np.lexsort((candidates, -bounds))
+            for key_id, bound in zip(candidates[order].tolist(), bounds[order].tolist()):
+                floor = top.floor() * 100
+                if bound < floor:
+                    break  # 剩余候选的上界都进不了前 k 名
+                score = fuzz.ratio(entity_text, keys[key_id], score_cutoff=max(threshold, floor))
+                if score >= threshold:
+                    top.offer(score / 100.0, int(self._key_entity_ids[key_id]), "fuzzy", keys[key_id])
+        
+        return [
+            LinkResult(self._entity_infos[entity_id], confidence, match_type, matched_text)
+            for entity_id, confidence, match_type, matched_text in top.items()
+        ]
+    
+    def _link(self, entity_text: str, threshold: int, type_code: Optional[int] = None,
+              trace: Optional[List[Tuple[str, float]]] = None) -> Optional[LinkResult]:
+        """依次执行各匹配阶段（不经过缓存）；trace 不为 None 时追加每个执行过的阶段及其结束时间"""
         # 1. 精确匹配（最快）
-        exact_match = self._exact_match(entity_text)
+        exact_match = self._exact_match(entity_text, type_code)
+        if trace is not None:
+            trace.append(("exact", time.perf_counter()))
         if exact_match:
-            exact_match["confidence"] = 1.0
-            exact_match["match_type"] = "exact"
-            return exact_match
+            return LinkResult(exact_match, 1.0, "exact")
         
         # 2. 小写匹配
-        lower_match = self._exact_match(entity_text.lower())
+        lower_match = self._exact_match(entity_text.lower(), type_code)
+        if trace is not None:
+            trace.append(("case_insensitive", time.perf_counter()))
         if lower_match:
-            lower_match["confidence"] = 0.99
-            lower_match["match_type"] = "case_insensitive"
-            return lower_match
+            return LinkResult(lower_match, 0.99, "case_insensitive")
         
-        # 3. 部分匹配（搜索词是实体名称的一部分，或实体名称包含搜索词）
-        partial_match = self._partial_match(entity_text)
-        if partial_match:
-            return partial_match
+        # 3. 规范键匹配（全半角、括号、繁简体、标点差异）
+        canonical_match = self._canonical_match(entity_text, type_code)
+        if trace is not None and self.canonical_index is not None:
+            trace.append(("canonical", time.perf_counter()))
+        if canonical_match:
+            return canonical_match
+        
+        # 4-7. 剂型后缀剥离 / 部分匹配 / 拼写纠错 / 拼音键
+        candidate_match, fuzzy_possible = self._link_candidates(entity_text, threshold, type_code, trace)
+        if candidate_match:
+            return candidate_match
         
-        # 4. 模糊匹配（编辑距离）
-        fuzzy_match = self._fuzzy_match(entity_text, threshold)
-        if fuzzy_match:
-            return fuzzy_match
+        # 8. 向量检索（长查询）：先只对近邻候选打分，未命中再做全量模糊匹配
+        if self._vector_eligible(entity_text):
+            vector_match = self._vector_match(entity_text, threshold, type_code, fuzzy_possible)
+            if trace is not None:
+                trace.append(("vector", time.perf_counter()))
+            if vector_match:
+                return vector_match
+        
+        # 9. 模糊匹配（编辑距离）
+        if fuzzy_possible:
+            fuzzy_match = self._fuzzy_match(entity_text, threshold, type_code)
+            if trace is not None:
+                trace.append(("fuzzy", time.perf_counter()))
+            if fuzzy_match:
+                return fuzzy_match
         
         # 未匹配到
         return None
     
-    def _exact_match(self, entity_text: str) -> Optional[Dict]:
+    def _link_candidates(self, entity_text: str, threshold: int, type_code: Optional[int] = None,
+                         trace: Optional[List[Tuple[str, float]]] = None
+                         ) -> Tuple[Optional[LinkResult], bool]:
+        """
+        精确匹配未命中后、全量模糊匹配之前的候选召回阶段（trace 同 _link）
+        
+        Returns:
+            (匹配结果, 模糊匹配是否可能达到阈值)；预过滤只在前面的阶段都未命中时才计算
+        """
+        # 4. 剂型后缀剥离（"阿司匹林泡腾片" -> 通用名 "阿司匹林"）
+        generic_match = self._generic_match(entity_text, type_code)
+        if trace is not None:
+            trace.append(("generic", time.perf_counter()))
+        if generic_match:
+            return generic_match, True
+        
+        # 5. 部分匹配（搜索词是实体名称的一部分，或实体名称包含搜索词）
+        partial_match = self._partial_match(entity_text, type_code)
+        if trace is not None:
+            trace.append(("partial", time.perf_counter()))
+        if partial_match:
+            return partial_match, True
+        
+        # 6. 拼写纠错（删除邻域索引，少量哈希探测）
+        fuzzy_possible = self._may_fuzzy(entity_text, threshold)
+        if trace is not None and self.ngram_filter is not None:
+            trace.append(("ngram_filter", time.perf_counter()))
+        if fuzzy_possible and self._typo_index is not None:
+            typo_match = self._typo_match(entity_text, threshold, type_code)
+            if trace is not None:
+                trace.append(("typo", time.perf_counter()))
+            if typo_match:
+                return typo_match, True
+        
+        # 7. 拼音键匹配（同音字，字面得分低，不经过预过滤）
+        if self._pinyin_index is not None:
+            pinyin_match = self._pinyin_match(entity_text, type_code)
+            if trace is not None:
+                trace.append(("pinyin", time.perf_counter()))
+            if pinyin_match:
+                return pinyin_match, True
+        
+        return None, fuzzy_possible
+    
+    def _exact_id(self, word: str, type_code: Optional[int] = None) -> int:
+        """精确查找词条对应的实体ID（指定分区时只返回该分区的实体），未找到返回 -1"""
+        entity_id = self.trie.search_id(word)
+        if entity_id < 0 or type_code is None or self._entity_types[entity_id] == type_code:
+            return entity_id
+        shared = self._shared_keys.get(word)
+        return shared.get(type_code, -1) if shared else -1
+    
+    def _exact_ids(self, word: str, type_code: Optional[int] = None) -> List[int]:
+        """精确查找词条对应的全部实体ID（不指定分区时包含各分区共有词条的全部实体）"""
+        if type_code is None:
+            shared = self._shared_keys.get(word)
+            if shared:
+                return list(shared.values())
+        entity_id = self._exact_id(word, type_code)
+        return [entity_id] if entity_id >= 0 else []
+    
+    def _exact_match(self, entity_text: str, type_code: Optional[int] = None) -> Optional[Dict]:
         """精确匹配"""
-        return self.trie.search(entity_text)
+        entity_id = self._exact_id(entity_text, type_code)
+        return self._entity_infos[entity_id] if entity_id >= 0 else None
+    
+    def _canonical_words(self, entity_text: str) -> List[str]:
+        """查询文本的规范键可能对应的词条（规范键本身，以及规范键相同的其他写法）"""
+        canonical = self.canonical_index.normalizer(entity_text)
+        words = self.canonical_index.words(canonical)
+        # 规范键与小写形式相同时，前缀树已在小写匹配中查过
+        return words if canonical == entity_text.lower() else [canonical] + words
+    
+    def _canonical_match(self, entity_text: str, type_code: Optional[int] = None) -> Optional[LinkResult]:
+        """规范键匹配，并记录规范键表的命中统计"""
+        if self.canonical_index is None:
+            return None
+        for word in self._canonical_words(entity_text):
+            entity_id = self._exact_id(word, type_code)
+            if entity_id >= 0:
+                self.canonical_index.record(True)
+                return LinkResult(self._entity_infos[entity_id], 0.98, "canonical")
+        self.canonical_index.record(False)
+        return None
+    
+    def _generic_id(self, entity_text: str, type_code: Optional[int] = None) -> int:
+        """去掉查询末尾的剂型后按通用名查找实体ID，未找到返回 -1"""
+        text_lower = entity_text.lower()
+        form = DOSAGE_FORM_SUFFIXES.longest_suffix(text_lower)
+        if form is None:
+            return -1
+        entity_id = self._generic_ids.get(text_lower[:-len(form)].strip(), -1)
+        if entity_id < 0 or entity_id in self._removed_entities:
+            return -1
+        if type_code is not None and self._entity_types[entity_id] != type_code:
+            return -1
+        return entity_id
+    
+    def _generic_match(self, entity_text: str, type_code: Optional[int] = None) -> Optional[LinkResult]:
+        """剂型后缀剥离：制剂名未收录时，匹配到同一通用名的实体"""
+        entity_id = self._generic_id(entity_text, type_code)
+        if entity_id < 0:
+            return None
+        return LinkResult(self._entity_infos[entity_id], 0.9, "generic", self._entity_names[entity_id])
     
-    def _partial_match(self, entity_text: str) -> Optional[Dict]:
+    def _partial_candidates(self, entity_text_lower: str,
+                            type_code: Optional[int] = None) -> List[int]:
+        """通过 bigram 倒排索引召回部分匹配候选（按实体ID升序，保持原有的同分排序）"""
+        candidate_ids = self._ngram_index.candidates(entity_text_lower)
+        if candidate_ids is None:
+            # 单字查询：相似度至少30%，只有3个字以内的名称才可能满足
+            candidate_ids = self._short_entity_ids
+        else:
+            candidate_ids = sorted(candidate_ids)
+        removed = self._removed_entities
+        if removed:
+            candidate_ids = [entity_id for entity_id in candidate_ids if entity_id not in removed]
+        if type_code is None:
+            return candidate_ids
+        entity_types = self._entity_types
+        return [entity_id for entity_id in candidate_ids if entity_types[entity_id] == type_code]
+    
+    def _partial_match(self, entity_text: str, type_code: Optional[int] = None) -> Optional[LinkResult]:
         """部分匹配：搜索词是实体名称的一部分，或实体名称包含搜索词"""
+        if not entity_text:
+            return None
+        candidates = self._partial_scores(entity_text, type_code)
+        
+        # 返回得分最高的匹配
+        if candidates:
+            candidates.sort(key=lambda x: x[0], reverse=True)
+            best_score, best_id, best_type = candidates[0]
+            return LinkResult(self._entity_infos[best_id], min(0.95, best_score), best_type,
+                              self._entity_names[best_id])
+        
+        return None
+    
+    def _partial_scores(self, entity_text: str,
+                        type_code: Optional[int] = None) -> List[Tuple[float, int, str]]:
+        """部分匹配打分：[(得分, 实体ID, 匹配类型), ...]，按实体ID升序，只含得分大于0的实体"""
         entity_text_lower = entity_text.lower()
         candidates = []
         
-        # 收集所有可能的匹配
-        for entity_name, entity_info in self.ontology.items():
+        # 只对与搜索词共享全部 bigram 的实体计算得分
+        for entity_id in self._partial_candidates(entity_text_lower, type_code):
+            entity_name = self._entity_names[entity_id]
+            entity_info = self._entity_infos[entity_id]
             entity_name_lower = entity_name.lower()
             score = 0
             match_type = None
@@ -139,7 +734,7 @@ class EntityLinker:
                 # 计算相似度（搜索词长度 / 实体名称长度）
                 similarity = len(entity_text) / len(entity_name) if len(entity_name) > 0 else 0
                 # 如果相似度足够高（至少30%）
-                if similarity >= 0.3:
+                if similarity >= PARTIAL_MIN_SIMILARITY:
                     # 优先匹配更短、更简单的名称（如"盐酸二甲双胍"优于"二甲双胍恩格列净片"）
                     # 计算得分：相似度 * (1 - 长度惩罚)
                     length_penalty = min(0.3, (len(entity_name) - len(entity_text)) / 50.0)
@@ -150,7 +745,7 @@ class EntityLinker:
             generic_name = entity_info.get("generic_name", "")
             if generic_name and entity_text_lower in generic_name.lower():
                 similarity = len(entity_text) / len(generic_name) if len(generic_name) > 0 else 0
-                if similarity >= 0.3:
+                if similarity >= PARTIAL_MIN_SIMILARITY:
                     length_penalty = min(0.3, (len(generic_name) - len(entity_text)) / 50.0)
                     generic_score = similarity * (1 - length_penalty) * 0.9  # 通用名匹配稍低优先级
                     if generic_score > score:
@@ -158,61 +753,1016 @@ class EntityLinker:
                         match_type = "partial_generic"
             
             if score > 0:
-                candidates.append((score, entity_name, entity_info, match_type))
+                candidates.append((score, entity_id, match_type))
         
-        # 返回得分最高的匹配
-        if candidates:
-            candidates.sort(key=lambda x: x[0], reverse=True)
-            best_score, best_name, best_info, best_type = candidates[0]
-            result = best_info.copy()
-            result["confidence"] = min(0.95, best_score)
-            result["match_type"] = best_type
-            result["matched_text"] = best_name
-            return result
+        return candidates
+    
+    def _build_fuzzy_prefilter(self):
+        """构建模糊匹配预过滤所需的长度和字符集签名数组"""
+        keys = self._fuzzy_keys
+        self._key_lengths = np.fromiter((len(key) for key in keys), dtype=np.int32, count=len(keys))
+        self._key_signatures = np.fromiter(
+            (char_signature(key) for key in keys), dtype=np.uint64, count=len(keys)
+        )
+        self._keys_by_length = np.argsort(self._key_lengths, kind="stable").astype(np.uint32)
+        self._sorted_key_lengths = self._key_lengths[self._keys_by_length]
+    
+    def _filter_keys(self, key_ids: np.ndarray, type_code: Optional[int]) -> np.ndarray:
+        """只保留未删除且属于指定分区的候选键"""
+        if len(key_ids) == 0:
+            return key_ids
+        if self._version:
+            key_ids = key_ids[~self._key_dead[key_ids]]
+        if type_code is not None:
+            key_ids = key_ids[self._key_types[key_ids] == type_code]
+        return key_ids
+    
+    def _fuzzy_candidates(self, entity_text: str, threshold: int,
+                          type_code: Optional[int] = None) -> np.ndarray:
+        """
+        模糊匹配预过滤：返回得分上界可能达到阈值的候选键下标（升序）
         
-        return None
+        fuzz.ratio = 200 * LCS / (la + lb)，其中 LCS 不超过两串长度的较小值，
+        也不超过查询中出现在候选键字符集里的字符数（按签名位判断，只会高估）。
+        """
+        if threshold <= 0 or not entity_text:
+            return self._filter_keys(np.arange(len(self._fuzzy_keys), dtype=np.uint32), type_code)
+        candidates, _ = self._fuzzy_bounds(entity_text, threshold, type_code)
+        return np.sort(candidates)
     
-    def _fuzzy_match(self, entity_text: str, threshold: int) -> Optional[Dict]:
+    def _fuzzy_bounds(self, entity_text: str, threshold: int,
+                      type_code: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """返回得分上界达到阈值（需大于0）的候选键下标及各自的得分上界"""
+        query_length = len(entity_text)
+        
+        # 1. 长度上界：200 * min(la, lb) / (la + lb) >= threshold
+        eps = 1e-9
+        if threshold >= 200:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0)
+        min_length = query_length * threshold / (200 - threshold) - eps
+        max_length = query_length * (200 - threshold) / threshold + eps
+        lo = np.searchsorted(self._sorted_key_lengths, min_length, side="left")
+        hi = np.searchsorted(self._sorted_key_lengths, max_length, side="right")
+        candidates = self._keys_by_length[lo:hi]
+        key_count = len(self._fuzzy_keys)  # 先读键数：键数组只追加，之后读到的数组都包含这些键
+        if key_count > len(self._keys_by_length):
+            # 增量添加的键不在长度排序表中，单独按长度筛选
+            added = np.arange(len(self._keys_by_length), key_count, dtype=np.uint32)
+            added_lengths = self._key_lengths[added]
+            added = added[(added_lengths >= min_length) & (added_lengths <= max_length)]
+            candidates = np.concatenate((candidates, added))
+        candidates = self._filter_keys(candidates, type_code)
+        if len(candidates) == 0:
+            return candidates, np.zeros(0)
+        
+        # 2. 字符集上界：查询中出现在候选键签名里的字符数
+        query_bits: Dict[int, int] = {}
+        for char in entity_text:
+            bit = char_bit(char)
+            query_bits[bit] = query_bits.get(bit, 0) + 1
+        
+        signatures = self._key_signatures[candidates]
+        lengths = self._key_lengths[candidates]
+        overlap = np.zeros(len(candidates), dtype=np.int32)
+        for bit, count in query_bits.items():
+            overlap += count * ((signatures & np.uint64(bit)) != 0)
+        np.minimum(overlap, lengths, out=overlap)
+        np.minimum(overlap, query_length, out=overlap)
+        
+        bound = 200.0 * overlap / (query_length + lengths)
+        keep = bound >= threshold - eps
+        return candidates[keep], bound[keep]
+    
+    def _fuzzy_match(self, entity_text: str, threshold: int,
+                     type_code: Optional[int] = None) -> Optional[LinkResult]:
         """模糊匹配"""
-        # 使用rapidfuzz进行快速模糊匹配
-        all_keys = list(self.ontology.keys()) + list(self.alias_map.keys())
+        keys = self._fuzzy_choices()
+        candidates = self._fuzzy_candidates(entity_text, threshold, type_code)
+        if len(candidates) == 0:
+            return None
         
+        # 使用rapidfuzz进行快速模糊匹配（只对通过预过滤的候选键打分，保持原有顺序）
         match = process.extractOne(
             entity_text,
-            all_keys,
+            [keys[i] for i in candidates],
             scorer=fuzz.ratio,
             score_cutoff=threshold
         )
         
         if match:
-            matched_text, score, _ = match
+            _, score, index = match
+            return self._fuzzy_result(int(candidates[index]), score)
+        
+        return None
+    
+    def _fuzzy_choices(self) -> List[str]:
+        """模糊匹配候选键列表（从快照打开时在首次模糊匹配时才解码）"""
+        if not isinstance(self._fuzzy_keys, list):
+            self._fuzzy_keys = list(self._fuzzy_keys)
+        return self._fuzzy_keys
+    
+    def _build_typo_index(self):
+        """构建拼写纠错用的删除邻域索引（键统一小写）"""
+        if self.typo_max_distance <= 0:
+            self._typo_index = None
+            return
+        self._typo_index = DeletionIndex(max_distance=self.typo_max_distance)
+        for key_id, key in enumerate(self._fuzzy_choices()):
+            self._typo_index.add(key_id, key.lower())
+        logger.info(f"拼写纠错索引构建完成: {len(self._typo_index)} 个删除变体")
+    
+    def _build_pinyin_index(self):
+        """构建拼音键索引（键统一小写）"""
+        if not self.pinyin_index:
+            self._pinyin_index = None
+            return
+        self._pinyin_index = PinyinIndex()
+        for key_id, key in enumerate(self._fuzzy_choices()):
+            self._pinyin_index.add(key_id, key.lower())
+        logger.info(f"拼音键索引构建完成: {len(self._pinyin_index)} 个拼音键")
+    
+    def _build_vector_index(self):
+        """构建候选键的 n-gram 向量近邻索引（键统一小写）"""
+        if not self.vector_index:
+            self._vector_index = None
+            return
+        self._vector_index = NgramVectorIndex().build([key.lower() for key in self._fuzzy_choices()])
+        stats = self._vector_index.get_statistics()
+        logger.info(f"向量索引构建完成: {stats['rows']} 个候选键, {stats['nlist']} 个簇, "
+                    f"{stats['bytes'] / 1024 / 1024:.1f} MB")
+    
+    def _build_ngram_filter(self):
+        """构建查询预过滤的布隆过滤器：候选键（原文和小写）的单字和 bigram"""
+        if self.ngram_filter_fpr <= 0:
+            self.ngram_filter = None
+            return
+        keys = self._fuzzy_choices()
+        self.ngram_filter = NgramFilter.build(
+            chain(keys, (key.lower() for key in keys)),
+            self.ngram_filter_fpr,
+        )
+        logger.info(f"查询预过滤构建完成: {self.ngram_filter.bloom.count} 个 n-gram")
+    
+    def _may_fuzzy(self, entity_text: str, threshold: int) -> bool:
+        """预过滤：拼写纠错和模糊匹配是否可能达到阈值（未启用时总是 True）"""
+        return self.ngram_filter is None or self.ngram_filter.may_fuzzy(entity_text, threshold)
+    
+    def _typo_match(self, entity_text: str, threshold: int,
+                    type_code: Optional[int] = None) -> Optional[LinkResult]:
+        """拼写纠错：召回编辑距离不超过上限的键，取 fuzz.ratio 最高且达到阈值者"""
+        if self._typo_index is None:
+            return None
+        
+        keys = self._fuzzy_choices()
+        query = entity_text.lower()
+        max_distance = self.typo_max_distance
+        best = None
+        for key_id in sorted(self._typo_index.lookup(query)):
+            if self._key_dead[key_id] or (type_code is not None and self._key_types[key_id] != type_code):
+                continue
+            key_lower = keys[key_id].lower()
+            if Levenshtein.distance(query, key_lower, score_cutoff=max_distance) > max_distance:
+                continue
+            score = fuzz.ratio(query, key_lower)
+            if score >= threshold and (best is None or score > best[1]):
+                best = (key_id, score)
+        
+        if best:
+            return self._fuzzy_result(best[0], best[1], match_type="typo")
+        return None
+    
+    def _pinyin_candidates(self, entity_text: str,
+                           type_code: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        拼音键召回：[(候选键ID, 相同字数), ...]，按候选键ID升序
+        
+        只保留与查询等长、且至少一半位置上的字相同的键（全部换成同音字的多半是另一个词）。
+        """
+        if self._pinyin_index is None:
+            return []
+        keys = self._fuzzy_choices()
+        query = entity_text.lower()
+        candidates = []
+        for key_id in sorted(self._pinyin_index.lookup(query)):
+            if self._key_dead[key_id] or (type_code is not None and self._key_types[key_id] != type_code):
+                continue
+            key_lower = keys[key_id].lower()
+            if len(key_lower) != len(query):
+                continue
+            same = sum(1 for a, b in zip(query, key_lower) if a == b)
+            if 2 * same >= len(query):
+                candidates.append((key_id, same))
+        return candidates
+    
+    def _pinyin_match(self, entity_text: str,
+                      type_code: Optional[int] = None) -> Optional[LinkResult]:
+        """拼音键匹配：读音相同的键中取相同字数最多者"""
+        best = None
+        for key_id, same in self._pinyin_candidates(entity_text, type_code):
+            if best is None or same > best[1]:
+                best = (key_id, same)
+        
+        if best:
+            return self._fuzzy_result(best[0], PINYIN_CONFIDENCE * 100, match_type="pinyin")
+        return None
+    
+    def _vector_eligible(self, entity_text: str) -> bool:
+        """查询是否走向量检索阶段（已启用且查询足够长）"""
+        return self._vector_index is not None and len(entity_text) >= VECTOR_MIN_LENGTH
+    
+    def _vector_candidates(self, entity_text: str, type_code: Optional[int] = None,
+                           k: int = VECTOR_CANDIDATES) -> List[Tuple[int, float]]:
+        """向量近邻召回：[(候选键ID, 余弦相似度), ...]，按相似度降序（只含未删除、属于指定分区的键）"""
+        if self._vector_index is None:
+            return []
+        
+        def live(key_ids: np.ndarray) -> np.ndarray:
+            keep = ~self._key_dead[key_ids] if self._version else np.ones(len(key_ids), dtype=bool)
+            if type_code is not None:
+                keep &= self._key_types[key_ids] == type_code
+            return keep
+        
+        key_ids, similarities = self._vector_index.search(entity_text.lower(), k, live)
+        return list(zip(key_ids.tolist(), similarities.tolist()))
+    
+    def _vector_match(self, entity_text: str, threshold: int, type_code: Optional[int] = None,
+                      fuzzy_possible: bool = True) -> Optional[LinkResult]:
+        """
+        向量检索：按余弦相似度从高到低取第一个达到阈值的近邻候选
+        
+        余弦相似度达到阈值时 match_type 为 "vector"，否则 fuzz.ratio 达到阈值时为 "fuzzy"
+        （排序仍按余弦相似度，只用编辑距离判断是否接受）。
+        """
+        keys = self._fuzzy_choices()
+        for key_id, similarity in self._vector_candidates(entity_text, type_code):
+            if similarity * 100 >= threshold:
+                return self._fuzzy_result(key_id, min(95.0, similarity * 100), match_type="vector")
+            if fuzzy_possible:
+                score = fuzz.ratio(entity_text, keys[key_id], score_cutoff=threshold)
+                if score >= threshold:
+                    return self._fuzzy_result(key_id, score)
+        return None
+    
+    def vector_search(self, entity_text: str, k: int = 10,
+                      entity_type: Optional[str] = None) -> List[LinkResult]:
+        """
+        n-gram TF-IDF 向量近邻检索（候选生成，不限查询长度，需启用 vector_index）
+        
+        Returns:
+            余弦相似度最高的 k 个实体（同一实体只出现一次），confidence 为余弦相似度，
+            match_type 为 "vector"，matched_text 为命中的名称或别名
+        """
+        type_code = self._type_code(entity_type)
+        if not entity_text or k <= 0 or type_code == -1:
+            return []
+        keys = self._fuzzy_choices()
+        results, seen = [], set()
+        for key_id, similarity in self._vector_candidates(entity_text, type_code, max(k, VECTOR_CANDIDATES)):
+            entity_id = int(self._key_entity_ids[key_id])
+            if entity_id in seen or similarity <= 0:
+                continue
+            seen.add(entity_id)
+            results.append(LinkResult(self._entity_infos[entity_id], similarity, "vector", keys[key_id]))
+            if len(results) == k:
+                break
+        return results
+    
+    def _fuzzy_result(self, key_id: int, score: float,
+                      match_type: str = "fuzzy") -> LinkResult:
+        """根据模糊匹配命中的候选键构造结果"""
+        return LinkResult(self._entity_infos[int(self._key_entity_ids[key_id])], score / 100.0,
+                          match_type, self._fuzzy_choices()[key_id])
+    
+    def link_batch(self, entity_texts: List[str], threshold: int = 85,
+                   workers: int = -1, entity_type: Optional[str] = None) -> List[Optional[LinkResult]]:
+        """
+        批量链接
+        
+        相同文本只链接一次（结果共享同一对象）；精确/小写/部分匹配逐条完成后，
+        剩余文本通过一次多线程 cdist 计算与全部候选键的得分矩阵，逐行取最大值。
+        只有一个线程时全量 cdist 反而比逐条预过滤打分慢，改为逐条模糊匹配（结果相同）。
+        
+        Args:
+            entity_texts: 待链接的实体文本列表
+            threshold: 模糊匹配阈值 (0-100)
+            workers: cdist 使用的线程数（-1 表示全部CPU核心）
+            entity_type: 实体类型，只在该类型的分区中匹配（None 表示全部分区）
+        
+        Returns:
+            与输入等长的结果列表，未匹配为 None
+        """
+        type_code = self._type_code(entity_type)
+        if type_code == -1:
+            return [None] * len(entity_texts)
+        
+        resolved: Dict[str, Optional[LinkResult]] = {}
+        fuzzy_texts = []
+        computed = []  # 本批次新计算（需写入缓存）的文本
+        generation = self._cache.generation if self._cache is not None else None
+        
+        for entity_text in entity_texts:
+            if entity_text in resolved:
+                continue
+            resolved[entity_text] = None
+            if not entity_text:
+                continue
             
-            # 获取实体信息
-            if matched_text in self.ontology:
-                entity_info = self.ontology[matched_text].copy()
-            elif matched_text.lower() in self.alias_map:
-                standard_name = self.alias_map[matched_text.lower()]
-                entity_info = self.ontology[standard_name].copy()
-            else:
-                return None
+            if self._cache is not None:
+                hit, cached = self._cache.get((entity_text, threshold, type_code))
+                if hit:
+                    resolved[entity_text] = cached
+                    continue
+                computed.append(entity_text)
+            
+            exact_match = self._exact_match(entity_text, type_code)
+            if exact_match:
+                resolved[entity_text] = LinkResult(exact_match, 1.0, "exact")
+                continue
+            
+            lower_match = self._exact_match(entity_text.lower(), type_code)
+            if lower_match:
+                resolved[entity_text] = LinkResult(lower_match, 0.99, "case_insensitive")
+                continue
+            
+            canonical_match = self._canonical_match(entity_text, type_code)
+            if canonical_match:
+                resolved[entity_text] = canonical_match
+                continue
+            
+            candidate_match, fuzzy_possible = self._link_candidates(entity_text, threshold, type_code)
+            if candidate_match:
+                resolved[entity_text] = candidate_match
+                continue
+            
+            if self._vector_eligible(entity_text):
+                vector_match = self._vector_match(entity_text, threshold, type_code, fuzzy_possible)
+                if vector_match:
+                    resolved[entity_text] = vector_match
+                    continue
             
-            entity_info["confidence"] = score / 100.0
-            entity_info["match_type"] = "fuzzy"
-            entity_info["matched_text"] = matched_text
+            if fuzzy_possible:
+                fuzzy_texts.append(entity_text)
+        
+        threads = (os.cpu_count() or 1) if workers < 0 else workers
+        if fuzzy_texts and threads > 1:
+            for entity_text, key_id, score in self._fuzzy_match_batch(
+                fuzzy_texts, threshold, workers, type_code
+            ):
+                resolved[entity_text] = self._fuzzy_result(key_id, score)
+        else:
+            for entity_text in fuzzy_texts:
+                resolved[entity_text] = self._fuzzy_match(entity_text, threshold, type_code)
+        
+        for entity_text in computed:
+            self._cache.put((entity_text, threshold, type_code), resolved[entity_text], generation)
+        
+        return [resolved[text] for text in entity_texts]
+    
+    def link_stream(self, entity_texts: Iterable[str], threshold: int = 85,
+                    workers: int = -1, entity_type: Optional[str] = None,
+                    chunk_size: int = 1000) -> Iterator[Optional[LinkResult]]:
+        """
+        流式批量链接，按输入顺序逐条产出结果
+        
+        输入可以是任意长度的迭代器（如逐行读取的文件），每次只取 chunk_size 条调用 link_batch()，
+        内存占用与输入总量无关。其余参数含义同 link_batch()。
+        """
+        if chunk_size < 1:
+            raise ValueError(f"无效的分块大小: {chunk_size}")
+        iterator = iter(entity_texts)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield from self.link_batch(chunk, threshold, workers, entity_type)
+    
+    def _partition_choices(self, type_code: Optional[int]) -> Tuple[np.ndarray, List[str]]:
+        """批量模糊匹配的候选键表：(候选键下标, 候选键)，按分区缓存"""
+        partition_keys = self._partition_keys  # 增量更新时整体替换为新的空表
+        choices = partition_keys.get(type_code)
+        if choices is None:
+            keys = self._fuzzy_choices()
+            if type_code is None and not self._version:
+                choices = (np.arange(len(keys), dtype=np.uint32), keys)
+            else:
+                key_ids = self._filter_keys(np.arange(len(keys), dtype=np.uint32), type_code)
+                choices = (key_ids, [keys[i] for i in key_ids])
+            partition_keys[type_code] = choices
+        return choices
+    
+    def _fuzzy_match_batch(self, entity_texts: List[str], threshold: int, workers: int,
+                           type_code: Optional[int] = None):
+        """
+        批量模糊匹配：按行分块调用 cdist，逐行取得分最高（同分取最靠前）的候选键
+        
+        Yields:
+            (entity_text, 候选键下标, score)，仅包含达到阈值的文本
+        """
+        key_ids, keys = self._partition_choices(type_code)
+        if not keys:
+            return
+        rows_per_chunk = max(1, BATCH_SCORE_CELLS // len(keys))
+        
+        for start in range(0, len(entity_texts), rows_per_chunk):
+            chunk = entity_texts[start:start + rows_per_chunk]
+            scores = process.cdist(
+                chunk,
+                keys,
+                scorer=fuzz.ratio,
+                score_cutoff=threshold,
+                dtype=np.float32,
+                workers=workers,
+            )
+            best_indices = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(chunk)), best_indices]
             
-            return entity_info
+            for entity_text, key_index, best_score in zip(chunk, best_indices, best_scores):
+                if best_score < threshold:
+                    continue
+                # 得分矩阵为 float32，按 extractOne 的精度重新计算最终得分
+                score = fuzz.ratio(entity_text, keys[key_index])
+                if score >= threshold:
+                    yield entity_text, int(key_ids[key_index]), score
+    
+    def build_mention_automaton(self) -> AhoCorasick:
+        """
+        构建（或返回已构建的）提及抽取自动机
+        
+        extract_mentions() 首次调用时会自动构建；多进程标注时应在 fork 之前调用，
+        子进程以写时复制方式共享，不必各自构建。索引更新后自动机失效，下次调用时重建。
+        """
+        automaton = self._automaton
+        if automaton is None:
+            with self._write_lock:
+                automaton = self._automaton
+                if automaton is None:
+                    self.trie.freeze()
+                    automaton = self._automaton = AhoCorasick(self.trie)
+        return automaton
+    
+    def extract_mentions(self, text: str, min_length: int = 2,
+                         entity_type: Optional[str] = None) -> List[Dict]:
+        """
+        从自由文本中抽取实体提及（无需预先分词）
+        
+        用全部标准名和别名构建的 Aho-Corasick 自动机一次扫描全文，
+        返回互不重叠的最长匹配（大小写不敏感）。
+        
+        Args:
+            text: 待抽取的文本
+            min_length: 提及的最小字符数（过滤单字词条带来的噪声）
+            entity_type: 实体类型，只抽取该类型的提及（None 表示全部类型）
+        
+        Returns:
+            [{"mention": 原文片段, "start": 起始位置, "end": 结束位置, "entity": 实体信息}, ...]
+        """
+        type_code = self._type_code(entity_type)
+        if not text or type_code == -1:
+            return []
+        automaton = self.build_mention_automaton()
+        
+        # 词条均为小写；逐字小写以保证位置与原文一一对应
+        folded = text.lower()
+        if len(folded) != len(text):
+            folded = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
         
+        matches = automaton.iter_matches(folded)
+        if type_code is not None:
+            # 先按分区过滤再选最长匹配，其他类型的长词条不会遮住本类型的短词条
+            typed_matches = []
+            for start, end, entity_id in matches:
+                if self._entity_types[entity_id] != type_code:
+                    entity_id = self._exact_id(folded[start:end], type_code)
+                    if entity_id < 0:
+                        continue
+                typed_matches.append((start, end, entity_id))
+            matches = typed_matches
+        
+        entities = self._entity_infos
+        return [
+            {
+                "mention": text[start:end],
+                "start": start,
+                "end": end,
+                "entity": entities[entity_id],
+            }
+            for start, end, entity_id in select_longest(matches, min_length)
+        ]
+    
+    def add_entity(self, entity_text: str, entity_info: Dict,
+                   entity_type: Optional[str] = None) -> int:
+        """
+        增量添加实体（同一分区已有同名实体时替换），只更新该实体名称和别名涉及的索引条目
+        
+        构建时传入的本体字典会同步更新。写操作之间互斥，可与查询并发执行：
+        实体表和候选键只追加，删除只打标记，查询看到的总是更新前或更新后的状态。
+        
+        Args:
+            entity_text: 标准名称
+            entity_info: 实体信息（格式同构造函数）
+            entity_type: 实体类型（默认取 entity_info["type"]）
+        
+        Returns:
+            新实体的实体ID
+        """
+        with self._write_lock:
+            self._prepare_update()
+            type_code = self._partition_code(
+                entity_type if entity_type is not None else entity_info.get("type")
+            )
+            replaced = self._live_ids(entity_text, type_code)
+            for entity_id in replaced:
+                self._unpublish(entity_id, keep_entry=True)
+            # 替换同名实体时沿用其插入次序，本体字典中的位置也不变
+            rank = self._rank(replaced[0]) if replaced else None
+            entity_id = self._publish(entity_text, entity_info, type_code, rank)
+            self._finish_update()
+        return entity_id
+    
+    def remove_entity(self, entity_text: str, entity_type: Optional[str] = None) -> int:
+        """
+        增量删除实体，其名称和别名不再被任何匹配阶段返回
+        
+        Args:
+            entity_text: 标准名称
+            entity_type: 实体类型（None 表示删除所有分区中的同名实体）
+        
+        Returns:
+            删除的实体数
+        """
+        with self._write_lock:
+            self._prepare_update()
+            entity_ids = self._live_ids(entity_text, self._type_code(entity_type))
+            for entity_id in entity_ids:
+                self._unpublish(entity_id)
+            if entity_ids:
+                self._finish_update()
+        return len(entity_ids)
+    
+    def update_aliases(self, entity_text: str, aliases: List[str],
+                       entity_type: Optional[str] = None) -> int:
+        """
+        替换实体的别名列表
+        
+        写时复制：生成新的实体记录并重新发布，正在进行的查询仍使用旧记录。
+        
+        Args:
+            entity_text: 标准名称
+            aliases: 新的别名列表
+            entity_type: 实体类型（None 表示更新所有分区中的同名实体）
+        
+        Returns:
+            更新的实体数
+        """
+        with self._write_lock:
+            self._prepare_update()
+            entity_ids = self._live_ids(entity_text, self._type_code(entity_type))
+            for entity_id in entity_ids:
+                entity_info = {
+                    k: v for k, v in self._entity_infos[entity_id].items()
+                    if k not in RESULT_FIELDS
+                }
+                entity_info["aliases"] = list(aliases)
+                type_code = self._entity_types[entity_id]
+                self._unpublish(entity_id, keep_entry=True)
+                # 沿用原实体的插入次序：共有词条和别名的归属与按更新后本体重新构建时一致
+                self._publish(entity_text, entity_info, type_code, self._rank(entity_id))
+            if entity_ids:
+                self._finish_update()
+        return len(entity_ids)
+    
+    def _prepare_update(self):
+        """增量更新前的检查；首次更新时构建名称、词条和别名键的反查表（一次性 O(N)）"""
+        if not isinstance(self._entity_infos, list):
+            raise RuntimeError("从快照打开的索引是只读的，请在构建的链接器上更新后重新保存快照")
+        if self._name_ids is not None:
+            return
+        
+        name_ids: Dict[str, List[int]] = {}
+        word_owners: Dict[str, List[int]] = {}
+        for entity_id, name in enumerate(self._entity_names):
+            name_ids.setdefault(name, []).append(entity_id)
+            for word in self._entity_words(entity_id):
+                word_owners.setdefault(word, []).append(entity_id)
+        # 首次更新前没有删除标记和增量键：前 N 个候选键依次是各实体的标准名，其余为别名
+        keys = self._fuzzy_choices()
+        self._alias_key_ids = {
+            (int(self._key_types[key_id]), keys[key_id]): key_id
+            for key_id in range(len(self._entity_names), len(keys))
+        }
+        self._word_owners = word_owners
+        self._name_ids = name_ids
+    
+    def _entity_words(self, entity_id: int) -> List[str]:
+        """实体写入前缀树的词条（小写的标准名 + 别名）"""
+        aliases = self._entity_infos[entity_id].get("aliases", [])
+        return [self._entity_names[entity_id].lower()] + [alias.lower() for alias in aliases]
+    
+    def _live_ids(self, entity_text: str, type_code: Optional[int]) -> List[int]:
+        """名称为 entity_text 的存活实体（可按分区过滤）"""
+        if type_code == -1:
+            return []
+        return [
+            entity_id for entity_id in self._name_ids.get(entity_text, ())
+            if type_code is None or self._entity_types[entity_id] == type_code
+        ]
+    
+    def _publish(self, entity_text: str, entity_info: Dict, type_code: int,
+                 rank: Optional[int] = None) -> int:
+        """
+        追加实体并发布其索引条目（先写实体表，再写引用它的索引）
+        
+        rank 为实体的插入次序，默认排在所有实体之后；共有的词条和别名归排在最后的实体。
+        """
+        entity_id = len(self._entity_names)
+        if rank is not None:
+            self._ranks[entity_id] = rank
+        rank = self._rank(entity_id)
+        self._entity_infos.append(entity_info)
+        self._entity_types.append(type_code)
+        self._entity_names.append(entity_text)
+        self._name_ids.setdefault(entity_text, []).append(entity_id)
+        
+        for word in self._entity_words(entity_id):
+            owners = self._word_owners.setdefault(word, [])
+            position = len(owners)
+            while position and self._rank(owners[position - 1]) > rank:
+                position -= 1
+            owners.insert(position, entity_id)
+            if position == len(owners) - 1:
+                self._insert_key(word, entity_id, type_code)
+            else:
+                self._refresh_key(word)
+        self._name_key_ids[entity_id] = self._append_key(entity_text, entity_id, type_code)
+        for alias in entity_info.get("aliases", []):
+            alias_lower = alias.lower()
+            # 同一分区的同名别名只保留排在最后的实体（与构建时一致）
+            previous_key = self._alias_key_ids.get((type_code, alias_lower))
+            if previous_key is None or self._rank(int(self._key_entity_ids[previous_key])) <= rank:
+                if previous_key is not None:
+                    self._key_dead[previous_key] = True
+                self._alias_key_ids[(type_code, alias_lower)] = self._append_key(
+                    alias_lower, entity_id, type_code
+                )
+            if self._alias_heir(alias_lower) == entity_id:
+                self.alias_map[alias_lower] = entity_text
+        
+        self._index_partial(entity_id, entity_text, entity_info)
+        self._partition_dict(type_code)[entity_text] = entity_info
+        return entity_id
+    
+    def _unpublish(self, entity_id: int, keep_entry: bool = False):
+        """
+        撤下实体的全部索引条目并标记删除（实体记录保留，正在进行的查询仍可读取）
+        
+        keep_entry 为 True 时保留本体字典中的条目，随后重新发布的同名实体原位替换它。
+        """
+        entity_text = self._entity_names[entity_id]
+        entity_info = self._entity_infos[entity_id]
+        type_code = self._entity_types[entity_id]
+        
+        for word in self._entity_words(entity_id):
+            self._remove_key(word, entity_id)
+        # 构建时的实体，标准名候选键ID即实体ID
+        self._key_dead[self._name_key_ids.pop(entity_id, entity_id)] = True
+        for alias_lower in {alias.lower() for alias in entity_info.get("aliases", [])}:
+            key_id = self._alias_key_ids.get((type_code, alias_lower))
+            if key_id is not None and self._key_entity_ids[key_id] == entity_id:
+                self._key_dead[key_id] = True
+                del self._alias_key_ids[(type_code, alias_lower)]
+                heir = self._alias_heir(alias_lower, type_code)
+                if heir is not None:
+                    self._alias_key_ids[(type_code, alias_lower)] = self._append_key(
+                        alias_lower, heir, type_code
+                    )
+            if self.alias_map.get(alias_lower) == entity_text:
+                heir = self._alias_heir(alias_lower)
+                if heir is None:
+                    del self.alias_map[alias_lower]
+                else:
+                    self.alias_map[alias_lower] = self._entity_names[heir]
+        
+        self._removed_entities.add(entity_id)
+        same_name = self._name_ids[entity_text]
+        same_name.remove(entity_id)
+        if not same_name:
+            del self._name_ids[entity_text]
+        entities = self._partition_dicts.get(type_code)
+        if not keep_entry and entities is not None and entities.get(entity_text) is entity_info:
+            del entities[entity_text]
+    
+    def _rank(self, entity_id: int) -> int:
+        """实体的插入次序（重新发布的实体沿用原次序）"""
+        return self._ranks.get(entity_id, entity_id)
+    
+    def _alias_heir(self, alias: str, type_code: Optional[int] = None) -> Optional[int]:
+        """仍带有该别名的最后一个存活实体（可限定分区）"""
+        for owner in reversed(self._word_owners.get(alias, ())):
+            if type_code is not None and self._entity_types[owner] != type_code:
+                continue
+            if any(a.lower() == alias for a in self._entity_infos[owner].get("aliases", [])):
+                return owner
         return None
     
-    def link_batch(self, entity_texts: List[str], threshold: int = 85) -> List[Optional[Dict]]:
-        """批量链接"""
-        return [self.link(text, threshold) for text in entity_texts]
+    def _remove_key(self, word: str, entity_id: int):
+        """撤下实体的前缀树词条，交还给仍使用该词条的实体（插入次序靠后的优先，与构建时一致）"""
+        owners = self._word_owners[word]
+        owners.remove(entity_id)
+        if not owners:
+            del self._word_owners[word]
+            self._shared_keys.pop(word, None)
+            self.trie.remove(word)
+            return
+        self._refresh_key(word)
+    
+    def _refresh_key(self, word: str):
+        """按使用词条的实体重设前缀树条目和各分区的实体（排在最后的优先）"""
+        owners = self._word_owners[word]
+        by_code: Dict[int, int] = {}
+        for owner in owners:
+            by_code[self._entity_types[owner]] = owner
+        # 整体替换而不是原地修改：查询可能正在读取旧的映射
+        if len(by_code) > 1:
+            self._shared_keys[word] = by_code
+        else:
+            self._shared_keys.pop(word, None)
+        if self.trie.search_id(word) != owners[-1]:
+            self.trie.insert_id(word, owners[-1])
+
+    def _append_key(self, key: str, entity_id: int, type_code: int) -> int:
+        """追加模糊匹配候选键（先写各数组，最后追加键本身完成发布）"""
+        key_id = len(self._fuzzy_keys)
+        if key_id == len(self._key_lengths):
+            # 容量不足时按两倍扩容：复制到新数组后替换，查询仍可安全读取旧数组
+            capacity = max(16, 2 * key_id)
+            for name in ("_key_entity_ids", "_key_types", "_key_lengths",
+                         "_key_signatures", "_key_dead"):
+                old = getattr(self, name)
+                new = np.zeros(capacity, dtype=old.dtype)
+                new[:key_id] = old[:key_id]
+                setattr(self, name, new)
+        self._key_entity_ids[key_id] = entity_id
+        self._key_types[key_id] = type_code
+        self._key_lengths[key_id] = len(key)
+        self._key_signatures[key_id] = char_signature(key)
+        if self.ngram_filter is not None:
+            self.ngram_filter.add(key)
+            self.ngram_filter.add(key.lower())
+        self._fuzzy_keys.append(key)
+        if self._typo_index is not None:
+            self._typo_index.add(key_id, key.lower())
+        if self._pinyin_index is not None:
+            self._pinyin_index.add(key_id, key.lower())
+        if self._vector_index is not None:
+            self._vector_index.add(key.lower())
+        return key_id
+    
+    def _partition_dict(self, type_code: int) -> Dict[str, Dict]:
+        """增量更新要同步写入的本体字典（新分区在合并视图最前面新建一个字典）"""
+        entities = self._partition_dicts.get(type_code)
+        if entities is None:
+            if isinstance(self.ontology, ChainMap):
+                entities = {}
+                self.ontology.maps.insert(0, entities)
+            else:
+                entities = self.ontology
+            self._partition_dicts[type_code] = entities
+        return entities
+    
+    def _finish_update(self):
+        """增量更新完成：版本号加一，缓存、批量匹配键表和文本提及自动机失效"""
+        self._version += 1
+        self._partition_keys = {}
+        self._automaton = None
+        if self._cache is not None:
+            self._cache.clear()
     
     def get_statistics(self) -> Dict:
         """获取统计信息"""
-        return {
-            "total_entities": len(self.ontology),
+        entity_types = np.array(self._entity_types, dtype=np.int64)
+        if self._removed_entities:
+            entity_types[list(self._removed_entities)] = -1
+        partition_sizes = np.bincount(
+            entity_types[entity_types >= 0], minlength=len(self._partition_names)
+        )
+        key_count = len(self._fuzzy_keys)
+        stats = {
+            "total_entities": len(self._entity_names) - len(self._removed_entities),
             "total_aliases": len(self.alias_map),
-            "total_keys": len(self.ontology) + len(self.alias_map),
+            "total_keys": key_count - int(np.count_nonzero(self._key_dead[:key_count])),
+            "total_bigrams": len(self._ngram_index.postings),
+            "generic_names": len(self._generic_ids),
+            "partitions": {
+                name: int(size) for name, size in zip(self._partition_names, partition_sizes)
+            },
         }
-
+        if self._typo_index is not None:
+            stats["typo_index_entries"] = len(self._typo_index)
+        if self._pinyin_index is not None:
+            stats["pinyin_index_entries"] = len(self._pinyin_index)
+        if self._vector_index is not None:
+            stats["vector_index"] = self._vector_index.get_statistics()
+        if self.canonical_index is not None:
+            stats["canonical_keys"] = len(self.canonical_index)
+        if self.ngram_filter is not None:
+            stats["ngram_filter_bytes"] = self.ngram_filter.bloom.num_bits // 8
+        if self.metrics is not None:
+            stats["metrics"] = self.metrics.get_statistics()
+        if self._cache is not None:
+            stats["cache"] = self._cache.get_statistics()
+        if self._version:
+            stats["updates"] = self._version
+        return stats
+    
+    def _compacted(self) -> "EntityLinker":
+        """用存活实体重新构建一份不含删除标记和增量键的索引（分区编号不变）"""
+        with self._write_lock:
+            partitions = [(name, {}) for name in self._partition_names]
+            for entity_id in sorted(range(len(self._entity_names)), key=self._rank):
+                if entity_id not in self._removed_entities:
+                    entity_text = self._entity_names[entity_id]
+                    partitions[self._entity_types[entity_id]][1][entity_text] = self._entity_infos[entity_id]
+            # 拼写纠错索引和拼音键索引不写入快照，无需构建
+            linker = EntityLinker(normalization=self.normalization,
+                                  ngram_filter_fpr=self.ngram_filter_fpr)
+            for name in self._partition_names:
+                linker._partition_code(name)
+            linker.ontology = self.ontology
+        linker._build_index(partitions)
+        return linker
+    
+    def save_index(self, path: Union[str, Path]):
+        """
+        保存索引快照（前缀树、别名映射、模糊匹配键表、部分匹配倒排索引、分区及实体记录）
+        
+        快照可由 open_index() 内存映射打开，无需重新解析 JSON 和构建索引。
+        有过增量更新时，先用存活实体重新构建一份紧凑索引再保存。
+        """
+        if self._version:
+            self._compacted().save_index(path)
+            return
+        with self._write_lock:
+            self.trie.freeze()
+        
+        name_ids = {name: entity_id for entity_id, name in enumerate(self._entity_names)}
+        
+        name_offsets, name_blob = index_snapshot.encode_strings(self._entity_names)
+        record_offsets, record_blob = index_snapshot.encode_strings(
+            json.dumps(
+                {k: v for k, v in info.items() if k not in RESULT_FIELDS},
+                ensure_ascii=False,
+            )
+            for info in self._entity_infos
+        )
+        aliases = sorted(self.alias_map)
+        alias_offsets, alias_blob = index_snapshot.encode_strings(aliases)
+        key_offsets, key_blob = index_snapshot.encode_strings(self._fuzzy_choices())
+        generics = sorted(self._generic_ids)
+        generic_offsets, generic_blob = index_snapshot.encode_strings(generics)
+        
+        sections = {
+            "trie_edge_start": array("I", self.trie.edge_start),
+            "trie_edge_labels": array("I", self.trie.edge_labels),
+            "trie_payloads": array("i", self.trie.payloads),
+            "name_offsets": name_offsets,
+            "name_blob": name_blob,
+            "name_order": array("I", sorted(range(len(self._entity_names)),
+                                            key=self._entity_names.__getitem__)),
+            "record_offsets": record_offsets,
+            "record_blob": record_blob,
+            "entity_types": np.array(self._entity_types, dtype=np.uint16).tobytes(),
+            "alias_offsets": alias_offsets,
+            "alias_blob": alias_blob,
+            "alias_targets": array("I", (name_ids[self.alias_map[a]] for a in aliases)),
+            "key_offsets": key_offsets,
+            "key_blob": key_blob,
+            "key_entity_ids": self._key_entity_ids.tobytes(),
+            "short_entity_ids": array("I", self._short_entity_ids),
+            "generic_offsets": generic_offsets,
+            "generic_blob": generic_blob,
+            "generic_targets": array("I", (self._generic_ids[g] for g in generics)),
+            "key_lengths": self._key_lengths.tobytes(),
+            "key_signatures": self._key_signatures.tobytes(),
+            "keys_by_length": self._keys_by_length.tobytes(),
+        }
+        sections.update(index_snapshot.posting_sections(self._ngram_index.postings))
+        if self.ngram_filter is not None:
+            sections["ngram_filter_words"] = self.ngram_filter.bloom.words
+        
+        meta = {
+            "ngram_n": self._ngram_index.n,
+            "partitions": self._partition_names,
+            "shared_keys": {
+                word: {str(code): entity_id for code, entity_id in owners.items()}
+                for word, owners in self._shared_keys.items()
+            },
+        }
+        if self.canonical_index is not None:
+            if all(isinstance(step, str) for step in self.normalization):
+                meta["normalization"] = list(self.normalization)
+                meta["canonical_keys"] = self.canonical_index.entries
+            else:
+                logger.warning("规范化步骤包含自定义函数，规范键表不写入快照")
+        if self.ngram_filter is not None:
+            bloom = self.ngram_filter.bloom
+            meta["ngram_filter"] = {
+                "num_hashes": bloom.num_hashes,
+                "count": bloom.count,
+                "false_positive_rate": self.ngram_filter_fpr,
+            }
+        index_snapshot.write_snapshot(path, sections, meta=meta)
+        logger.info(f"索引快照已保存: {path} ({len(self._entity_names)} 条实体)")
+    
+    @classmethod
+    def open_index(cls, path: Union[str, Path], cache_size: int = 0,
+                   typo_max_distance: int = 0, pinyin_index: bool = False,
+                   metrics_sample_rate: float = 0.0, vector_index: bool = False) -> "EntityLinker":
+        """
+        内存映射打开 save_index() 保存的快照（只读）
+        
+        不重建 Python 对象：字符串和实体记录在访问时才解码，
+        多个进程打开同一快照时共享操作系统页缓存。
+        拼写纠错索引、拼音键索引和向量索引不在快照中，typo_max_distance > 0 / pinyin_index /
+        vector_index 为 True 时会在打开时重新构建。
+        """
+        mm, sections, meta = index_snapshot.open_snapshot(path)
+        
+        names = index_snapshot.StringTable(sections["name_offsets"], sections["name_blob"])
+        records = index_snapshot.JsonTable(sections["record_offsets"], sections["record_blob"])
+        
+        linker = cls.__new__(cls)
+        linker._cache = LinkCache(cache_size) if cache_size > 0 else None
+        linker.metrics = LinkMetrics(metrics_sample_rate) if metrics_sample_rate > 0 else None
+        linker._snapshot = mm
+        linker._entity_names = names
+        linker._entity_infos = records
+        linker._entity_types = np.frombuffer(sections["entity_types"], dtype=np.uint16)
+        linker._partition_names = list(meta["partitions"])
+        linker._partition_codes = {name: code for code, name in enumerate(linker._partition_names)}
+        linker._shared_keys = {
+            word: {int(code): entity_id for code, entity_id in owners.items()}
+            for word, owners in meta["shared_keys"].items()
+        }
+        linker.ontology = index_snapshot.SortedKeyMap(
+            names, records.__getitem__, sorted_ids=sections["name_order"]
+        )
+        linker.trie = CompactTrie.from_arrays(
+            sections["trie_edge_start"],
+            sections["trie_edge_labels"],
+            sections["trie_payloads"],
+            records,
+        )
+        alias_targets = sections["alias_targets"]
+        linker.alias_map = index_snapshot.SortedKeyMap(
+            index_snapshot.StringTable(sections["alias_offsets"], sections["alias_blob"]),
+            lambda index: names[alias_targets[index]],
+        )
+        linker._fuzzy_keys = index_snapshot.StringTable(sections["key_offsets"], sections["key_blob"])
+        linker._key_entity_ids = np.frombuffer(sections["key_entity_ids"], dtype=np.uint32)
+        linker._key_types = linker._entity_types[linker._key_entity_ids]
+        linker._key_lengths = np.frombuffer(sections["key_lengths"], dtype=np.int32)
+        linker._key_signatures = np.frombuffer(sections["key_signatures"], dtype=np.uint64)
+        linker._keys_by_length = np.frombuffer(sections["keys_by_length"], dtype=np.uint32)
+        linker._sorted_key_lengths = linker._key_lengths[linker._keys_by_length]
+        linker._partition_keys = {}
+        linker._ngram_index = NgramIndex(n=meta["ngram_n"])
+        linker._ngram_index.postings = index_snapshot.posting_map(sections)
+        linker._short_entity_ids = sections["short_entity_ids"]
+        generic_targets = sections["generic_targets"]
+        linker._generic_ids = index_snapshot.SortedKeyMap(
+            index_snapshot.StringTable(sections["generic_offsets"], sections["generic_blob"]),
+            generic_targets.__getitem__,
+        )
+        linker._automaton = None
+        linker._partition_dicts = {}
+        linker._removed_entities = set()
+        linker._key_dead = np.zeros(len(linker._key_lengths), dtype=bool)
+        linker._write_lock = threading.RLock()
+        linker._version = 0
+        linker._name_ids = None
+        linker._alias_key_ids = None
+        linker._name_key_ids = {}
+        linker._word_owners = {}
+        linker._ranks = {}
+        linker.typo_max_distance = typo_max_distance
+        linker._build_typo_index()
+        linker.pinyin_index = pinyin_index
+        linker._build_pinyin_index()
+        linker.vector_index = vector_index
+        linker._build_vector_index()
+        linker.normalization = tuple(meta["normalization"]) if "normalization" in meta else None
+        linker.ngram_filter_fpr = 0.0
+        linker.ngram_filter = None
+        if "ngram_filter" in meta:
+            bloom_meta = meta["ngram_filter"]
+            linker.ngram_filter_fpr = bloom_meta["false_positive_rate"]
+            linker.ngram_filter = NgramFilter(BloomFilter.from_words(
+                sections["ngram_filter_words"], bloom_meta["num_hashes"], bloom_meta["count"]
+            ))
+        linker.canonical_index = None
+        if linker.normalization:
+            linker.canonical_index = CanonicalIndex(TextNormalizer(linker.normalization))
+            linker.canonical_index.entries = meta["canonical_keys"]
+        
+        logger.info(f"索引快照已打开: {path} ({len(names)} 条实体)")
+        return linker
@@ -0,0 +1,204 @@
+"""
+实体链接索引快照（二进制，可内存映射）
+
+文件布局：
+  MAGIC (8 字节) | 头部长度 (uint32, 小端) | 头部 JSON | 按 8 字节对齐的数据段 ...
+头部 JSON 记录每个数据段的 (偏移, 字节数, 类型码) 以及元数据。
+打开快照时只做 mmap 和 memoryview.cast，不重建任何 Python 对象；
+字符串和实体记录在访问时才解码，多个进程通过操作系统页缓存共享同一份数据。
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+MAGIC = b"CMKGIDX1"
+FORMAT_VERSION = 2
+ALIGNMENT = 8
+
+
+class StringTable(Sequence):
+    """只读字符串表：offsets[i]..offsets[i+1] 为第 i 个字符串的 UTF-8 字节区间"""
+
+    def __init__(self, offsets: Sequence, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+
+class JsonTable(StringTable):
+    """只读 JSON 记录表，每次访问解码出一个新的 dict"""
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return json.loads(super().__getitem__(index))
+
+
+class SortedKeyMap(Mapping):
+    """
+    基于有序键的只读映射，按二分查找定位
+
+    keys 按任意顺序存储（迭代顺序即 keys 的顺序），sorted_ids 给出按键升序排列的下标；
+    sorted_ids 为 None 时表示 keys 本身已升序。
+    """
+
+    def __init__(self, keys: Sequence, value_at: Callable[[int], Any],
+                 sorted_ids: Optional[Sequence] = None):
+        self._keys = keys
+        self._value_at = value_at
+        self._sorted_ids = sorted_ids
+
+    def _find(self, key: str) -> int:
+        keys = self._keys
+        sorted_ids = self._sorted_ids
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            index = sorted_ids[mid] if sorted_ids is not None else mid
+            if keys[index] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(keys):
+            index = sorted_ids[lo] if sorted_ids is not None else lo
+            if keys[index] == key:
+                return index
+        return -1
+
+    def __getitem__(self, key):
+        index = self._find(key) if isinstance(key, str) else -1
+        if index < 0:
+            raise KeyError(key)
+        return self._value_at(index)
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def encode_strings(strings: Iterable[str]) -> Tuple[array, bytes]:
+    """把字符串序列编码为 (偏移数组, UTF-8 字节串)"""
+    offsets = array("Q", [0])
+    parts = []
+    total = 0
+    for text in strings:
+        data = text.encode("utf-8")
+        parts.append(data)
+        total += len(data)
+        offsets.append(total)
+    return offsets, b"".join(parts)
+
+
+def write_snapshot(path: Union[str, Path], sections: Dict[str, Union[array, bytes]],
+                   meta: Dict):
+    """写入快照文件"""
+    toc = {}
+    offset = 0
+    for name, data in sections.items():
+        offset = _align(offset)
+        typecode = data.typecode if isinstance(data, array) else "B"
+        nbytes = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        toc[name] = [offset, nbytes, typecode]
+        offset += nbytes
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "itemsizes": {code: array(code).itemsize for code in "IiQ"},
+        "sections": toc,
+        "meta": meta,
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            f.write(b"\0" * (data_start + toc[name][0] - f.tell()))
+            f.write(data.tobytes() if isinstance(data, array) else data)
+    tmp_path.replace(path)
+
+
+def open_snapshot(path: Union[str, Path]) -> Tuple[mmap.mmap, Dict[str, memoryview], Dict]:
+    """
+    内存映射快照文件
+
+    Returns:
+        (mmap 对象, 数据段名 -> memoryview, 元数据)；调用方需持有 mmap 对象
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mm[:len(MAGIC)] != MAGIC:
+        mm.close()
+        raise ValueError(f"不是实体链接索引快照: {path}")
+    (header_len,) = struct.unpack_from("<I", mm, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(mm[header_start:header_start + header_len].decode("utf-8"))
+
+    itemsizes = {code: array(code).itemsize for code in "IiQ"}
+    if (header.get("version") != FORMAT_VERSION or header.get("byteorder") != sys.byteorder
+            or header.get("itemsizes") != itemsizes):
+        mm.close()
+        raise ValueError(f"快照格式与当前平台不兼容: {path}")
+
+    data_start = _align(header_start + header_len)
+    buffer = memoryview(mm)
+    sections = {}
+    for name, (offset, nbytes, typecode) in header["sections"].items():
+        view = buffer[data_start + offset:data_start + offset + nbytes]
+        sections[name] = view.cast(typecode) if typecode != "B" else view
+    return mm, sections, header["meta"]
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def posting_sections(postings: Dict[str, List[int]]) -> Dict[str, Union[array, bytes]]:
+    """把 gram -> 文档ID列表 编码为 (有序 gram 表, 倒排偏移, 倒排数据) 三个数据段"""
+    grams = sorted(postings)
+    gram_offsets, gram_blob = encode_strings(grams)
+    posting_offsets = array("Q", [0])
+    posting_ids = array("I")
+    for gram in grams:
+        posting_ids.extend(postings[gram])
+        posting_offsets.append(len(posting_ids))
+    return {
+        "gram_offsets": gram_offsets,
+        "gram_blob": gram_blob,
+        "posting_offsets": posting_offsets,
+        "posting_ids": posting_ids,
+    }
+
+
+def posting_map(sections: Dict[str, memoryview]) -> SortedKeyMap:
+    """从数据段构造只读的 gram -> 文档ID 映射"""
+    offsets = sections["posting_offsets"]
+    ids = sections["posting_ids"]
+    return SortedKeyMap(
+        StringTable(sections["gram_offsets"], sections["gram_blob"]),
+        lambda index: ids[offsets[index]:offsets[index + 1]],
+    )
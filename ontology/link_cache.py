@@ -0,0 +1,67 @@
+"""
+链接结果 LRU 缓存
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LinkCache:
+    """容量有限的 LRU 缓存（线程安全），统计命中、未命中和淘汰次数"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0  # 每次 clear() 加一，用于丢弃清空前开始计算的结果
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """查找缓存，返回 (是否命中, 值)"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+
+        generation 为计算开始前读取的 self.generation；期间缓存被清空过则不写入。
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存（统计保留）"""
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_statistics(self) -> Dict:
+        """获取缓存统计"""
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
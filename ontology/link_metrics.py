@@ -0,0 +1,148 @@
+"""
+链接阶段统计：各阶段的执行次数、命中次数和耗时直方图
+
+EntityLinker.link() 按采样率抽取部分调用，在每个实际执行的阶段结束时记一次时间，
+据此得到每个阶段的耗时分布，以及调用最终在哪个阶段结束（命中 / 未匹配 / 缓存命中）。
+未启用时链接路径上只多一次判空。
+"""
+import threading
+from typing import Dict, List, Tuple
+
+# 阶段名（与 link() 的执行顺序一致）；ngram_filter 为拼写纠错和模糊匹配之前的预过滤，
+# vector 只对长查询执行，未命中时继续进入 fuzzy
+STAGES = (
+    "exact", "case_insensitive", "canonical", "generic", "partial",
+    "ngram_filter", "typo", "pinyin", "vector", "fuzzy",
+)
+
+# 调用结果中不对应阶段的两种：未匹配、缓存命中
+NO_MATCH = "none"
+CACHE_HIT = "cache"
+
+# 耗时直方图各桶的上界（微秒），超过最后一个上界的计入溢出桶
+LATENCY_BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图（分位数取所在桶的上界）"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.count = 0
+        self.total = 0.0  # 秒
+
+    def add(self, seconds: float):
+        micros = seconds * 1e6
+        index = 0
+        while index < len(LATENCY_BUCKETS_US) and micros > LATENCY_BUCKETS_US[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> float:
+        """第 q 分位数（0-1）所在桶的上界（微秒），溢出桶返回 inf"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                break
+        return float(LATENCY_BUCKETS_US[index]) if index < len(LATENCY_BUCKETS_US) else float("inf")
+
+    def get_statistics(self) -> Dict:
+        """获取耗时统计（只列出非空的桶）"""
+        buckets = {}
+        for index, count in enumerate(self.counts):
+            if count:
+                label = (f"<={LATENCY_BUCKETS_US[index]}us" if index < len(LATENCY_BUCKETS_US)
+                         else f">{LATENCY_BUCKETS_US[-1]}us")
+                buckets[label] = count
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count * 1e6, 2) if self.count else 0.0,
+            "p50_us": self.percentile(0.5),
+            "p95_us": self.percentile(0.95),
+            "p99_us": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class LinkMetrics:
+    """链接调用的采样统计（线程安全；总调用数在并发时为近似值）"""
+
+    def __init__(self, sample_rate: float = 1.0):
+        """
+        Args:
+            sample_rate: 采样率 (0, 1]，每 round(1 / sample_rate) 次调用记录一次
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"采样率应在 (0, 1] 之间: {sample_rate}")
+        self.sample_rate = sample_rate
+        self._stride = max(1, round(1 / sample_rate))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.calls = 0
+            self.sampled_calls = 0
+            self.outcomes: Dict[str, int] = {}
+            self.stage_runs: Dict[str, int] = {stage: 0 for stage in STAGES}
+            self.stage_latency: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+            self.latency = LatencyHistogram()
+
+    def should_sample(self) -> bool:
+        """计一次调用，返回本次是否采样"""
+        self.calls += 1
+        return self.calls % self._stride == 0
+
+    def record(self, start: float, trace: List[Tuple[str, float]], outcome: str):
+        """
+        记录一次采样调用
+
+        Args:
+            start: 调用开始时间（time.perf_counter()）
+            trace: 依次执行的阶段及其结束时间 [(阶段名, perf_counter), ...]
+            outcome: 调用结束于哪个阶段（阶段名、NO_MATCH 或 CACHE_HIT）
+        """
+        with self._lock:
+            self.sampled_calls += 1
+            previous = start
+            for stage, end in trace:
+                self.stage_runs[stage] += 1
+                self.stage_latency[stage].add(end - previous)
+                previous = end
+            self.latency.add(previous - start)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def get_statistics(self) -> Dict:
+        """获取统计：调用结局分布、各阶段执行/命中次数与耗时、整体耗时"""
+        with self._lock:
+            sampled = self.sampled_calls
+            stages = {}
+            for stage in STAGES:
+                runs = self.stage_runs[stage]
+                if not runs:
+                    continue
+                hits = self.outcomes.get(stage, 0)
+                stages[stage] = {
+                    "runs": runs,
+                    "hits": hits,
+                    "hit_rate": round(hits / runs, 4),
+                    "latency": self.stage_latency[stage].get_statistics(),
+                }
+            return {
+                "sample_rate": self.sample_rate,
+                "calls": self.calls,
+                "sampled_calls": sampled,
+                "outcomes": {
+                    outcome: {"count": count, "fraction": round(count / sampled, 4)}
+                    for outcome, count in sorted(self.outcomes.items(), key=lambda item: -item[1])
+                },
+                "stages": stages,
+                "latency": self.latency.get_statistics(),
+            }
@@ -0,0 +1,95 @@
+"""
+链接结果
+
+只引用本体中的实体记录、附带匹配信息，不复制记录；以映射的形式对外提供，
+用法与原先返回的 dict 相同（result["standard_name"]、result.get(...)、dict(result)、result.copy()）。
+"""
+import copy
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional
+
+# 链接结果写入实体记录的字段，保存快照时不持久化
+RESULT_FIELDS = ("confidence", "match_type", "matched_text")
+
+_set_slot = object.__setattr__
+
+
+class LinkResult(Mapping):
+    """
+    不可变的链接结果：实体记录的引用 + confidence / match_type / matched_text
+
+    记录为多次查询共享的本体数据，取值原样返回（不复制），调用方不应修改其中的列表、字典；
+    需要修改或序列化时用 dict(result) / result.copy()（浅拷贝）或 to_dict()（连同嵌套取值一起复制）。
+    matched_text 为 None 时（精确、小写、规范键匹配）不出现在键中。
+    """
+
+    # 四个字段放在一个元组里：构造时只需绕过一次 __setattr__
+    __slots__ = ("_data",)
+
+    def __init__(self, entity: Mapping, confidence: float, match_type: str,
+                 matched_text: Optional[str] = None):
+        _set_slot(self, "_data", (entity, confidence, match_type, matched_text))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("LinkResult 不可修改")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("LinkResult 不可修改")
+
+    @property
+    def entity(self) -> Mapping:
+        """实体记录（只读视图）"""
+        return MappingProxyType(self._data[0])
+
+    @property
+    def confidence(self) -> float:
+        return self._data[1]
+
+    @property
+    def match_type(self) -> str:
+        return self._data[2]
+
+    @property
+    def matched_text(self) -> Optional[str]:
+        return self._data[3]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in RESULT_FIELDS:
+            value = self._data[RESULT_FIELDS.index(key) + 1]
+            if value is None:
+                raise KeyError(key)
+            return value
+        return self._data[0][key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._data[0]:
+            if key not in RESULT_FIELDS:
+                yield key
+        yield "confidence"
+        yield "match_type"
+        if self._data[3] is not None:
+            yield "matched_text"
+
+    def copy(self) -> Dict[str, Any]:
+        """浅拷贝为 dict（同 dict.copy()，嵌套的列表、字典仍与本体共享）"""
+        return dict(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """复制为独立的 dict（嵌套取值也复制），可任意修改、可直接 json.dumps"""
+        return copy.deepcopy(dict(self))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        # 结果总是真值（不必像 Mapping 默认那样先计算长度）
+        return True
+
+    def __repr__(self) -> str:
+        return f"LinkResult({dict(self)!r})"
+
+    def __reduce__(self):
+        # 跨进程传递（ParallelLinker）时只序列化记录和匹配信息
+        entity, confidence, match_type, matched_text = self._data
+        return LinkResult, (dict(entity), confidence, match_type, matched_text)
@@ -0,0 +1,164 @@
+"""
+文件流式链接（JSONL / CSV）
+
+逐行读取输入文件，按块调用 EntityLinker.link_stream()，每行追加链接结果列后立即写出。
+同一时刻只有一个分块的行留在内存中，内存占用与文件大小无关；处理过程中定期输出吞吐量。
+"""
+import csv
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Union
+
+from utils.logger import get_logger
+
+from .entity_linker import EntityLinker
+
+logger = get_logger(__name__)
+
+FORMATS = ("jsonl", "csv")
+# .json 通常是单个 JSON 文档而非逐行对象，不按扩展名猜测，需显式指定格式
+_SUFFIX_FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# 追加到每行的链接结果列（未匹配时为空）
+LINK_FIELDS = ("standard_name", "type", "confidence", "match_type")
+LINK_PREFIX = "link_"
+
+
+def detect_format(path: Union[str, Path]) -> str:
+    """按扩展名判断文件格式（.jsonl / .ndjson 为 JSONL，.csv 为 CSV，其余需显式指定）"""
+    file_format = _SUFFIX_FORMATS.get(Path(path).suffix.lower())
+    if file_format is None:
+        raise ValueError(f"无法根据扩展名判断文件格式: {path}（请指定 {' / '.join(FORMATS)}）")
+    return file_format
+
+
+def link_columns(prefix: str = LINK_PREFIX):
+    """链接结果列名"""
+    return [prefix + field for field in LINK_FIELDS]
+
+
+def iter_rows(path: Union[str, Path], file_format: str, text_field: str) -> Iterator[Dict]:
+    """逐行读取输入文件（JSONL 跳过空行）"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                return
+            if text_field not in reader.fieldnames:
+                raise ValueError(f"CSV 缺少文本列 {text_field!r}: {path}")
+            yield from reader
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"JSONL 第 {line_number} 行解析失败: {exc}") from exc
+                if not isinstance(row, dict):
+                    raise ValueError(f"JSONL 第 {line_number} 行不是对象: {path}")
+                yield row
+
+
+class _RowWriter:
+    """
+    逐行写出 JSONL / CSV
+
+    CSV 的列在写第一行时确定；之后的行缺少的列留空，多出的列报错（不静默丢弃）。
+    """
+
+    def __init__(self, f, file_format: str, prefix: str):
+        self.f = f
+        self.file_format = file_format
+        self.prefix = prefix
+        self._csv: Optional[csv.DictWriter] = None
+        self._rows = 0
+
+    def write(self, row: Dict):
+        self._rows += 1
+        if self.file_format == "jsonl":
+            self.f.write(json.dumps(row, ensure_ascii=False))
+            self.f.write("\n")
+            return
+        if self._csv is None:
+            fieldnames = [key for key in row if not key.startswith(self.prefix)] + link_columns(self.prefix)
+            self._csv = csv.DictWriter(self.f, fieldnames=fieldnames)
+            self._csv.writeheader()
+        try:
+            self._csv.writerow(row)
+        except ValueError:
+            extra = [key for key in row if key not in self._csv.fieldnames]
+            raise ValueError(f"第 {self._rows} 行含表头中没有的字段 {extra}（CSV 的列由第一行确定），"
+                             f"请改为输出 JSONL") from None
+
+
+def link_file(linker: EntityLinker, input_path: Union[str, Path], output_path: Union[str, Path],
+              text_field: str = "text", threshold: int = 85, entity_type: Optional[str] = None,
+              chunk_size: int = 1000, workers: int = -1, input_format: Optional[str] = None,
+              output_format: Optional[str] = None, prefix: str = LINK_PREFIX,
+              report_every: int = 100000,
+              progress: Optional[Callable[[int, float], None]] = None) -> Dict:
+    """
+    链接文件中每行的文本列，结果列追加到行尾写入输出文件
+
+    Args:
+        linker: 已构建索引的链接器
+        input_path: 输入文件（JSONL 每行一个对象，CSV 需有表头）
+        output_path: 输出文件（格式可与输入不同；CSV 的列由第一行确定，行字段不一致时输出 JSONL）
+        text_field: 待链接文本所在的字段 / 列
+        threshold, entity_type, workers: 同 EntityLinker.link_batch()
+        chunk_size: 每次链接的行数（决定内存占用）
+        input_format, output_format: "jsonl" 或 "csv"，默认按扩展名判断（.jsonl / .ndjson / .csv）
+        prefix: 结果列名前缀（列为 prefix + standard_name / type / confidence / match_type）
+        report_every: 每处理多少行输出一次进度（0 表示不输出）
+        progress: 进度回调 progress(已处理行数, 行/秒)，与日志同频调用
+
+    Returns:
+        统计：行数、匹配行数、耗时、行/秒
+    """
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+    for file_format in (input_format, output_format):
+        if file_format not in FORMATS:
+            raise ValueError(f"不支持的文件格式: {file_format}")
+
+    # 已读出、尚未写出的行；link_stream 每次只预取一个分块，队列长度不超过 chunk_size
+    pending: deque = deque()
+
+    def texts() -> Iterator[str]:
+        for row in iter_rows(input_path, input_format, text_field):
+            pending.append(row)
+            text = row.get(text_field)
+            yield text.strip() if isinstance(text, str) else ""
+
+    rows = 0
+    linked = 0
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = _RowWriter(f, output_format, prefix)
+        for result in linker.link_stream(texts(), threshold, workers, entity_type, chunk_size):
+            row = pending.popleft()
+            for field in LINK_FIELDS:
+                row[prefix + field] = result.get(field) if result is not None else None
+            writer.write(row)
+            rows += 1
+            if result is not None:
+                linked += 1
+            if report_every and rows % report_every == 0:
+                rate = rows / (time.perf_counter() - start)
+                logger.info(f"已处理 {rows} 行（{rate:,.0f} 行/秒），匹配 {linked} 行")
+                if progress is not None:
+                    progress(rows, rate)
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": rows,
+        "linked": linked,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+    }
+    logger.info(f"链接完成: {input_path} -> {output_path}，{rows} 行，匹配 {linked} 行，"
+                f"{stats['rows_per_second']} 行/秒")
+    return stats
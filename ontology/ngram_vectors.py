@@ -0,0 +1,355 @@
+"""
+字符 n-gram 哈希 TF-IDF 向量与近似最近邻索引（IVF）
+
+带限定语的长名称（如 "2型糖尿病性周围神经病变"）与候选键逐个计算 fuzz.ratio 既慢、排序也差：
+多出的限定语按编辑距离扣分，核心词相同的候选反而排不到前面。这里把每个候选键的
+1-3 字 gram 哈希到固定维度，以 TF-IDF 加权并归一化（稀疏 CSR，float32），余弦相似度即点积。
+
+近邻检索分两步：
+  1. 稀疏向量经随机投影（每个哈希特征对应一个由哈希生成的 ±1 向量，不必存投影矩阵）
+     降为 dim 维稠密向量（float32 矩阵），用球面 k-means 聚成 nlist 簇；查询只扫描最近的 nprobe 个簇
+  2. 稠密得分最高的 rerank 个候选再用稀疏向量精确计算余弦相似度并排序
+"""
+import math
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+_CODE_BITS = 21  # Unicode 码位不超过 21 位，gram 编码为各字码位拼接
+_GRAM_SALTS = (0, 0x9E3779B97F4A7C15, 0xD6E8FEB86659FD93, 0xA0761D6478BD642F)  # 按 gram 长度区分
+_PROJECTION_SEED = 0x632BE59BD9B4E019
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """64 位整数混洗（splitmix64 终结函数，跨进程稳定；uint64 乘法按 2^64 取模）"""
+    keys = keys.astype(np.uint64, copy=True)
+    keys ^= keys >> np.uint64(30)
+    keys *= np.uint64(0xBF58476D1CE4E5B9)
+    keys ^= keys >> np.uint64(27)
+    keys *= np.uint64(0x94D049BB133111EB)
+    keys ^= keys >> np.uint64(31)
+    return keys
+
+
+class NgramVectorizer:
+    """字符 n-gram 哈希 TF-IDF 向量化（tf 取 1 + log，L2 归一化）"""
+
+    def __init__(self, max_n: int = 3, num_features: int = 1 << 20):
+        """
+        Args:
+            max_n: 最长 gram 的字数（1 到 max_n 字的 gram 都参与）
+            num_features: 哈希维度（2 的幂；idf 表为 num_features 个 float32）
+        """
+        if not 1 <= max_n <= 3:
+            raise ValueError(f"max_n 应在 1-3 之间: {max_n}")
+        if num_features & (num_features - 1):
+            raise ValueError(f"num_features 应为 2 的幂: {num_features}")
+        self.max_n = max_n
+        self.num_features = num_features
+        self._shift = np.uint64(64 - int(math.log2(num_features)))
+        self.idf: Optional[np.ndarray] = None
+
+    def _features(self, codes: np.ndarray, starts: np.ndarray, ends: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        全部文本的 gram 特征（含重复）
+
+        Args:
+            codes: 各文本码位首尾相接的数组
+            starts, ends: 每个文本在 codes 中的区间
+
+        Returns:
+            (行号, 特征ID)
+        """
+        positions = np.arange(len(codes), dtype=np.int64)
+        row_of = np.repeat(np.arange(len(starts), dtype=np.int64), ends - starts)
+        rows, features = [], []
+        for n in range(1, self.max_n + 1):
+            count = len(codes) - n + 1
+            if count <= 0:
+                break
+            # 不跨文本边界的起点
+            valid = positions[:count] + n <= ends[row_of[:count]]
+            gram = codes[:count].copy()
+            for offset in range(1, n):
+                gram = (gram << np.uint64(_CODE_BITS)) | codes[offset:offset + count]
+            gram ^= np.uint64(_GRAM_SALTS[n])
+            rows.append(row_of[:count][valid])
+            features.append((_mix(gram[valid]) >> self._shift).astype(np.int64))
+        if not rows:
+            # 没有文本或全部为空文本
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(features)
+
+    def _counts(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(行号, 特征ID, 词频)，按行号、特征ID升序去重"""
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        rows, features = self._features(codes, starts, ends)
+        pairs, tf = np.unique(rows * self.num_features + features, return_counts=True)
+        return pairs // self.num_features, pairs % self.num_features, tf
+
+    def fit(self, texts: Sequence[str]) -> "NgramVectorizer":
+        """按文档频率计算 idf（平滑：log((1 + N) / (1 + df)) + 1）"""
+        _, features, _ = self._counts(texts)
+        df = np.bincount(features, minlength=self.num_features)
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        批量向量化
+
+        Returns:
+            CSR 三元组 (indptr int64, indices int32, data float32)，每行特征ID升序
+        """
+        if self.idf is None:
+            raise RuntimeError("向量化器尚未 fit")
+        rows, features, tf = self._counts(texts)
+        data = ((1.0 + np.log(tf)) * self.idf[features]).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=len(texts)))
+        data /= norms[rows].astype(np.float32)
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(texts)), out=indptr[1:])
+        return indptr, features.astype(np.int32), data
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """向量化单个文本：(特征ID int32 升序, 权重 float32)；与 transform() 结果相同，省去批量路径的开销"""
+        if self.idf is None:
+            raise RuntimeError("向量化器尚未 fit")
+        codes = [ord(char) for char in text]
+        grams = []
+        for n in range(1, min(self.max_n, len(codes)) + 1):
+            salt = _GRAM_SALTS[n]
+            for start in range(len(codes) - n + 1):
+                gram = 0
+                for code in codes[start:start + n]:
+                    gram = (gram << _CODE_BITS) | code
+                grams.append(gram ^ salt)
+        if not grams:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        features, tf = np.unique((_mix(np.array(grams, dtype=np.uint64)) >> self._shift).astype(np.int32),
+                                 return_counts=True)
+        data = ((1.0 + np.log(tf)) * self.idf[features]).astype(np.float32)
+        data /= np.float32(np.sqrt(np.dot(data.astype(np.float64), data)))
+        return features, data
+
+
+def random_signs(features: np.ndarray, dim: int) -> np.ndarray:
+    """每个特征对应的 ±1 投影向量（由特征ID哈希生成）：(len(features), dim) float32"""
+    blocks = [
+        _mix(features.astype(np.uint64) + np.uint64(_PROJECTION_SEED * (block + 1) & ((1 << 64) - 1)))
+        for block in range(dim // 64)
+    ]
+    bits = np.unpackbits(np.stack(blocks, axis=1).view(np.uint8), axis=1)
+    return bits.astype(np.float32) * 2.0 - 1.0
+
+
+class NgramVectorIndex:
+    """
+    n-gram TF-IDF 向量的 IVF 近似最近邻索引
+
+    行号即调用方的候选键ID。稠密向量按簇连续存放，查询只对探测到的簇做连续切片的矩阵乘法；
+    add() 追加的行不参与聚类，存放在末尾，查询时一并扫描。
+    """
+
+    def __init__(self, dim: int = 64, nlist: Optional[int] = None, nprobe: int = 24,
+                 rerank: int = 96, max_n: int = 3, num_features: int = 1 << 20):
+        """
+        Args:
+            dim: 随机投影后的稠密维度（64 的倍数）
+            nlist: 聚类数（默认约为 sqrt(行数)）
+            nprobe: 查询扫描的簇数
+            rerank: 精确计算余弦相似度的候选数
+            max_n, num_features: 见 NgramVectorizer
+        """
+        if dim <= 0 or dim % 64:
+            raise ValueError(f"dim 应为 64 的正整数倍: {dim}")
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.vectorizer = NgramVectorizer(max_n, num_features)
+        self.size = 0
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0, dtype=np.float32)
+        self._dense = np.zeros((0, dim), dtype=np.float32)  # 按簇连续存放的稠密向量
+        self._dense_ids = np.zeros(0, dtype=np.uint32)  # _dense 各行对应的行号
+        self._centroids = np.zeros((0, dim), dtype=np.float32)
+        self._list_offsets = np.zeros(1, dtype=np.int64)  # 第 c 簇为 _dense[offsets[c]:offsets[c + 1]]
+        self._clustered = 0  # 参与聚类的行数，其后的行为 add() 追加（位置与行号相同）
+        self._local = threading.local()  # 各查询线程的稠密查找表
+
+    def build(self, texts: Sequence[str], seed: int = 0, iterations: int = 10) -> "NgramVectorIndex":
+        """向量化全部文本（先 fit idf），投影后聚类"""
+        texts = list(texts)
+        self.vectorizer.fit(texts)
+        self._indptr, self._indices, self._data = self.vectorizer.transform(texts)
+        self._cluster(self._project_rows(self._indptr, self._indices, self._data), seed, iterations)
+        self.size = len(texts)
+        return self
+
+    def _project_rows(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+                      chunk_rows: int = 4096) -> np.ndarray:
+        """稀疏行随机投影为单位长度的稠密向量（分块计算，控制 ±1 矩阵的内存）"""
+        rows = len(indptr) - 1
+        dense = np.zeros((rows, self.dim), dtype=np.float32)
+        for lo in range(0, rows, chunk_rows):
+            hi = min(rows, lo + chunk_rows)
+            begin, end = indptr[lo], indptr[hi]
+            if begin == end:
+                continue
+            contributions = random_signs(indices[begin:end], self.dim) * data[begin:end, None]
+            starts = indptr[lo:hi] - begin
+            nonempty = indptr[lo + 1:hi + 1] > indptr[lo:hi]
+            # reduceat 要求起点有效：只对非空行求和
+            dense[lo:hi][nonempty] = np.add.reduceat(contributions, starts[nonempty], axis=0)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        np.divide(dense, norms, out=dense, where=norms > 0)
+        return dense
+
+    def _project_one(self, indices: np.ndarray, data: np.ndarray) -> np.ndarray:
+        """单个稀疏向量的随机投影"""
+        vector = data @ random_signs(indices, self.dim)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _cluster(self, dense: np.ndarray, seed: int, iterations: int, chunk_rows: int = 16384):
+        """球面 k-means（在最多 64 * nlist 行的样本上训练），再把全部行按最近的簇分组存放"""
+        rng = np.random.default_rng(seed)
+        rows = len(dense)
+        nlist = min(self.nlist or max(1, int(round(math.sqrt(rows)))), max(rows, 1))
+        centroids = np.zeros((0, self.dim), dtype=np.float32)
+        if rows:
+            sample = dense if rows <= 64 * nlist else dense[rng.choice(rows, 64 * nlist, replace=False)]
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                empty = norms[:, 0] == 0
+                # 空簇重新取随机样本
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                norms[empty] = 1.0
+                centroids = (sums / norms).astype(np.float32)
+
+        assignment = np.zeros(rows, dtype=np.int64)
+        for lo in range(0, rows, chunk_rows):
+            assignment[lo:lo + chunk_rows] = np.argmax(dense[lo:lo + chunk_rows] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self._centroids = centroids
+        self._dense = dense[order]
+        self._dense_ids = order.astype(np.uint32)
+        self._list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=self._list_offsets[1:])
+        self._clustered = rows
+
+    def add(self, text: str):
+        """追加一行（行号为当前行数；idf 沿用构建时的值），先写各数组，最后增加行数完成发布"""
+        indices, data = self.vectorizer.transform_one(text)
+        row = self.size
+        nnz = int(self._indptr[row])
+        if (row + 1 >= len(self._indptr) or row >= len(self._dense)
+                or nnz + len(indices) > len(self._indices)):
+            # 容量不足时按两倍扩容：复制到新数组后替换，查询仍可安全读取旧数组
+            self._indptr = self._grow(self._indptr, row + 2)
+            self._indices = self._grow(self._indices, nnz + len(indices))
+            self._data = self._grow(self._data, nnz + len(indices))
+            self._dense = self._grow(self._dense, row + 1)
+            self._dense_ids = self._grow(self._dense_ids, row + 1)
+        self._indices[nnz:nnz + len(indices)] = indices
+        self._data[nnz:nnz + len(indices)] = data
+        self._indptr[row + 1] = nnz + len(indices)
+        self._dense[row] = self._project_one(indices, data)
+        self._dense_ids[row] = row
+        self.size = row + 1
+
+    @staticmethod
+    def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+        grown = np.zeros((max(16, needed, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def search(self, text: str, k: int = 10,
+               key_filter: Optional[Callable[[np.ndarray], np.ndarray]] = None
+               ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        近似最近邻检索
+
+        Args:
+            text: 查询文本（与构建时的文本同样做过小写等处理）
+            k: 返回的候选数
+            key_filter: 对扫描到的行号返回保留与否的布尔掩码（如排除已删除的键）
+
+        Returns:
+            (行号 uint32, 余弦相似度 float32)，按相似度降序
+        """
+        indices, data = self.vectorizer.transform_one(text)
+        size = self.size  # 先读行数：各数组只追加，之后读到的数组都包含这些行
+        if len(indices) == 0 or size == 0:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32)
+        query = self._project_one(indices, data)
+        dense = self._dense
+
+        # 1. 最近的 nprobe 个簇（连续切片）+ 追加的行
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probe = (np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe
+                 else np.zeros(0, dtype=np.int64))  # 空索引构建后只有追加的行
+        offsets = self._list_offsets
+        spans = [(offsets[c], offsets[c + 1]) for c in probe.tolist()]
+        if size > self._clustered:
+            spans.append((self._clustered, size))
+        dense_ids = self._dense_ids
+        if not spans:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32)
+        candidates = np.concatenate([dense_ids[lo:hi] for lo, hi in spans])
+        approx = np.concatenate([dense[lo:hi] @ query for lo, hi in spans])
+        if key_filter is not None:
+            keep = key_filter(candidates)
+            candidates, approx = candidates[keep], approx[keep]
+        if len(candidates) == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+
+        # 2. 稠密得分最高的 rerank 个候选，用稀疏向量精确计算余弦相似度
+        if len(candidates) > self.rerank:
+            candidates = candidates[np.argpartition(-approx, self.rerank - 1)[:self.rerank]]
+        scores = self._cosine(candidates, indices, data)
+        order = np.lexsort((candidates, -scores))[:k]
+        return candidates[order], scores[order]
+
+    def _cosine(self, rows: np.ndarray, indices: np.ndarray, data: np.ndarray) -> np.ndarray:
+        """查询稀疏向量与若干行的精确点积（查询权重临时写入本线程的稠密查找表）"""
+        lookup = getattr(self._local, "lookup", None)
+        if lookup is None:
+            lookup = self._local.lookup = np.zeros(self.vectorizer.num_features, dtype=np.float32)
+        indptr = self._indptr
+        starts = indptr[rows]
+        lengths = indptr[rows.astype(np.int64) + 1] - starts
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+        positions = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        lookup[indices] = data
+        weights = lookup[self._indices[positions]] * self._data[positions]
+        lookup[indices] = 0.0
+        return np.bincount(row_of, weights=weights, minlength=len(rows)).astype(np.float32)
+
+    def nbytes(self) -> int:
+        """索引数组占用的字节数（含 idf 表）"""
+        arrays = (self._indptr, self._indices, self._data, self._dense, self._dense_ids,
+                  self._centroids, self._list_offsets, self.vectorizer.idf)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def get_statistics(self) -> Dict:
+        return {
+            "rows": self.size,
+            "dim": self.dim,
+            "nlist": len(self._centroids),
+            "nprobe": self.nprobe,
+            "rerank": self.rerank,
+            "bytes": self.nbytes(),
+        }
@@ -0,0 +1,147 @@
+"""
+文本规范化与规范键表
+
+把表面形式不同、含义相同的写法折叠成同一个规范键：全角/半角、中英文括号、
+繁体/简体、空白和标点、大小写。EntityLinker 构建索引时对每个词条计算一次规范键，
+查询时对查询文本计算一次，在部分匹配和模糊匹配之前先查规范键表。
+"""
+import unicodedata
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from .t2s_table import SIMPLIFIED, TRADITIONAL
+
+_T2S = str.maketrans(TRADITIONAL, SIMPLIFIED)
+
+# 各类括号统一为半角圆括号（NFKC 不处理方头括号、书名号等）
+_BRACKETS = str.maketrans({
+    **{char: "(" for char in "（［｛【〔〖〘〚《〈「『[{"},
+    **{char: ")" for char in "）］｝】〕〗〙〛》〉」』]}"},
+})
+
+# 去掉空白、格式控制字符和标点（BMP 范围内），保留括号和有区分意义的字符（如 "0.9%氯化钠"）
+_KEPT_PUNCTUATION = set(".%+#&()")
+_PUNCTUATION: Dict[int, Any] = {}  # 首次用到 "punctuation" 步骤时才填充，见 _punctuation_table()
+
+
+def _punctuation_table() -> Dict[int, Any]:
+    """填充标点删除表（逐个检查 BMP 的全部码位，约 15ms，不放在导入时做）"""
+    if not _PUNCTUATION:
+        _PUNCTUATION.update({
+            code: None for code in range(0x10000)
+            if chr(code) not in _KEPT_PUNCTUATION
+            and (unicodedata.category(chr(code))[0] in "PZ" or unicodedata.category(chr(code)) in ("Cc", "Cf"))
+        })
+    return _PUNCTUATION
+
+
+# 可用的规范化步骤（按名称引用）：函数，或 str.translate 查表
+NORMALIZATION_STEPS: Dict[str, Union[Callable[[str], str], Dict[int, Any]]] = {
+    "nfkc": lambda text: unicodedata.normalize("NFKC", text),  # 全角 -> 半角、兼容字符
+    "brackets": _BRACKETS,
+    "traditional": _T2S,  # 繁体 -> 简体（逐字）
+    "punctuation": _PUNCTUATION,
+    "lower": str.lower,
+}
+
+
+def _merge_tables(first: Dict[int, Any], second: Dict[int, Any]) -> Dict[int, str]:
+    """两张 str.translate 查表合并为一张（效果等于先查 first 再查 second）"""
+    merged = {}
+    for code in first.keys() | second.keys():
+        char = chr(code)
+        result = char.translate(first).translate(second)
+        if result != char:
+            merged[code] = result
+    return merged
+
+
+DEFAULT_STEPS = ("nfkc", "brackets", "traditional", "punctuation", "lower")
+
+
+class TextNormalizer:
+    """按顺序执行的规范化流水线"""
+
+    def __init__(self, steps: Sequence[Union[str, Callable[[str], str], Dict[int, Any]]] = DEFAULT_STEPS):
+        """
+        Args:
+            steps: 步骤名（见 NORMALIZATION_STEPS）、str -> str 的函数或 str.translate 查表，按顺序执行
+        """
+        unknown = [step for step in steps if isinstance(step, str) and step not in NORMALIZATION_STEPS]
+        if unknown:
+            raise ValueError(f"未知的规范化步骤: {unknown}，可选: {list(NORMALIZATION_STEPS)}")
+        self.steps = tuple(steps)
+        # 相邻的查表步骤合并为一次 str.translate
+        compiled: List[Union[Callable[[str], str], Dict[int, Any]]] = []
+        for step in steps:
+            step = NORMALIZATION_STEPS[step] if isinstance(step, str) else step
+            if step is _PUNCTUATION:
+                _punctuation_table()
+            if isinstance(step, dict) and compiled and isinstance(compiled[-1], dict):
+                compiled[-1] = _merge_tables(compiled[-1], step)
+            else:
+                compiled.append(step)
+        self._functions = [
+            (lambda text, table=step: text.translate(table)) if isinstance(step, dict) else step
+            for step in compiled
+        ]
+
+    def __call__(self, text: str) -> str:
+        for function in self._functions:
+            text = function(text)
+        return text
+
+
+class CanonicalIndex:
+    """
+    规范键表：规范键 -> 词条，并统计查询命中次数
+
+    规范键与词条本身相同的不收录（直接用规范键查前缀树即可），表通常很小。
+    """
+
+    def __init__(self, normalizer: TextNormalizer):
+        self.normalizer = normalizer
+        # 规范键 -> 词条；只有一个词条时直接存 str，节省内存
+        self.entries: Dict[str, Union[str, List[str]]] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def add(self, word: str):
+        """添加词条（前缀树中的小写形式）"""
+        canonical = self.normalizer(word)
+        if canonical == word:
+            return
+        existing = self.entries.get(canonical)
+        if existing is None:
+            self.entries[canonical] = word
+        elif isinstance(existing, str):
+            if existing != word:
+                self.entries[canonical] = [existing, word]
+        elif word not in existing:
+            existing.append(word)
+
+    def words(self, canonical: str) -> List[str]:
+        """规范键对应的词条（不含规范键本身）"""
+        found = self.entries.get(canonical)
+        if found is None:
+            return []
+        return [found] if isinstance(found, str) else found
+
+    def record(self, hit: bool):
+        """记录一次查询（精确匹配和小写匹配都未命中后查规范键表）"""
+        self.lookups += 1
+        if hit:
+            self.hits += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_statistics(self) -> Dict:
+        """获取规范键表统计"""
+        return {
+            "steps": [step if isinstance(step, str) else getattr(step, "__name__", "custom")
+                      for step in self.normalizer.steps],
+            "keys": len(self.entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+        }
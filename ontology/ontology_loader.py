@@ -2,79 +2,132 @@
 医学本体加载器
 """
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 本体集合 -> (数据文件, 日志中的名称)
+COLLECTIONS = {
+    "drugs": ("drugs.json", "药物本体"),
+    "diseases": ("diseases.json", "疾病本体"),
+    "genes": ("genes.json", "基因本体"),
+    "manufacturers": ("manufacturers.json", "生产商本体"),
+    "relations": ("relations.json", "关系本体"),
+}
+
+# 实体类型写法 -> 分区名（EntityLinker 的分区、本体中的 type 字段；集合名为分区名加 s）
+ENTITY_TYPE_ALIASES = {
+    "drugs": "drug",
+    "diseases": "disease",
+    "genes": "gene",
+    "gene_target": "gene",
+    "manufacturers": "manufacturer",
+}
+
+
+def normalize_entity_type(entity_type: Optional[str]) -> str:
+    """实体类型归一化为分区名（"Drug" / "drugs" -> "drug"，"Gene_Target" -> "gene"）"""
+    name = (entity_type or "").strip().lower()
+    return ENTITY_TYPE_ALIASES.get(name, name)
+
+
+class _LazyCollection:
+    """首次访问时解析对应的数据文件并缓存；可直接赋值替换"""
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, loader, owner=None):
+        if loader is None:
+            return self
+        collection = loader._collections.get(self.name)
+        if collection is None:
+            collection = loader._load(self.name)
+        return collection
+    
+    def __set__(self, loader, value):
+        loader._collections[self.name] = value
+
 
 class OntologyLoader:
-    """医学本体数据加载器"""
+    """
+    医学本体数据加载器
+    
+    各集合（drugs、diseases、genes、manufacturers、relations）在首次访问时才读取并解析，
+    只用到药物本体的进程不会加载其他文件；需要预热时调用 preload()。
+    """
+    
+    drugs = _LazyCollection()
+    diseases = _LazyCollection()
+    genes = _LazyCollection()
+    manufacturers = _LazyCollection()
+    relations = _LazyCollection()
     
     def __init__(self, data_dir: str = None):
         if data_dir is None:
             data_dir = Path(__file__).parent / "data"
         self.data_dir = Path(data_dir)
         
-        self.drugs = {}
-        self.diseases = {}
-        self.genes = {}
-        self.manufacturers = {}
-        self.relations = {}
-        
-        self._load_all()
+        self._collections: Dict[str, Dict] = {}  # 集合名 -> 已加载的数据
+        self._load_lock = threading.Lock()  # 多线程同时首次访问时只解析一次
     
-    def _load_all(self):
-        """加载所有本体数据"""
-        logger.info("开始加载医学本体数据...")
-        
-        # 加载药物本体
-        drug_file = self.data_dir / "drugs.json"
-        if drug_file.exists():
-            with open(drug_file, 'r', encoding='utf-8') as f:
-                self.drugs = json.load(f)
-            logger.info(f"加载药物本体: {len(self.drugs)} 条")
-        
-        # 加载疾病本体
-        disease_file = self.data_dir / "diseases.json"
-        if disease_file.exists():
-            with open(disease_file, 'r', encoding='utf-8') as f:
-                self.diseases = json.load(f)
-            logger.info(f"加载疾病本体: {len(self.diseases)} 条")
-        
-        # 加载基因本体
-        gene_file = self.data_dir / "genes.json"
-        if gene_file.exists():
-            with open(gene_file, 'r', encoding='utf-8') as f:
-                self.genes = json.load(f)
-            logger.info(f"加载基因本体: {len(self.genes)} 条")
-        
-        # 加载生产商本体
-        manufacturer_file = self.data_dir / "manufacturers.json"
-        if manufacturer_file.exists():
-            with open(manufacturer_file, 'r', encoding='utf-8') as f:
-                self.manufacturers = json.load(f)
-            logger.info(f"加载生产商本体: {len(self.manufacturers)} 条")
+    def _load(self, name: str) -> Dict:
+        """读取并缓存一个集合（文件不存在时为空字典）"""
+        with self._load_lock:
+            if name in self._collections:
+                return self._collections[name]
+            file_name, label = COLLECTIONS[name]
+            data_file = self.data_dir / file_name
+            collection = {}
+            if data_file.exists():
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    collection = json.load(f)
+                logger.info(f"加载{label}: {len(collection)} 条")
+            self._collections[name] = collection
+            return collection
+    
+    def preload(self, types: Optional[Iterable[str]] = None) -> "OntologyLoader":
+        """
+        预先加载指定集合（服务启动时预热，避免首个请求承担解析耗时）
         
-        # 加载关系本体
-        relation_file = self.data_dir / "relations.json"
-        if relation_file.exists():
-            with open(relation_file, 'r', encoding='utf-8') as f:
-                self.relations = json.load(f)
-            logger.info(f"加载关系本体: {len(self.relations)} 条")
+        Args:
+            types: 集合名或实体类型，如 ["drugs", "Disease", "Gene_Target"]；None 表示全部
         
-        logger.info("医学本体数据加载完成")
+        Returns:
+            self
+        """
+        names = list(COLLECTIONS) if types is None else [self._collection_name(t) for t in types]
+        logger.info(f"预加载医学本体数据: {', '.join(names)}")
+        for name in names:
+            getattr(self, name)
+        return self
+    
+    def is_loaded(self, entity_type: str) -> bool:
+        """集合是否已加载"""
+        return self._collection_name(entity_type) in self._collections
+    
+    @staticmethod
+    def _collection_name(entity_type: str) -> str:
+        name = normalize_entity_type(entity_type)
+        # 集合名为分区名加 s（"drug" -> "drugs"）
+        name = name if name in COLLECTIONS else name + "s"
+        if name not in COLLECTIONS:
+            raise ValueError(f"未知的本体类型: {entity_type}（可用 {', '.join(COLLECTIONS)}）")
+        return name
     
     def get_entity_by_type(self, entity_type: str) -> Dict:
         """根据类型获取实体本体"""
         type_map = {
-            "Drug": self.drugs,
-            "Disease": self.diseases,
-            "Gene_Target": self.genes,
-            "Manufacturer": self.manufacturers,
+            "Drug": "drugs",
+            "Disease": "diseases",
+            "Gene_Target": "genes",
+            "Manufacturer": "manufacturers",
         }
-        return type_map.get(entity_type, {})
+        name = type_map.get(entity_type)
+        return getattr(self, name) if name else {}
     
     def get_relation_info(self, relation_type: str) -> Optional[Dict]:
         """获取关系类型信息"""
@@ -90,4 +143,3 @@ class OntologyLoader:
         valid_targets = relation_info.get("target_types", [])
         
         return source_type in valid_sources and target_type in valid_targets
-
@@ -0,0 +1,155 @@
+"""
+多进程分片批量链接
+
+索引构建完成后再 fork 工作进程，子进程以写时复制方式共享父进程中的索引页，
+无需序列化链接器。输入按块分发，结果按输入顺序流式返回。
+"""
+import gc
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+from .entity_linker import EntityLinker
+
+logger = get_logger(__name__)
+
+# fork 前设置，子进程继承（写时复制共享）
+_worker_linker: Optional[EntityLinker] = None
+
+
+def fork_pool(processes: int):
+    """
+    以 fork 方式启动进程池，子进程以写时复制方式共享父进程中已构建的索引
+
+    调用前应把工作进程要用的对象放到模块级变量中。当前平台不支持 fork 时返回 None，
+    由调用方退化为单进程。
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    # fork 期间把现有对象移出GC跟踪，减少子进程中因GC写入而触发的页复制
+    gc.freeze()
+    try:
+        return multiprocessing.get_context("fork").Pool(processes)
+    finally:
+        gc.unfreeze()
+
+
+def _link_chunk(chunk_index: int, texts: List[str], threshold: int,
+                entity_type: Optional[str] = None):
+    """工作进程：链接一个分块"""
+    start = time.perf_counter()
+    # 进程内不再开线程，避免与进程池争抢CPU
+    results = _worker_linker.link_batch(texts, threshold, workers=1, entity_type=entity_type)
+    return chunk_index, os.getpid(), len(texts), time.perf_counter() - start, results
+
+
+class ParallelLinker:
+    """多进程实体链接器（仅支持 fork 启动方式的平台，其余平台退化为单进程）"""
+
+    def __init__(self, linker: EntityLinker, processes: Optional[int] = None,
+                 chunk_size: int = 1000):
+        """
+        Args:
+            linker: 已构建索引的链接器
+            processes: 工作进程数（默认CPU核心数）
+            chunk_size: 每个分块的文本数
+        """
+        self.linker = linker
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._worker_stats: Dict[int, Dict] = {}
+
+    def _get_pool(self):
+        """首次使用时 fork 进程池（平台不支持 fork 时为 None）"""
+        global _worker_linker
+        if self._pool is None:
+            _worker_linker = self.linker
+            self._pool = fork_pool(self.processes)
+            if self._pool is not None:
+                logger.info(f"已启动 {self.processes} 个链接进程")
+        return self._pool
+
+    def link_iter(self, entity_texts: Iterable[str], threshold: int = 85,
+                  entity_type: Optional[str] = None) -> Iterator[Optional[Dict]]:
+        """
+        流式并行链接，按输入顺序逐条产出结果
+
+        同时在途的分块数不超过进程数的两倍，输入可以是任意长度的迭代器。
+        entity_type 含义同 EntityLinker.link()。
+        """
+        iterator = iter(entity_texts)
+
+        pool = self._get_pool()
+        if pool is None:
+            logger.warning("当前平台不支持 fork，退化为单进程链接")
+            while True:
+                chunk = list(islice(iterator, self.chunk_size))
+                if not chunk:
+                    return
+                yield from self.linker.link_batch(chunk, threshold, entity_type=entity_type)
+
+        pending = deque()
+        chunk_index = 0
+        exhausted = False
+
+        while True:
+            while not exhausted and len(pending) < 2 * self.processes:
+                chunk = list(islice(iterator, self.chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append(pool.apply_async(_link_chunk, (chunk_index, chunk, threshold, entity_type)))
+                chunk_index += 1
+
+            if not pending:
+                return
+
+            _, pid, count, seconds, results = pending.popleft().get()
+            self._record(pid, count, seconds)
+            yield from results
+
+    def link_batch(self, entity_texts: Iterable[str], threshold: int = 85,
+                   entity_type: Optional[str] = None) -> List[Optional[Dict]]:
+        """并行批量链接"""
+        return list(self.link_iter(entity_texts, threshold, entity_type))
+
+    def _record(self, pid: int, count: int, seconds: float):
+        """累计单个工作进程的吞吐量"""
+        stats = self._worker_stats.setdefault(pid, {"chunks": 0, "texts": 0, "seconds": 0.0})
+        stats["chunks"] += 1
+        stats["texts"] += count
+        stats["seconds"] += seconds
+
+    def get_statistics(self) -> Dict:
+        """获取各工作进程的吞吐量统计"""
+        workers = {}
+        for pid, stats in self._worker_stats.items():
+            workers[pid] = dict(stats)
+            workers[pid]["texts_per_second"] = (
+                round(stats["texts"] / stats["seconds"], 1) if stats["seconds"] > 0 else None
+            )
+        return {
+            "processes": self.processes,
+            "chunk_size": self.chunk_size,
+            "total_texts": sum(s["texts"] for s in self._worker_stats.values()),
+            "workers": workers,
+        }
+
+    def close(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,79 @@
+"""
+拼音键索引（同音字输入错误）
+
+输入法错误常把字换成同音字（"二甲双呱" -> "二甲双胍"），字面编辑距离大，fuzz.ratio 得分低。
+对每个词条按首选读音生成无声调拼音键，建立 拼音键 -> 词条ID 的倒排；查询时对查询串
+各字读音的组合（多音字展开，数量有上限）逐个哈希探测即可召回候选。
+"""
+from itertools import islice, product
+from typing import Dict, List, Optional, Set, Union
+
+from .pinyin_table import HETERONYMS, PINYIN
+
+_PRIMARY: Dict[str, str] = {char: syllable for syllable, chars in PINYIN.items() for char in chars}
+_READINGS: Dict[str, List[str]] = {char: [syllable] for char, syllable in _PRIMARY.items()}
+for _syllable, _chars in HETERONYMS.items():
+    for _char in _chars:
+        _READINGS[_char].append(_syllable)
+
+
+def pinyin_key(text: str) -> Optional[str]:
+    """按首选读音生成拼音键（音节以空格分隔，非汉字原样保留），不含汉字时返回 None"""
+    if not any(char in _PRIMARY for char in text):
+        return None
+    return " ".join(_PRIMARY.get(char, char) for char in text)
+
+
+def pinyin_variants(text: str, limit: int = 16) -> List[str]:
+    """多音字展开后的拼音键（首选读音组合在最前），最多 limit 个"""
+    readings = [_READINGS.get(char, [char]) for char in text]
+    return [" ".join(syllables) for syllables in islice(product(*readings), limit)]
+
+
+class PinyinIndex:
+    """拼音键倒排索引"""
+
+    def __init__(self, min_length: int = 2, max_variants: int = 16):
+        """
+        Args:
+            min_length: 参与索引和查询的最短字数（单字同音字太多，不收录）
+            max_variants: 查询时多音字展开的最大组合数
+        """
+        self.min_length = min_length
+        self.max_variants = max_variants
+        # 拼音键 -> 词条ID；只有一个词条时直接存 int，节省内存
+        self.entries: Dict[str, Union[int, List[int]]] = {}
+
+    def add(self, key_id: int, key: str):
+        """添加词条（小写形式）"""
+        if len(key) < self.min_length:
+            return
+        pinyin = pinyin_key(key)
+        if pinyin is None:
+            return
+        existing = self.entries.get(pinyin)
+        if existing is None:
+            self.entries[pinyin] = key_id
+        elif isinstance(existing, int):
+            if existing != key_id:
+                self.entries[pinyin] = [existing, key_id]
+        elif existing[-1] != key_id:
+            existing.append(key_id)
+
+    def lookup(self, query: str) -> Set[int]:
+        """召回与 query 读音相同的词条ID（查询为小写形式）"""
+        candidates: Set[int] = set()
+        if len(query) < self.min_length or pinyin_key(query) is None:
+            return candidates
+        for variant in pinyin_variants(query, self.max_variants):
+            found = self.entries.get(variant)
+            if found is None:
+                continue
+            if isinstance(found, int):
+                candidates.add(found)
+            else:
+                candidates.update(found)
+        return candidates
+
+    def __len__(self) -> int:
+        return len(self.entries)
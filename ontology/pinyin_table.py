@@ -0,0 +1,1636 @@
+"""
+汉字 -> 无声调拼音对照表（由 pypinyin 0.55.0 的单字拼音数据生成，CJK 基本区 20924 字，MIT 许可）
+
+PINYIN 按首选读音分组；HETERONYMS 为多音字（4930 字）的其余读音。ü 记作 v。供 pinyin.py 使用。
+"""
+
+PINYIN = {
+    "a": "啊嗄錒锕阿",
+    "ai": (
+        "伌僾凒叆哀哎唉啀嗌嗳嘊噯埃塧壒娭娾嫒嬡愛懓懝挨捱敱敳昹暧曖欸毐溰溾濭爱瑷璦癌皑皚"
+        "皧瞹矮砹硋碍礙艾蔼薆藹譪譺躷銰鎄鑀锿閡隘霭靄靉餲馤騃鱫鴱"
+    ),
+    "an": (
+        "侒俺儑唵啽垵埯堓婩媕安岸峖庵按揞晻暗案桉氨洝犴玵痷盦盫罯胺腤荌菴萻葊蓭誝諳谙豻貋"
+        "銨錌铵闇隌雸鞌鞍韽馣鮟鵪鶕鹌黯鿷"
+    ),
+    "ang": "卬岇昂昻枊盎肮醠骯",
+    "ao": (
+        "傲凹厫嗷嗸坳垇墺奡奥奧媪媼嫯岙岰嶅嶴廒慠懊扷抝拗摮擙敖柪梎滶澳熬爊獒獓璈磝翱翶翺"
+        "聱芺蔜螯袄襖謷謸軪遨鏊鏖镺隞隩驁骜鰲鳌鷔鼇鿫"
+    ),
+    "ba": (
+        "丷仈八叐叭吧哵坝坺垻墢壩夿妭岜峇巴巼弝扒把抜拔捌朳柭欛灞炦爸犮玐疤癹矲笆粑紦罢罷"
+        "羓耙胈芭茇菝蚆覇詙豝跁跋軷釛釟鈀钯霸靶颰魃魞鮊鲃鲅鲌鼥鿱"
+    ),
+    "bai": "佰庍拜拝挀捭掰摆擘擺敗柏栢猈瓸白百稗竡粨粺絔薭襬贁败韛",
+    "ban": (
+        "伴办半坂坢姅岅怑扮扳拌搬攽斑斒昄板柈湴版班瓣瓪瘢癍秚粄絆绊舨般蝂螁螌褩辦辬鈑鉡钣"
+        "闆阪靽頒颁魬鳻"
+    ),
+    "bang": "傍垹塝帮幇幚幫捠搒梆棒棓榜浜牓玤磅稖綁縍绑膀艕蒡蚌蜯謗谤邦邫鎊镑鞤髈",
+    "bao": (
+        "佨保儤勹勽包堡堢報媬嫑孢宝宲寚寳寶忁怉报抱暴曓枹煲爆珤窇笣緥胞苞菢葆蕔薄藵虣蚫袌"
+        "褒褓襃豹賲趵鉋鑤铇闁雹靌靤飹飽饱駂骲髱鮑鲍鳵鴇鸨齙龅"
+    ),
+    "bei": (
+        "俻倍偝偹備僃北卑呗唄备孛悖悲惫愂憊揹昁杯桮梖椑焙牬犕狈狽珼琲盃碑碚禙糒背苝蓓藣蛽"
+        "被褙誖貝贝軰輩辈邶郥鄁鉳鋇鐾钡陂鞁鞴骳鵯鹎"
+    ),
+    "ben": "倴坋坌奔奙捹撪本栟桳楍泍渀犇獖畚笨翉苯贲輽逩錛锛",
+    "beng": "伻傰嘣埄埲塴奟崩嵭揼泵琣琫甏甭痭祊絣綳繃绷菶蹦迸逬鏰镚閍鞛",
+    "bi": (
+        "佊佖俾偪匕吡哔啚嗶坒堛壁夶奰妣妼婢嬖嬶屄币幣幤庇庳廦弊弻弼彃彼必怭怶愊愎敝斃朼枈"
+        "柀柲梐楅榌比毕毖毙毴沘湢滗滭潷濞煏熚狴獘獙珌璧畀畁畢疕疪痹痺皕睤碧禆秕笓笔筆筚箄"
+        "箅箆篦篳粃粊綼縪繴罼聛腷臂舭苾荜荸萆萞蓖蓽蔽薜蜌螕袐裨襅襞襣觱詖诐豍貏貱賁贔赑跸"
+        "蹕躃躄逼避邲鄙鄨鄪鉍鎞鏎鐴铋閇閉閟闭陛鞸韠飶饆馝駜驆髀髲魓鮅鰏鲾鵖鷝鷩鼊鼻"
+    ),
+    "bian": (
+        "便匾卞变変峅弁徧忭惼扁抃揙昪汳汴炞煸牑猵獱玣甂砭碥稨窆笾箯籩糄編緶缏编艑苄萹藊蝙"
+        "褊覍變貶贬辡辧辨辩辫辮辯边辺遍邉邊釆鍽閞鞭鯾鯿鳊鴘"
+    ),
+    "biao": (
+        "俵儦墂婊幖彪摽杓标標檦淲滮瀌灬熛爂猋瘭磦穮脿膘臕蔈藨表裱褾諘謤贆錶鏢鑣镖镳颩颮颷"
+        "飆飇飈飊飑飙飚驃驫骉骠髟鰾鳔"
+    ),
+    "bie": "別别咇彆徶憋瘪癟莂虌蛂蟞襒蹩鱉鳖鼈龞",
+    "bin": (
+        "傧儐宾彬摈擯斌梹椕槟檳殡殯氞汃滨濒濱濵瀕玢瑸璸砏繽缤膑臏虨豩豳賓賔邠鑌镔霦顮髌髕"
+        "髩鬂鬓鬢"
+    ),
+    "bing": (
+        "丙並仌仒併倂偋傡兵冫冰垪寎并幷庰怲抦掤摒昞昺柄栤棅氷炳病眪禀秉稟窉竝苪蛃誁邴鈵鉼"
+        "鋲陃靐鞆鞞餅餠饼鮩"
+    ),
+    "bo": (
+        "亳仢伯侼僠僰剝剥勃博卜哱啵嚗孹嶓帗帛愽懪拨挬搏撥播檗欂波浡淿渤溊煿牔犦犻狛猼玻瓝"
+        "瓟癶癷盋砵碆礡礴秡箔箥簙簸糪紴缽肑胉脖膊舶艊苩菠萡葧蔔蘗袚袯袰袹襏襮譒豰跛踣蹳郣"
+        "鈸鉑鉢鋍鎛鑮钵钹铂镈餑餺饽馎馛馞駁駮驋驳髆髉鮁鱍鵓鹁"
+    ),
+    "bu": (
+        "不佈勏卟吥咘哺喸埗埠峬布庯廍怖悑抪捕捗晡柨步歨歩瓿篰簿荹蔀补補誧踄轐逋部郶醭鈈鈽"
+        "钚钸餔餢鳪鵏鸔鿻"
+    ),
+    "ca": "嚓囃擦攃礤礸遪",
+    "cai": "倸偲啋埰婇寀彩才採材棌毝猜睬綵縩纔菜蔡裁財财跴踩采",
+    "can": (
+        "傪儏参參叄叅喰嬠孱惨惭慘慙慚憯掺摻朁残殘湌澯灿燦爘璨穇篸粲薒蚕蝅蠶蠺謲飡餐驂骖黪"
+        "黲"
+    ),
+    "cang": "仓仺伧倉傖嵢欌沧滄濸獊舱艙苍蒼藏螥賶鑶鶬鸧",
+    "cao": "嘈嶆愺懆撡操曹曺槽漕糙肏艚艸艹草蓸螬褿襙鄵鏪騲",
+    "ce": "侧側冊册厕厠墄廁恻惻憡拺敇测測畟笧策筞筴箣簎粣荝萗萴蓛",
+    "cen": "岑嵾梣涔笒",
+    "ceng": "噌层層嶒曽曾竲蹭驓",
+    "cha": (
+        "侘偛叉嗏垞奼姹察岔嵖差扠挿插揷搽杈查槎檫汊猹疀碴秅紁肞臿艖茬茶衩詧詫诧蹅銟鍤鑔锸"
+        "镲靫餷馇"
+    ),
+    "chai": "侪儕喍囆拆柴犲瘥祡芆茝虿蠆袃訍豺釵钗齜",
+    "chan": (
+        "丳产僝儃儳冁刬剗剷劖啴嘽嚵囅壥婵嬋嵼巉幝幨廛忏懴懺搀摌摲攙斺旵梴棎欃毚浐湹滻潹潺"
+        "澶瀍瀺灛煘燀獑產産硟磛禅禪簅緾繟纏纒缠羼艬蒇蕆蝉蟬蟾裧襜覘觇誗諂譂讇讒谄谗躔辴辿"
+        "鄽酁鉆鋋鋓鏟鑱铲镡镵閳闡阐韂顫颤饞馋骣"
+    ),
+    "chang": (
+        "仧仩伥倀倡偿僘償兏厂厰唱嘗嚐场場塲娼嫦尝常廠徜怅悵惝敞昌昶晿暢椙氅淐焻猖玚琩瑒瑺"
+        "瓺甞畅畼肠腸膓苌菖萇蟐裮誯鋹鋿錩鏛锠镸閶阊韔鬯鯧鱨鲳鲿鼚"
+    ),
+    "chao": "仦仯勦吵嘲巐巢巣弨怊抄晁朝樔欩漅潮炒焣焯煼牊眧窲罺耖觘訬謿超轈鄛鈔钞麨鼂鼌",
+    "che": "伡俥偖勶唓坼屮彻徹扯掣撤撦澈烢爡瞮砗硨硩聅莗蛼車车迠頙",
+    "chen": (
+        "儭嗔嚫塵墋夦宸尘忱愖抻捵揨敐晨曟榇樄櫬沉煁琛疢瘎瞋硶碜磣綝縝臣茞莀莐蔯薼螴衬襯訦"
+        "諃諶謓讖谌谶賝贂趁趂趻踸軙辰迧郴醦鈂鍖陈陳霃鷐麎齓齔龀"
+    ),
+    "cheng": (
+        "丞乗乘侱偁僜呈城埕堘塍塖娍宬峸庱徎悜惩憆憕懲成承挰掁摚撐撑晟朾枨柽棖棦椉橕橙檉檙"
+        "泟洆浾溗澂澄瀓爯牚珵珹琤畻睈瞠碀秤称程稱穪窚竀筬絾緽罉脀脭荿蛏蟶裎誠诚赪赬逞郕酲"
+        "鋮鏳鏿鐣铖阷靗頳饓騁騬骋鯎"
+    ),
+    "chi": (
+        "侈侙傺勅勑卶叱叺吃呎哧啻喫嗤噄坻垑墀妛媸尺岻弛彨彲彳恜恥慗憏懘抶持摛攡敕斥杘欼歭"
+        "歯池湁漦灻炽烾熾瓻痓痴痸瘈瘛癡眵瞝硳竾笞筂箎篪粚絺翄翅翤翨耻肔胣胵腟茌荎蚇蚩蚳螭"
+        "袲袳裭褫訵誺謘貾赤赿趍趩跮踟迟遅遟遫遲鉓鉹銐雴飭饎饬馳驰魑鴟鵄鶒鷘鸱麶黐齒齝齿"
+    ),
+    "chong": "充冲嘃埫宠寵崇崈徸忡憃憧揰摏沖浺爞珫緟罿翀舂艟茺虫蝩蟲衝褈蹖銃铳隀",
+    "chou": (
+        "丑丒仇侴俦偢儔吜嚋婤嬦帱幬怞惆愁懤抽搊杻杽栦椆殠燽犨犫畴疇瘳皗瞅矁稠筹篘籌紬絒綢"
+        "绸臭臰菗薵裯讎讐踌躊遚酧酬醜醻雔雠魗"
+    ),
+    "chu": (
+        "亍俶傗储儊儲処出刍初厨嘼埱处媰岀幮廚怵憷拀搐摴敊斶杵柷椘楚楮榋樗橱橻檚櫉櫥欪歜滀"
+        "滁濋犓珿琡璴畜矗础礎竌竐篨絀绌耡臅芻蒢蒭蓫蕏藸處蜍蟵褚触觸諔豖豠貙趎踀蹰躇躕鄐鉏"
+        "鋤锄閦除雏雛鶵鸀黜齣齭齼"
+    ),
+    "chua": "欻歘",
+    "chuai": "啜嘬揣搋膗膪踹",
+    "chuan": "串传傳僢剶喘圌巛川暷椽歂氚汌猭玔瑏穿篅舛舡舩船荈賗踳輲遄釧钏鶨",
+    "chuang": "傸凔刅创刱剏剙創噇幢床怆愴摐摤牀牎牕疮瘡磢窓窗窻闖闯",
+    "chui": "倕吹垂埀捶搥棰椎槌炊箠腄菙錘鎚锤陲顀龡",
+    "chun": (
+        "偆唇堾媋惷旾春暙杶椿槆橁櫄浱淳湻滣漘犉瑃睶箺純纯脣莼萅萶蒓蓴蝽蠢賰輴醇醕錞陙鯙鰆"
+        "鶉鶞鹑"
+    ),
+    "chuo": "嚽娕娖婥婼惙戳擉歠涰磭綽繛绰腏趠踔輟辍辵辶逴酫鑡齪龊",
+    "ci": (
+        "伺佌佽偨刺刾呲垐堲嬨庛慈朿柌栨次此泚濨玼珁瓷甆疵皉磁礠祠糍絘縒茈茦茨莿薋蛓螆蠀詞"
+        "词賜赐趀跐辝辞辤辭雌飺餈骴髊鮆鴜鶿鷀鹚齹"
+    ),
+    "cong": (
+        "丛从匆叢囪囱婃孮従徖從忩怱悤悰慒憁暰枞棇樅樬樷欉淙漎漗潀潨灇焧熜爜琮瑽璁瞛篵緫繱"
+        "聡聦聪聰苁茐葱蓯蔥藂蟌誴謥賨賩鍯鏦騘驄骢"
+    ),
+    "cou": "凑湊腠輳辏",
+    "cu": "促噈媨徂憱殂猝瘄瘯簇粗縬脨蔟觕誎趗踧蹙蹴蹵酢醋顣麁麄麤鼀",
+    "cuan": "巑撺攛櫕欑殩汆熶爨穳窜竄篡簒蹿躥鋑鑹镩",
+    "cui": (
+        "乼伜倅催凗啐啛墔崔嶉忰悴慛摧榱槯毳淬漼濢焠獕璀疩瘁皠磪竁粋粹紣綷縗缞翆翠脃脆脺膬"
+        "膵臎萃襊趡鏙顇"
+    ),
+    "cun": "侟刌吋存寸忖拵村澊皴竴籿膥踆邨",
+    "cuo": "剉剒厝夎嵯嵳挫措搓撮斮棤瑳痤睉矬磋脞莝莡蒫蓌蔖虘蹉躦逪遳酂醝銼錯锉错鹺鹾",
+    "da": (
+        "亣剳匒呾咑哒嗒噠垯墶大妲怛打搭撘汏沓炟燵畗畣瘩眔笚笪答繨羍耷荅荙薘蟽褡詚跶躂达迏"
+        "迖迚逹達鎉鎝鐽阘靼鞑韃龖龘"
+    ),
+    "dai": (
+        "代侢傣叇呆呔垈埭岱帒带帯帶廗待怠懛戴曃柋歹殆瀻獃玳瑇甙簤紿緿绐艜蚮袋襶貸贷蹛軑軚"
+        "軩轪迨逮霴靆骀鮘鴏黛黱"
+    ),
+    "dan": (
+        "丹亶伔但僤儋刐勯匰单単啖啗啿單嘾噉嚪妉媅帎弹弾彈惮憚憺抌担掸撢撣擔旦柦殚殫氮沊泹"
+        "淡澸澹狚玬瓭甔疍疸瘅癉癚眈砃禫窞箪簞紞繵耼耽聃聸胆腅膽萏蓞蛋蜑衴褝襌觛誕诞贉赕躭"
+        "郸鄲霮頕饏馾駳髧鴠黕黮鿕"
+    ),
+    "dang": (
+        "儅党凼噹圵垱壋婸宕嵣当愓挡擋攩档檔欓氹潒澢灙珰璗璫瓽當盪瞊砀碭礑筜簜簹艡荡菪蕩蘯"
+        "蟷裆襠譡讜谠趤逿鐺铛闣雼黨"
+    ),
+    "dao": (
+        "倒刀刂到叨噵壔导導岛島嶋嶌嶹忉悼捣捯搗擣朷椡槝檤氘焘燾瓙盗盜祷禂禱稲稻箌纛翢翿舠"
+        "艔菿衜衟蹈軇道釖陦隝隯魛鱽"
+    ),
+    "de": "嘚得徳德恴悳惪棏淂的脦鍀锝",
+    "den": "扥扽",
+    "deng": "凳噔墱嬁嶝戥朩櫈灯燈璒登瞪磴竳等簦艠覴豋蹬邓鄧鐙镫隥",
+    "di": (
+        "仾低俤偙僀厎呧唙啇啲嘀嚁地坔坘埊埞堤墑墬奃娣媂嫡嶳帝底廸弟弤彽怟慸抵拞掋摕敌敵旳"
+        "杕枤柢梊梑棣樀氐涤渧滌滴焍牴狄玓珶甋眱睇砥碲磾祶禘笛第篴籴糴締缔羝翟聜腣苖荻菂菧"
+        "蒂蔋蔐蔕藡蝃螮袛覿觌觝詆諦诋谛豴趆踶蹢軧迪递逓遞遰邸釱鉪鍉鏑镝阺隄靮鞮頔馰骶髢鬄"
+        "鯳鸐"
+    ),
+    "dian": (
+        "佃傎典厧嚸坫垫墊壂奌奠婝婰嵮巅巓巔店惦扂掂攧敁敟椣槇槙橂橝殿淀滇澱点猠玷琔电甸瘨"
+        "癜癫癲碘簟蒧蕇蜔跕踮蹎钿阽電靛顚顛颠驔點齻"
+    ),
+    "diao": (
+        "伄凋刁刟叼吊奝屌弔弴彫扚掉殦汈琱瘹瞗碉窎窵竨簓蓧藋虭蛁訋調调貂釣鈟銱鋽鑃钓铞铫雕"
+        "雿魡鮉鯛鲷鳭鵰鼦"
+    ),
+    "die": (
+        "叠哋喋嗲垤堞峌嵽幉恎惵戜挕揲昳曡殜氎爹牃牒瓞畳疂疉疊眣眰碟絰绖耊耋胅臷艓苵蜨蝶褋"
+        "褺詄諜谍趃跌蹀迭镻鰈鲽"
+    ),
+    "ding": (
+        "丁仃叮啶奵定嵿帄忊椗濎玎疔盯矴碇碠磸耵聢腚萣薡虰蝊訂订酊釘鋌錠鐤钉铤锭靪頂顁顶飣"
+        "饤鼎鼑"
+    ),
+    "diu": "丟丢銩铥",
+    "dong": (
+        "东侗倲働冬冻凍动動咚垌埬墥姛娻嬞岽峒崠崬徚恫懂戙挏昸東栋棟氡氭洞涷湩硐笗箽絧胨胴"
+        "腖苳菄董蕫蝀諌迵霘駧鮗鯟鶇鶫鸫鼕鿴"
+    ),
+    "dou": "乧兜兠吺唗唞抖斗斣枓梪橷毭浢痘窦竇篼脰荳蔸蚪豆逗郖都酘鈄閗闘阧陡餖饾鬥鬦鬪鬬鬭",
+    "du": (
+        "凟剢匵厾嘟堵妒妬嬻帾度杜椟櫝殬殰毒涜渎渡瀆牍牘犊犢独獨琽瓄皾督睹碡秺笃篤肚芏荰蝳"
+        "螙蠧蠹裻覩読讀讟读豄賭贕赌醏錖鍍鑟镀闍阇靯韇韣韥騳髑黩黷"
+    ),
+    "duan": "偳剬塅媏断斷椴段毈煅瑖短碫端簖籪緞缎耑腶葮褍躖鍛鍴锻",
+    "dui": "兊兌兑垖堆塠对対對嵟怼憝憞懟濧瀩痽碓磓祋綐薱襨譈譵鐓鐜镦队陮隊頧鴭",
+    "dun": "伅吨噸囤墩墪庉惇撉撴敦楯橔沌潡炖燉犜獤盹盾砘碷礅蜳趸踲蹲蹾躉逇遁遯鈍钝頓顿驐",
+    "duo": (
+        "亸凙刴剁剟剫咄哆哚喥嚉嚲垛垜埵堕墮墯多夛夺奪奲尮崜嶞惰憜挅挆掇敓敚敠敪朵朶柁柮桗"
+        "椯毲畓痥綞缍舵裰趓跢跥跺踱躱躲軃鈬鐸铎陊陏飿饳鮵鵽"
+    ),
+    "e": (
+        "俄偔僫匎卾厄吪呃呝咢咹噁噩囮垩堊堮妸妿姶娥娿婀屙屵岋峉峨峩崿廅恶悪惡愕戹扼搤搹擜"
+        "枙櫮歞歺涐湂珴琧痾皒睋砈砐砨硆磀礘腭苊莪萼蕚蚅蛾蝁覨訛詻誐諤譌讍讹谔豟軛軶轭迗遌"
+        "遏遻鄂鈋鈪鋨鍔鑩锇锷閼阏阨阸頋頞頟額顎颚额餓餩饿騀魤魥鰐鰪鱷鳄鵈鵝鵞鶚鹅鹗齃齶"
+    ),
+    "ei": "誒诶",
+    "en": "奀峎恩摁煾蒽",
+    "eng": "鞥",
+    "er": (
+        "二佴侕儿児兒刵厼咡唲尒尓尔峏弍弐栭栮樲毦洏洱爾珥粫而耳聏胹荋薾衈袻誀貮貳贰趰輀轜"
+        "迩邇鉺铒陑隭餌饵駬髵鮞鲕鴯鸸"
+    ),
+    "fa": "乏伐佱傠发垡姂彂栰橃沷法浌灋珐琺疺発發瞂砝笩筏罚罰罸茷蕟藅醱鍅閥阀髪髮",
+    "fan": (
+        "仮凡凢凣勫匥反噃墦奿婏嬎嬏帆幡忛憣払旙旛杋柉梵棥樊橎氾汎泛渢滼瀪瀿烦煩燔犯璠畈番"
+        "盕矾礬笲笵範籓籵緐繁繙羳翻膰舤舧范蕃薠藩蘩蠜襎訉販贩蹯軓軬轓返釩鐇鐢钒颿飜飯飰饭"
+        "鱕鷭"
+    ),
+    "fang": "仿倣匚坊埅堏妨房放方旊昉昘枋汸淓牥瓬眆紡纺肪舫芳蚄訪访趽邡鈁錺钫防髣魴鰟鲂鴋鶭",
+    "fei": (
+        "俷剕匪厞吠啡奜妃婓婔屝废廃廢悱扉斐昲暃曊朏杮棐榧櫠沸淝渄濷狒猆疿痱癈篚緋绯翡肥肺"
+        "胇胐腓芾菲萉蕜蜚蜰蟦裶誹诽費费鐨镄陫霏靅非靟飛飝飞餥馡騑騛鯡鲱鼣"
+    ),
+    "fen": (
+        "份偾僨兝兺分吩哛坟墳奋奮妢岎帉幩弅忿愤憤昐朆朌枌梤棻棼橨氛汾濆瀵炃焚燌燓瞓秎竕粉"
+        "粪糞紛纷羒羵翂肦膹芬蒶蕡蚠蚡衯訜豮豶躮轒酚鈖鐼隫雰餴饙馚馩魵鱝鲼黂黺鼖鼢"
+    ),
+    "feng": (
+        "丰仹俸偑僼冯凤凨凬凮唪堸夆奉妦寷封峯峰崶捀摓枫桻楓檒沣沨浲湗溄漨灃烽焨煈犎猦琒甮"
+        "疯瘋盽砜碸篈綘縫缝艂葑蘴蜂蠭覂諷讽豐賵赗逢鄷酆鋒鎽鏠锋闏霻靊風飌风馮鳯鳳鴌麷"
+    ),
+    "fiao": "覅",
+    "fo": "仏坲梻",
+    "fou": "否妚殕紑缶缹缻裦雬鴀",
+    "fu": (
+        "乀乶付伏伕佛俌俘俛俯偩傅冨冹凫刜副匐呋咈咐哹嘸坿垘垺复夫妇妋姇娐婦媍嬔孚孵富尃岪"
+        "峊巿幅幞府弗弣彿復怤怫懯扶抚拂拊捬撨撫敷斧旉服枎柎柫栿桴棴椨椱榑氟泭洑浮涪滏澓炥"
+        "烰焤父玞玸琈甫甶畉畐痡癁盙砆砩祓祔福禣秿稃稪竎符笰筟箙簠粰糐紨紱紼絥綍綒緮縛绂绋"
+        "缚罘罦翇肤胕腐腑腹膚艀艴芙芣苻茀茯荂荴莩菔萯葍蕧虙蚥蚨蚹蛗蜅蜉蝜蝠蝮衭袝袱複褔襆"
+        "襥覄覆訃詂諨讣豧負賦賻负赋赙赴趺跗踾輔輹輻辅辐邞郙郛鄜酜釜釡鈇鉘鉜鍑鍢阜阝附陚韍"
+        "韨頫颫馥駙驸髴鬴鮄鮒鮲鰒鲋鳆鳧鳬鳺鴔鵩鶝麩麬麱麸黻黼"
+    ),
+    "ga": "伽呷嘎嘠噶尕尜尬旮玍釓錷钆魀",
+    "gai": "丐乢侅匃匄垓姟峐忋戤摡改晐杚概槩槪溉漑瓂畡盖祴絠絯荄葢蓋該该豥賅賌赅郂鈣钙阣陔隑",
+    "gan": (
+        "乹亁仠倝凎凲咁坩尲尴尶尷干幹忓感扞擀攼敢旰杆柑桿榦橄檊汵泔淦漧澉灨玕甘疳皯盰矸秆"
+        "稈竿笴筸簳粓紺绀肝芉苷衦詌贑贛赣赶趕迀酐骭魐鰔鱤鳡鳱"
+    ),
+    "gang": "冈冮刚剛堈堽岗岡崗戅戆掆杠棡槓港焵焹牨犅疘矼筻綱纲缸罁罓罡肛釭鋼鎠钢鿍",
+    "gao": (
+        "勂吿告夰峼搞暠杲槀槁槔槹橰檺櫜滜皋皐睾祮祰禞稁稾稿筶篙糕縞缟羔羙膏臯菒藁藳誥诰郜"
+        "鋯锆镐韟餻高髙鷎鷱鼛"
+    ),
+    "ge": (
+        "个仡佮個割匌各呄咯哥哿嗝嗰圪塥彁愅戈戓戨挌搁搿擱敋格槅櫊歌滆滒牫牱犵獦疙硌箇纥肐"
+        "胳膈臵舸茖葛虼蛒袼裓觡諽謌輵轕鉻鎶铬镉閣閤阁隔革鞈鞷韐韚騔骼鬲鮯鴐鴚鴿鸽鿔"
+    ),
+    "gei": "給给",
+    "gen": "亘亙哏揯搄根艮茛跟",
+    "geng": "刯哽埂堩峺庚挭暅更梗椩浭焿畊絚綆緪縆绠羮羹耕耿莄菮賡赓郠骾鯁鲠鶊鹒",
+    "gong": (
+        "供公共功匑匔厷唝塨宫宮工巩幊廾弓恭愩慐拱拲攻杛栱汞熕珙碽糼羾肱莻蚣觥觵貢贡躬躳輁"
+        "鞏髸龏龔龚"
+    ),
+    "gou": (
+        "佝冓勾坸垢够夠姤媾岣彀搆撀构枸構沟溝煹狗玽笱篝簼緱缑耇耈耉芶苟茩蚼袧褠覯觏訽詬诟"
+        "豿購购遘鈎鉤钩雊鞲韝"
+    ),
+    "gu": (
+        "估傦僱凅古呱咕唂唃啒嘏固堌夃姑嫴孤尳崓崮愲扢故柧梏棝榖榾橭毂汩沽泒淈濲瀔牯牿痼皷"
+        "皼盬瞽祻稒穀笟箍箛篐糓縎罛罟羖股脵臌苽菇菰蓇薣蛄蛊蛌蠱觚詁诂谷軱軲轂轱辜逧酤鈲鈷"
+        "錮钴锢雇顧顾餶馉骨鮕鯝鲴鴣鶻鸪鹄鹘鼓鼔"
+    ),
+    "gua": "冎刮剐剮劀卦叧啩坬寡挂掛栝歄煱瓜絓緺罣罫聒胍褂詿诖趏踻銽颪颳騧鴰鸹",
+    "guai": "乖叏夬怪恠拐掴摑枴柺箉",
+    "guan": (
+        "丱倌关冠官悹悺惯慣掼摜棺樌毌泴涫潅灌爟琯瓘痯瘝癏盥矔礶祼窤筦管罆罐舘莞蒄覌観觀观"
+        "貫贯躀輨遦錧鏆鑵関闗關雚館馆鰥鱞鱹鳏鳤鸛鹳"
+    ),
+    "guang": "侊俇僙光咣垙姯广広廣撗桄欟洸灮炗炚炛烡犷獷珖胱臦臩茪輄逛銧黆",
+    "gui": (
+        "亀佹傀刽刿劊劌匦匭匱厬圭垝妫姽媯嫢嬀宄嶡巂帰庋庪廆归恑摫撌攰攱昋晷朹柜桂桧椝椢槶"
+        "槻槼檜櫃櫷歸氿湀炔猤珪瑰璝瓌癐癸皈瞡瞶硅祪禬窐筀簂簋胿膭茥蓕蛫螝蟡袿襘規规觤詭诡"
+        "貴贵跪軌轨邽郌閨闺陒鞼騩鬶鬹鬼鮭鱖鱥鲑鳜龜龟"
+    ),
+    "gun": "丨惃棍滚滾璭睔睴磙緄绲蓘蔉衮袞謴輥辊鮌鯀鲧",
+    "guo": (
+        "呙咼啯嘓囯囶囻国圀國埚堝墎崞帼幗彉彍惈慖果椁槨淉漍濄猓瘑粿綶聝腘膕菓蔮虢蜾蝈蟈裹"
+        "褁輠过過郭鈛錁鍋鐹锅餜馃馘"
+    ),
+    "ha": "哈奤蛤铪",
+    "hai": "亥咍嗐嗨嚡塰妎孩害氦海烸胲还還酼醢頦餀饚駭駴骇骸",
+    "han": (
+        "丆佄傼兯函凾厈含哻唅喊圅垾娢嫨寒屽岾崡嵅悍憨憾捍撖撼旱晗晘暵梒歛汉汗浛浫涆涵漢澏"
+        "瀚焊焓熯爳猂琀甝皔睅筨罕翰肣莟菡蔊蘫虷蚶蛿蜬蜭螒譀谽豃邗邯酣釬銲鋎鋡閈闬阚雗韓韩"
+        "頇頷顄顸颔馠馯駻鬫魽鶾鼾鿰"
+    ),
+    "hang": "垳夯斻杭沆珩笐筕絎绗航苀蚢貥迒頏颃魧",
+    "hao": (
+        "傐儫号哠嗥嘷噑嚆嚎壕好恏悎昊昦晧暤暭曍椃毜毫浩淏滈澔濠灏灝獆獋獔皓皜皞皡皥秏竓籇"
+        "耗聕茠蒿薃薅薧號蚝蠔諕譹豪貉郝鄗鎬顥颢鰝"
+    ),
+    "he": (
+        "何佫劾合呵咊和哬啝喝嗃嗬垎壑姀寉峆惒抲敆曷柇核楁欱毼河涸渮澕焃煂熆熇燺爀狢癋皬盇"
+        "盉盍盒碋礉禾秴穒篕籺粭紇翮翯荷菏萂蚵螛蠚袔褐覈訶訸詥謞诃貈賀贺赫郃鉌鑉闔阂阖靍靎"
+        "靏鞨頜颌饸魺鲄鶡鶮鶴鸖鹖鹤麧齕龁龢"
+    ),
+    "hei": "嘿潶黑黒",
+    "hen": "佷很恨拫狠痕詪鞎",
+    "heng": "亨哼啈堼姮恆恒悙桁横橫涥烆胻脝蘅衡鑅鴴鵆鸻",
+    "hm": "噷",
+    "hong": (
+        "仜叿吰吽呍哄嗊嚝垬妅娂宏宖弘彋揈撔晎汯泓洪浤渱渹潂澋澒灴烘焢玒玜硔硡竑竤粠紅紘紭"
+        "綋红纮翃翝耾苰荭葒葓蕻薨虹訇訌讧谹谼谾軣輷轟轰鈜鉷銾鋐鍧閎閧闀闂闳霐霟鞃鬨魟鴻鸿"
+        "黉黌"
+    ),
+    "hou": "侯候厚后吼喉垕堠帿後洉犼猴瘊睺矦篌糇翭翵葔豞逅郈鄇鍭餱骺鮜鯸鱟鲎鲘齁",
+    "hu": (
+        "乎乕乥乯互俿冱冴匢匫呼唬唿喖嗀嘑嘝嚛囫垀壶壷壺婟媩嫭嫮寣岵帍幠弖弧忽怘怙恗惚戯戶"
+        "户戸戽扈抇护搰摢斛昈昒曶枑楛楜槲槴歑汻沍沪泘浒淴湖滬滸滹瀫烀焀煳熩狐猢琥瑚瓠瓳祜"
+        "笏箶簄粐糊絗綔縠胡膴芐苸萀葫蔛蔰虍虎虖虝蝴螜衚觳謼護軤轷鄠醐錿鍙鍸隺雐雽韄頀頶餬"
+        "鬍魱鯱鰗鱯鳠鳸鵠鶘鶦鸌鹕鹱"
+    ),
+    "hua": (
+        "划劃化华哗嘩埖夻姡婲婳嫿嬅崋搳摦撶杹枠桦椛槬樺滑澅猾画畫畵硴磆糀繣舙花芲華蒊蕐蘤"
+        "螖觟話誮諙諣譁譮话釪釫鋘錵鏵铧驊骅鷨黊"
+    ),
+    "huai": "咶坏壊壞徊怀懐懷槐櫰淮瀤耲蘹蘾褢褱踝",
+    "huan": (
+        "唤喚喛嚾圜奂奐嬛宦寏寰峘嵈幻患愌懽换換擐攌桓梙槵欢歓歡洹浣涣渙漶澣澴烉焕煥犿狟獾"
+        "环瑍環瓛痪瘓睆糫絙綄緩繯缓缳羦肒荁萈萑藧讙豢豲貆貛轘逭郇酄鉮鍰鐶锾镮闤阛雈驩鬟鯇"
+        "鯶鰀鲩鴅鵍鹮"
+    ),
+    "huang": (
+        "偟兤凰喤堭塃墴奛媓宺崲巟幌徨怳恍惶愰慌晃晄曂朚楻榥櫎湟滉潢炾煌熀熿獚瑝璜癀皇皝皩"
+        "磺穔篁篊簧縨肓艎荒葟蝗蟥衁詤諻謊谎趪遑鍠鎤鐄锽隍韹餭騜鰉鱑鳇鷬黃黄"
+    ),
+    "hui": (
+        "会佪僡儶匯卉咴哕喙嘒噅噕嚖囘回囬圚婎媈嬒孈寭屶屷幑廻廽彗彙彚徻徽恚恛恢恵悔惠慧憓"
+        "懳拻挥揮撝晖晦暉暳會楎槥橞檅檓櫘殨毀毁毇汇泋洃洄浍湏滙潓澮濊瀈灰灳烠烣烩煇燬燴獩"
+        "珲璤璯痐瘣睳瞺禈秽穢篲絵繢繪绘缋翙翚翬翽芔茴荟蔧蕙薈薉藱蘳虺蚘蛔蛕蜖蟪袆褘詯詼誨"
+        "諱譓譭譿讳诙诲豗賄贿輝辉迴逥鏸鐬闠阓隓隳靧頮顪颒餯鮰鰴麾"
+    ),
+    "hun": "俒倱圂堚婚忶惛慁掍昏昬梡棔殙浑涽混渾溷焝琿睧睯繉荤葷觨諢诨轋閽阍餛馄魂鼲",
+    "huo": (
+        "伙佸俰剨劐吙咟嚄嚯嚿夥奯惑或捇掝攉旤曤楇檴沎活湱漷濩瀖火獲癨眓矆矐砉祸禍秮秳穫耠"
+        "耯臛艧获蒦藿蠖謋豁貨货邩鈥鍃鑊钬锪镬閄霍靃騞"
+    ),
+    "ji": (
+        "丌丮乩亟亼亽伋伎佶偈偮僟兾冀几击刉刏剂剞剤劑勣卙即卽及叝叽吉咭哜唧喞嗘嘰嚌圾坖垍"
+        "基塈塉墼妀妓姞姫姬嫉季寂寄屐岌峜嵆嵇嵴嶯己幾庴廭彐彑彶徛忌忣急悸惎愱懻戟戢技挤掎"
+        "揤撃撠擊擠敧旡既旣暨暩曁朞机极枅梞棘楫極槉槣樭機橶檕檝檵櫅殛毄汲泲洎济済湒漃漈潗"
+        "激濈濟瀱焏犄犱狤玑璣畸畿疾痵瘠癠癪皀皍矶磯祭禝禨积稘稩稷稽穄穊積穖穧笄笈筓箕箿簊"
+        "籍紀紒級継緝績繋繼级纪继绩缉罽羁羇羈耤耭肌脊膌臮艥芨芰茍茤荠葪蒺蓟蔇蕀蕺薊薺藉蘎"
+        "蘮蘻虀虮螏蟣裚襀襋覉覊覬觊觙觭計記誋諅譏譤计讥记诘谻賫賷赍趌跡跻跽踖蹐蹟躋躤躸輯"
+        "轚辑迹郆鄿銈銡錤鍓鏶鐖鑇鑙际際隮集雞雦雧霁霵霽鞿韲飢饑饥驥骥髻鬾魕魢鯚鰶鰿鱀鱭鱾"
+        "鲚鲫鳮鵋鶏鶺鷄鷑鸄鸡鹡麂齌齎齏齑"
+    ),
+    "jia": (
+        "乫价佳假傢價加叚唊嘉圿埉夹夾婽嫁家岬幏徦忦恝戛戞扴抸拁斚斝架枷梜椵榎榢槚檟毠泇浃"
+        "浹犌猳玾珈甲痂瘕稼笳糘耞胛腵茄荚莢葭蛱蛺袈袷裌豭貑賈贾跏跲迦郏郟鉀鉫鉿鋏鎵钾铗镓"
+        "頬頰颊餄駕驾鴶鵊麚鿼"
+    ),
+    "jian": (
+        "件俭俴倹健僭儉兼冿减剑剣剪剱劍劎劒劔劗囏囝坚堅堿墹奸姦姧寋尖幵建弿彅徤惤戋戔戩戬"
+        "拣挸捡揀揃搛撿擶旔暕枧柬栫梘检検椷椾楗榗樫橺檢櫼歼殱殲毽洊涧渐減湔湕溅漸澗濺瀐瀳"
+        "瀸瀽煎熞熸牋牮犍猏玪珔瑊瑐监監睑睷瞷瞼硷碊碱磵礀礆礛笕笺筧简箋箭篯簡籛糋絸緘縑繝"
+        "繭缄缣翦肩腱臶舰艦艰艱茧荐菅菺葌葥蒹蔪蕑蕳薦藆虃螹蠒袸裥襇襉襺見覵覸见詃諓諫謇謭"
+        "譼譾谏谫豜豣賎賤贱趝趼践踐踺蹇轞釼鉴鋻鍳鍵鏩鐗鐧鐱鑑鑒鑬鑯鑳锏键間间鞬鞯韀韉餞餰"
+        "饯馢鬋鰎鰹鲣鳒鳽鵳鶼鹣鹸鹻鹼麉"
+    ),
+    "jiang": (
+        "傋僵勥匞匠壃夅奖奨奬姜将將嵹弜弶彊摪摾桨槳橿櫤殭江洚浆滰漿犟獎畕畺疅疆礓糡糨絳繮"
+        "绛缰翞耩膙茳葁蒋蔣薑螀螿袶講謽讲豇酱醤醬降韁顜鱂鳉"
+    ),
+    "jiao": (
+        "交佼侥僥僬儌剿劋叫呌嘂嘄嘦噍噭姣娇嬌嬓孂峤峧嶕嶠嶣徺徼恔憍憿挍挢捁搅摷撟撹攪敎教"
+        "敫敽敿斠晈暞曒椒櫵浇湫湬滘漖潐澆灚烄焦煍燋燞狡獥珓璬皎皦皭矫矯礁穚窌窖笅簥絞繳纐"
+        "绞缴胶脚腳膠膲臫艽芁茭茮蕉藠虠蛟蟜蟭角訆譑譥賋趭跤踋較轇轎轿较郊酵醮釂鉸鐎铰隦餃"
+        "饺驕骄鮫鱎鲛鵁鵤鷦鷮鹪"
+    ),
+    "jie": (
+        "丯介借倢偼傑刦刧刼劫劼卩卪吤喈喼嗟堦堺姐婕媎媘媫嫅孑尐屆届岊岕崨嵥嶻巀幯庎徣悈戒"
+        "截拮捷接掲掶揭擑擮昅杢杰桀桝椄楐楬楶榤檞櫭毑洁湝滐潔煯犗玠琾界畍疌疖疥痎癤皆睫砎"
+        "碣礍秸稭竭節結絜结羯脻节芥莭菨蓵蚧蛶蜐蝍蝔蠘蠞蠽街衱衸袺褯解觧訐詰誡誱謯讦诫踕迼"
+        "鉣鍻鎅阶階鞂鞊颉飷骱魝魪鮚鲒鶛"
+    ),
+    "jin": (
+        "仅今伒侭僅僸儘兓凚劤劲勁卺厪唫噤嚍埐堇堻墐壗妗嫤嬧寖尽嶜巹巾廑惍搢斤晉晋枃槿歏殣"
+        "津浕浸溍漌濅濜烬煡燼珒琎琻瑨瑾璡璶盡矜矝砛祲禁筋紟紧緊縉缙荕荩菫蓳藎衿襟覲觐觔謹"
+        "谨賮贐赆近进進金釒釿錦钅锦靳饉馑鹶黅齽"
+    ),
+    "jing": (
+        "丼井京亰俓倞傹儆兢净凈刭剄坓坕坙境妌婙婛婧宑巠幜弪弳径徑惊憬憼敬旌旍景晶暻曔桱梷"
+        "橸汫汬泾浄涇淨瀞燝猄獍璄璟璥痉痙睛秔稉穽竞竟竧竫競竸粳精経經经聙肼胫脛腈茎荆荊莖"
+        "菁葏蟼誩警踁迳逕鏡镜阱靓靖静靚靜頚頸颈驚鯨鲸鵛鶁鶄麖麠鼱"
+    ),
+    "jiong": "侰僒冂冋冏囧坰埛扃泂浻澃炅炯烱煚煛熲燛窘絅綗蘏蘔褧迥逈颎駉駫",
+    "jiu": (
+        "丩久乆九乣倃僦勼匓匛匶厩咎啾奺就廄廏廐慦捄揂揪揫摎救旧朻杦柩柾桕樛欍殧汣灸牞玖疚"
+        "究糺糾紤纠臼舅舊舏萛赳酒镹阄韭韮鬏鬮鯦鳩鷲鸠鹫麔齨"
+    ),
+    "ju": (
+        "举乬侷俱倨倶僪具冣凥剧劇勮匊句咀啹埧埾壉姖娵婅婮寠局居屦屨岠崌巈巨巪弆怇怐怚惧愳"
+        "懅懼抅拒拘拠挙挶据掬據擧昛桔梮椇椈椐榉榘橘檋櫸欅歫毩毱沮泃泦洰涺淗湨澽炬烥焗爠犋"
+        "犑狊狙琚疽痀眗矩砠秬窭窶筥簴粔粷罝耟聚聥腒舉艍苣苴莒菊菹蒟蘜虡蚷蜛袓裾襷詎諊讵豦"
+        "貗趄趜跔跙距跼踘踞踽蹫躆躹輂遽邭郹醵鉅鋦鋸鐻钜锔锯閰陱雎鞠鞫颶飓駏駒駶驧驹鮈鮔鴡"
+        "鵙鵴鶋鶪鼰鼳齟龃"
+    ),
+    "juan": (
+        "倦劵勌勬卷呟埍奆姢娟巻帣慻捐捲桊涓淃焆狷獧瓹眷睊睠絭絹縳绢罥羂脧臇菤蔨蠲裐鄄錈鎸"
+        "鐫锩镌隽雋飬餋鵑鹃"
+    ),
+    "jue": (
+        "亅倔傕决刔劂勪匷厥噘噱嚼孒孓屩屫崛嶥弡彏憠憰戄抉挗捔掘撅撧攫斍桷橛橜欔欮殌氒決泬"
+        "灍焳熦爑爝爴爵獗玃玦玨珏瑴疦瘚矍矡砄絕絶绝臄芵蕝蕨虳蚗蟨蟩覐覚覺觉觖觼訣譎诀谲貜"
+        "赽趉趹蹶蹷蹻躩逫鈌鐍鐝钁镢駃鴂鴃鶌鷢龣"
+    ),
+    "jun": (
+        "俊儁军君呁均埈姰寯峻懏捃攈攟晙桾棞汮浚濬焌燇珺畯皲皸皹碅竣箘箟莙菌蚐蜠袀覠軍郡鈞"
+        "銁銞鍕钧陖餕馂駿骏鮶鲪鵔鵕鵘麇麏麕"
+    ),
+    "ka": "佧卡咔咖喀垰擖胩衉裃鉲",
+    "kai": "凯凱剀剴勓嘅垲塏奒嵦开忾恺愒愷愾慨揩暟楷欬炌炏烗蒈輆鍇鎎鎧鐦铠锎锴開闓闿颽",
+    "kan": "侃偘冚刊勘坎埳堪塪墈崁嵁惂戡栞槛檻欿歁看瞰矙砍磡竷莰衎輡轗闞顑龕龛",
+    "kang": "亢伉匟囥嫝嵻康忼慷扛抗摃槺漮炕犺砊穅粇糠躿邟鈧鏮钪閌闶鱇",
+    "kao": "丂尻拷攷栲洘烤犒考銬铐靠髛鮳鯌鲓",
+    "ke": (
+        "克刻剋勀勊匼可咳嗑坷堁壳娔客尅岢嵑嵙嶱恪愙揢搕敤柯棵榼樖殼氪渇渴溘炣牁犐珂疴瞌砢"
+        "碦磕礊礚科稞窠緙缂翗胢艐苛萪薖蝌課课趷軻轲醘鈳钶锞顆颏颗騍骒髁"
+    ),
+    "ken": "啃垦墾恳懇掯肎肯肻裉褃豤錹齦龈",
+    "keng": "劥吭坑妔挳摼牼硁硜硻誙銵鍞鏗铿阬",
+    "kong": "倥埪孔崆恐悾控涳硿空箜躻錓鞚鵼",
+    "kou": "冦剾劶口叩宼寇彄扣抠摳敂滱眍瞉瞘窛筘簆芤蔲蔻釦鷇",
+    "ku": "俈刳哭喾嚳圐堀崫库庫廤扝枯桍焅狜瘔矻秙窟絝绔苦袴裤褲趶跍郀酷骷鮬",
+    "kua": "侉咵垮夸姱挎胯舿誇跨銙骻",
+    "kuai": "侩儈凷哙噲圦块塊墤巜廥快擓旝狯獪筷糩脍膾蒯郐鄶鱠鲙",
+    "kuan": "宽寛寬欵款歀窽窾臗鑧髋髖",
+    "kuang": (
+        "儣况劻匡匩卝哐圹壙夼岲忹恇懬懭抂旷昿曠框況洭爌狂狅眖眶矌矿砿硄礦穬筐筺絋絖纊纩誆"
+        "誑诓诳貺贶軖軠軦軭邝邼鄺鉱鋛鑛鵟黋"
+    ),
+    "kui": (
+        "亏刲匮喟喹嘳夔奎媿嬇尯岿巋巙悝愦愧憒戣揆晆暌楏楑樻櫆欳溃潰煃犪盔睽瞆窥窺篑簣籄聧"
+        "聩聭聵腃葵蒉蕢藈蘬蘷虁虧蝰謉跬蹞躨逵鄈鍨鍷鐀鑎闚隗頄頍頯顝餽饋馈馗騤骙魁"
+    ),
+    "kun": (
+        "困坤堃堒壸壼婫尡崐崑悃捆昆晜梱涃潉焜熴猑琨瑻睏硱祵稇稛綑菎蜫裈裍裩褌貇醌錕锟閫閸"
+        "阃騉髠髡髨鯤鲲鵾鶤鹍"
+    ),
+    "kuo": "廓懖扩拡括挄擴桰濶筈萿葀蛞闊阔霩鞟鞹韕頢髺鬠",
+    "la": "剌啦喇嚹垃拉揦揧搚攋旯柆楋溂爉瓎瘌砬磖翋腊臈臘菈藞蜡蝋蝲蠟辢辣邋鑞镴鞡鬎鯻",
+    "lai": (
+        "來俫倈唻婡崃崍庲徕徠来梾棶櫴涞淶濑瀨瀬猍琜癞癩睐睞筙箂籁籟莱萊藾襰賚賴赉赖逨郲錸"
+        "铼頼顂騋鯠鵣鶆麳"
+    ),
+    "lan": (
+        "儖兰厱嚂囒囕壈婪嬾孄孏岚嵐幱惏懒懢懶拦揽擥攔攬斓斕栏榄欄欖欗浨滥漤澜濫瀾灆灠灡烂"
+        "燗燣燷爁爛爤爦璼瓓礷篮籃籣糷繿纜缆罱葻蓝藍蘭褴襕襤襴襽覧覽览譋讕谰躝醂鑭钄镧闌阑"
+        "韊顲"
+    ),
+    "lang": (
+        "勆唥啷埌塱嫏崀廊斏朖朗朤桹榔樃欴浪烺狼琅瑯硠稂筤艆莨蒗蓈蓢蜋螂誏躴郎郒郞鋃鎯锒閬"
+        "阆駺鿶鿾"
+    ),
+    "lao": (
+        "佬僗劳労勞咾哰唠嗠嘮姥嫪崂嶗恅憥憦捞撈朥栳橑橯浶涝潦澇烙牢狫珯痨癆硓磱窂簩粩老耂"
+        "耢耮荖蛯蟧躼軂轑酪醪銠鐒铑铹顟髝鮱鿲"
+    ),
+    "le": "乐了仂叻忇扐楽樂氻泐玏砳竻簕肋艻阞韷餎饹鰳鳓",
+    "lei": (
+        "傫儡儽勒厽嘞垒塁壘壨嫘擂攂樏檑櫐櫑欙泪洡涙淚灅瓃畾癗矋磊磥礌礧礨禷类累絫縲纇纍纝"
+        "缧罍羸耒腂蔂蕌蕾藟蘱蘲蘽虆蠝誄讄诔轠酹銇錑鐳鑘鑸镭雷靁頛頪類颣鱩鸓鼺"
+    ),
+    "leng": "倰冷堎塄崚愣棱楞睖碐稜薐踜輘",
+    "li": (
+        "丽例俐俚俪傈儮儷兣凓刕利剓剺劙力励勵历厉厘厤厯厲吏呖哩唎唳喱嚟嚦囄囇坜塛壢娌娳婯"
+        "嫠孋孷屴岦峛峢峲巁廲悡悧悷慄戾搮攊攦攭斄暦曆曞朸李杝枥栃栎栗栛梨梩梸棃棙樆檪櫔櫟"
+        "櫪欐欚歴歷沥沴浬涖溧漓澧濿瀝灕爄爏犁犂犡狸猁珕理琍瑮璃瓅瓈瓑瓥疠疬痢癘癧皪盠盭睝"
+        "砅砺砾磿礪礫礰礼禮禲离秝穲立竰笠筣篥篱籬粒粝粴糎糲綟縭纚缡罹脷艃苈苙茘荔荲莅莉菞"
+        "蒚蒞蓠蔾藜藶蘺蚸蛎蛠蜊蜧蝷蟍蟸蠇蠡蠣蠫裏裡褵觻詈謧讈豊貍赲跞躒轢轣轹逦邌邐郦酈醨"
+        "醴里釐鉝鋫鋰錅鎘鏫鑗锂隶隷隸離雳靂靋驪骊鬁鯉鯏鯬鱧鱱鱳鱺鲡鲤鳢鳨鴗鵹鷅鸝鹂麗麜黎"
+        "黧"
+    ),
+    "lia": "俩倆",
+    "lian": (
+        "亷僆劆匲匳嗹噒堜奁奩媡嫾嬚帘廉怜恋慩憐戀摙敛斂梿楝槤櫣殓殮浰涟湅溓漣潋澰濂濓瀲炼"
+        "煉熑燫琏瑓璉磏簾籢籨練縺纞练羷翴联聨聫聮聯脸臁臉莲萰蓮蔹薕蘝蘞螊蠊裢裣褳襝覝謰蹥"
+        "连連鄻錬鍊鎌鏈鐮链镰鬑鰊鰱鲢"
+    ),
+    "liang": (
+        "両两亮俍兩凉哴唡啢喨墚悢掚晾梁椋樑涼湸煷粮粱糧綡緉脼良蜽裲諒谅踉輌輛輬辆辌量鍄魉"
+        "魎鿄鿌"
+    ),
+    "liao": (
+        "僚叾嘹嫽寥寮尞尥尦屪嵺嶚嶛廖廫憀憭撂撩敹料暸曢漻炓燎爎爒獠璙疗療瞭窷竂簝繚缭聊膋"
+        "膫蓼藔蟟豂賿蹘蹽辽遼鄝釕鐐钌镣镽飉髎鷯鹩"
+    ),
+    "lie": (
+        "儠冽列劣劽咧哷埒埓姴巤挒挘捩擸栵毟洌浖烈烮煭犣猎猟獵睙聗脟茢蛚裂趔躐迾颲鬛鬣鮤鱲"
+        "鴷"
+    ),
+    "lin": (
+        "临亃僯冧凛凜厸吝啉壣崊嶙廩廪恡悋懍懔拎撛斴晽暽林橉檁檩淋潾澟瀶焛燐獜琳璘甐疄痳癛"
+        "癝瞵碄磷箖粦粼繗翷膦臨菻蔺藺賃赁蹸躏躙躪轔轥辚遴邻鄰鏻閵隣霖驎鱗鳞麐麟"
+    ),
+    "ling": (
+        "令伶凌刢另呤囹坽夌姈婈孁岭岺嶺彾掕昤朎柃棂櫺欞泠淩澪瀮灵炩燯爧狑玲琌瓴皊砱祾秢竛"
+        "笭紷綾绫羚翎聆舲苓菱蓤蔆蕶蘦蛉衑袊裬詅跉軨酃醽鈴錂铃閝阾陵零霊霗霛霝靈領领駖魿鯪"
+        "鲮鴒鸰鹷麢齡齢龄龗"
+    ),
+    "liu": (
+        "六刘劉嚠塯媹嬼嵧廇懰旈旒柳栁桞桺榴橊橮沠流浏溜澑瀏熘熮珋琉瑠瑬璢畂畄留畱疁瘤癅硫"
+        "磂磟綹绺罶羀翏蒥蓅藰蟉裗蹓遛鋶鎏鎦鏐鐂锍镏镠雡霤飀飂飅飗餾馏駠駵騮驑骝鬸鰡鶹鷚鹠"
+        "鹨麍"
+    ),
+    "lo": "囖",
+    "long": (
+        "儱咙哢嚨垄垅壟壠屸嶐巃巄徿拢攏昽曨朧栊梇槞櫳泷湰滝漋瀧爖珑瓏癃眬矓砻礱礲窿竉竜笼"
+        "篢篭籠聋聾胧茏蕯蘢蠪蠬襱豅贚躘鏧鑨陇隆隴霳靇驡鸗龍龒龓龙"
+    ),
+    "lou": (
+        "偻僂剅喽嘍塿娄婁屚嵝嶁廔慺搂摟楼樓溇漊漏熡甊瘘瘺瘻瞜篓簍耧耬艛蒌蔞蝼螻謱軁遱鏤镂"
+        "陋鞻髅髏"
+    ),
+    "lu": (
+        "侓侣侶僇儢剹勎勠勴卢卤吕呂噜嚕嚧圥坴垆垏塶塷壚娽寽屡屢履峍嵂庐廘廬彔录律慮戮挔捋"
+        "捛掳摝撸擄擼攎旅曥枦栌梠椂榈樐樚橹櫓櫖櫚櫨氀氇氌氯泸淕淥渌滤滷漉潞澛濾瀂瀘炉焒熝"
+        "爈爐獹率玈琭璐璷瓐甪盝盧睩矑硉硵碌磠祣祿禄稆稑穋穞穭箓箻簏簬簵簶籙籚粶絽綠緑縷繂"
+        "纑绿缕罏胪膂膐膔膟膢臚舮舻艣艪艫芦菉葎蓾蔍蕗藘蘆虂虏虑虜螰蠦褛褸觮謢賂赂趢路踛蹗"
+        "輅轆轤轳辂辘逯郘醁鈩鋁錄録錴鏀鏕鏴鐪鑢鑥鑪铝镥閭闾陆陸露顱颅馿騄騼驢驴髗魯魲鯥鱸"
+        "鲁鲈鵦鵱鷜鷺鸕鸬鹭鹵鹿麓黸"
+    ),
+    "luan": "乱亂卵圝圞奱娈孌孪孿峦巒挛攣曫栾欒滦灓灤癴癵羉脔臠虊釠銮鑾鵉鸞鸾龻",
+    "lun": "仑伦侖倫囵圇埨婨崘崙惀抡掄棆沦淪溣碖磮稐綸纶耣腀菕蜦論论踚輪轮錀陯鯩",
+    "luo": (
+        "倮儸剆啰囉峈摞攞曪椤欏泺洛洜漯濼犖猡玀珞瘰癳硦笿箩籮絡纙络罖罗羅脶腡臝荦萝落蓏蘿"
+        "螺蠃裸覙覶覼躶逻邏鏍鑼锣镙雒頱饠駱騾驘骆骡鮥鴼鵅鸁"
+    ),
+    "lve": "圙掠擽略畧稤鋝鋢锊",
+    "m": "呣",
+    "ma": (
+        "亇傌吗唛嗎嘛嘜妈媽嫲嬤嬷孖杩榪溤犘犸獁玛瑪痲睰码碼礣祃禡罵蔴蚂螞蟆蟇遤鎷閁馬駡马"
+        "骂鬕鰢鷌麻"
+    ),
+    "mai": "买佅劢勱卖嘪埋売脈脉荬蕒薶衇買賣迈邁霡霢霾鷶麥麦鿏鿺",
+    "man": (
+        "僈墁姏嫚屘幔悗慢慲摱曼槾樠満满滿漫澷熳獌睌瞒瞞矕縵缦蔄蔓蘰蛮螨蟎蠻襔謾谩鄤鏋鏝镘"
+        "鞔顢颟饅馒鬗鬘鰻鳗"
+    ),
+    "mang": "吂哤壾娏尨庬忙恾杗杧氓汒浝漭牤牻狵痝盲硥硭笀芒茫茻莽莾蛖蟒蠎邙釯鋩铓駹",
+    "mao": (
+        "乮兞冃冇冐冒卯堥夘媢峁帽愗懋戼旄昴暓枆柕楙毛毷氂泖渵牦犛猫瑁皃眊瞀矛笷罞耄芼茂茅"
+        "茆萺蓩蝐蝥蟊袤覒貌貓貿贸軞鄚鄮酕鉚錨铆锚髦髳鶜"
+    ),
+    "me": "么嚒嚜濹癦麼",
+    "mei": (
+        "凂呅坆堳塺妹娒媄媒媚媺嬍寐嵄嵋徾抺挴攗旀昧枚栂梅楣楳槑毎每沒没沬浼渼湄湈煝煤燘猸"
+        "玫珻瑂痗眉眛睂睸矀祙禖穈篃美脄脢腜苺莓葿蘪蝞袂跊躾郿酶鋂鎂鎇镁镅霉韎鬽魅鶥鹛黣黴"
+    ),
+    "men": "们們悶懑懣扪捫暪椚焖燜玧璊菛虋鍆钔門閅门闷",
+    "meng": (
+        "儚冡勐夢夣孟幪懜懞懵掹擝曚朦梦橗檬氋溕濛猛獴瓾甍甿盟瞢矇矒礞艋艨莔萌蒙蕄蘉虻蜢蝱"
+        "蠓鄳鄸錳锰霥霿靀顭饛鯍鯭鸏鹲鼆"
+    ),
+    "mi": (
+        "侎冖冞冪咪嘧塓孊宓宻密峚幂幎幦弥弭彌戂擟攠敉榓樒櫁汨沕沵泌洣淧渳滵漞濔濗瀰灖熐爢"
+        "猕獼瓕眫眯瞇祕祢禰秘簚米粎糜糸縻羃羋脒芈葞蒾蔝蔤藌蘼蜜袮覓覔覛觅詸謎謐谜谧迷醚醾"
+        "醿釄銤镾靡鸍麊麋麛麿鼏鿹"
+    ),
+    "mian": (
+        "丏偭免冕勉勔喕娩婂媔嬵宀愐杣棉檰櫋汅沔渑湎澠眄眠矈矊矏糆絻綿緜緬绵缅腼臱芇葂蝒面"
+        "靣鮸麪麫麵麺黽"
+    ),
+    "miao": "喵妙媌嫹庙庿廟描杪淼渺玅眇瞄秒竗篎緢緲缈苗藐邈鱙鶓鹋",
+    "mie": "乜吀咩哶孭幭懱搣櫗滅灭烕篾蔑薎蠛衊覕鑖鱴鴓",
+    "min": (
+        "僶冺刡勄垊姄岷崏忞怋悯惽愍慜憫抿捪敃敏敯旻旼暋民泯湣潣珉琘琝瑉痻皿盿砇碈笢笽簢緍"
+        "緡缗罠苠蠠鈱錉鍲閔閩闵闽鰵鳘鴖黾"
+    ),
+    "ming": "佲冥凕名命姳嫇慏掵明暝朙椧榠洺溟猽眀眳瞑茗蓂螟覭詺鄍酩銘铭鳴鸣",
+    "miu": "謬谬",
+    "mo": (
+        "劘劰唜嗼嚤嚩嚰圽塻墨妺嫫嫼寞尛帓帞庅怽懡抹摩摸摹擵昩暯末枺模橅歾歿殁沫湐漠瀎爅獏"
+        "瘼皌眜眽眿瞐瞙砞磨礳秣粖糢絈纆耱膜茉莈莫蓦藦蘑蛨蟔謨謩谟貃貊貘銆鏌镆陌靺饃饝馍驀"
+        "髍魔魩魹麽默黙"
+    ),
+    "mou": "侔劺哞恈某洠牟眸瞴繆缪蛑謀谋踎鉾鍪鴾麰",
+    "mu": (
+        "亩仫凩募坶墓墲姆峔幕幙慔慕拇暮木朰楘母毣毪氁沐炑牡牧牳狇畆畒畝畞畮目睦砪穆縸胟艒"
+        "苜莯蚞踇鉧鉬钼雮霂鞪"
+    ),
+    "n": "嗯",
+    "na": "乸吶呐哪嗱妠娜拏拿挐捺笝納纳肭蒳衲袦豽貀軜那鈉鎿钠镎雫靹魶",
+    "nai": "乃倷奈奶嬭孻廼摨柰氖渿熋疓耏耐腉艿萘螚褦迺釢錼鼐",
+    "nan": "侽南喃囡娚婻戁抩揇暔枏柟楠湳煵男畘腩莮萳蝻諵赧遖难難",
+    "nang": "乪儾嚢囊囔擃攮曩欜灢蠰譨饢馕鬞齉",
+    "nao": "匘呶垴堖夒嫐孬峱嶩巎怓恼悩惱憹挠撓淖猱獶獿瑙硇碙碯脑脳腦臑蛲蟯詉譊鐃铙閙闹鬧",
+    "ne": "呢抐疒眲訥讷",
+    "nei": "內内娞氝脮腇錗餒馁鮾鯘",
+    "nen": "嫩嫰恁",
+    "neng": "能",
+    "ni": (
+        "伱伲你倪儗儞匿坭埿堄妮妳婗嫟嬺孴尼屔屰怩惄愵抳拟擬旎昵晲暱柅棿檷氼泥淣溺狔猊眤睨"
+        "秜籾縌聣聻胒腝腻膩臡苨薿蚭蜺觬誽貎跜輗迡逆郳鈮铌隬霓馜鯢鲵麑齯鿭"
+    ),
+    "nian": "卄哖唸埝姩年廿念拈捻撚撵攆涊淰焾碾秊秥簐艌蔫跈蹍蹨躎輦辇辗鮎鯰鲇鲶鵇黏",
+    "niang": "娘嬢孃酿醸釀",
+    "niao": "嫋嬝嬲尿樢脲茑蔦袅裊褭鳥鸟",
+    "nie": (
+        "啮喦嗫噛嚙囁囓圼孼孽嵲嶭巕帇惗捏揑摰敜枿槷櫱涅湼痆篞籋糱糵聂聶臬臲苶菍蘖蠥讘踂踗"
+        "踙蹑躡錜鎳鑈鑷钀镊镍闑陧隉顳颞齧"
+    ),
+    "nin": "囜您拰脌",
+    "ning": "佞侫倿儜凝咛嚀嬣宁寍寕寗寜寧拧擰柠橣檸泞澝濘狞獰甯矃聍聹苧薴鑏鬡鸋",
+    "niu": "妞忸扭汼炄牛牜狃紐纽莥鈕钮靵",
+    "nong": "侬儂农哝噥弄挊挵檂欁浓濃燶癑禯秾穠繷脓膿蕽襛農辳醲齈",
+    "nou": "啂槈檽獳羺耨譳鎒鐞",
+    "nu": "伮傉努女奴孥弩怒恧搙朒沑砮笯籹胬衂衄釹钕駑驽",
+    "nuan": "奻暖渜煖煗餪",
+    "nun": "黁",
+    "nuo": "傩儺喏愞懦懧挪掿搦搻梛榒橠稬穤糑糥糯諾诺蹃逽郍锘",
+    "nve": "疟瘧硸虐",
+    "o": "哦喔噢",
+    "ou": "偶吘呕嘔塸怄慪櫙欧歐殴毆沤漚熰瓯甌筽耦腢膒蕅藕藲謳讴鏂鴎鷗鸥齵",
+    "pa": "啪妑帊帕怕掱杷潖爬琶皅筢舥葩袙趴",
+    "pai": "俳哌廹徘拍排棑派渒湃牌犤猅簰簲蒎輫鎃",
+    "pan": (
+        "冸判叛媻幋拚搫攀槃沜泮洀溿潘瀊炍爿牉畔畨盘盤盼眅磐磻縏聁萠蒰蟠袢襻詊跘蹒蹣鋬鎜鑻"
+        "鞶頖鵥"
+    ),
+    "pang": "乓厐厖嗙嫎庞彷徬旁沗滂炐耪肨胖胮膖舽螃覫逄雱霶鳑龎龐",
+    "pao": "刨匏咆垉奅庖抛拋泡炮炰爮狍疱皰砲礟礮脬萢袍褜跑軳鞄麃麅麭",
+    "pei": "伂佩俖呸培姵嶏帔怌斾旆柸毰沛浿珮肧胚蓜衃裴裵賠赔轡辔配醅锫阫陪霈馷駍",
+    "pen": "呠喯喷噴歕湓瓫盆翸葐",
+    "peng": (
+        "倗剻匉嘭堋塳弸彭怦恲憉抨挷捧掽朋梈棚椖椪槰樥淎漰澎烹熢皏砰硑硼碰磞稝竼篣篷纄膨芃"
+        "莑蓬蘕蟚蟛踫軯輣錋鑝閛韸韼騯髼鬅鬔鵬鹏"
+    ),
+    "pi": (
+        "丕仳伓伾僻劈匹啤噼噽嚊嚭圮坯埤壀媲嫓屁岯崥庀悂憵批披抷揊擗旇朇枇毗毘毞淠潎澼炋焷"
+        "狉狓琵甓疈疋疲痞癖皮睥砒磇礔礕秛秠稫篺紕纰罴羆翍耚肶脴脾腗膍芘苉蚍蚽蚾蜱螷蠯諀譬"
+        "豼豾貔辟邳郫釽鈚鈹鉟銔銢錃錍铍闢阰陴霹駓髬魮魾鮍鲏鴄鵧鷿鸊鼙"
+    ),
+    "pian": "偏囨媥楄楩片犏篇翩胼腁覑諚諞谝貵賆跰蹁鍂駢騈騗騙骈骗骿魸鶣",
+    "piao": "僄剽勡嘌嫖彯徱慓旚殍漂犥瓢皫瞟票篻縹缥翲薸螵醥闝顠飃飄飘魒",
+    "pie": "丿嫳撆撇暼氕瞥苤鐅",
+    "pin": "品嚬姘娦嫔嬪拼榀汖牝玭琕矉礗穦聘薲蠙貧贫頻顰频颦馪驞",
+    "ping": (
+        "乒俜凭凴呯坪塀娉屏屛岼帡帲幈平慿憑枰檘泙洴涄淜焩玶瓶甁甹砯竮箳簈缾聠胓艵苹荓萍蓱"
+        "蘋蚲蛢評评軿輧郱頩鮃鲆"
+    ),
+    "po": "叵嘙坡婆尀岥岶敀昢桲櫇泊泼洦溌潑烞珀皤破砶笸粕蒪蔢謈迫鄱酦醗釙鉕鏺钋钷頗颇駊魄",
+    "pou": "剖咅哣娝婄抔抙捊掊犃箁裒錇",
+    "pu": (
+        "仆僕匍噗圃圑圤埔墣巬巭扑撲擈攴攵普暜曝朴樸檏氆浦溥潽濮瀑炇烳獛璞瞨穙纀脯舖舗莆菐"
+        "菩葡蒱蒲諩譜谱贌蹼酺鋪鏷鐠铺镤镨陠鯆"
+    ),
+    "qi": (
+        "七乞亓亝企俟倛僛其凄剘启呇呮咠唘唭啓啔啟嘁噐器圻埼夡奇契妻娸婍屺岂岐岓崎嵜帺弃忔"
+        "忯悽愭慼慽憇憩懠戚捿掑摖攲斉斊旂旗晵暣期杞柒栔栖桤桼棄棊棋棨棲榿槭檱櫀欫欺歧气気"
+        "氣汔汽沏泣淇淒湆湇漆濝炁猉玂玘琦琪璂甈畦疧盀盵矵砌碁碕碛碶磜磧磩祁祇祈祺禥竒簯簱"
+        "籏粸紪綥綦綨綮綺緀緕纃绮缼罊耆肵脐臍艩芑芞芪萁萋萕葺蕲藄蘄蚑蚔蚚蛣蛴蜝蜞螧蟿蠐褀"
+        "褄訖諆諬諿讫豈起跂踑蹊軝迄迉邔郪釮錡鏚锜闙霋頎颀騎騏騹骐骑鬐鬿魌鯕鰭鲯鳍鵸鶀鶈麒"
+        "麡鼜齊齐"
+    ),
+    "qia": "冾圶峠帢恰愘拤掐殎洽硈葜跒酠鞐髂",
+    "qian": (
+        "乾仟仱伣佥俔倩偂傔僉儙兛凵刋前千嗛圱圲堑塹墘壍奷婜媊嬱孅孯岍岒嵌嵰忴悓悭愆慊慳扦"
+        "扲拑拪掔掮揵搴撁攐攑攓杄棈椠榩槏槧橬檶櫏欠欦歉歬汘汧浅淺潛潜濳灊牵牽瓩皘竏签箝箞"
+        "篏篟簽籖籤粁綪縴繾缱羬肷脥膁臤芊芡茜茾蒨蔳蕁虔蚈蜸褰諐謙譴谦谴谸軡輤迁遣遷釺鈆鈐"
+        "鉗鉛銭錢鎆鏲鑓钎钤钱钳铅阡雃靬韆顅騚騝騫骞鬜鬝鰜鰬鵮鹐黔黚"
+    ),
+    "qiang": (
+        "丬呛唴嗆嗴墏墙墻嫱嬙嶈廧強强戕戗戧抢搶斨枪椌槍樯檣溬漒炝熗牄牆猐獇玱瑲篬繈繦羌羗"
+        "羟羥羫羻腔艢蔃蔷薔蘠蜣襁謒跄蹌蹡錆鎗鏘鏹锖锵镪"
+    ),
+    "qiao": (
+        "乔侨俏僑僺劁喬嘺墝墽嫶峭嵪巧帩幧悄愀憔撬撽敲桥槗樵橇橋殻毃燆犞癄瞧硗硚磽礄窍竅繑"
+        "缲翘翹荍荞菬蕎藮誚譙诮谯趫趬跷踍蹺躈郻鄡鄥釥鍫鍬鐈鐰锹陗鞒鞘鞩鞽韒頝顦骹髚髜"
+    ),
+    "qie": "且切匧厒妾怯悏惬愜挈朅洯淁癿穕窃竊笡箧篋籡緁聺苆藒蛪踥郄鍥鐑锲鯜",
+    "qin": (
+        "亲侵勤吢吣唚嗪噙坅埁媇嫀寑寝寢寴嵚嶔庈慬懃懄抋捦揿搇撳擒斳昑梫檎欽沁溱澿瀙珡琴琹"
+        "瘽禽秦笉綅耹芩芹菣菦菳藽蚙螓螼蠄衾親誛赾鈙鈫鋟钦锓雂靲顉駸骎鬵鮼鳹鵭"
+    ),
+    "qing": (
+        "倾傾儬凊剠勍卿圊埥夝寈庆庼廎情慶掅擎擏晴暒棾樈檠檾櫦殑殸氢氫氰淸清漀濪甠硘碃磬箐"
+        "罄苘葝蜻請謦请輕轻郬鑋靑青靘頃顷鲭黥"
+    ),
+    "qiong": "儝卭宆惸憌桏橩焪焭煢熍琼璚瓊瓗睘瞏穷穹窮竆笻筇舼芎茕藑藭蛩蛬赹跫邛銎",
+    "qiu": (
+        "丘丠俅叴唒囚坵媝崷巯巰恘扏搝梂楸殏毬求汓泅浗渞湭煪犰玌球璆皳盚秋秌穐篍糗紌絿緧肍"
+        "莍萩蓲蘒虬虯蚯蛷蝤蝵蟗蠤裘觓觩訄訅賕赇趥逎逑遒邱酋醔釚釻銶鞦鞧鮂鯄鰌鰍鰽鳅鶖鹙鼽"
+        "龝"
+    ),
+    "qu": (
+        "伹佉佢刞劬匤区區厺去取呿唟坥娶屈岖岨岴嶇忂憈戵抾敺斪曲朐欋氍浀淭渠灈璖璩癯瞿磲祛"
+        "竘竬筁籧粬紶絇翑耝胊胠臞菃葋蕖蘧蛆蛐蝺螶蟝蠷蠼衐衢袪覰覷覻觑詓詘誳诎趋趣趨躣躯軀"
+        "軥迲鑺镼閴闃阒阹駆駈驅驱髷魼鰸鱋鴝鸜鸲麮麯麴麹黢鼁鼩齲龋"
+    ),
+    "quan": (
+        "佺全券劝勧勸啳圈圏埢奍姾婘孉峑巏弮恮悛惓拳搼权棬椦楾権權汱泉洤湶烇牶牷犈犬犭瑔畎"
+        "痊硂筌絟綣縓绻荃葲虇蜷蠸觠詮诠跧踡輇辁醛銓鐉铨闎韏顴颧駩騡鬈鰁鳈齤"
+    ),
+    "que": "却卻埆塙墧崅悫愨慤搉榷燩琷瘸皵硞确碏確碻礐礭缺蒛趞闋闕阕阙雀鵲鹊",
+    "qun": "囷夋宭峮帬羣群裙裠逡",
+    "ran": "冄冉呥嘫姌媣染橪然燃珃繎肰苒蒅蚦蚺衻袇袡髥髯",
+    "rang": "儴勷嚷壌壤懹攘瀼爙獽瓤禳穣穰纕蘘譲讓让躟鬤",
+    "rao": "娆嬈扰擾桡橈繞绕荛蕘襓遶隢饒饶",
+    "re": "惹热熱",
+    "ren": (
+        "人亻仁仞仭任刃刄壬妊姙屻岃忈忍忎扨朲杒栠栣梕棯牣祍秂秹稔紉紝絍綛纫纴肕腍芢荏荵葚"
+        "衽袵訒認认讱躵軔轫鈓銋靭靱韌韧飪餁饪魜鵀"
+    ),
+    "reng": "仍扔礽芿辸陾",
+    "ri": "囸日釰鈤馹驲",
+    "rong": (
+        "傇冗坈媶嫆嬫宂容峵嵘嵤嶸巆戎搈搑曧栄榕榮榵毧氄溶瀜烿熔爃狨瑢穁穃絨縙绒羢肜茙茸荣"
+        "蓉蝾融螎蠑褣軵鎔镕駥髶"
+    ),
+    "rou": "厹媃宍揉柔楺渘煣瑈瓇禸粈糅肉腬葇蝚蹂輮鍒鞣韖騥鰇鶔",
+    "ru": (
+        "乳侞儒入嗕嚅如媷嬬孺嶿帤扖擩曘杁桇汝洳渪溽濡燸筎縟缛肗茹蒘蓐蕠薷蝡蠕袽褥襦辱邚鄏"
+        "醹銣铷顬颥鱬鳰鴑鴽"
+    ),
+    "rua": "挼",
+    "ruan": "偄堧壖媆撋朊瑌瓀碝礝緛耎軟輭软阮",
+    "rui": "叡壡婑枘桵橤汭瑞甤睿緌繠芮蕊蕋蕤蘂蘃蚋蜹銳鋭锐",
+    "run": "橍润潤瞤膶閏閠闰",
+    "ruo": "偌叒嵶弱捼楉渃焫爇箬篛若蒻鄀鰙鰯鶸",
+    "sa": "仨卅挱挲摋撒櫒泧洒潵灑脎萨薩虄訯躠鈒钑隡靸颯飒馺",
+    "sai": "僿嗮嘥噻塞愢揌毢毸簺腮賽赛顋鰓鳃",
+    "san": "三仐伞俕傘厁叁壭帴弎散橵毵毶毿犙糁糂糝糣糤繖鏒鏾閐饊馓鬖",
+    "sang": "丧喪嗓搡桑桒槡磉褬鎟顙颡",
+    "sao": "埽嫂慅扫掃掻搔氉溞瘙矂繅缫臊螦騒騷骚髞鰠鱢鳋",
+    "se": "啬嗇懎擌栜歮歰洓涩渋澀澁濇濏瀒琗瑟璱瘷穑穡穯繬色譅轖銫鏼铯閪雭飋",
+    "sen": "森椮槮襂",
+    "seng": "僧鬙",
+    "sha": (
+        "乷倽傻儍刹剎厦唦唼啑啥喢帹廈杀桬榝樧歃殺毮沙煞猀痧砂硰箑粆紗繌纱翜翣莎萐蔱裟鎩铩"
+        "閯霎魦鯊鯋鲨"
+    ),
+    "shai": "晒曬筛篩簁簛繺酾釃閷",
+    "shan": (
+        "傓僐删刪剡剼善嘇圸埏墠墡姍姗嬗山幓彡扇挻掞搧擅敾晱杉柵椫樿檆歚汕潬潸澘灗炶煔煽熌"
+        "狦珊疝痁睒磰笘縿繕缮羴羶脠膳膻舢芟苫蟮蟺衫覢訕謆譱讪贍赡赸跚軕邖鄯釤銏鐥钐閃閊闪"
+        "陕陝饍騸骟鯅鱓鱔鳝鿃"
+    ),
+    "shang": "丄上伤傷商垧墒尙尚恦慯扄晌殇殤滳漡熵緔绱蔏螪裳觞觴謪賞贘赏鑜鞝鬺",
+    "shao": "劭勺卲哨娋少弰捎旓柖梢潲烧焼燒玿睄稍筲紹綤绍艄芍苕莦蕱蛸袑輎邵韶颵髾鮹",
+    "she": (
+        "佘厍厙奢射弽慑慴懾捨摂摄摵攝檨欇歙涉涻渉滠灄猞畬畲社舌舍舎蔎虵蛇蛥蠂設设賒賖赊赦"
+        "輋韘騇麝"
+    ),
+    "shen": (
+        "什伸侁侺兟呻哂堔妽姺娠婶嬸审宷審屾峷弞愼慎扟敒昚曋曑柛棽椹榊氠沈涁深渖渗滲瀋燊珅"
+        "甚甡甧申瘆瘮眒眘瞫矤矧砷神祳穼籶籸紳绅罙罧肾胂脤腎莘葠蓡蔘薓蜃蜄裑覾訠訷詵諗讅诜"
+        "谂谉身邥鋠頣駪魫鯓鯵鰰鰺鲹鵢"
+    ),
+    "sheng": (
+        "偗剩剰勝升呏圣墭声嵊憴斘昇晠曻枡栍榺橳殅泩渻湦焺牲狌珄琞生甥盛省眚竔笙縄繩绳聖聲"
+        "胜苼蕂譝貹賸鉎鍟阩陞陹鵿鼪"
+    ),
+    "shi": (
+        "世丗乨乭亊事仕似佦使侍兘冟势勢匙十卋叓史呞呩嗜噬埘塒士失奭始姼媞嬕实実室宩寔實尸"
+        "屍屎峕崼嵵市师師式弑弒徥忕恀恃戺拭拾揓施时旹是昰時枾柹柿栻榁榯氏浉湜湤湿溡溮溼澨"
+        "濕炻烒煶狮獅瑡眂眎眡睗矢石示礻祏竍笶筮篒簭籂絁舐舓莳葹蒒蒔蓍虱蚀蝕蝨螫褷襫襹視视"
+        "觢試詩誓諟諡謚識识试诗谥豉豕貰贳軾轼辻适逝遈適遾邿釈释釋釶鈰鉂鉃鉇鉈鉐鉽銴鍦铈食"
+        "飠飾餙餝饣饰駛驶鮖鯴鰘鰣鰤鲥鲺鳲鳾鶳鸤鼫鼭"
+    ),
+    "shou": "兽収受售垨壽夀守寿手扌授收涭狩獣獸痩瘦綬绶膄艏鏉首龵",
+    "shu": (
+        "书侸倏倐儵叔咰塾墅姝婌孰尌尗属屬庶庻怷恕戍抒捒掓摅攄数數暏暑曙書朮术束杸枢树梳樞"
+        "樹橾殊殳毹毺沭淑漱潄潻澍濖瀭焂熟瑹璹疎疏癙秫竖竪糬紓絉綀纾署腧舒荗菽蒁蔬薥薯藷虪"
+        "蜀蠴術裋襡襩豎贖赎跾踈軗輸输述鄃鉥錰鏣陎隃鮛鱪鱰鵨鶐黍鼠鼡"
+    ),
+    "shua": "刷唰耍誜",
+    "shuai": "卛帅帥摔甩蟀衰",
+    "shuan": "拴栓涮腨閂闩",
+    "shuang": "双塽孀孇慡樉欆漺灀爽礵縔艭鏯雙霜騻驦骦鷞鸘鹴",
+    "shui": "帨水氵氺涗涚睡祱稅税脽裞誰谁閖",
+    "shun": "吮橓瞚瞬舜蕣順顺鬊",
+    "shuo": "哾妁搠朔槊欶烁爍獡矟硕碩箾蒴說説说鎙鑠铄",
+    "si": (
+        "丝亖佀価俬儩兕凘厮厶司咝嗣嘶噝四姒娰媤孠寺巳廝思恖撕斯杫柶楒榹死汜泀泗泤洍涘澌瀃"
+        "燍牭磃祀禗禠禩私竢笥籭糹絲緦纟缌罳耜肂肆蕬蕼虒蛳蜤螄蟖蟴覗貄釲鈶鈻鉰銯鋖鐁锶颸飔"
+        "飤飼饲駟騦驷鷥鸶鼶"
+    ),
+    "song": (
+        "倯傱凇娀宋崧嵩嵷庺忪怂悚愯慫憽松枀枩柗梥楤檧淞濍硹竦耸聳菘蜙訟誦讼诵送鍶鎹頌颂餸"
+        "駷鬆"
+    ),
+    "sou": "傁凁叜叟嗖嗽嗾廀廋捜搜摉摗擞擻櫢溲獀瘶瞍籔艘蒐蓃薮藪螋鄋醙鎪锼颼颾飕餿馊騪",
+    "su": (
+        "俗傃僳嗉囌塐塑夙嫊宿愫愬憟梀榡樎樕橚櫯殐泝洬涑溯溸潚潥玊珟璛甦碿稣穌窣簌粛粟素縤"
+        "肃肅膆苏莤蔌藗蘇蘓觫訴謖诉谡趚蹜速遡遬酥鋉餗驌骕鯂鱐鷫鹔"
+    ),
+    "suan": "匴狻痠祘笇筭算蒜酸",
+    "sui": (
+        "亗倠哸埣夊嬘岁嵗旞檖歲歳浽滖澻濉瀡煫熣燧璲瓍眭睟睢砕碎祟禭穂穗穟綏繀繐繸绥膸芕荽"
+        "荾葰虽襚誶譢谇賥遀遂邃鐆鐩隋随隧隨雖鞖韢髄髓"
+    ),
+    "sun": "孙孫损損搎榫槂狲猻笋筍箰簨荪蓀蕵薞鎨隼飧飱鶽",
+    "suo": (
+        "乺傞唆唢嗍嗦嗩娑惢所摍暛桫梭溑溹琐琑瑣璅睃簑簔索縮缩羧莏蓑蜶褨趖逤鎈鎍鎖鎻鏁锁髿"
+        "鮻"
+    ),
+    "ta": (
+        "他侤咜嚃嚺塌塔墖她它崉挞搨撻榙榻橽毾涾溚溻澾濌牠狧獭獺祂禢褟誻譶趿踏蹋蹹躢遝遢錔"
+        "铊闒闥闧闼鞜鞳鮙鰨鳎鿎"
+    ),
+    "tai": (
+        "儓冭台囼坮太夳嬯孡忲态態抬擡旲枱檯汰泰溙炱炲燤箈籉粏肽胎臺舦苔菭薹跆邰酞鈦钛颱駘"
+        "鮐鲐"
+    ),
+    "tan": (
+        "倓傝僋叹嗿嘆坍坛坦埮墰墵壇壜婒忐怹惔憛憳憻探摊擹攤昙暺曇榃檀歎毯湠滩潭灘炭燂璮痑"
+        "痰瘫癱碳磹罈罎舑舕菼藫袒襢覃談譚譠谈谭貚貪賧贪郯醈醓醰鉭錟钽锬顃餤"
+    ),
+    "tang": (
+        "伖倘偒傏傥儻劏唐啺嘡坣堂塘帑戃搪摥曭棠榶樘橖汤淌湯溏漟烫煻燙爣瑭矘磄禟篖糃糖糛羰"
+        "耥膅膛蓎薚蝪螗螳赯趟踼蹚躺鄌醣鎕鎲鏜鐋钂铴镋镗闛隚鞺餳餹饄饧鶶鼞"
+    ),
+    "tao": (
+        "匋咷啕夲套嫍幍弢慆掏搯桃梼槄檮洮涛淘滔濤瑫祹絛綯縚縧绦绹萄蜪裪討詜謟讨轁迯逃醄鋾"
+        "錭陶鞀鞉鞱韜韬飸饀饕駣騊鼗"
+    ),
+    "te": "忑忒慝特螣蟘貣鋱铽",
+    "teng": "儯幐滕漛熥疼痋籐籘縢腾膯藤虅誊謄邆霯駦騰驣鰧鼟",
+    "ti": (
+        "体倜偍剃剔厗啼嗁嚏嚔屉屜崹徲悌悐惕惖惿戻挮掦提揥擿替朑梯楴歒殢洟涕漽瑅瓋碮禵稊笹"
+        "籊綈緹绨缇罤苐荑蕛薙蝭裼褅褆謕趧趯踢蹄蹏躰軆逖逷遆醍銻鍗锑題题騠骵體髰鬀鮧鮷鯷鳀"
+        "鴺鵜鶗鶙鷈鷉鷤鹈"
+    ),
+    "tian": (
+        "倎兲唺塡填天婖屇忝恬悿掭搷晪殄沺淟添湉琠璳甛甜田畋畑畠痶盷睓睼碵磌窴緂胋腆舔舚菾"
+        "覥觍賟酟鈿錪鍩闐阗靔靝靦餂鴫鷆鷏黇鿬"
+    ),
+    "tiao": (
+        "佻嬥宨岧岹庣恌挑斢旫晀朓条條樤眺祒祧窕窱笤粜糶絩聎脁芀萔蓚蓨蜩螩覜誂趒跳迢鋚鎥鞗"
+        "髫鯈鰷鲦齠龆"
+    ),
+    "tie": "僣呫帖怗聑萜蛈貼贴銕鐡鐵铁飻餮驖鴩",
+    "ting": (
+        "亭侹停厅厛听圢娗婷嵉庁庭廰廳廷挺桯梃楟榳汀涏渟烃烴烶珽町甼筳綎耓聤聴聼聽脡艇艼莛"
+        "葶蜓蝏誔諪邒閮霆鞓頲颋鼮"
+    ),
+    "tong": (
+        "仝佟僮勭同哃嗵囲峂峝庝彤恸慟憅捅晍曈朣桐桶樋橦氃浵潼炵烔燑犝狪獞痌痛眮瞳砼秱童筒"
+        "筩粡統綂统膧茼蓪蚒衕詷赨通酮鉖鉵銅铜餇鮦鲖"
+    ),
+    "tou": "亠偷偸头妵婾媮投敨紏綉緰蘣透鋀鍮钭頭飳骰黈",
+    "tu": (
+        "兎兔凃凸吐唋図图圕圖圗土圡堍堗塗宊屠峹嵞嶀庩廜徒怢悇捈捸揬梌汢涂涋湥潳痜瘏禿秃稌"
+        "突筡腯荼莵菟葖蒤跿迌途酴釷鈯鋵鍎钍馟駼鵌鵚鵵鶟鷋鷵鼵"
+    ),
+    "tuan": "剸团団團彖慱抟摶槫檲湍湪漙煓猯疃篿糰褖貒鏄鷒鷻",
+    "tui": "侻俀僓娧尵弚推煺穨腿蓷藬蘈蛻蜕褪蹆蹪退隤頹頺頽颓駾骽魋",
+    "tun": "吞呑啍噋坉屯忳旽暾朜氽涒焞畽臀臋芚豘豚軘霕飩饨魨鲀黗",
+    "tuo": (
+        "乇仛佗侂咃唾坨堶妥媠嫷岮庹彵托扡拓拕拖挩捝杔柝椭楕槖橐橢毤毻汑沰沱沲涶狏砣砤碢箨"
+        "籜紽脫脱莌萚蘀袉袥託讬跅跎迱酡陀陁飥饦馱駄駝駞騨驒驝驮驼鬌魠鮀鰖鴕鵎鸵鼉鼍鼧鿳鿸"
+    ),
+    "wa": "佤劸咓哇嗗嗢娃娲媧屲挖搲攨洼溛漥瓦瓲畖砙穵窊窪聉腽膃蛙袜襪邷韈韤鼃",
+    "wai": "喎外夞崴歪竵顡",
+    "wan": (
+        "万丸倇刓剜卍卐唍埦塆壪妧婉婠完宛岏帵弯彎忨惋抏挽捖捥晚晥晩晼杤梚椀汍湾潫澫灣烷玩"
+        "琓琬畹皖盌睕瞣碗笂紈綩綰纨绾翫脕脘腕芄菀萖萬薍蜿蟃豌貦贃贎踠輐輓鋄鋔錽鎫頑顽"
+    ),
+    "wang": "亡亾仼兦妄尣尩尪尫彺往徃徍忘惘旺暀望朢枉棢汪瀇王盳網网罒罔莣菵蚟蛧蝄誷輞辋迋魍龬",
+    "wei": (
+        "为亹伟伪位偉偎偽僞儰卫危厃叞味唯喂喡喴囗围圍圩墛壝委威娓媁媙媦寪尉尾屗峗峞崣嵔嵬"
+        "嶶巍帏帷幃徫微惟愄愇慰懀捤揋揻撱斖暐未桅梶椲椳楲欈沩洈洧浘涠渨渭湋溈溦潍潙潿濰濻"
+        "瀢炜為烓煀煒煟煨熭燰爲犚犩猥猬玮琟瑋璏畏痏痿癓硊硙碨磈磑維緭緯縅纬维罻胃腲艉芛苇"
+        "苿荱菋萎葦葨葳蒍蓶蔚蔿薇薳藯蘶蜲蜼蝛蝟螱衛衞褽覣覹詴諉謂讆讏诿谓踓躗躛軎轊违逶違"
+        "鄬醀鍏鍡鏏闈闱隇隈霨霺韋韑韙韡韦韪頠颹餧餵饖骩骪骫魏鮇鮠鮪鰃鰄鲔鳂鳚"
+    ),
+    "wen": (
+        "刎匁吻呚呡問塭妏彣忟抆揾搵文昷桽榅榲殟汶渂温溫炆玟珳瑥璺瘒瘟稳穏穩紊紋纹聞肳脗芠"
+        "莬蕰蚉蚊螡蟁豱輼轀辒鎾閺閿闅闦问闻阌雯鞰顐饂馼駇魰鰛鰮鳁鳼鴍鼤"
+    ),
+    "weng": "勜嗡塕奣嵡攚暡滃瓮甕瞈罋翁聬蓊蕹螉鎓鶲鹟齆",
+    "wo": (
+        "仴倭偓卧唩婐媉幄我挝捰捾握撾擭斡枂楃沃涡涴涹渥渦濣焥猧瓁瞃硪窝窩肟腛臒臥莴萵蜗蝸"
+        "踒雘齷龌"
+    ),
+    "wu": (
+        "乄乌五仵伆伍侮俉倵儛兀剭务務勿午卼吳吴吾呉呒呜唔啎嗚圬坞塢奦妩娪娬婺嫵寤屋屼岉嵍"
+        "嵨巫庑廡弙忢忤怃悞悟悮憮戊扤捂摀敄无旿晤杇杌梧橆歍武毋汙汚污洖洿浯溩潕烏焐無熃熓"
+        "物牾玝珷珸瑦璑甒痦矹碔祦禑窏窹箼粅舞芜芴茣莁蕪蘁蜈螐蟱誈誣誤譕诬误躌迕逜邬郚鄔鋈"
+        "錻鎢钨铻阢隖雺雾霚霧靰騖骛鯃鰞鴮鵐鵡鶩鷡鹀鹉鹜鼯鼿齀"
+    ),
+    "xi": (
+        "习係俙傒僖兮凞匸卌卥厀吸呬咥唏唽喜喺嘻噏嚱囍墍壐夕奚媳嬆嬉屃屖屣屭嵠嶍嶲巇希席徆"
+        "徙徯忚忥怬怸恄恓息悉悕惁惜慀憘憙戏戱戲扱扸昔晞晰晳暿曦析枲桸椞椺榽槢樨橀橲檄欯欷"
+        "歖氥汐洗浠淅渓溪滊漇漝潝潟澙烯焁焈焟焬煕熂熄熈熙熹熺熻燨爔牺犀犔犠犧狶玺琋璽瘜皙"
+        "盻睎瞦矖矽硒磎磶礂禊禧稀稧穸窸粞糦系細綌緆縘縰繥繫细绤羲習翕翖肸肹膝舃舄舾莃菥葈"
+        "葸蒠蒵蓆蓰蕮薂虩蜥螅螇蟋蟢蠵衋袭襲西覀覡覤觋觹觽觿諰謑謵譆谿豀豨豯貕赥赩趇趘蹝躧"
+        "邜郋郗郤鄎酅醯釳釸鈢鉨鉩錫鎴鏭鑴铣锡闟阋隙隟隰隵雟霫霼飁餏餼饩饻騱騽驨鬩鯑鰼鱚鳛"
+        "鵗鸂黖鼷"
+    ),
+    "xia": (
+        "丅下乤侠俠傄匣吓嚇圷夏夓峡峽懗敮暇柙梺炠烚煆狎狭狹珨瑕疜疨睱瞎硖硤碬磍祫筪縀縖罅"
+        "翈舝舺蕸虲虾蝦谺赮轄辖遐鍜鎋鎼鏬閕閜陜陿霞颬騢魻鰕鶷黠"
+    ),
+    "xian": (
+        "仙仚伭佡僊僩僲僴先冼县咞咸哯唌啣嘕垷壏奾妶姭娊娨娴娹婱嫌嫺嫻嬐宪尟尠屳岘峴崄嶮幰"
+        "廯弦忺憪憲憸挦掀搟撊撏攇攕显晛暹杴枮橌櫶毨氙涀涎湺澖瀗灦烍燹狝猃献獫獮獻玁现珗現"
+        "甉痫癇癎県睍瞯硍礥祆禒秈稴筅箲籼粯糮絃絤綫線縣繊纎纖纤线缐羡羨胘腺臔臽舷苋苮莧莶"
+        "薟藓藖蘚蚬蚿蛝蜆衔衘褼襳誢誸諴譣豏賢贒贤赻跣跹蹮躚輱酰醎銑銛銜鋧錎鍁鍌鑦铦锨閑閒"
+        "闲限陥险陷険險霰韅韯韱顕顯餡馅馦鮮鱻鲜鶱鷳鷴鷼鹇鹹麙麲鼸"
+    ),
+    "xiang": (
+        "乡享亯佭像勨厢向响啌嚮塂姠嶑巷庠廂忀想晑曏栙楿橡欀湘珦瓖瓨相祥稥箱絴緗缃缿翔膷芗"
+        "萫葙薌蚃蟓蠁衖襄襐詳详象跭郷鄉鄊鄕銄銗鐌鑲镶響項项飨餉饗饟饷香驤骧鮝鯗鱌鱜鱶鲞麘"
+    ),
+    "xiao": (
+        "侾俲傚効呺咲哓哮啸嘋嘐嘨嘯嘵嚣嚻囂婋孝宯宵小崤庨彇恷憢揱效敩斅斆晓暁曉枭枵校梟櫹"
+        "歊歗殽毊洨消涍淆潇瀟灱灲焇熽猇獢痚痟皛皢硝硣穘窙笑筊筱筿箫篠簘簫綃绡翛肖膮萧萷蕭"
+        "藃虈虓蟂蟏蟰蠨訤詨誟誵謏踃逍郩銷销霄驍骁髇髐魈鴞鴵鷍鸮"
+    ),
+    "xie": (
+        "些亵伳偕偞偰僁写冩劦勰协協卨卸嗋噧垥塮夑奊娎媟寫屑屓屟屧峫嶰廨徢恊愶懈拹挟挾揳携"
+        "撷擕擷攜斜旪暬械楔榍榭歇泄泻洩渫澥瀉瀣灺炧炨烲焎熁燮燲爕猲獬瑎祄禼糏紲絏絬綊緤緳"
+        "繲纈绁缬缷翓胁脅脇脋膎薢薤藛蝎蝢蟹蠍蠏衺褉褻襭諧謝讗谐谢躞邂邪鞋鞢鞵韰頡齂齘齛齥"
+        "龤"
+    ),
+    "xin": (
+        "伈伩信俽噺囟妡嬜孞廞心忄忻惞新昕杺枔欣歆炘焮盺脪舋芯薪衅襑訢訫軐辛邤釁鈊鋅鐔鑫锌"
+        "阠顖馨馫馸"
+    ),
+    "xing": (
+        "侀倖兴刑哘型垶姓娙婞嬹幸形性悻惺擤星曐杏洐涬滎煋猩瑆皨睲硎箵篂緈腥臖興荇荥莕蛵行"
+        "裄觪觲謃邢郉醒鈃鉶銒鋞钘铏陉陘騂骍鮏鯹鿿"
+    ),
+    "xiong": "兄兇凶匂匈哅夐忷恟敻汹洶焸焽熊胷胸訩詗詾讻诇賯雄",
+    "xiu": (
+        "休俢修咻嗅岫峀庥朽樇溴滫潃烋烌珛琇璓秀糔綇繍繡绣羞脙脩臹苬螑袖褎褏貅銝銹鎀鏅鏥鏽"
+        "锈飍饈馐髤髹鮴鱃鵂鸺齅"
+    ),
+    "xu": (
+        "伵侐俆偦冔勖勗卹叙吁呴喣嘘噓垿墟壻姁婿媭嬃幁序徐怴恤慉戌揟敍敘旭旴昫晇暊朂栩楈槒"
+        "欨欰歔殈汿沀洫湑溆漵潊烅烼煦獝珝珬疞盢盨盱瞁瞲稰稸窢糈絮続緒緖縃繻續绪续聓聟胥芧"
+        "蒣蓄蓿蕦藇藚虗虚虛蝑裇訏許訹詡諝譃许诩谞賉鄦酗醑銊鑐需須頊须顼驉鬚魆魖魣鱮"
+    ),
+    "xuan": (
+        "儇吅咺喧塇媗嫙宣弲怰悬愃愋懁懸揎旋昍昡晅暄暶梋楥楦檈泫渲漩炫烜煊玄玹琁琄瑄璇璿痃"
+        "癣癬眩眴睻矎碹禤箮絢縇縼繏绚翧翾萱萲蓒蔙蕿藼蘐蜁蝖蠉衒袨諠諼譞讂谖贙軒轩选選鉉鋗"
+        "鍹鏇铉镟鞙顈颴駽鰚"
+    ),
+    "xue": (
+        "乴削吷坹壆学學岤峃嶨斈桖樰泶澩瀥燢狘疶穴膤艝茓蒆薛血袕觷謔谑趐踅轌辥辪雤雪靴鞾鱈"
+        "鳕鷽鸴"
+    ),
+    "xun": (
+        "伨侚偱勋勛勲勳卂噀噚嚑坃埙塤壎壦奞寻尋峋巡巺巽廵徇循恂愻揗攳旬曛杊栒桪樳殉殾毥汛"
+        "洵浔潠潯灥焄熏燅燖燻爋狥獯珣璕畃矄稄窨紃纁臐荀荨蔒蕈薫薰蘍蟳訊訓訙詢训讯询賐迅迿"
+        "逊遜鄩醺鑂顨馴駨驯鱏鱘鲟"
+    ),
+    "ya": (
+        "丫乛亚亜亞伢俹劜厊压厑厓吖呀哑唖啞圔圠圧垭埡堐壓娅婭孲岈崕崖庌庘押挜掗揠枒桠椏氩"
+        "氬涯漄牙犽猚猰玡琊瑘痖瘂睚砑稏窫笌聐芽蕥蚜衙襾訝讶軋轧迓錏鐚铔雅鴉鴨鵶鸦鸭齖齾"
+    ),
+    "yan": (
+        "严乵俨偃偐偣傿儼兖兗剦匽厌厣厭厳厴咽唁啱喭噞嚥嚴堰塩墕壛壧夵奄妍妟姲姸娫娮嫣嬊嬮"
+        "嬿孍宴岩崦嵃嵒嵓嶖巌巖巗巘巚延弇彥彦恹愝懕懨戭扊抁掩揅揜敥昖晏暥曕曣曮棪椻椼楌樮"
+        "檐檿櫩欕沇沿淊淹渰渷湮溎滟演漹灎灔灧灩炎烟烻焉焑焔焰焱煙熖燄燕爓牪狿猒珚琂琰甗盐"
+        "眼研砚硏硯硽碞礹筵篶簷綖縯罨胭腌臙艳艶艷芫莚菸萒葕蔅虤蜒蝘衍裺褗覎觃觾言訁訮詽諺"
+        "讌讞讠谚谳豓豔贋贗赝躽軅遃郔郾鄢酀酓酽醃醶醼釅閆閹閻闫阉阎隁隒雁顏顔顩颜餍饜騐験"
+        "騴驗驠验鬳魇魘鰋鳫鴈鴳鶠鷃鷰鹽麣黡黤黫黬黭黶鼴鼹齞齴龑"
+    ),
+    "yang": (
+        "仰佒佯傟养劷咉坱垟央姎岟崵崸徉怏恙慃懩扬抰揚攁敭旸昜暘杨柍样楊楧様樣殃氜氧氱泱洋"
+        "漾瀁炀炴烊煬珜疡痒瘍癢眏眻礢禓秧紻羊羏羕羪胦蛘蝆詇諹軮輰鉠鍚鐊钖阦阳陽雵霷鞅颺飏"
+        "養駚鰑鴦鴹鸉鸯"
+    ),
+    "yao": (
+        "仸倄偠傜吆咬喓嗂垚堯夭妖姚婹媱宎尧尭岆峣崾嶢嶤幺徭愮抭揺搖摇摿暚曜杳枖柼楆榚榣殀"
+        "溔滧烑熎燿爻狕猺獟珧瑤瑶眑矅磘祅穾窅窈窑窔窯窰筄繇纅耀肴腰舀艞苭药葯葽蓔薬藥蘨袎"
+        "要覞訞詏謠謡讑谣軺轺遙遥邀邎銚鎐鑰钥闄靿顤颻飖餆餚騕鰩鳐鴁鴢鷂鷕鹞鼼齩"
+    ),
+    "ye": (
+        "业也亪亱倻僷冶叶吔啘嘢噎嚈埜堨墷壄夜嶪嶫抴捓捙掖揶擛擨擪擫晔暍曄曅曗曳曵枼枽椰楪"
+        "業歋殗洂液漜潱澲烨燁爗爷爺璍皣瞱瞸礏耶腋葉蠮謁谒邺鄓鄴野釾鋣鍱鎁鎑鐷铘靥靨頁页餣"
+        "饁馌驜鵺鸈"
+    ),
+    "yi": (
+        "一乁乂义乊乙亄亦亿以仪伇伊伿佁佚佾侇依俋倚偯儀億兿冝刈劓劮勚勩匇匜医吚呓呭呹咦咿"
+        "唈噫囈圛圯坄垼埶埸墿壱壹夁夷奕姨媐嫕嫛嬄嬑嬟宐宜宧寱寲屹峄峓崺嶧嶬嶷已巸帟帠幆庡"
+        "廙异弈弋弌弬彛彜彝彞役忆怈怡怿恞悒悘悥意憶懌懿扅扆抑拸挹掜揖撎攺敡敼斁旑旖易晹暆"
+        "曀曎杙枍枻柂栘栧栺桋棭椅椬椸榏槸檍檥檹欥欭欹歝殔殪殹毅毉沂沶泆洢浂浥浳渏湙溢漪潩"
+        "澺瀷炈焲熠熤熪熼燚燡燱狋猗獈玴珆瑿瓵畩異疑疫痍痬瘗瘞瘱癔益眙睪瞖矣硛礒祎禕秇移稦"
+        "穓竩笖箷簃籎縊繄繶繹绎缢羛羠義羿翊翌翳翼耛耴肄肊胰膉臆舣艗艤艺芅苅苡苢萓萟蓺薏藙"
+        "藝蘙虉蚁蛜蛡蛦蜴螔螘螠蟻衣衤衪衵袘袣裔裛裿褹襼觺訑訲訳詍詑詒詣誃誼謻譩譯議讉讛议"
+        "译诒诣谊豙豛豷貖貤貽賹贀贻跇跠踦軼輢轙轶辷迆迤迻逘逸遗遺邑郼酏醫醳醷釔釴鈘鈠鉯銥"
+        "鎰鏔鐿钇铱镒镱陭隿霬靾頉頤頥顊顗颐飴饐饴駅驛驿骮鮨鯣鳦鶂鶃鶍鷁鷊鷖鷧鷾鸃鹝鹢鹥黓"
+        "黟黳齮齸"
+    ),
+    "yin": (
+        "乑乚侌冘凐印吟吲喑噖噾嚚囙因圁垔垠垽堙堷夤姻婣婬寅尹峾崟崯嶾廕廴引愔慇慭憖憗懚斦"
+        "朄栶檃檭檼櫽歅殥殷氤泿洇洕淫淾湚溵滛濥濦烎犾狺猌珢璌瘖瘾癊癮碒磤禋秵筃粌絪緸胤苂"
+        "茚茵荫荶蒑蔩蔭蘟蚓螾蟫裀訔訚訡誾諲讔赺趛輑鄞酳鈏鈝銀銦铟银闉阥阴陰陻隂隐隠隱霒霠"
+        "霪靷鞇音韾飮飲饮駰骃鮣鷣齗龂"
+    ),
+    "ying": (
+        "偀僌啨営嘤噟嚶塋婴媖媵嫈嬰嬴孆孾巊应廮影応愥應摬撄攍攖映暎朠桜梬楹樱櫻櫿浧渶溁溋"
+        "滢潁潆濙濚濴瀅瀛瀠瀯瀴灐灜煐熒營珱瑛瑩璎瓔甇甖瘿癭盁盈矨硬碤礯穎籝籯緓縈纓绬缨罂"
+        "罃罌膡膺英茔荧莹莺萤营萦萾蓥藀蘡蛍蝇蝧蝿螢蠅蠳褮覮謍譍譻賏贏赢軈迎郢鍈鎣鐛鑍锳霙"
+        "鞕韺頴颍颕颖鱦鴬鶑鶧鶯鷪鷹鸎鸚鹦鹰"
+    ),
+    "yo": "哟唷喲",
+    "yong": (
+        "佣俑傛傭勇勈咏喁嗈噰埇塎墉壅嫞嵱庸廱彮怺恿悀惥愑愹慂慵拥揘擁柡栐槦永泳涌湧滽澭灉"
+        "牅用甬痈癕癰砽硧禜臃苚蛹詠踊踴邕郺鄘醟鏞镛雍雝顒颙饔鯒鰫鱅鲬鳙鷛"
+    ),
+    "you": (
+        "丣亴优佑侑偤優卣又友右呦哊唀嚘囿姷孧宥尢尤峟峳幼幽庮忧怣怮悠憂懮攸斿有柚栯梄楢槱"
+        "櫌櫾沋油泑浟游湵滺瀀牖牗牰犹狖猶猷由疣祐禉秞糿纋羐羑耰聈肬脜苃莜莠莸蒏蕕蚰蚴蜏蝣"
+        "訧誘诱貁輏輶迶逌逰遊邮郵鄾酉酭釉鈾銪铀铕駀魷鮋鱿鲉麀黝鼬"
+    ),
+    "yu": (
+        "与乻予于亐伃伛余俁俞俣俼偊傴儥兪匬唹喅喐喩喻噊噳圄圉圫域堉堣堬妤妪娛娯娱媀嫗嬩宇"
+        "寓寙屿峪峿崳嵎嵛嶎嶼庽庾彧御忬悆惐愈愉愚慾懙戫扜扵挧揄敔斔斞於旕旟昱杅桙棛棜棫楀"
+        "楡楰榆櫲欎欝欤欲歈歟歶毓浴淢淤淯渔渝湡滪漁潏澚澞澦灪焴煜燏燠爩牏狱狳獄玉玗玙琙瑀"
+        "瑜璵畭瘀瘉瘐癒盂盓睮矞砡硢硲礇礖礜祤禦禹禺秗稢稶穥穻窬窳竽箊篽籅籞籲紆緎繘纡罭羭"
+        "羽聿肀育腴臾舁舆與艅艈芋芌茟茰萭萮萸蒮蓣蓹蕍蕷薁蘌蘛虞虶蜟蜮蝓螸衧袬裕褕覦觎誉語"
+        "諛諭謣譽语谀谕豫貐踰軉輍輿轝込迂迃逳逾遇遹邘郁鄅酑醧鈺銉鋊鋙錥鍝鐭钰閾阈陓隅雓雨"
+        "雩霱預頨预飫餘饇饫馀馭騟驈驭骬髃鬰鬱鬻魊魚鮽鯲鰅鱊鱼鳿鴥鴧鴪鵒鷠鷸鸆鸒鹆鹬麌齬龉"
+        "龥"
+    ),
+    "yuan": (
+        "傆元円冤剈原厡厵员員噮囦园圆圎園圓垣垸塬夗妴媛媴嫄嬽寃怨悁惌愿掾援杬棩榞榬橼櫞沅"
+        "淵渁渆渊渕湲源溒灁爰猨猿獂瑗盶眢禐笎箢緣縁缘羱肙苑茒葾蒝蒬薗蚖蜎蜵蝝蝯螈衏袁裫裷"
+        "褑褤謜貟贠轅辕远逺遠邍邧酛鈨鋺鎱院願駌騵魭鳶鴛鵷鶢鶰鸢鸳鹓黿鼋鼘鼝"
+    ),
+    "yue": (
+        "刖噦妜嬳岄岳嶽彟彠恱悅悦戉抈捳曰曱月樾瀹爚玥矱礿禴箹篗籆籥籰粤粵約约蘥蚎蚏越跀跃"
+        "躍軏鈅鉞钺閱閲阅鸑鸙黦龠"
+    ),
+    "yun": (
+        "云伝傊允勻匀喗囩夽奫妘孕恽惲愠愪慍抎抣昀晕暈枟橒殒殞氲氳沄涢溳澐煴熅熉熨狁畇眃磒"
+        "秐筠筼篔紜緷緼縕縜繧纭缊耘耺腪芸荺蒀蒕蒷蕓蕴薀藴蘊蝹褞賱贇赟运運郓郧鄆鄖酝醖醞鈗"
+        "鋆阭陨隕雲霣韗韞韫韵韻頵餫馧馻齫齳"
+    ),
+    "za": "偺匝咂咋喒囋囐帀拶杂沞沯砸磼紥紮臜臢襍迊鉔雑雜雥韴魳",
+    "zai": "仔傤儎再哉在宰崽扗栽洅渽溨災灾烖甾睵縡菑賳載载酨",
+    "zan": "儧儹兂咱噆寁揝撍攅攒攢昝暂暫桚濽灒瓉瓒瓚禶簪簮糌襸讃讚賛贊赞趱趲蹔鄼酇錾鏨鐕鐟饡",
+    "zang": "匨塟奘弉牂羘脏臓臟臧葬蔵賍賘贓贜赃銺駔驵髒",
+    "zao": "傮凿唕唣喿噪慥早枣栆梍棗澡灶煰燥璪皁皂竃竈簉糟繰艁薻藻蚤譟趮蹧躁造遭醩鑿",
+    "ze": (
+        "仄伬则則唶啧嘖夨嫧崱帻幘庂択择捑擇昃昗樍歵汄沢泎泽溭澤皟瞔矠礋笮箦簀舴蔶蠌襗諎謮"
+        "責賾责赜迮鸅齚齰"
+    ),
+    "zei": "戝蠈賊贼鯽鰂鱡鲗",
+    "zen": "囎怎譖譛谮",
+    "zeng": "増增憎橧熷璔甑矰磳繒缯罾譄贈赠鄫鋥锃鱛",
+    "zha": (
+        "乍偧劄厏吒咤哳喳奓宱扎抯拃挓揸搩搾摣札柞柤査栅楂榨樝渣溠灹炸煠牐甴痄皶皻眨砟箚耫"
+        "苲蚱蚻觰詐譇譗诈踷醡鍘铡閘闸霅鮓鮺鲊鲝齄齇"
+    ),
+    "zhai": "债債夈宅寨捚摘斋斎榸檡瘵砦窄粂鉙齋",
+    "zhan": (
+        "佔偡占噡嫸展崭嶃嶄嶘嶦惉战戦戰搌斩斬旃旜枬栈栴桟棧榐橏毡氈氊沾湛琖盏盞瞻站粘綻绽"
+        "菚薝蘸虥虦蛅覱詀詹譧譫讝谵趈輚輾轏邅醆閚霑颭飐飦饘驏驙魙鱣鳣鸇鹯黵龪"
+    ),
+    "zhang": (
+        "丈仉仗傽墇嫜嶂帐帳幛幥张張彰慞扙掌暲杖樟涨涱漲漳獐璋痮瘬瘴瞕礃章粀粻胀脹蔁蟑賬账"
+        "遧鄣鏱長长障餦騿鱆麞"
+    ),
+    "zhao": (
+        "佋兆召啁垗妱巶找招旐昭曌枛棹櫂沼炤照燳爪爫狣瑵皽盄瞾窼笊罀罩羄肁肇肈詔诏赵趙釗鉊"
+        "鍣钊駋鮡"
+    ),
+    "zhe": (
+        "乽厇哲啠啫喆嗻嚞埑嫬悊折摺晢晣柘樜歽浙淛潪着矺砓磔禇籷粍者蔗虴蛰蜇蟄蟅袩褶襵詟謫"
+        "謺讁讋谪赭輒輙轍辄辙这這遮銸鍺锗馲鮿鷓鹧"
+    ),
+    "zhen": (
+        "侦侲偵圳塦嫃寊屒帧帪弫抮挋振揕搸敶斟昣朕枕栕栚桢桭楨榛樼殝浈湞潧澵獉珍珎瑧瑱甄甽"
+        "畛疹眕眞真眹砧碪祯禎禛稹箴籈紖紾絼縥纼缜聄胗臻萙葴蒖蓁薽袗裖診誫诊貞賑贞赈軫轃轸"
+        "遉酖酙針鉁鋴錱鍼鎭鎮针镇阵陣震靕駗鬒鱵鴆鸩黰"
+    ),
+    "zheng": (
+        "争佂凧埩塣姃媜峥崝崢幀征徰徴徵怔愸抍拯挣掙掟揁撜政整晸正氶炡烝爭狰猙症癥眐睁睜筝"
+        "箏篜糽聇蒸証諍證证诤踭郑鄭鉦錚钲铮鬇鯖鴊鿇"
+    ),
+    "zhi": (
+        "之乿侄俧倁値值偫傂儨凪制劕劧卮厔只吱咫嗭址坁坧垁埴執墆墌夂妷姪娡嬂寘峙崻巵帋帙帜"
+        "幟庢庤廌彘徏徔徝志忮怾恉慹憄懥懫戠执扺扻抧挃指挚掷搘搱摭摯擲擳支旘旨晊智枝枳柣栀"
+        "栉桎梔梽植椥楖榰樴櫍櫛止殖汁汥汦沚治泜洔洷淔淽滍滞滯漐潌瀄炙熫犆狾猘瓆瓡畤疐疷疻"
+        "痔痣直知砋礩祉祑祗祬禃禔秓秖秩秪秲秷稙稚稺穉窒筫紙紩絷綕緻縶織纸织置翐聀职職肢胑"
+        "胝脂膣膱至致臸芖芝芷茋藢蘵蛭蜘螲蟙衹衼袟袠製襧覟觗觯觶訨誌豑豒豸貭質贄质贽趾跖跱"
+        "踬踯蹠躑躓軄軹軽輊轵轾迣郅酯釞鉄銍鋕鑕铚锧阤阯陟隲隻雉馶馽駤騭騺驇骘鯯鳷鴙鴲鷙鸷"
+        "黹鼅鿵"
+    ),
+    "zhong": (
+        "中仲伀众偅冢刣喠堹塚塜妐妕媑尰幒彸忠柊歱汷泈炂煄狆瘇盅眾祌种種穜筗籦終终肿腫舯茽"
+        "蔠蚛螤螽衆衳衶衷諥踵蹱重鈡銿鍾鐘钟锺鴤鼨"
+    ),
+    "zhou": (
+        "伷侜僽冑周呪咒咮喌噣妯宙州帚徟掫昼晝晭洲淍炿烐珘甃疛皱皺盩睭矪箒籀籒籕粙粥紂縐纣"
+        "绉肘胄舟荮菷葤詋詶謅譸诌诪賙赒軸輈輖轴辀週郮酎銂霌駎駲騆驟骤鯞鵃鸼"
+    ),
+    "zhu": (
+        "丶主伫佇住侏劚助劯嘱囑坾墸壴孎宔嵀拄斸曯朱杼柱株槠樦橥櫧櫫欘殶泏注洙渚潴濐瀦灟炢"
+        "炷烛煑煮燭爥猪珠疰瘃眝瞩矚砫硃祝祩秼窋竚竹竺笁笜筑筯箸築篫簗紵紸絑纻罜羜翥舳苎茱"
+        "茿莇著蛀蛛蝫蠋蠩蠾袾註詝誅諸诛诸豬貯贮跓跦躅軴迬逐邾鉒銖鋳鑄钃铢铸陼霔馵駐駯驻鮢"
+        "鯺鱁鴸麆麈鼄"
+    ),
+    "zhua": "抓檛簻膼髽",
+    "zhuai": "拽跩",
+    "zhuan": (
+        "专僎叀啭囀堟塼嫥孨専專撰灷瑑瑼甎砖磗磚竱篆篹籑腞膞蒃蟤襈諯譔賺赚転轉转鄟顓颛饌馔"
+        "鱄"
+    ),
+    "zhuang": "壮壯壵妆妝娤庄庒戇撞桩梉樁湷漴焋状狀粧糚荘莊装裝",
+    "zhui": "坠墜娷惴桘沝甀畷硾礈笍綴縋缀缒膇諈贅赘轛追醊錐錣鑆锥隹餟騅骓鵻",
+    "zhun": "准凖埻宒準稕窀綧肫衠訰諄谆迍",
+    "zhuo": (
+        "丵倬劅卓叕啄啅圴妰娺彴拙捉撯擆擢斀斫斱斲斵晫桌梲棁棳椓槕櫡汋浊浞涿濁濯灂灼炪烵犳"
+        "琸硺禚穛穱窡窧篧籗籱罬茁蠗蠿諁諑謶诼酌鋜鐯鐲镯鵫鷟"
+    ),
+    "zi": (
+        "乲倳兹剚吇呰咨啙嗞姉姊姕姿子字孜孳孶崰嵫恣杍栥梓椔榟橴淄渍湽滋滓漬澬牸玆璾眥眦矷"
+        "禌秄秭秶稵笫籽粢紎紫緇缁耔胏胔胾自芓茊茡茲荢葘蓻虸觜訾訿諮谘貲資赀资赼趑趦輜輺辎"
+        "鄑釨鈭錙鍿鎡锱镃頾頿髭鯔鰦鲻鶅鼒齍龇"
+    ),
+    "zong": (
+        "倊倧偬傯堫宗嵏嵕嵸总惣惾愡捴揔搃摠昮朡棕椶潈熧燪猔猣疭瘲碂磫稯粽糉糭綜緃総緵縂縦"
+        "縱總纵综翪腙葼蓗蝬豵踨踪蹤錝鍐鏓鑁騌騣骔鬃鬉鬷鯮鯼"
+    ),
+    "zou": "奏揍棷棸楱箃緅菆諏诹走赱邹郰鄒鄹陬騶驺鯐鯫鲰黀齱齺龰",
+    "zu": "俎傶卆卒哫唨崒崪族爼珇祖租箤組组葅蒩詛诅足踤踿鎺鏃镞阻靻",
+    "zuan": "攥籫繤纂纉纘缵躜鑚鑽钻",
+    "zui": "厜嗺嘴噿嶊嶵晬最朘栬槜樶檇檌璻祽稡穝絊纗罪蕞蟕辠酔酻醉鋷錊",
+    "zun": "僔噂墫壿尊嶟捘撙樽繜罇譐遵銌鐏鱒鳟鶎鷷",
+    "zuo": "佐作侳做咗唑坐岝岞左座怍捽昨椊琢祚秨稓筰糳繓胙莋葃葄蓙袏鈼阼飵",
+}
+
+HETERONYMS = {
+    "a": "吖呵腌",
+    "ai": "乂乃佁儗剴厓呃呆噫堨奇嵦欬烠焥獃磑絠諰謁賹醷阨阸隑鯦",
+    "an": "匼厂厈咹垾屽干广盒碪裺遃鉗陰頇頞鴳",
+    "ang": "仰腌醃",
+    "ao": "噢嚣囂墽棍泑澆熝燠眑磽礉薁蝹郩鏕鴁鴢",
+    "ba": "伯哱抪捭杷湃皅茷萆鮁",
+    "bai": "伯呗唄啡扒排派罷薜鞁鞴",
+    "ban": "並卑埿彬搫朌籓覂豳賁跘辨辯",
+    "bang": "並嗙埲嫎彭徬旁硥紡蚄蛖螃騯",
+    "bao": "刨剥呆嘐嚗曝瀑炮砲苴袍裒",
+    "bei": "俾哱垻埤怫拔杮柸棑棓波箄臂茀菩萆萯葡蜚襬諀跋錍鐴鞞",
+    "ben": "体喯夯夲炃燌蟦賁軬鐼",
+    "beng": "俸傍唪嗙堋平抨搒旁榜漨熢蚌跰錋",
+    "bi": (
+        "仳佛卑咇埤娝媲崥幅悂拂捭旇服枇椑檗殍泌波畐皀瞥祕秘稫紕紴罷翍肥肶肸胇脾芘茀蘗虑被"
+        "費贲跛踾辟鈚錍閈陂陴鞁鞞馥魮鮩鴓鶝鸊"
+    ),
+    "bian": "封拚疺稹臱覵豍邲鞕頨鶣",
+    "biao": "僄剽嫖漂篻膔苞鏖麃",
+    "bie": "扒拔捌撇柭柲癿秘穪苾蔽",
+    "bin": "份攽浜訜贇頻",
+    "bing": "屏平拼枋栟梹槟檳燹琕痭癛絣綆跰鞸",
+    "bo": (
+        "佛募噃壆妭孛彴怕拍拔擗擘暴服柏柭桲榑檘殕泊溥潑潘瀑爆番發白百皪磻穛簿般艴茀茷菩蒲"
+        "蔢蕃薄薜蘖蚾襎詙趵跑魄鮊鲅鲌"
+    ),
+    "bu": "僕卜埔堡婄尃拊捬撲溥秿箁薄輹附陠鞴鯆",
+    "ca": "傪拆磣蔡",
+    "cai": "扐揌",
+    "can": "嘇噆囋嵾戔摲淺縿蹔鏒飱鰺",
+    "cang": "凔匨瑲篬臧蔵",
+    "cao": "傮屮慅慒慥澡造鐰鼜",
+    "ce": "嫧幘栅赦齰",
+    "cen": "参參汵硶穇篸",
+    "ceng": "僧增橧繒鄫",
+    "cha": "仛刹喳嚓土岎扱捈捷接摖斜梌楂芆苴荖荼褨訍釵鉏鎈",
+    "chai": "差扠搓查茈蔕",
+    "chan": "亶佔僤兔单厘單墠嬗孱嶄憚掺摻撣榐沾漸緂繵脠苫螹蟺袩襝襢讖蹍醦",
+    "chang": "倘儻尚棖淌脹裳長长闛",
+    "chao": "剿劋嘮摷槱濤粆紹綽縐绰謅趠趫",
+    "che": "呫喢奲宅尺拆揊摰斥池烲詀謵",
+    "chen": "伧侲傖堪填帘枕桭梣棧棽橙沈湛瀋疹瘨眈称稱肜胂謲跈闖",
+    "cheng": "倀傖净嗆噌埩嵊徵搶撜敞棱槍樘橖氶浧淨湞瑲盛盯睖矃虰觕趟踜蹚郢醒鎗鐺铛黨",
+    "chi": (
+        "佁俿剟匙卙呬呹哆喜嘯噭奓她徲慸扡抬拆拖拸捇提搋摴柅柢樆汖沱沶治泜滯狋眙祇离移穉箈"
+        "紕耛胝脪芪茬莉菭蛇蝭誀誃謻豉趐跅跢踅踶軧迡迣邌郗鍉離飾騺驪鳷鵣鶗齣"
+    ),
+    "chong": "偅傭僮喠樁橦涌漴潼烛痋盅祌种種茧蹱酮重",
+    "chou": "圳妯媿扭掫揄擣檮溴牰畤盩眣簉詶謅譸跾醔鈕鮋鯈",
+    "chu": "助嘔慉摢柠櫖涂淑炪硫祝絮耝菆著蠩觕詘諸跦踰",
+    "chua": "撮",
+    "chuai": "啐欼腄",
+    "chuan": "丳團惴掾椯甎膞踹",
+    "chuang": "倉囱戧朣橦漴漺舂葱",
+    "chui": "圌惙郵鬌魋",
+    "chun": "僢朐楯沌肫膞芚踳輇",
+    "chuo": "促吷啜孎拺斫淖焯箹簇綴荃蔟趵跿踱躇醛鋜錣鏃齱",
+    "ci": "兹司呰啙姕嵯差廁措枱柴栜滋澬粢胔茲薺蚝螅趑鈶",
+    "cong": "偬楤碂窗総縱總菆鏓",
+    "cou": "奏揍族楱簇蔟藪趣趨",
+    "cu": "且卒娕娖怚戚捽槭皻縐蔍蔖趣趥趨踀踓踤錯麆",
+    "cuan": "僔攒攢灒窾菆襸蹲",
+    "cui": "体卒察崒椊洒熣琗繀衰踤隹",
+    "cun": "墫洊浚蹲",
+    "cuo": "差摧昔最澨營玼瘥縒襊諎酇髊齹",
+    "da": "僤塌塔憚搨毼溚疸矺胆觰迭鿎",
+    "dai": "嘚大媞棣毒箉蔕蝳螮詒跢載逯遞遰隶馱駘",
+    "dan": "丼倓儃冉呾唌嘽噡壇娊忱怛惔愖憾檐欿湛潭澶燀皽石膻蜒蟺襜覘訑詹譂贍蹛酖醈餤黵",
+    "dang": "偒場崵燙瑒瘍",
+    "dao": "佻儔受啁嘄帱幬忑惆敦檮洮濤絩薵虭裯醻陶鳥",
+    "de": "地底登陟",
+    "dei": "嘚得",
+    "deng": "僜憕橙澄",
+    "di": "儥勺哋啻坻埅墆嵽弔扚提揥杓楴櫂浟疐的碮約肑胝芍苐茋莜蓧藋蚳諟赿踧蹄逐逮適隶題魡",
+    "dia": "嗲",
+    "dian": "佔唸埝拈沾涎痶磹腍蜓詀鈿頕",
+    "diao": "佻倜刀啁嬥挑敦椆淍矵稠糶絩綢莜蜩誂趙跳踔軺銚錭鳥鵃鸟",
+    "die": "佚咥哆啑崼怢挃柣楪槢泆涉渫窒至螲褶跕跮踢蹛軼鐵鞢鰨",
+    "ding": "奠掟汀灯町艼葶",
+    "diu": "颩",
+    "dong": "勭揰桐烔狪甬筒筩衕詷酮騆",
+    "dou": "侸剅吋投氀瀆瞗窬讀读逾鋀钭",
+    "du": "儥剫噣土塗宅斁晵暏樚橐睪竇竺纛罜襡詫都鍺陼頓顿",
+    "duan": "篅踹",
+    "dui": "啍埻奪搥敦杸槌瀢膭謉追鈗鋭錞鎚",
+    "dun": "俊坉忳憞腞腯豚鐓鐜镦",
+    "duo": "仛兑媠度捶揣杂杕杝柂棰橢沰沱澤硾茤袳襗詑誃貀跿鄲酡錞鍺陀隋隓馱驮鬌點",
+    "e": (
+        "亞佮侉偽匼叱哦啈啊啐啞囐埡堨娾媕庵搕曷椏欸歹洝猗玀疴痷砵硪胺蒍蘁蛤誒輵邑閜阿隘鬲"
+        "鴳齾"
+    ),
+    "ei": "欸",
+    "en": "饐",
+    "er": "嬭杒濡耏腝臑輭陾髶",
+    "fa": "拔撥汎泛貶酦",
+    "fan": "伋拚楓潘犿畨舩蟠袢",
+    "fang": "彷昞眪祊雱",
+    "fei": "墢怫拂柹橃橨犻砩祓笰紼胏茀茇蕟蕡裴襏賁髴鼥",
+    "fen": "匪噴坆坋奔愍扮拚敃燔獖玢盼砏葐賁錀頒鳻",
+    "feng": "埄捧方泛渢炐熢肨舽莑蚌豊逄鵬",
+    "fo": "仸佛",
+    "fou": "不垺炰芣衃",
+    "fu": (
+        "不仅偪包哺報婏嬎宓市帗彳怀捊掊枹柭汱沕沸溥璷畗箁纀脯芾莆萉蓲袚費軵还邚郍酻錇鞴韛"
+        "颰"
+    ),
+    "ga": "咖夹夾戛胳軋轧",
+    "gai": "咳核汽磑胲芥閡骸",
+    "gan": "个乾佄奸捍汗浛玵篢虷諴豃釬錎飦",
+    "gang": "亢伉戇扛抗溝犺碙肮阬頏",
+    "gao": "咎浩獋睪蒿鎬",
+    "ge": "介佫假可合吤嘅噶屹扢擖杚浩猲盖砝秴紇臈菏蓋蛤詥鉀鉿鎑鎘閘頜颌饹髂魺鮥鰪鵅",
+    "gen": "痕",
+    "geng": "亘亙亢恆硬絙邢頸颈",
+    "gong": "咣嗊杠渱疘硔磺礦篢紅红虹蛩贛釭銾鑛魟",
+    "gou": "傋區句呴拘泃痀豰軥鮈鴝",
+    "gu": "告呴哌嗗家怘枯櫎滑焸瓠皋磆胍苦角賈贾離骰鵠",
+    "gua": "呱咶咼惴括捖擖焻舌苽袿諣銛",
+    "guai": "噲罫",
+    "guan": "串卝婠幹懽斡果櫬權淉淪矜綸纶菅閞鵍",
+    "guang": "恍挄擴横櫎潢硄趪迋",
+    "gui": "偽匮哇娃撅桅概槣櫰洼溎潙炅硊祈繪蘬觖謉譌赽趹蹶鐀隗鳺鴂",
+    "gun": "卷混渾琯緷裷錕鰥",
+    "guo": "划咶唬囗埻掴摑楇櫎活涡渦矌簂聒腂蜮蝸蠃",
+    "ha": "吓呵獬虾蝦鉿",
+    "hai": "侅咳咴拸浬猲絯郂閡",
+    "han": "仠厂咁嚂嵌幹忓感扞攼旰桿椷榦欦汵泔淊淦澉澣灘犴甘矸笒軒鈐闞靬頜顩鳱",
+    "hang": "吭妔巷忼桁炕狠狼肮行邟酐",
+    "hao": "呺唬妞暠皋睾翯膠藃虠鎒镐",
+    "he": "吓呼咼哈哧喛嗑噈嚇害愒挌揭格洽渴犵猲硅繳纥苛藃藿蝎貉輅轄閡隺霍餄餲鬩鵠齃",
+    "hei": "嗨",
+    "hen": "哏噷掀艮",
+    "heng": "佷狟珩行訇",
+    "hng": "哼",
+    "hong": "共厷哅唝屸巆愩汪洚浲港瓨篊舼謍",
+    "hou": "吽呴腄詬銗",
+    "hu": "和嗃姱惡戏戲擭核欻汩洿淈淲濩瓡礐穫箎縎羽胍芔芦芴苦觷許许豰鈷鋘雇鴩鶮鶻鹄鹘",
+    "hua": "侉劐叱吪咶哇學找敌檴澮獪砉稞竵粿罫腂蒍豁輠魤鮭",
+    "huai": "佪划劃喟圳坯",
+    "huan": "圂垸孉巜懁援欥汍灌瑗皖眩睔瞏脘蒝螌蠸豩还還雚鸛",
+    "huang": "揘横汻洸爌芒茫",
+    "hui": "叀噦堕墮壞廆徊戲桧椲檜沬涣溃烜煒琿皓眭睢硊蒐蘬虫螝襘譮輠違銊鑴鞼韋韢鼿",
+    "hun": "婫惽捆揮昆梱棍湣湷焄煇珲眃碈緄緡顐餫",
+    "huo": "化呵和壑姡扮搉擭濊灬焃瓠礊篧膕萿諕豰越趏過隻",
+    "ji": (
+        "乁倚其卟厝吇呰堲奇姼尐居屰岋帺憿懠揖撽攲期棋楖櫭汥洁淁猗璾畟疵瘵睽瞉瞿秸簎粢系結"
+        "給繫给胔脔脨艻苙莋萁蒩蓻蘄蜡蝍蟻蟿蠀覘覿訐諔谿趞跂踑踦郅隔革鞊颳騎魝魥鮆鯽齊齍齐"
+    ),
+    "jia": "伽呷咖嘏夏宊押拮挈挟挾揩揳擖暇柙猰筴絜蝦頡駱骱",
+    "jian": (
+        "侟傔僣前咸喊塹孱帴揵攕朁槛橏檻沮浅涀淺濫犴瞯稴箴籈纖聻茛譖跈軒醎醶釰銒鋑錢錽鍊閒"
+        "險靬騫鰔鰜鹹黚黬齊"
+    ),
+    "jiang": "塂強强紅蔃虹",
+    "jiao": "僑勦卻叽咬喬嘐嚼妖嫶學嵺悎憢摎敥校樔橋激灂爝皛稾筊糾菽萩蕎覺觉趫蹻鄗釥骹",
+    "jie": (
+        "亥价假偈偕價唧唶啑嚌圾契她妎家嵑嶰差扢担拾搩擳斺暨桔楷概洯渴狤獬砝祖籍紇紒罝耤脥"
+        "艐苴藉蛣袓袷裓諎诘趌跲鍇雃頡髻"
+    ),
+    "jin": "吟婜嬐慬斳榗湛竻笒紾肋臸菳鋟馸",
+    "jing": "仱劲勁擏晟檠殑氏烴獷箐粇葝蜻醒鋞陘青靘頴",
+    "jiong": "坷垧扄昋瀅熒臦臩銄鎣顈",
+    "jiu": "剹噍愁氿湫稵穋繆蝤蹴",
+    "ju": (
+        "且仇佝俥告坥姐娶屈岨忂拱捄揈揟枸柜渠焣珇瞿租簍籧臄萭蒩蓻蔞蘧處蛆螶趉趡足蹻車軥车"
+        "郰鄒鄹鉏鋤雛驕鬻鮍"
+    ),
+    "juan": "圈埢婘巂弮悁惓擐朘梋棬泫甄眩睃腃萒蕊蜷襈踡身鋑鋗闂鞙韏鵍",
+    "jue": "乙叕吷啳嗟埆壆夬妜屈崫嶡柽梏構潏燋狂璚矞穱穴繑繘脚腳蕞蛙蠼袦角觳誳較闋闕鞽騤髉鱖",
+    "jun": "匀卷旬焞狻睃筠葰蔨訇鋆隽雋龜龟",
+    "ka": "呿咯",
+    "kai": "劾喝喫岂幆核欯渴溘濭豈閡雉",
+    "kan": "凵喊堿嵌扻監碪薟輱轁阚靬餡",
+    "kang": "坑奋杭沆羫荒阬骯",
+    "kao": "嵪搞撟槀槁焅熇稾薧訄",
+    "ke": "呵喀峇悈愘歁毼濭痾盍硞碣磆窼簻蚵袔鉿錁錒頦龕",
+    "kei": "刻剋尅",
+    "ken": "垠狠珢硍貇頎",
+    "keng": "坈奟忐揁殸硍硎脛踁鉺",
+    "kong": "椌矼穹腔",
+    "kou": "佝刳區嫗彀怐挎毆溝眗竘茠鏂",
+    "ku": "古圣挎捁掘搰朏楛泏硞窋跨齁",
+    "kua": "恗晇楇絓華袔錁顝髁",
+    "kuai": "会傀會檜浍澮狤璯蕢駃鬠魁",
+    "kuan": "完梡棵顆",
+    "kuang": "丱兄呈廣枉湟磺迋逛",
+    "kui": "傀匱歸殨瞶磈缺胿膭臾蒍觖踩闋頃鮭",
+    "kun": "卵混罤豤頑餛鰥齦",
+    "kuo": "噋噲會栝漷燭秳适鄺",
+    "la": "儠摺擸癩落蓝藍鱲",
+    "lai": "勑厲娕懶攋癘誺釐黧",
+    "lan": "僋啉坔壏廩懔暕湅漣煉蘫諫連郴",
+    "lang": "俍哴悢樠羹脼踉",
+    "lao": "僚嘐嫽撩獠絡络落蓼",
+    "le": "勒嘞牞",
+    "lei": "婁漯瘣盧祱肋郲",
+    "len": "啉",
+    "li": "仂位列叓叕叻悝扐扚捩擽柂氂泣浰淚濼灑犛珞矖砬硌纅翮蝕釃銐錑鑠霾颯鬲鬴黐",
+    "lian": "令孌搛撿攣槏欄歛瞵稴羸膦苓薟譧輦醶零鱄",
+    "liang": "俩倆倞惊莨蜋蹣閬靓靚駺",
+    "liao": "了佬僇勞摎樂樛橑潦窌繆蟉蟧轑鏐飂",
+    "lie": "例倈劦奊峛巁忚擖栗棙燤爄爉獦累綟膊臘邋",
+    "lin": "任伈惏溓滲玪稟顲魿",
+    "ling": "倰冷崚怜拎棱磷稜輘釘靇",
+    "liu": "僂摎斿泖泵游漻硐碌窌聊蓼蔞鉚陆陸",
+    "lo": "咯",
+    "long": "寵弄硦蝕衖谾龐",
+    "lou": "寠牢窶露",
+    "lu": "偻僂六哷壘婁寠慺攄樓漊瘳瘻瞜磟簍累繆翏膚蓼蔞角觻謱谷賁軁鄜酪鏤鱳",
+    "luan": "乿脟臡薍覶",
+    "lun": "睔",
+    "luo": "儽咯挼捋捰攎攭果格樂橐櫟欙烙爍猓皪砢硌碌礫茖蛒蜾蝸蠡袼詻跞路躒酪鉻鎯鱳",
+    "lve": "剠寽率藥詻",
+    "m": "呒唔嘸",
+    "ma": "么嚜抹摩痳貉貊靡驀麽",
+    "mai": "咪哩唛派貍",
+    "man": "埋幕澫絻蹣",
+    "mang": "厖朚朦甿盳瞢蘉鸏龍",
+    "mao": "侔勖務嵍描毣牟秏緢耗蛑貇鉾霿",
+    "me": "末没麽",
+    "mei": "味嚜坶墨某櫗氼溦眊糜羙膴谜",
+    "men": "亹呇怋悗惛殙汶滿瞞穈鞔",
+    "meng": "嫇尨庬明朚氓瞑蟊蟒鋂雺霧髳鱦黽黾",
+    "mi": "劘幺摩摵檷溟爾獮眽瞴穈籋苾蓂辟鑖",
+    "mian": "俛冥泯湣牑瞑緡莬蠠靦黾",
+    "miao": "仯吵彯猫紗繆缪蜱訬",
+    "mie": "咪瀎眜羋",
+    "min": "厸呡汶渂湏玟盷眠繩黽",
+    "ming": "皿盟萌",
+    "miu": "嘐繆缪",
+    "mo": "万么伯佰冒勿嘿嬷帕戂撫攠无昧没無狢百絔縸脈脉艒藐蟆袜袹譕貈貉貌鄚鞨",
+    "mou": "件厶呣堥婺敄桙毋畝蟱袤鞪",
+    "mu": "嘿姥娒婺朷模樢牟獏繆茻莫萺鶩",
+    "n": "咹哏哽唔唵",
+    "na": "内南呶抐淰秅笚箬絮蒘訤詉誽蹃郍",
+    "nai": "佴哪妳掜搱能那",
+    "nan": "冉囝妠嫨弇攤灘罱",
+    "nang": "噥憹搑涳瀼蘘",
+    "nao": "婥巙摎橈澆腝膠蝚",
+    "ne": "呐哪疔那",
+    "nei": "哪婑浽那餧",
+    "nen": "媆枘腝臑",
+    "neng": "竜而耐螚",
+    "ng": "哽唔唵嗯",
+    "ni": "兒呢嬭孨嶷彌慝懝抐掜濔濘瀰灄爾痆祢禰蛪譺鉨鑈",
+    "nian": "捵榐溓痆粘趁輾",
+    "niao": "尥溺茮",
+    "nie": "乜倪哪囐囡埝峊嵒幸捻掜攝棿泥褹諗鉨鉩銸鋷",
+    "nin": "恁",
+    "ning": "冰年攘泥疑鬤",
+    "niu": "怓抝拗杻沑蚴",
+    "nong": "咔憹莀",
+    "nou": "嬬搙擩譨",
+    "nu": "仅呶帑挐擩狃絮聏肭褥詉",
+    "nuan": "暧湪濡臑",
+    "nun": "媆",
+    "nuo": "呐哪堧娜媠掉搙毭濡耎袲袳那鍩難需",
+    "nve": "婩",
+    "o": "嚄",
+    "ou": "区區吽握摳敺樞渥澫紆蓲遇醧",
+    "pa": "叭吧扒把汃派耙芭苩跁鈀钯",
+    "pai": "啡椑箄脾迫",
+    "pan": "乑伴半卞坢姍審弁彦扳拌柈湴瀋片番皤盻眫籓繁胖膰般螌褩賁踫鄱闆",
+    "pang": "仿傍夆尨彭房方榜汸牓磅篣膀蒡蠭趽逢鎊髈鰟",
+    "pao": "包嚗抱摽犥瓟穮窌胞脟苞藨蚫袌謈趵鉋颮鮑",
+    "pei": "倍啡坏垺妃妚婄抷掊攈昢柭棑棓淠犻琣肺艴茇茷蜚錇陫",
+    "pen": "吩汾濆衯",
+    "peng": "亨傍傰塜庄搒摓旁榜泙洴淜滂漨痭絣胓苹荓輧逢逬駍",
+    "pi": (
+        "俾副卑吡否坏培奊妚嶏帔庇庳怶扑拂枈椑比濞猈番痦笓篦粃罷苤萆蕃薜蚌螕被裨鄱鈈鈲鎞陂"
+        "隦鞞頗"
+    ),
+    "pian": "便平徧扁猵璸緶缏萹蝙褊辨辯",
+    "piao": "摽朴潎膘莩蔈謤驃驫骠髟麃",
+    "pie": "潎蔽覕",
+    "pin": "匕娉拚泵砏蘋",
+    "ping": "倗冯堋砰硑秤聘鉼馮",
+    "po": "剖哱奤尃屰巿廹搫朴泺溥濼猼番皛繁翍膊跛醱陂霸馞髆",
+    "pou": "吥垺培堷抱棓涪瓿襃踣部",
+    "pu": "剥卜堡扶抪捗暴柨甫痡砲秿箁苻荹蜅襆豧鵏",
+    "qi": (
+        "丌亟伎偈傶切刺勤吃吱喰宿己幾忮忾恓恝愒愾扢扱扺技抵挈揭支敧朞枝梩欹洓溪滊漬濟焏甭"
+        "畸磎礘示禨稘稽絜緝缉肐舙荠薺螇蟣衹袳裿觭趞趿踖踦躩軙逗鄿鐖隑饑鬾鮨鸂齮"
+    ),
+    "qia": "佉價卡咭客抲挈揢搳擖楬疴矻磍絜袷鮚",
+    "qian": (
+        "厱唊寨幵廞忏揃摼撍撖朁杴柑欿歁涔淒湔漸灒煔熑燂燖犍玪磏筋纤羥腱艌荨葥葴藖蚙赶鉆鋟"
+        "錎鍼鐱鑯開顩馯鳽鶼齦"
+    ),
+    "qiang": "創勥哐啌将將彊慶控摪爿矼箐跫鶬",
+    "qiao": (
+        "丂偢削喿噭塙墧壳峤嶠幓愁招捎搞摮敫校橾殼毳潐焦燋睄硝碻磝礉窯箾繰茭蕉蟜譑跤踃蹻鄗"
+        "醮銚鏒雀顤驕"
+    ),
+    "qie": "伽倢唼喋嗛契婕帹慊捷椄沏渫漆猰疌砌稧脞茄蕺蛣詧趄跙輵魥鰈",
+    "qin": "儭埐堇墐嶜廑忴扲梣槿橬櫬浸滲矜肣臤蓁蘄衿覃赺鈂鈊頜顩",
+    "qing": "亲倩啨声涇渹硜精綪綮胜莔親軽鯖鯨鶄",
+    "qiong": "嬛琁鞠",
+    "qiu": "仇區厹团惆愀捄朹橚櫹氽氿湫牫艽趜踆邺釓馗鱃鳩龜龟",
+    "qu": "句巨弆怚戌枸欪毆焌組翵脥苣蚼蜡誇趍趜跔跙跼遽鉤鐻鞠鞫騶鮈鶌",
+    "quan": "串卷圳拴捲栓桊槫灥狋獾甽矔純腃謜譔酄鸛",
+    "que": "傕屈攉敠汋決炔猎舄芍蚗觳踖隺鳥",
+    "qun": "歏箘踆蹲輑遁麇麕",
+    "ran": "柟熯蹨",
+    "rang": "孃忀欀蠰鑲",
+    "rao": "撓犪穘繚蟯",
+    "re": "偌喏捼渃焫若蹃",
+    "ren": "儿恁涊菍釰",
+    "reng": "戎穰耳艿",
+    "ri": "氜",
+    "rong": "傛縟隔頌",
+    "rou": "莥鑐髳",
+    "ru": "偄吺咮女挐月檽獳繻肉臑鑐需",
+    "ruan": "擩檽濡燸腝蝡需",
+    "rui": "兑内惢抐撋棁笍綏苼踒鈉鏸",
+    "run": "撋",
+    "ruo": "婼惹挼撋溺芮",
+    "sa": "攃檫殺纚蔡趿鎝鏾霅鞈",
+    "sai": "思",
+    "san": "傪參潵蔘謲霰",
+    "sang": "纕",
+    "sao": "哨懆梢橾燥縿繰缲鄵鐰颾鰺",
+    "se": "塞寨廧愬拺槭泣溹漬粣薔虩鉍鎍鎩闟",
+    "sen": "傪摻洒滲",
+    "sha": "哈嗄噎挱挲接摋攝杉歰濈菨賒閷霅",
+    "shai": "摋攦殺色諰",
+    "shan": "僤儃儋单單壇嶦掸掺摻撣擔攙杣栅檀櫼澹烻猭禅禪穇笧纔葠蔪蟬襂襳邓閄顃顫髟鱣",
+    "shang": "埫場塲愓曏汤湯禓蠰踼",
+    "shao": "佋削召招搜杓溲燿笤綃萷裢鞘韒",
+    "she": "奓折抴拾挕揲睫碟磼聶葉蛞邪鉈鍦闍阇鞨",
+    "shei": "誰谁",
+    "shen": "信参參吲嘇嫀幓抌抻搷棯槮淰湛瞋糁糝綝葚鉮震鯅黮",
+    "sheng": "丞乘冼垩姓娍媵晟椉殸渑澠甸箵鱦",
+    "shi": (
+        "什厔咶唑啇嘘埶堤宲寺峙彖忯惿挈提斯楴檡殖殺汁沶液澤灑狧狶畤痑秲箷篩繹耆肢舍褆訑赫"
+        "跩踶遞遰郝酾醳釃鍉鎩飭馶魳齛"
+    ),
+    "shou": "嘼掱敊濤熟醻",
+    "shu": "俆俞俶兪售嗽娶孎忬悆捈揄朱杼氀涑潏疋稌籔紵翛荼蒣藪蠾謶豫透野鐲除鷸",
+    "shua": "唆涮選",
+    "shuai": "率綏縗",
+    "shuan": "專槫汕踹",
+    "shuang": "傱泷淙漴瀧",
+    "shui": "娷捝説说",
+    "shun": "俊巛巡恂楯盾眴瞤輴",
+    "shuo": "勺嗍嗽揱数數杓汋洬溯濯燿療萷藥銏",
+    "si": "以伺似佁俟偲傂厕台已廁徙愢析枱梩祠簛糸肄菥螔謕逘銉鍶雉食飴騃鷉麗",
+    "song": "吅憁捒揔摗棇漎蓯蘴",
+    "sou": "捒撨敕族棷欶涑潚謏鏉",
+    "su": "僁卹嗖圱埣捽搬摵棴稡縮缩蓿",
+    "suan": "撰篹選",
+    "sui": "嗺娞尿彗挼撋毸篲粹縗脺莎蓑遺鏸陏隊靃",
+    "sun": "喰扻摌栒潠跣餐",
+    "suo": "些嫅戲抄挱挲歲沙洓犧獻縒莎葰衰逡霍靃魦",
+    "ta": "傝呾哈嗒太拓搭沓漯濕荅达達鉈鎉鎑闟阘靸鞈韃",
+    "tai": "呔咍大奤忕斄汏漦珆能詒釐鈶騃骀",
+    "tan": "但儃啴單嘽嘾弹彈撢撣橝沈淡湛漢潬澹炎癉禪緂繵胆舔蕁蕈裧镡鷤黮",
+    "tang": "埫嵣惝愓擴攩欓漡簜蕩逿鐺閶闣黨",
+    "tao": "叨夵姚抭挑涭焘燾籌綢跳頫",
+    "te": "匿式犆職脦貸",
+    "tei": "忒",
+    "teng": "僜螣",
+    "ti": "俶啑堤奃姼媂媞屟弟徥折是桋棣渧狄珶睇磃穉肆虒蟬衹詆諦踶躍达適錫鐟隄鬄",
+    "tian": "佃典吞嗔奵娗寘捵撣栝沗沾滇瑱甸町畇瞋紾苫蚕蚺跈銛鎮钿顚",
+    "tiao": "儵咷啁姚朷桃稠脩艞苕蓧調调超趠踔銚頫",
+    "tie": "占怙惵蝶詀跕鉄鉆鋨",
+    "ting": "侱奠庍忊朾濎珵鋌铤",
+    "tong": "侗偅垌峒恫恿洞湩熥爞硐硧穜絧艟蜼蟲重鼕",
+    "tou": "埱愉斢褕諭諳逗",
+    "tu": "余啚墿摕斁杜檡瑹腞趃跌鋀",
+    "tuan": "剬塼墥嫥專揣敦畽痪磚税蓴褍鱄鶉",
+    "tui": "啍墤弟忒怢橔焞税聉脮脱謉讉追饋騩",
+    "tun": "吨吴囤庉憞敦汭沌炖燉窀純肫膯蜳褪逐錪",
+    "tuo": "他侻嘽圫它惰撱杝柁棁池牠磚税綏舄蛇蟺袘訑詑説踻軃迆迤鉈鋖铊阤隋馲魄鱓",
+    "wa": "凹唲啘坬姽帓徍汙瓩窐譁譌靺鞋鮭黳",
+    "wai": "咼夭瀤",
+    "wan": "免园夗夘娩惌掔朊槾涴箢絻綄莞莧莬蔓蚖貫鄤鋺關骫魭",
+    "wang": "匡尢忹抂方朚琞皇芒迬",
+    "wei": "于倭唩噲堤崴巋廆恑捼撝有机沇濊熨猗猚瓗癐眭睢瞶立膸芟茟荽蜹觿趡踒遗遺錗阢隗隹鰖",
+    "wen": "免呅娩忞愠昧歾殁煴眼笏絻緼脕藴褞限韞鴖",
+    "weng": "壅",
+    "wo": "咼喔嗌噁嚄堝夭婑媪捼杌濄瘟矆艧蒦薶踠馧龏",
+    "wu": "亡仡侉喔嘸噁埡堥墲娒峿幠恶惡扜扝揾於旄杅柮母沕渞渥盓瞀瞴笏筽膴蝥趶釫鋘鋙陚霿齬",
+    "xi": (
+        "卤卻吚呰咦咭嚊塈奊娭媐屎嵇巂愾戯摡撕擊既杫栖棲欪歙氣洒濕灑燍猎獻瓕碏纚羛義脅腊茜"
+        "莔蔇虒蜤蜴蝷裼褶訢詑誒謚蹊遟郄釐鈒銑錯雭餙鰓鼳鿭"
+    ),
+    "xia": "假厦叚呀呷呼哧唬嗄嗑埉夾岈廈徦押捾搳斜昰欱歃毳浹瘕笚給芐葭螛諕謑郃",
+    "xian": (
+        "俔咁嗛埳堿妗姍姺孅寰彡慊慳懢捍探揱搚梘槏欦洒洗溓濂灑玹盷省瞷矣碱礆禰筧綅綖縿羬肩"
+        "脅膁臤蘞見见譀軐軒醶釤錟鏾铣锬闞顈饀鰔黹"
+    ),
+    "xiang": "亨傢儴勷啍攘樣洋潒皀纕羏舡蘘迒閧闂降鬨鴹",
+    "xiao": (
+        "佼俏削叟号呼咻哨唬啋嗃嘮奡姣恔捎搜撓撨梢橚歒滧漻潚澩烋熇燆爻狡獟睄箾絞縿胶脩芍茭"
+        "莦薂蛸謞謼譊較轇颵騷驕骹鵁鷕"
+    ),
+    "xie": (
+        "儶叶吤唏喈夾契孈慀接搚摺枻桔梋榝槷檞欸歙殺汁湝溉滊潰獦眭碿絜耶苴蝑血裌觟解諜譮豫"
+        "跬躠迦鍱隰頁颉骱鬹魼鮭鲑"
+    ),
+    "xin": "噷姰寻尋庍愖憖撢橝款礥興莘镡鬵",
+    "xing": "坓嫈巠熒狌省研胜餳饧",
+    "xiong": "宪昫能芎赨",
+    "xiu": "嚊宿櫹煦綉臭茠莠蓨",
+    "xu": (
+        "于伃休余呼咻嘔嘼圩妶姐嶼怵恓惐掝旮朐欻歘浒淢滀滸畜眗矞砉緰肷芋蓲蚼蛡規諿謣謳邪鉏"
+        "鉥雩馘"
+    ),
+    "xuan": "亘券喛夐妶姰嬛揈撰擐昕暅暖洵涓滋澴煇煖狟玆瓊盤絃絹縣蜎還鐶饌駨",
+    "xue": "哮噱嚯怴敩斅決泧泬滈炔疦瞲矆蹻韡",
+    "xun": "咰姰孫悛撏梭洒浚潭濬煇燂爓狻眴筍篔絢荤葷蕁蟫逡遁郇鑫鶽",
+    "ya": "厭吾呾堊姶御拁札椻歇浥潝烏疋疨碣磍穵輅輵邪釾閘顔鵪",
+    "yan": (
+        "但俺剡厂厃唌囐埏埯媕嬐屵嶮巡广庵挻捝掞揞晻橪殗殷氤汧洇洝涎淡淫炏狠瓛癌羡羬膁菴蔫"
+        "薟覃豣趼這鉛鋋錟铅閼阏阭阽險靨顑鳱麙麲黰齗"
+    ),
+    "yang": "勜卬婸將愓昂映歍湯潒玚瑒英詳霙",
+    "yao": "么佻侥僥匋嚙嬈崤幼徼怮恌揄撽樂殽洮淫瀹烄猶玅由疟瘧箹約约蕘趯踰铫陶隃驁",
+    "ye": "偞咽喝墅射峫懕拽揞揲擖斜枒殕洇涂焆煠熀瓛痷窫緤聶荼虵蠱邪釶餘饐黦",
+    "yi": (
+        "丿也仡佗儗印厭叕台叹听喦嗌噎圪坨夕失奇妷姬孴它射尾崎巳彵忔怠戲戺扡掎搋搤擇施昳杝"
+        "槷樴歖汽泄洩洫渫澤焉焬焱熙犄狏疙硪礙紲絏維綺羡艾荑蛇蛾袂褘襗誒謚譺輗辥迭迱釋釶鉇"
+        "鉈銕錡钀阣阤陁隶雉霅靉食鮧鴺黝"
+    ),
+    "yin": "伒众傿听唫圻垦壹币梀欭欽沂湛湮潭潯烟玪硍窨縯芩言訢酓釿闇齦龈",
+    "ying": "俓吋呎哩哽唡啢夃央嵤巆旲景柍桯泂滎焸甸眏禜繩耺荥莖逞韹",
+    "yo": "嚛育",
+    "yong": "容筩臾蕹遇銿飬",
+    "you": "冘叹坳奥妋怞戭扰揂揄朓梎汓汼泅獶甴痏繇羗聱脩莤蚘蝤褎銹鯈",
+    "yu": (
+        "丂亏僪吁吳吾唷喁噢圩奥娪媮宛尉崛悇惌懊或拗捓捥昙栩栯梧欥毹氀汙汩澳灹煨熨獝王琟畬"
+        "痏粥緰腧舒苑菀菸蔚藇蜍蝺蟈衘衙谷貍貗郚釪鐍铻閼隃隩顒魣鱮齵"
+    ),
+    "yuan": "允咽喛圜妧嫚宛弲捐楥涓涴焆畹穿芫薳輐阮隕",
+    "yue": "乐哕哾囝块妁扚擽枂栎樂櫟汋焆爍矆臒蜕蠖説说趯躒鋭鑠鑰钥髺",
+    "yun": "员員均媪宛尉尹怨榅涒温煇煾玧瘟盾筍苑菀蕰蜵輼",
+    "za": "咱啈啐啑嘁噈囃扎灒籴",
+    "zai": "才",
+    "zan": "偺兓喒囋拶涔淺湔濺穳篸臢酂鏩",
+    "zang": "戕牫藏驡",
+    "zao": "槽璅窖繅草謲",
+    "ze": "侧側咋廁措柞灂睪稄稷耫葃蘀謫飵鰂",
+    "zen": "僭撍",
+    "zeng": "曾綜縡综鬷",
+    "zha": "偞册剳咋哆喋喥囃怍扠插擖查柵渫潳笮箑紥紮膪苴蔖藸蜡諎謯蹅軋轧鞢馇鰈齟齰",
+    "zhai": "亝侧側厇厏啇嚌度抧择擇擿柴牴疵祭簀翟膪豸責駘骴齊",
+    "zhan": "亶儃單孱嵁怗拃撣椾欃湔澶皽碊袒襢謙跕蹍躔辗醮顫颤餰鳽點",
+    "zhang": "弡鞝",
+    "zhao": "佻啅嘲晁朝桃淖濯着箌菬著蚤釽鳭鼂",
+    "zhe": "乇仛嘀囁堵庶慴慹扸攝斥杔棏樀耷聑聶著螫褚謶軼適陬鷙",
+    "zhei": "这這",
+    "zhen": "唇坫填姫慎戡枮椹榐槇沴溱滇竧縝蜄謓趁辴鈂鍖陳鮝黮黱鼎",
+    "zheng": "丁丞倀偵埥奠嶒帧徎憕承敞朾浧町瞠禎綪脀貞趟鮏鲭",
+    "zhi": (
+        "伎剬厎呮咥嚔埃媞實徵恃抵拓捗摕摨擿斦昵晢杝杫栺樀樲歭氏氐潪璏瘈眰砥示祁祇秇积絺耆"
+        "胵臷茝菭薙虒蚔觝識识跂踶蹛蹢遟遲酈銴陁鳩鶨"
+    ),
+    "zhong": "乑夂徸忪橦潼童緟舂董蚣蝩蟲褈鈆",
+    "zhou": "侏倜啁啄喙嚋婤扭柚椆注洀碡祝紬繇翢育胕舳薵調諏逐鈾騶鬻",
+    "zhu": (
+        "之予兪咮嗻噣宁尌属屬庶搊敱斀斗朝朮术枓柠柷楮櫡泞澍磩篴芧苧茁蓫薥藷藸蚰褚跙軸逗逫"
+        "鉏阻除飳騶鸀"
+    ),
+    "zhua": "挝摣撾爪",
+    "zhuai": "尵睉轉转顡",
+    "zhuan": "传傳僝剸巽恮摶沌湍漙篿簨縳耑",
+    "zhuang": "僮奘幢憧戆獞艟贛",
+    "zhui": "倕垂揣椎槌磓箠腏致萑醀錗鎚隊隧",
+    "zhun": "啍圫屯忳敦旽淳甽盹純胗踆飩",
+    "zhuo": "剢勺啜噣墌捔掇斮杓棹淖準焯燋狵琢着矠箸繳缴聉肫著蓔蕞藋蝃趠趵踔蹠躅鉵",
+    "zi": "事仔吱呲孖柴次沝泚洓甾疵穧純茈菑薋跐載鋅齊齜",
+    "zong": "从從枞樅潨熜艐蓯",
+    "zou": "偢媰掫搊族芻趣",
+    "zu": "伹倅啐嘁姐岨怚柤槭沮淬砠稡綷苴菹謯趲蹴鉃鉏鉐錊鎐鑿顇駔",
+    "zuan": "劗揝撮攢欑篹籑賺赚躦",
+    "zui": "咀堆嫢嶉摧撮槯欈濢睟羧脧蕝觜酨雋",
+    "zun": "僎奠拵捽栫瀳袸跧踆蹲",
+    "zuo": "乍凿嘬挫撮柞柮砟笮苲諎迮酢醋鑿",
+}
@@ -0,0 +1,71 @@
+"""
+SymSpell 风格的删除邻域索引（拼写纠错）
+
+对每个词条（只取前 prefix_length 个字符）预先生成编辑距离不超过 max_distance 的
+全部删除变体，建立 删除变体 -> 词条ID 的倒排。查询时只需对查询串的删除变体做
+少量哈希探测即可召回候选，再用真实编辑距离校验。
+"""
+from typing import Dict, List, Set, Union
+
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """生成 word 在 max_distance 次删除以内的全部变体（包含 word 本身）"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                variant = item[:i] + item[i + 1:]
+                if variant not in results:
+                    results.add(variant)
+                    next_frontier.add(variant)
+        frontier = next_frontier
+    return results
+
+
+class DeletionIndex:
+    """删除邻域倒排索引"""
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        """
+        Args:
+            max_distance: 最大编辑距离
+            prefix_length: 只对词条前若干个字符生成删除变体（控制索引大小）
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # 删除变体 -> 词条ID；只有一个词条时直接存 int，节省内存
+        self.entries: Dict[str, Union[int, List[int]]] = {}
+        self.key_count = 0
+
+    def add(self, key_id: int, key: str):
+        """添加词条"""
+        self.key_count += 1
+        for variant in deletes(key[:self.prefix_length], self.max_distance):
+            existing = self.entries.get(variant)
+            if existing is None:
+                self.entries[variant] = key_id
+            elif isinstance(existing, int):
+                if existing != key_id:
+                    self.entries[variant] = [existing, key_id]
+            elif existing[-1] != key_id:
+                existing.append(key_id)
+
+    def lookup(self, query: str) -> Set[int]:
+        """召回与 query 编辑距离可能不超过 max_distance 的词条ID（需调用方校验）"""
+        candidates: Set[int] = set()
+        for variant in deletes(query[:self.prefix_length], self.max_distance):
+            found = self.entries.get(variant)
+            if found is None:
+                continue
+            if isinstance(found, int):
+                candidates.add(found)
+            else:
+                candidates.update(found)
+        return candidates
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+语料实体标注
+对目录下的全部文本文档做词典匹配提及抽取与实体链接，多进程并行，结果写为 JSONL 或 BRAT standoff
+
+索引只在主进程加载一次，之后 fork 工作进程，以写时复制方式共享；文档按完成顺序逐篇写出，
+中断后以相同参数重新运行即从上次完成处继续（JSONL 按已写出的 doc_id，BRAT 按已存在的 .ann 文件）。
+
+用法:
+  python scripts/annotate_corpus.py notes/ annotations.jsonl
+  python scripts/annotate_corpus.py notes/ brat_out/ --format brat --processes 8
+  python scripts/annotate_corpus.py notes/ annotations.jsonl --index linker.idx --entity-type drug
+  python scripts/annotate_corpus.py notes/ annotations.jsonl --restart
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ontology.entity_linker import EntityLinker
+from ontology.parallel_linker import fork_pool
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# fork 前设置，子进程继承（写时复制共享）
+_worker_linker = None
+_worker_options = {}
+
+
+def annotate_text(linker, text, min_length=2, entity_type=None):
+    """抽取一篇文档中的实体提及，返回标注列表（位置为字符偏移）"""
+    annotations = []
+    for mention in linker.extract_mentions(text, min_length=min_length, entity_type=entity_type):
+        entity = mention["entity"]
+        annotations.append({
+            "start": mention["start"],
+            "end": mention["end"],
+            "mention": mention["mention"],
+            "standard_name": entity.get("standard_name"),
+            "type": entity.get("type"),
+        })
+    return annotations
+
+
+def _annotate_document(task):
+    """工作进程：读取并标注一篇文档"""
+    doc_id, path = task
+    start = time.perf_counter()
+    try:
+        with open(path, encoding=_worker_options["encoding"], errors="replace", newline="") as f:
+            text = f.read()
+        annotations = annotate_text(_worker_linker, text, _worker_options["min_length"],
+                                    _worker_options["entity_type"])
+    except OSError as exc:
+        return doc_id, None, None, str(exc), time.perf_counter() - start
+    return doc_id, text, annotations, None, time.perf_counter() - start
+
+
+def iter_documents(input_dir, pattern):
+    """按路径顺序列出文档：(doc_id, 路径)，doc_id 为相对输入目录的路径"""
+    root = Path(input_dir)
+    for path in sorted(root.rglob(pattern)):
+        if path.is_file():
+            yield path.relative_to(root).as_posix(), str(path)
+
+
+class JsonlWriter:
+    """每篇文档一行 JSON；续跑时跳过已写出的 doc_id，并截掉中断时写了一半的末行"""
+
+    def __init__(self, output_path, restart=False):
+        self.path = Path(output_path)
+        self.done = set()
+        if self.path.exists() and not restart:
+            self._recover()
+        self.f = open(self.path, "w" if restart else "a", encoding="utf-8")
+
+    def _recover(self):
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    self.done.add(json.loads(line)["doc_id"])
+                except (ValueError, KeyError):
+                    break
+                valid_bytes += len(line)
+        if valid_bytes < self.path.stat().st_size:
+            logger.warning(f"截掉输出文件末尾不完整的记录: {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def is_done(self, doc_id):
+        return doc_id in self.done
+
+    def write(self, doc_id, text, annotations):
+        record = {"doc_id": doc_id, "length": len(text), "annotations": annotations}
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class BratWriter:
+    """每篇文档写 .txt 与 .ann（T 行为实体，# 行注明标准名）；.ann 原子写入，存在即视为已完成"""
+
+    def __init__(self, output_dir, restart=False):
+        self.root = Path(output_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.restart = restart
+        self._owners = {}  # 输出路径 -> doc_id
+
+    def _txt_path(self, doc_id):
+        """doc_id 补上 .txt 后缀作为输出路径；"x" 与 "x.txt" 会落到同一文件，视为错误"""
+        txt_path = self.root / doc_id
+        if txt_path.suffix != ".txt":
+            txt_path = txt_path.with_name(txt_path.name + ".txt")
+        owner = self._owners.setdefault(txt_path, doc_id)
+        if owner != doc_id:
+            raise ValueError(f"文档 {owner} 与 {doc_id} 的 BRAT 输出文件相同: {txt_path}")
+        return txt_path
+
+    def is_done(self, doc_id):
+        return not self.restart and self._txt_path(doc_id).with_suffix(".ann").exists()
+
+    def write(self, doc_id, text, annotations):
+        txt_path = self._txt_path(doc_id)
+        txt_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(txt_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+        lines = []
+        for index, annotation in enumerate(annotations, 1):
+            # BRAT 类型名不能含空白
+            entity_type = "".join((annotation["type"] or "Entity").split())
+            mention = annotation["mention"].replace("\n", " ")
+            lines.append(f"T{index}\t{entity_type} {annotation['start']} {annotation['end']}\t{mention}")
+            if annotation["standard_name"]:
+                lines.append(f"#{index}\tAnnotatorNotes T{index}\t{annotation['standard_name']}")
+        ann_path = txt_path.with_suffix(".ann")
+        tmp_path = ann_path.with_name(ann_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        os.replace(tmp_path, ann_path)
+
+    def close(self):
+        pass
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def annotate_corpus(linker, input_dir, writer, pattern="*.txt", processes=None, min_length=2,
+                    entity_type=None, encoding="utf-8", chunksize=8, report_every=1000):
+    """
+    标注目录下的全部文档，结果交给 writer 逐篇写出
+
+    Returns:
+        统计：文档数、跳过数、失败数、提及数、字符数、吞吐量、单篇耗时分位数
+    """
+    global _worker_linker, _worker_options
+    processes = processes or os.cpu_count() or 1
+
+    tasks = []
+    skipped = 0
+    for doc_id, path in iter_documents(input_dir, pattern):
+        if writer.is_done(doc_id):
+            skipped += 1
+        else:
+            tasks.append((doc_id, path))
+    if skipped:
+        logger.info(f"续跑：跳过已完成的 {skipped} 篇文档，剩余 {len(tasks)} 篇")
+
+    # fork 前构建好提及抽取自动机，子进程直接共享，不必各自构建
+    linker.build_mention_automaton()
+    _worker_linker = linker
+    _worker_options = {"min_length": min_length, "entity_type": entity_type, "encoding": encoding}
+
+    pool = fork_pool(processes) if processes > 1 else None
+    if pool is not None:
+        results = pool.imap_unordered(_annotate_document, tasks, chunksize=chunksize)
+    else:
+        if processes > 1:
+            logger.warning("当前平台不支持 fork，退化为单进程标注")
+        processes = 1
+        results = map(_annotate_document, tasks)
+
+    latencies = array("d")
+    documents = mentions = characters = failed = 0
+    start = time.perf_counter()
+    try:
+        for doc_id, text, annotations, error, seconds in results:
+            if error is not None:
+                failed += 1
+                logger.error(f"读取文档失败 {doc_id}: {error}")
+                continue
+            writer.write(doc_id, text, annotations)
+            documents += 1
+            mentions += len(annotations)
+            characters += len(text)
+            latencies.append(seconds)
+            if report_every and documents % report_every == 0:
+                elapsed = time.perf_counter() - start
+                logger.info(f"已标注 {documents}/{len(tasks)} 篇（{documents / elapsed:,.1f} 篇/秒，"
+                            f"{characters / elapsed / 1e6:.2f} M字符/秒），提及 {mentions} 个")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "documents": documents,
+        "skipped": skipped,
+        "failed": failed,
+        "mentions": mentions,
+        "characters": characters,
+        "processes": processes,
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(documents / elapsed, 1) if elapsed > 0 else None,
+        "characters_per_second": round(characters / elapsed) if elapsed > 0 else None,
+        "document_latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(_percentile(ordered, 0.5) * 1000, 3),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='语料实体标注（多进程词典匹配 + 实体链接）')
+    parser.add_argument('input_dir', help='文本文档目录（递归查找）')
+    parser.add_argument('output', help='输出路径：JSONL 为文件，BRAT 为目录')
+    parser.add_argument('--format', choices=['jsonl', 'brat'], default='jsonl', help='输出格式 (默认: jsonl)')
+    parser.add_argument('--pattern', default='*.txt', help='文档文件名模式 (默认: *.txt)')
+    parser.add_argument('--index', default=None, help='索引快照路径 (见 EntityLinker.save_index)')
+    parser.add_argument('--data-dir', default=None, help='本体数据目录 (默认: ontology/data)')
+    parser.add_argument('--entity-type', default=None, help='只标注该类型的实体 (如 drug、disease)')
+    parser.add_argument('--min-length', type=int, default=2, help='提及的最小字符数 (默认: 2)')
+    parser.add_argument('--processes', type=int, default=None, help='工作进程数 (默认: CPU核心数)')
+    parser.add_argument('--chunksize', type=int, default=8, help='每次分发给工作进程的文档数 (默认: 8)')
+    parser.add_argument('--encoding', default='utf-8', help='文档编码 (默认: utf-8)')
+    parser.add_argument('--restart', action='store_true', help='忽略已有输出，从头标注')
+    parser.add_argument('--report-every', type=int, default=1000,
+                        help='每标注多少篇输出一次进度 (默认: 1000)')
+    args = parser.parse_args()
+
+    if args.index:
+        linker = EntityLinker.open_index(args.index)
+    else:
+        linker = EntityLinker()
+        linker.load_ontology(args.data_dir)
+
+    if args.format == 'brat':
+        writer = BratWriter(args.output, restart=args.restart)
+    else:
+        writer = JsonlWriter(args.output, restart=args.restart)
+
+    stats = annotate_corpus(
+        linker, args.input_dir, writer,
+        pattern=args.pattern,
+        processes=args.processes,
+        min_length=args.min_length,
+        entity_type=args.entity_type,
+        encoding=args.encoding,
+        chunksize=args.chunksize,
+        report_every=args.report_every,
+    )
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
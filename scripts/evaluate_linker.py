@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+实体链接准确率-延迟评估
+用金标准文件（提及, 期望标准名）评估不同链接配置与阈值下的精确率、召回率和单次链接延迟分位数，
+并标出帕累托最优的组合（没有其他组合在精确率、召回率、P95 延迟上都不差且至少一项更好）。
+
+金标准为 JSONL / CSV，每行一个提及；期望标准名为空表示该提及不应链接（NIL），链接了即为误报。
+可选的实体类型列会传给 link(entity_type=...)。
+
+用法:
+  python scripts/evaluate_linker.py gold.jsonl --thresholds 70 80 85 90
+  python scripts/evaluate_linker.py gold.csv --mention-field text --expected-field name --pipelines plain typo vector
+  python scripts/evaluate_linker.py gold.jsonl --pipelines plain fast='{"ngram_filter_fpr": 0.01}' --json
+  python scripts/evaluate_linker.py --synthetic 100k --gold-size 2000 --write-gold gold_100k.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.synthetic_ontology import generate_gold, generate_ontology
+from ontology.entity_linker import EntityLinker
+from ontology.link_stream import detect_format, iter_rows
+from ontology.ontology_loader import OntologyLoader
+
+# 预置链接配置：名称 -> EntityLinker 构造参数
+PIPELINES = {
+    "plain": {},
+    "ngram_filter": {"ngram_filter_fpr": 0.01},
+    "typo": {"typo_max_distance": 1},
+    "pinyin": {"pinyin_index": True},
+    "vector": {"vector_index": True},
+    "full": {"ngram_filter_fpr": 0.01, "typo_max_distance": 1, "pinyin_index": True, "vector_index": True},
+}
+DEFAULT_THRESHOLDS = [70, 80, 85, 90, 95]
+
+
+def load_gold(path, mention_field="mention", expected_field="standard_name", type_field="entity_type"):
+    """读取金标准：[{"mention", "standard_name", "entity_type", "variant"}, ...]，期望标准名为空表示 NIL"""
+    gold = []
+    for row in iter_rows(path, detect_format(path), mention_field):
+        mention = row.get(mention_field)
+        if not isinstance(mention, str) or not mention.strip():
+            continue
+        expected = row.get(expected_field)
+        gold.append({
+            "mention": mention.strip(),
+            "standard_name": expected.strip() if isinstance(expected, str) and expected.strip() else None,
+            "entity_type": row.get(type_field) or None,
+            "variant": row.get("variant") or None,
+        })
+    if not gold:
+        raise ValueError(f"金标准为空: {path}")
+    return gold
+
+
+def parse_pipelines(specs):
+    """解析配置参数：预置名称，或 名称=JSON构造参数"""
+    pipelines = {}
+    for spec in specs:
+        name, _, options = spec.partition("=")
+        if options:
+            options = json.loads(options)
+            if not isinstance(options, dict):
+                raise ValueError(f"配置参数必须是 JSON 对象: {spec}")
+            pipelines[name] = options
+        elif name in PIPELINES:
+            pipelines[name] = PIPELINES[name]
+        else:
+            raise ValueError(f"未知配置: {name}（可用 {', '.join(PIPELINES)}，或 名称=JSON）")
+    return pipelines
+
+
+def evaluate(linker, gold, threshold, warmup=20):
+    """
+    逐条链接金标准提及，统计准确率与延迟
+
+    精确率 = 正确链接数 / 链接数（含 NIL 提及被链接）；召回率 = 正确链接数 / 非 NIL 提及数
+    """
+    for item in gold[:warmup]:
+        linker.link(item["mention"], threshold, item["entity_type"])
+
+    latencies = np.zeros(len(gold))
+    correct = linked = nil_linked = 0
+    match_types = Counter()
+    errors = Counter()
+    for i, item in enumerate(gold):
+        start = time.perf_counter()
+        result = linker.link(item["mention"], threshold, item["entity_type"])
+        latencies[i] = time.perf_counter() - start
+        expected = item["standard_name"]
+        if result is None:
+            if expected is not None:
+                errors[f"missed:{item['variant'] or 'other'}"] += 1
+            continue
+        linked += 1
+        match_types[result["match_type"]] += 1
+        if expected is None:
+            nil_linked += 1
+            errors["nil"] += 1
+        elif result["standard_name"] == expected:
+            correct += 1
+        else:
+            errors[f"wrong:{result['match_type']}"] += 1
+
+    expected_count = sum(1 for item in gold if item["standard_name"] is not None)
+    precision = correct / linked if linked else 0.0
+    recall = correct / expected_count if expected_count else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    latencies_ms = latencies * 1000
+    return {
+        "threshold": threshold,
+        "mentions": len(gold),
+        "linked": linked,
+        "correct": correct,
+        "nil_linked": nil_linked,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "match_types": dict(match_types.most_common()),
+        "errors": dict(errors.most_common()),
+    }
+
+
+def pareto_front(runs, latency="p95_ms"):
+    """标记帕累托最优的组合（精确率、召回率越高越好，延迟越低越好）"""
+    for run in runs:
+        run["pareto"] = not any(
+            other is not run
+            and other["precision"] >= run["precision"]
+            and other["recall"] >= run["recall"]
+            and other[latency] <= run[latency]
+            and (other["precision"] > run["precision"] or other["recall"] > run["recall"]
+                 or other[latency] < run[latency])
+            for other in runs
+        )
+    return runs
+
+
+def evaluate_pipelines(partitions, gold, pipelines, thresholds):
+    """对每个配置构建一次链接器，依次评估各阈值"""
+    runs = []
+    for name, options in pipelines.items():
+        start = time.perf_counter()
+        linker = EntityLinker(**options)
+        linker.load_partitions(partitions)
+        build_seconds = round(time.perf_counter() - start, 3)
+        for threshold in thresholds:
+            run = evaluate(linker, gold, threshold)
+            run.update(pipeline=name, options=options, build_seconds=build_seconds)
+            runs.append(run)
+    return pareto_front(runs)
+
+
+def print_report(report):
+    """打印结果表（按 P95 延迟升序，* 为帕累托最优）"""
+    print("=" * 96)
+    print("  实体链接准确率-延迟评估")
+    print("=" * 96)
+    gold = report["gold"]
+    print(f"\n金标准: {gold['source']}  提及: {gold['mentions']:,}  NIL: {gold['nil']:,}")
+    print(f"\n{'':2}{'配置':<14}{'阈值':>6}{'精确率':>9}{'召回率':>9}{'F1':>8}"
+          f"{'P50(ms)':>10}{'P95(ms)':>10}{'P99(ms)':>10}{'NIL误链':>9}")
+    for run in sorted(report["runs"], key=lambda run: (run["p95_ms"], -run["f1"])):
+        mark = "*" if run["pareto"] else ""
+        print(f"{mark:2}{run['pipeline']:<14}{run['threshold']:>6}{run['precision']:>9.2%}"
+              f"{run['recall']:>9.2%}{run['f1']:>8.3f}{run['p50_ms']:>10.3f}{run['p95_ms']:>10.3f}"
+              f"{run['p99_ms']:>10.3f}{run['nil_linked']:>9}")
+    best = max(report["runs"], key=lambda run: run["f1"])
+    print(f"\n* 帕累托最优（精确率、召回率、P95 延迟）  F1 最高: {best['pipeline']} @ {best['threshold']}")
+    print(f"  错误分布: {', '.join(f'{kind}={count}' for kind, count in best['errors'].items()) or '无'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='实体链接准确率-延迟评估（帕累托表）')
+    parser.add_argument('gold', nargs='?', default=None,
+                        help='金标准文件 (.jsonl / .csv)；与 --synthetic 二选一')
+    parser.add_argument('--mention-field', default='mention', help='提及文本字段 (默认: mention)')
+    parser.add_argument('--expected-field', default='standard_name',
+                        help='期望标准名字段，为空表示不应链接 (默认: standard_name)')
+    parser.add_argument('--type-field', default='entity_type',
+                        help='实体类型字段，可缺省 (默认: entity_type)')
+    parser.add_argument('--data-dir', default=None, help='本体数据目录 (默认: ontology/data)')
+    parser.add_argument('--synthetic', default=None,
+                        help='改用该规模的合成本体与合成金标准 (如 10k、100k)')
+    parser.add_argument('--gold-size', type=int, default=2000, help='合成金标准的提及数 (默认: 2000)')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据的随机种子 (默认: 0)')
+    parser.add_argument('--write-gold', default=None, help='把合成金标准写入该 JSONL 文件')
+    parser.add_argument('--pipelines', nargs='+', default=['plain', 'ngram_filter', 'typo', 'vector'],
+                        help=f'要评估的配置：{" / ".join(PIPELINES)}，或 名称=JSON构造参数 '
+                             f'(默认: plain ngram_filter typo vector)')
+    parser.add_argument('--thresholds', type=int, nargs='+', default=DEFAULT_THRESHOLDS,
+                        help='匹配阈值 (默认: 70 80 85 90 95)')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    args = parser.parse_args()
+
+    if (args.gold is None) == (args.synthetic is None):
+        parser.error("需要指定金标准文件或 --synthetic（二者只能选一个）")
+
+    try:
+        pipelines = parse_pipelines(args.pipelines)
+        if args.synthetic:
+            partitions = generate_ontology(args.synthetic, args.seed)
+            gold = generate_gold(partitions, args.gold_size, args.seed)
+            for item in gold:
+                item["entity_type"] = None
+            source = f"synthetic-{args.synthetic}"
+        else:
+            loader = OntologyLoader(args.data_dir)
+            partitions = {"drug": loader.drugs, "disease": loader.diseases, "gene": loader.genes}
+            gold = load_gold(args.gold, args.mention_field, args.expected_field, args.type_field)
+            source = args.gold
+    except ValueError as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.write_gold:
+        with open(args.write_gold, "w", encoding="utf-8") as f:
+            for item in gold:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    runs = evaluate_pipelines(partitions, gold, pipelines, args.thresholds)
+    report = {
+        "gold": {
+            "source": source,
+            "mentions": len(gold),
+            "nil": sum(1 for item in gold if item["standard_name"] is None),
+        },
+        "runs": runs,
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,77 +5,16 @@
 例如: "阿司匹林注射液" → 通用名: "阿司匹林", 剂型: "注射液"
 """
 
-import re
 import json
+import sys
 from pathlib import Path
 from collections import defaultdict
 
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-# 常见剂型列表
-DOSAGE_FORMS = [
-    '注射液', '注射剂', '针剂',
-    '片', '片剂',
-    '胶囊', '胶囊剂',
-    '颗粒', '颗粒剂',
-    '散', '散剂',
-    '丸', '丸剂',
-    '栓', '栓剂',
-    '软膏', '软膏剂',
-    '乳膏', '乳膏剂',
-    '凝胶', '凝胶剂',
-    '贴', '贴剂',
-    '喷雾', '喷雾剂',
-    '吸入', '吸入剂',
-    '滴眼', '滴眼液',
-    '滴耳', '滴耳液',
-    '滴鼻', '滴鼻液',
-    '肠溶片', '肠溶胶囊',
-    '缓释片', '缓释胶囊',
-    '控释片', '控释胶囊',
-    '分散片',
-    '咀嚼片',
-    '泡腾片',
-    '口含片',
-    '舌下片',
-    '薄膜衣片',
-    '糖衣片',
-    '溶液', '溶液剂',
-    '混悬液', '混悬剂',
-    '乳剂',
-    '糖浆', '糖浆剂',
-    '口服液',
-    '合剂',
-]
-
-
-def extract_generic_name_and_dosage(drug_name: str) -> tuple:
-    """
-    从药品名称中提取通用名和剂型
-    
-    Args:
-        drug_name: 药品名称，如"阿司匹林注射液"
-    
-    Returns:
-        (generic_name, dosage_form, is_generic)
-        - generic_name: 通用名，如"阿司匹林"
-        - dosage_form: 剂型，如"注射液"
-        - is_generic: 是否为通用名（无剂型后缀）
-    """
-    if not drug_name:
-        return drug_name, None, True
-    
-    # 按长度排序，优先匹配长剂型（如"肠溶片"应该在"片"之前）
-    sorted_forms = sorted(DOSAGE_FORMS, key=len, reverse=True)
-    
-    # 尝试匹配剂型
-    for form in sorted_forms:
-        if drug_name.endswith(form):
-            generic_name = drug_name[:-len(form)]
-            if generic_name:  # 确保提取到通用名
-                return generic_name, form, False
-    
-    # 如果没有匹配到剂型，可能是通用名
-    return drug_name, None, True
+# 剂型词表和拆分逻辑与实体链接器共用
+from ontology.dosage_forms import DOSAGE_FORMS, extract_generic_name_and_dosage  # noqa: F401
 
 
 def analyze_drugs(data_dir='ontology/data'):
@@ -42,9 +42,9 @@ def search_entity(db, name, entity_type=None, output_format='text'):
     return result
 
 
-def fuzzy_search(db, keyword, entity_type=None, limit=10, output_format='text'):
+def fuzzy_search(db, keyword, entity_type=None, limit=10, output_format='text', method='like'):
     """模糊搜索"""
-    results = db.fuzzy_search(keyword, entity_type, limit)
+    results = db.fuzzy_search(keyword, entity_type, limit, method=method)
     
     if not results:
         print(f"❌ 未找到包含 '{keyword}' 的实体", file=sys.stderr)
@@ -55,7 +55,8 @@ def fuzzy_search(db, keyword, entity_type=None, limit=10, output_format='text'):
     else:
         print(f"✅ 找到 {len(results)} 个结果:")
         for i, r in enumerate(results, 1):
-            print(f"  {i}. {r['name']} ({r['type']})")
+            similarity = f"  相似度 {r['similarity']:.2f}" if 'similarity' in r else ''
+            print(f"  {i}. {r['name']} ({r['type']}){similarity}")
     
     return results
 
@@ -179,6 +180,8 @@ def main():
                              help='实体类型')
     fuzzy_parser.add_argument('--limit', type=int, default=10,
                              help='返回结果数量限制 (默认: 10)')
+    fuzzy_parser.add_argument('--vector', action='store_true',
+                             help='按 n-gram 向量相似度检索（适合带限定语的长名称）')
     
     # drug-targets 命令
     drug_targets_parser = subparsers.add_parser('drug-targets', 
@@ -248,7 +251,8 @@ def main():
                 search_entity(db, args.name, args.type, output_format)
         
         elif args.command == 'fuzzy':
-            fuzzy_search(db, args.keyword, args.type, args.limit, output_format)
+            fuzzy_search(db, args.keyword, args.type, args.limit, output_format,
+                         method='vector' if args.vector else 'like')
         
         elif args.command == 'drug-targets':
             get_drug_targets(db, args.drug_name, output_format)
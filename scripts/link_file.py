@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+文件流式实体链接
+逐块读取 JSONL / CSV 文件，链接指定文本列，结果列追加到每行后写出（内存占用与文件大小无关）
+
+用法:
+  python scripts/link_file.py mentions.jsonl linked.jsonl
+  python scripts/link_file.py mentions.csv linked.csv --text-field mention --entity-type drug
+  python scripts/link_file.py mentions.jsonl linked.csv --index linker.idx --chunk-size 5000
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ontology.entity_linker import EntityLinker
+from ontology.link_stream import FORMATS, link_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文件流式实体链接 (JSONL / CSV)')
+    parser.add_argument('input', help='输入文件 (.jsonl / .csv)')
+    parser.add_argument('output', help='输出文件 (.jsonl / .csv)')
+    parser.add_argument('--text-field', default='text', help='待链接文本所在的字段 (默认: text)')
+    parser.add_argument('--input-format', choices=FORMATS, default=None, help='输入格式 (默认按扩展名)')
+    parser.add_argument('--output-format', choices=FORMATS, default=None, help='输出格式 (默认按扩展名)')
+    parser.add_argument('--index', default=None, help='索引快照路径 (见 EntityLinker.save_index)')
+    parser.add_argument('--data-dir', default=None, help='本体数据目录 (默认: ontology/data)')
+    parser.add_argument('--entity-type', default=None, help='只在该类型中匹配 (如 drug、disease)')
+    parser.add_argument('--threshold', type=int, default=85, help='模糊匹配阈值 (默认: 85)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每块行数 (默认: 1000)')
+    parser.add_argument('--workers', type=int, default=-1, help='cdist 线程数 (默认: 全部CPU核心)')
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help='链接结果缓存容量，重复文本较多时有效 (默认: 100000)')
+    parser.add_argument('--report-every', type=int, default=100000,
+                        help='每处理多少行输出一次进度 (默认: 100000)')
+    args = parser.parse_args()
+
+    if args.index:
+        linker = EntityLinker.open_index(args.index, cache_size=args.cache_size)
+    else:
+        linker = EntityLinker(cache_size=args.cache_size)
+        linker.load_ontology(args.data_dir)
+
+    stats = link_file(
+        linker, args.input, args.output,
+        text_field=args.text_field,
+        threshold=args.threshold,
+        entity_type=args.entity_type,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        report_every=args.report_every,
+    )
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
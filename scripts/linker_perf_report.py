@@ -0,0 +1,919 @@
+#!/usr/bin/env python3
+"""
+实体链接器性能报告
+对比不同索引结构的内存占用与查询速度
+
+用法:
+  python scripts/linker_perf_report.py trie-memory
+  python scripts/linker_perf_report.py trie-memory --data-dir ontology/data --json
+  python scripts/linker_perf_report.py mentions --size-mb 5
+  python scripts/linker_perf_report.py parallel --texts 20000 --processes 1 2 4 8
+  python scripts/linker_perf_report.py prefilter --thresholds 70 85 95
+  python scripts/linker_perf_report.py symspell --max-distance 2
+  python scripts/linker_perf_report.py ngram-filter --fpr 0.01 --non-entity-ratio 0.6
+  python scripts/linker_perf_report.py pinyin --texts 1000
+  python scripts/linker_perf_report.py stages --non-entity-ratio 0.3 --sample-rate 0.1
+  python scripts/linker_perf_report.py async-batch --texts 2000 --window-ms 5
+  python scripts/linker_perf_report.py vectors --diseases 30000 --texts 500
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from rapidfuzz import fuzz, process
+
+from ontology.async_batcher import AsyncLinkerBatcher
+from ontology.compact_trie import CompactTrie
+from ontology.entity_linker import EntityLinker, Trie
+from ontology.ontology_loader import OntologyLoader
+from ontology.parallel_linker import ParallelLinker
+from ontology.pinyin import PinyinIndex
+from ontology.pinyin_table import PINYIN
+from ontology.symspell import DeletionIndex
+
+
+def load_ontology(data_dir=None):
+    """加载药物、疾病、基因本体并合并为一个字典"""
+    loader = OntologyLoader(data_dir)
+    ontology = {}
+    for entities in (loader.drugs, loader.diseases, loader.genes):
+        ontology.update(entities)
+    return ontology
+
+
+def iter_trie_keys(ontology):
+    """产出与 EntityLinker._build_index 相同的 (词条, 实体信息) 序列"""
+    for entity_text, entity_info in ontology.items():
+        yield entity_text.lower(), entity_info
+        for alias in entity_info.get("aliases", []):
+            yield alias.lower(), entity_info
+
+
+def measure(build):
+    """测量 build() 构建的对象常驻内存（字节）与构建耗时"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, size, elapsed
+
+
+def lookup_rate(trie, keys):
+    """每秒精确查找次数"""
+    start = time.perf_counter()
+    for key in keys:
+        trie.search(key)
+    elapsed = time.perf_counter() - start
+    return len(keys) / elapsed if elapsed > 0 else 0.0
+
+
+def report_trie_memory(ontology):
+    """对比 dict-per-node Trie 与 CompactTrie"""
+    items = list(iter_trie_keys(ontology))
+    keys = [key for key, _ in items]
+
+    def build_legacy():
+        trie = Trie()
+        for key, entity_info in items:
+            trie.insert(key, entity_info)
+        return trie
+
+    def build_compact():
+        trie = CompactTrie()
+        for key, entity_info in items:
+            trie.insert(key, entity_info)
+        trie.freeze()
+        return trie
+
+    legacy, legacy_bytes, legacy_seconds = measure(build_legacy)
+    legacy_rate = lookup_rate(legacy, keys)
+    del legacy
+
+    compact, compact_bytes, compact_seconds = measure(build_compact)
+    compact_rate = lookup_rate(compact, keys)
+
+    return {
+        "entities": len(ontology),
+        "keys": len(keys),
+        "nodes": compact.node_count,
+        "legacy_trie": {
+            "bytes": legacy_bytes,
+            "build_seconds": round(legacy_seconds, 3),
+            "lookups_per_second": round(legacy_rate),
+        },
+        "compact_trie": {
+            "bytes": compact_bytes,
+            "array_bytes": compact.array_nbytes(),
+            "build_seconds": round(compact_seconds, 3),
+            "lookups_per_second": round(compact_rate),
+        },
+        "memory_ratio": round(legacy_bytes / compact_bytes, 1) if compact_bytes else None,
+    }
+
+
+def print_trie_memory(result):
+    """打印 trie-memory 报告"""
+    mb = 1024 * 1024
+    print("=" * 70)
+    print("  前缀树内存对比")
+    print("=" * 70)
+    print(f"\n实体数: {result['entities']:,}  词条数: {result['keys']:,}  节点数: {result['nodes']:,}")
+    print(f"\n{'实现':<16}{'内存(MB)':>12}{'构建(s)':>12}{'查找/秒':>14}")
+    for name, label in (("legacy_trie", "Trie"), ("compact_trie", "CompactTrie")):
+        row = result[name]
+        print(f"{label:<16}{row['bytes'] / mb:>12.1f}{row['build_seconds']:>12.3f}"
+              f"{row['lookups_per_second']:>14,}")
+    print(f"\n内存缩减: {result['memory_ratio']}x")
+
+
+# 合成病历文本用的非实体片段
+FILLER_PHRASES = [
+    "患者自诉", "既往史无特殊，", "入院后给予", "口服治疗，", "症状较前好转。",
+    "复查血常规提示", "未见明显异常，", "建议继续", "随访观察。", "家属知情同意。",
+]
+
+
+def synthetic_document(names, size_bytes, seed=0):
+    """生成约 size_bytes 字节的合成病历文本（实体名称与非实体片段交替）"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        part = rng.choice(names) if rng.random() < 0.3 else rng.choice(FILLER_PHRASES)
+        parts.append(part)
+        total += len(part.encode("utf-8"))
+    return "".join(parts)
+
+
+def report_mentions(ontology, size_mb):
+    """Aho-Corasick 文本提及抽取吞吐量（MB/s，按 UTF-8 字节计）"""
+    linker = EntityLinker(ontology)
+
+    start = time.perf_counter()
+    linker.extract_mentions("预热")  # 首次调用时构建自动机
+    build_seconds = time.perf_counter() - start
+
+    text = synthetic_document(list(ontology), int(size_mb * 1024 * 1024))
+    text_bytes = len(text.encode("utf-8"))
+
+    start = time.perf_counter()
+    mentions = linker.extract_mentions(text)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "entities": len(ontology),
+        "automaton_build_seconds": round(build_seconds, 3),
+        "text_bytes": text_bytes,
+        "text_chars": len(text),
+        "mentions": len(mentions),
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(text_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def print_mentions(result):
+    """打印 mentions 报告"""
+    print("=" * 70)
+    print("  文本提及抽取吞吐量")
+    print("=" * 70)
+    print(f"\n实体数: {result['entities']:,}  自动机构建: {result['automaton_build_seconds']}s")
+    print(f"文本: {result['text_bytes'] / (1024 * 1024):.1f} MB ({result['text_chars']:,} 字)")
+    print(f"提及: {result['mentions']:,}  耗时: {result['seconds']}s")
+    print(f"\n吞吐量: {result['mb_per_second']} MB/s")
+
+
+def synthetic_queries(names, count, seed=0):
+    """生成查询：原名、删去一个字的拼写错误、截断的部分名称各占一部分"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        roll = rng.random()
+        if roll < 0.4 or len(name) < 3:
+            queries.append(name)
+        elif roll < 0.7:
+            position = rng.randrange(len(name))
+            queries.append(name[:position] + name[position + 1:])
+        else:
+            queries.append(name[:len(name) - 1])
+    return queries
+
+
+def report_parallel(ontology, text_count, process_counts, chunk_size):
+    """多进程批量链接的扩展性（各进程数下的吞吐量与加速比）"""
+    linker = EntityLinker(ontology)
+    texts = synthetic_queries(list(ontology), text_count)
+
+    rows = []
+    for processes in process_counts:
+        with ParallelLinker(linker, processes=processes, chunk_size=chunk_size) as parallel:
+            start = time.perf_counter()
+            parallel.link_batch(texts)
+            elapsed = time.perf_counter() - start
+            stats = parallel.get_statistics()
+        rows.append({
+            "processes": processes,
+            "seconds": round(elapsed, 3),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+            "worker_texts_per_second": sorted(
+                w["texts_per_second"] for w in stats["workers"].values()
+            ),
+        })
+
+    baseline = rows[0]["texts_per_second"] / rows[0]["processes"]
+    for row in rows:
+        row["speedup"] = round(row["texts_per_second"] / baseline, 2)
+
+    return {"entities": len(ontology), "texts": len(texts), "chunk_size": chunk_size, "runs": rows}
+
+
+def print_parallel(result):
+    """打印 parallel 报告"""
+    print("=" * 70)
+    print("  多进程批量链接扩展性")
+    print("=" * 70)
+    print(f"\n实体数: {result['entities']:,}  文本数: {result['texts']:,}  分块: {result['chunk_size']}")
+    print(f"\n{'进程数':<10}{'耗时(s)':>10}{'文本/秒':>12}{'加速比':>10}   单进程文本/秒")
+    for row in result["runs"]:
+        workers = ", ".join(f"{rate:,.0f}" for rate in row["worker_texts_per_second"])
+        print(f"{row['processes']:<10}{row['seconds']:>10.3f}{row['texts_per_second']:>12,.0f}"
+              f"{row['speedup']:>10}   {workers}")
+
+
+def report_prefilter(ontology, text_count, thresholds):
+    """模糊匹配预过滤的剪枝比例，以及与全量打分相比的耗时"""
+    linker = EntityLinker(ontology)
+    keys = linker._fuzzy_choices()
+    # 只统计会落到模糊匹配阶段的查询
+    queries = [
+        q for q in synthetic_queries(list(ontology), text_count)
+        if not linker._exact_match(q) and not linker._exact_match(q.lower())
+        and not linker._partial_match(q)
+    ]
+
+    rows = []
+    for threshold in thresholds:
+        kept = 0
+        mismatches = 0
+        full_seconds = 0.0
+        filtered_seconds = 0.0
+        for query in queries:
+            start = time.perf_counter()
+            expected = process.extractOne(query, keys, scorer=fuzz.ratio, score_cutoff=threshold)
+            full_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = linker._fuzzy_match(query, threshold)
+            filtered_seconds += time.perf_counter() - start
+
+            kept += len(linker._fuzzy_candidates(query, threshold))
+            if (expected[0] if expected else None) != (result["matched_text"] if result else None):
+                mismatches += 1
+
+        total = len(queries) * len(keys)
+        rows.append({
+            "threshold": threshold,
+            "pruned_fraction": round(1 - kept / total, 4) if total else None,
+            "mean_candidates": round(kept / len(queries), 1) if queries else None,
+            "full_ms": round(full_seconds * 1000 / len(queries), 3) if queries else None,
+            "prefiltered_ms": round(filtered_seconds * 1000 / len(queries), 3) if queries else None,
+            "mismatches": mismatches,
+        })
+
+    return {"entities": len(ontology), "keys": len(keys), "queries": len(queries), "runs": rows}
+
+
+def print_prefilter(result):
+    """打印 prefilter 报告"""
+    print("=" * 70)
+    print("  模糊匹配预过滤剪枝比例")
+    print("=" * 70)
+    print(f"\n候选键: {result['keys']:,}  模糊阶段查询: {result['queries']:,}")
+    print(f"\n{'阈值':<8}{'剪枝比例':>10}{'平均候选':>10}{'全量(ms)':>12}{'预过滤(ms)':>12}{'结果不一致':>10}")
+    for row in result["runs"]:
+        print(f"{row['threshold']:<8}{row['pruned_fraction']:>10.2%}{row['mean_candidates']:>10}"
+              f"{row['full_ms']:>12}{row['prefiltered_ms']:>12}{row['mismatches']:>10}")
+
+
+def typo_queries(names, count, seed=0):
+    """生成拼写错误查询：随机删除或替换一个字（替换字取自其他名称）"""
+    rng = random.Random(seed)
+    chars = [char for name in rng.sample(names, min(len(names), 1000)) for char in name]
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(names)
+        if len(name) < 4:
+            continue
+        position = rng.randrange(len(name))
+        if rng.random() < 0.5:
+            queries.append(name[:position] + name[position + 1:])
+        else:
+            queries.append(name[:position] + rng.choice(chars) + name[position + 1:])
+    return queries
+
+
+def report_symspell(ontology, text_count, max_distance, threshold):
+    """删除邻域索引的内存占用与拼写纠错提速"""
+    linker = EntityLinker(ontology)
+    keys = [key.lower() for key in linker._fuzzy_choices()]
+
+    def build():
+        index = DeletionIndex(max_distance=max_distance)
+        for key_id, key in enumerate(keys):
+            index.add(key_id, key)
+        return index
+
+    index, index_bytes, build_seconds = measure(build)
+    linker.typo_max_distance = max_distance
+    linker._typo_index = index
+
+    queries = typo_queries(list(ontology), text_count)
+    timings = {}
+    hits = {}
+    for stage, func in (
+        ("typo", lambda q: linker._typo_match(q, threshold)),
+        ("fuzzy_prefiltered", lambda q: linker._fuzzy_match(q, threshold)),
+        ("fuzzy_full", lambda q: process.extractOne(q, keys, scorer=fuzz.ratio,
+                                                    score_cutoff=threshold)),
+    ):
+        start = time.perf_counter()
+        hits[stage] = sum(1 for q in queries if func(q))
+        timings[stage] = (time.perf_counter() - start) * 1000 / len(queries)
+
+    return {
+        "entities": len(ontology),
+        "keys": len(keys),
+        "max_distance": max_distance,
+        "threshold": threshold,
+        "index_entries": len(index),
+        "index_bytes": index_bytes,
+        "bytes_per_key": round(index_bytes / len(keys), 1) if keys else None,
+        "build_seconds": round(build_seconds, 3),
+        "queries": len(queries),
+        "mean_ms": {stage: round(ms, 4) for stage, ms in timings.items()},
+        "hits": hits,
+        "speedup_vs_prefiltered": round(timings["fuzzy_prefiltered"] / timings["typo"], 1),
+        "speedup_vs_full": round(timings["fuzzy_full"] / timings["typo"], 1),
+    }
+
+
+def print_symspell(result):
+    """打印 symspell 报告"""
+    mb = 1024 * 1024
+    print("=" * 70)
+    print("  删除邻域索引（拼写纠错）")
+    print("=" * 70)
+    print(f"\n候选键: {result['keys']:,}  最大编辑距离: {result['max_distance']}")
+    print(f"删除变体: {result['index_entries']:,}  内存: {result['index_bytes'] / mb:.1f} MB "
+          f"({result['bytes_per_key']} 字节/键)  构建: {result['build_seconds']}s")
+    print(f"\n{'阶段':<20}{'平均耗时(ms)':>14}{'命中数':>10}")
+    for stage, ms in result["mean_ms"].items():
+        print(f"{stage:<20}{ms:>14}{result['hits'][stage]:>10}")
+    print(f"\n提速: 相对预过滤模糊匹配 {result['speedup_vs_prefiltered']}x，"
+          f"相对全量模糊匹配 {result['speedup_vs_full']}x")
+
+
+def non_entity_queries(count, seed=0):
+    """生成非实体查询：合成病历非实体片段中随机截取的 2-8 字短语"""
+    rng = random.Random(seed)
+    text = "".join(FILLER_PHRASES)
+    queries = []
+    for _ in range(count):
+        length = rng.randint(2, 8)
+        start = rng.randrange(len(text) - length)
+        queries.append(text[start:start + length])
+    return queries
+
+
+def report_ngram_filter(ontology, text_count, non_entity_ratio, fpr, threshold):
+    """查询预过滤（n-gram 布隆过滤器）在实体/非实体混合负载下的吞吐量"""
+    names = list(ontology)
+    non_entity_count = int(text_count * non_entity_ratio)
+    queries = (synthetic_queries(names, text_count - non_entity_count)
+               + non_entity_queries(non_entity_count))
+    random.Random(1).shuffle(queries)
+
+    plain = EntityLinker(ontology)
+    start = time.perf_counter()
+    filtered = EntityLinker(ontology, ngram_filter_fpr=fpr)
+    build_seconds = time.perf_counter() - start
+
+    timings = {}
+    results = {}
+    for label, linker in (("plain", plain), ("filtered", filtered)):
+        start = time.perf_counter()
+        results[label] = [linker.link(q, threshold=threshold) for q in queries]
+        timings[label] = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for a, b in zip(results["plain"], results["filtered"])
+        if (a and a["standard_name"]) != (b and b["standard_name"])
+    )
+    return {
+        "entities": len(ontology),
+        "queries": len(queries),
+        "non_entity_queries": non_entity_count,
+        "threshold": threshold,
+        "filter": filtered.ngram_filter.get_statistics(),
+        "build_seconds": round(build_seconds, 3),
+        "queries_per_second": {
+            label: round(len(queries) / seconds, 1) for label, seconds in timings.items()
+        },
+        "speedup": round(timings["plain"] / timings["filtered"], 2),
+        "mismatches": mismatches,
+    }
+
+
+def print_ngram_filter(result):
+    """打印 ngram-filter 报告"""
+    stats = result["filter"]
+    print("=" * 70)
+    print("  查询预过滤（n-gram 布隆过滤器）")
+    print("=" * 70)
+    print(f"\n实体数: {result['entities']:,}  查询: {result['queries']:,} "
+          f"(非实体 {result['non_entity_queries']:,})  阈值: {result['threshold']}")
+    print(f"过滤器: {stats['ngrams']:,} 个 n-gram, {stats['bytes'] / 1024:.1f} KB, "
+          f"{stats['hashes']} 个哈希, 估计假阳性率 {stats['estimated_false_positive_rate']:.4%}")
+    print(f"跳过拼写纠错/模糊匹配: {stats['fuzzy_rejected']:,} 次")
+    print(f"\n{'链接器':<12}{'查询/秒':>12}")
+    for label, qps in result["queries_per_second"].items():
+        print(f"{label:<12}{qps:>12,}")
+    print(f"\n提速: {result['speedup']}x  结果不一致: {result['mismatches']}")
+
+
+def homophone_queries(names, count, seed=0):
+    """生成同音字错误查询：把名称中的一个字换成首选读音相同的另一个字，返回 [(查询, 原名称), ...]"""
+    rng = random.Random(seed)
+    syllables = {char: chars for chars in PINYIN.values() for char in chars}
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(names)
+        positions = [i for i, char in enumerate(name) if len(syllables.get(char, "")) > 1]
+        if len(name) < 3 or not positions:
+            continue
+        position = rng.choice(positions)
+        replacement = rng.choice([c for c in syllables[name[position]] if c != name[position]])
+        queries.append((name[:position] + replacement + name[position + 1:], name))
+    return queries
+
+
+def report_pinyin(ontology, text_count, threshold):
+    """拼音键索引的内存占用与同音字错误的召回率"""
+    plain = EntityLinker(ontology)
+    keys = [key.lower() for key in plain._fuzzy_choices()]
+
+    def build():
+        index = PinyinIndex()
+        for key_id, key in enumerate(keys):
+            index.add(key_id, key)
+        return index
+
+    index, index_bytes, build_seconds = measure(build)
+    linker = EntityLinker(ontology)
+    linker.pinyin_index = True
+    linker._pinyin_index = index
+
+    queries = homophone_queries(list(ontology), text_count)
+    runs = []
+    for label, current in (("plain", plain), ("pinyin", linker)):
+        start = time.perf_counter()
+        results = [current.link(query, threshold=threshold) for query, _ in queries]
+        seconds = time.perf_counter() - start
+        correct = sum(
+            1 for (_, name), result in zip(queries, results)
+            if result and result["standard_name"] == ontology[name].get("standard_name", name)
+        )
+        runs.append({
+            "linker": label,
+            "mean_ms": round(seconds * 1000 / len(queries), 4),
+            "linked": sum(1 for result in results if result),
+            "correct": correct,
+            "pinyin_hits": sum(1 for result in results if result and result["match_type"] == "pinyin"),
+        })
+
+    return {
+        "entities": len(ontology),
+        "keys": len(keys),
+        "threshold": threshold,
+        "index_entries": len(index),
+        "index_bytes": index_bytes,
+        "build_seconds": round(build_seconds, 3),
+        "queries": len(queries),
+        "runs": runs,
+    }
+
+
+def print_pinyin(result):
+    """打印 pinyin 报告"""
+    mb = 1024 * 1024
+    print("=" * 70)
+    print("  拼音键索引（同音字错误）")
+    print("=" * 70)
+    print(f"\n候选键: {result['keys']:,}  拼音键: {result['index_entries']:,}  "
+          f"内存: {result['index_bytes'] / mb:.1f} MB  构建: {result['build_seconds']}s")
+    print(f"同音字错误查询: {result['queries']:,}  阈值: {result['threshold']}")
+    print(f"\n{'链接器':<12}{'平均耗时(ms)':>14}{'链接数':>10}{'正确数':>10}{'拼音命中':>10}")
+    for row in result["runs"]:
+        print(f"{row['linker']:<12}{row['mean_ms']:>14}{row['linked']:>10}"
+              f"{row['correct']:>10}{row['pinyin_hits']:>10}")
+
+
+def report_stages(ontology, text_count, non_entity_ratio, sample_rate, threshold):
+    """混合负载下 link() 的阶段统计（结局分布、各阶段耗时）及统计本身的开销"""
+    names = list(ontology)
+    non_entity_count = int(text_count * non_entity_ratio)
+    queries = (synthetic_queries(names, text_count - non_entity_count)
+               + non_entity_queries(non_entity_count))
+    random.Random(1).shuffle(queries)
+
+    timings = {}
+    metrics = None
+    for label, rate in (("plain", 0.0), ("instrumented", sample_rate)):
+        linker = EntityLinker(ontology, metrics_sample_rate=rate)
+        start = time.perf_counter()
+        for query in queries:
+            linker.link(query, threshold=threshold)
+        timings[label] = time.perf_counter() - start
+        metrics = linker.metrics
+    return {
+        "entities": len(ontology),
+        "queries": len(queries),
+        "non_entity_queries": non_entity_count,
+        "threshold": threshold,
+        "metrics": metrics.get_statistics(),
+        "queries_per_second": {
+            label: round(len(queries) / seconds, 1) for label, seconds in timings.items()
+        },
+        "overhead": round(timings["instrumented"] / timings["plain"] - 1, 4),
+    }
+
+
+def print_stages(result):
+    """打印 stages 报告"""
+    metrics = result["metrics"]
+    print("=" * 70)
+    print("  link() 阶段统计")
+    print("=" * 70)
+    print(f"\n查询: {result['queries']:,} (非实体 {result['non_entity_queries']:,})  "
+          f"阈值: {result['threshold']}  采样率: {metrics['sample_rate']}  "
+          f"采样调用: {metrics['sampled_calls']:,}")
+    print(f"\n{'结局':<18}{'次数':>10}{'占比':>10}")
+    for outcome, row in metrics["outcomes"].items():
+        print(f"{outcome:<18}{row['count']:>10,}{row['fraction']:>10.2%}")
+    print(f"\n{'阶段':<18}{'执行':>8}{'命中率':>10}{'平均(us)':>10}{'P50(us)':>10}{'P99(us)':>10}")
+    for stage, row in metrics["stages"].items():
+        latency = row["latency"]
+        print(f"{stage:<18}{row['runs']:>8,}{row['hit_rate']:>10.2%}{latency['mean_us']:>10}"
+              f"{latency['p50_us']:>10}{latency['p99_us']:>10}")
+    latency = metrics["latency"]
+    print(f"\n整体: 平均 {latency['mean_us']} us, P50 <= {latency['p50_us']} us, "
+          f"P99 <= {latency['p99_us']} us")
+    print(f"统计开销: {result['overhead']:+.1%}（"
+          + ", ".join(f"{label} {qps:,} 查询/秒" for label, qps in result["queries_per_second"].items())
+          + "）")
+
+
+def report_async_batch(ontology, text_count, hot_names, window_ms, max_batch_size, threshold):
+    """并发 await 链接：逐条在线程池中 link() 与 AsyncLinkerBatcher 微批处理的吞吐量"""
+    linker = EntityLinker(ontology)
+    # 线上提及高度重复：查询只取自一小部分热门名称
+    names = random.Random(0).sample(list(ontology), min(hot_names, len(ontology)))
+    queries = synthetic_queries(names, text_count)
+
+    async def per_call():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(None, linker.link, query, threshold) for query in queries
+        ))
+
+    async def batched():
+        async with AsyncLinkerBatcher(linker, window_ms=window_ms,
+                                      max_batch_size=max_batch_size) as batcher:
+            results = await asyncio.gather(*(batcher.link(query, threshold) for query in queries))
+            return results, batcher.get_statistics()
+
+    start = time.perf_counter()
+    expected = asyncio.run(per_call())
+    per_call_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    results, stats = asyncio.run(batched())
+    batched_seconds = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for a, b in zip(expected, results)
+        if (a and a["standard_name"]) != (b and b["standard_name"])
+    )
+    return {
+        "entities": len(ontology),
+        "requests": len(queries),
+        "threshold": threshold,
+        "batcher": stats,
+        "requests_per_second": {
+            "per_call": round(len(queries) / per_call_seconds, 1),
+            "batched": round(len(queries) / batched_seconds, 1),
+        },
+        "speedup": round(per_call_seconds / batched_seconds, 2),
+        "mismatches": mismatches,
+    }
+
+
+def print_async_batch(result):
+    """打印 async-batch 报告"""
+    stats = result["batcher"]
+    print("=" * 70)
+    print("  异步微批处理（AsyncLinkerBatcher）")
+    print("=" * 70)
+    print(f"\n并发请求: {result['requests']:,}  阈值: {result['threshold']}  "
+          f"窗口: {stats['window_ms']} ms  批上限: {stats['max_batch_size']}")
+    print(f"批次: {stats['batches']:,}  平均批大小: {stats['mean_batch_size']}  "
+          f"去重比例: {stats['dedup_ratio']:.2%}")
+    print(f"\n{'方式':<12}{'请求/秒':>12}")
+    for label, rps in result["requests_per_second"].items():
+        print(f"{label:<12}{rps:>12,}")
+    print(f"\n提速: {result['speedup']}x  结果不一致: {result['mismatches']}")
+
+
+# ICD 风格长疾病名的组成部分（病因 + 限定词 + 部位 + 病变 + 伴随情况）
+ICD_CAUSES = ["2型糖尿病性", "1型糖尿病性", "高血压性", "酒精性", "药物性", "妊娠期", "新生儿", "老年性",
+              "病毒性", "细菌性"]
+ICD_QUALIFIERS = ["急性", "慢性", "复发性", "继发性", "原发性", "先天性", "反流性", "化脓性", "出血性",
+                  "阻塞性", "糜烂性", "弥漫性", "局限性", "重度", "轻度", "双侧", "左侧", "右侧"]
+ICD_SITES = ["胃", "十二指肠", "结肠", "直肠", "肝", "胆囊", "胰腺", "肺", "支气管", "气管", "心脏",
+             "冠状动脉", "主动脉", "肾", "膀胱", "输尿管", "前列腺", "甲状腺", "乳腺", "子宫", "卵巢",
+             "宫颈", "食管", "脑", "脊髓", "周围神经", "视网膜", "角膜", "皮肤", "股骨", "膝关节",
+             "髋关节", "腰椎", "颈椎", "淋巴结", "脾", "下肢静脉", "颈动脉", "鼻窦", "中耳"]
+ICD_LESIONS = ["炎", "恶性肿瘤", "良性肿瘤", "溃疡", "出血", "梗死", "结石", "囊肿", "息肉", "功能不全",
+               "衰竭", "狭窄", "扩张", "纤维化", "硬化", "感染", "损伤", "骨折", "结核", "动脉瘤", "病变",
+               "增生", "萎缩", "穿孔", "血栓形成"]
+ICD_CLAUSES = ["伴出血", "伴穿孔", "伴梗阻", "伴感染", "伴有并发症", "不伴有并发症", "未特指",
+               "伴急性加重", "伴功能障碍", "伴坏死"]
+
+
+def icd_like_names(count, seed=0):
+    """合成 ICD 风格的长疾病名（去重后按字典序）"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add("".join((
+            rng.choice(ICD_CAUSES) if rng.random() < 0.3 else "",
+            rng.choice(ICD_QUALIFIERS) if rng.random() < 0.6 else "",
+            rng.choice(ICD_SITES),
+            rng.choice(ICD_LESIONS),
+            rng.choice(ICD_CLAUSES) if rng.random() < 0.4 else "",
+        )))
+    return sorted(names)
+
+
+def long_name_queries(names, count, seed=0):
+    """长疾病名的书写变体：追加限定语、前置限定词、插入虚词、漏字，返回 [(查询, 原名)]"""
+    rng = random.Random(seed)
+    known = set(names)
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(names)
+        roll = rng.random()
+        if roll < 0.3:
+            query = f"{name}，{rng.choice(ICD_CLAUSES)}"
+        elif roll < 0.6:
+            query = rng.choice(ICD_QUALIFIERS) + name
+        else:
+            chars = list(name)
+            position = rng.randrange(len(chars))
+            if roll < 0.8:
+                chars.insert(position, "的")
+            else:
+                del chars[position]
+            query = "".join(chars)
+        if query not in known:
+            queries.append((query, name))
+    return queries
+
+
+def report_vectors(ontology, disease_count, text_count, threshold):
+    """向量索引：长疾病名查询的链接耗时与正确率、近邻召回率（对比精确余弦）、内存与构建耗时"""
+    diseases = icd_like_names(disease_count)
+    ontology = dict(ontology)
+    for name in diseases:
+        ontology[name] = {"standard_name": name, "type": "Disease", "aliases": []}
+
+    plain = EntityLinker(ontology)
+    linker, index_bytes, build_seconds = measure(lambda: EntityLinker(ontology, vector_index=True))
+    index = linker._vector_index
+    queries = long_name_queries(diseases, text_count)
+
+    runs = []
+    for label, current in (("plain", plain), ("vector", linker)):
+        latencies = []
+        correct = linked = vector_hits = 0
+        for query, name in queries:
+            start = time.perf_counter()
+            result = current.link(query, threshold=threshold)
+            latencies.append(time.perf_counter() - start)
+            if result:
+                linked += 1
+                correct += result["standard_name"] == name
+                vector_hits += result["match_type"] == "vector"
+        runs.append({
+            "linker": label,
+            "mean_ms": round(sum(latencies) * 1000 / len(queries), 4),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 4),
+            "linked": linked,
+            "correct": correct,
+            "vector_hits": vector_hits,
+        })
+
+    # 近邻召回率：ANN 的第一名与精确余弦的最高分一致的比例
+    all_rows = np.arange(index.size, dtype=np.uint32)
+    search_seconds = 0.0
+    recalled = 0
+    for query, _ in queries:
+        query = query.lower()
+        start = time.perf_counter()
+        _, similarities = index.search(query, k=1)
+        search_seconds += time.perf_counter() - start
+        indices, data = index.vectorizer.transform_one(query)
+        best = index._cosine(all_rows, indices, data).max()
+        recalled += len(similarities) > 0 and similarities[0] >= best - 1e-5
+
+    return {
+        "entities": len(ontology),
+        "index": index.get_statistics(),
+        "index_bytes": index_bytes,
+        "build_seconds": round(build_seconds, 3),
+        "queries": len(queries),
+        "threshold": threshold,
+        "search_mean_ms": round(search_seconds * 1000 / len(queries), 4),
+        "recall_at_1": round(recalled / len(queries), 4),
+        "runs": runs,
+    }
+
+
+def print_vectors(result):
+    """打印 vectors 报告"""
+    mb = 1024 * 1024
+    index = result["index"]
+    print("=" * 70)
+    print("  n-gram 向量近邻索引（长疾病名）")
+    print("=" * 70)
+    print(f"\n实体: {result['entities']:,}  候选键: {index['rows']:,}  "
+          f"维度: {index['dim']}  簇: {index['nlist']}  探测: {index['nprobe']}  精排: {index['rerank']}")
+    print(f"链接器内存: {result['index_bytes'] / mb:.1f} MB（含向量索引 {index['bytes'] / mb:.1f} MB）  "
+          f"构建: {result['build_seconds']}s")
+    print(f"近邻检索: {result['search_mean_ms']} ms/次  召回率@1（对比精确余弦）: {result['recall_at_1']:.2%}")
+    print(f"长名称变体查询: {result['queries']:,}  阈值: {result['threshold']}")
+    print(f"\n{'链接器':<10}{'平均(ms)':>10}{'P95(ms)':>10}{'链接数':>8}{'正确数':>8}{'向量命中':>10}")
+    for row in result["runs"]:
+        print(f"{row['linker']:<10}{row['mean_ms']:>10}{row['p95_ms']:>10}{row['linked']:>8}"
+              f"{row['correct']:>8}{row['vector_hits']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='实体链接器性能报告')
+    parser.add_argument('--data-dir', default=None,
+                        help='本体数据目录 (默认: ontology/data)')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+
+    subparsers = parser.add_subparsers(dest='command', help='可用报告')
+    subparsers.add_parser('trie-memory', help='对比 Trie 与 CompactTrie 的内存占用')
+    mentions_parser = subparsers.add_parser('mentions', help='文本提及抽取吞吐量')
+    mentions_parser.add_argument('--size-mb', type=float, default=5.0,
+                                 help='合成文本大小 (默认: 5 MB)')
+
+    parallel_parser = subparsers.add_parser('parallel', help='多进程批量链接扩展性')
+    parallel_parser.add_argument('--texts', type=int, default=20000,
+                                 help='查询文本数 (默认: 20000)')
+    parallel_parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4],
+                                 help='要测试的进程数 (默认: 1 2 4)')
+    parallel_parser.add_argument('--chunk-size', type=int, default=500,
+                                 help='分块大小 (默认: 500)')
+
+    prefilter_parser = subparsers.add_parser('prefilter', help='模糊匹配预过滤剪枝比例')
+    prefilter_parser.add_argument('--texts', type=int, default=2000,
+                                  help='查询文本数 (默认: 2000)')
+    prefilter_parser.add_argument('--thresholds', type=int, nargs='+', default=[70, 85, 95],
+                                  help='模糊匹配阈值 (默认: 70 85 95)')
+
+    symspell_parser = subparsers.add_parser('symspell', help='删除邻域索引内存与提速')
+    symspell_parser.add_argument('--texts', type=int, default=1000,
+                                 help='拼写错误查询数 (默认: 1000)')
+    symspell_parser.add_argument('--max-distance', type=int, default=2,
+                                 help='最大编辑距离 (默认: 2)')
+    symspell_parser.add_argument('--threshold', type=int, default=85,
+                                 help='模糊匹配阈值 (默认: 85)')
+
+    ngram_parser = subparsers.add_parser('ngram-filter', help='查询预过滤在混合负载下的吞吐量')
+    ngram_parser.add_argument('--texts', type=int, default=2000,
+                              help='查询文本数 (默认: 2000)')
+    ngram_parser.add_argument('--non-entity-ratio', type=float, default=0.6,
+                              help='非实体查询占比 (默认: 0.6)')
+    ngram_parser.add_argument('--fpr', type=float, default=0.01,
+                              help='布隆过滤器假阳性率 (默认: 0.01)')
+    ngram_parser.add_argument('--threshold', type=int, default=85,
+                              help='模糊匹配阈值 (默认: 85)')
+
+    pinyin_parser = subparsers.add_parser('pinyin', help='拼音键索引内存与同音字错误召回率')
+    pinyin_parser.add_argument('--texts', type=int, default=1000,
+                               help='同音字错误查询数 (默认: 1000)')
+    pinyin_parser.add_argument('--threshold', type=int, default=85,
+                               help='模糊匹配阈值 (默认: 85)')
+
+    stages_parser = subparsers.add_parser('stages', help='混合负载下 link() 的阶段统计')
+    stages_parser.add_argument('--texts', type=int, default=2000,
+                               help='查询文本数 (默认: 2000)')
+    stages_parser.add_argument('--non-entity-ratio', type=float, default=0.3,
+                               help='非实体查询占比 (默认: 0.3)')
+    stages_parser.add_argument('--sample-rate', type=float, default=1.0,
+                               help='统计采样率 (默认: 1.0)')
+    stages_parser.add_argument('--threshold', type=int, default=85,
+                               help='模糊匹配阈值 (默认: 85)')
+
+    async_parser = subparsers.add_parser('async-batch', help='异步微批处理与逐条链接的吞吐量对比')
+    async_parser.add_argument('--texts', type=int, default=2000,
+                              help='并发请求数 (默认: 2000)')
+    async_parser.add_argument('--hot-names', type=int, default=500,
+                              help='查询取自的热门名称数 (默认: 500)')
+    async_parser.add_argument('--window-ms', type=float, default=5.0,
+                              help='收集窗口毫秒数 (默认: 5)')
+    async_parser.add_argument('--max-batch-size', type=int, default=256,
+                              help='每批最大文本数 (默认: 256)')
+    async_parser.add_argument('--threshold', type=int, default=85,
+                              help='模糊匹配阈值 (默认: 85)')
+
+    vectors_parser = subparsers.add_parser('vectors', help='n-gram 向量近邻索引在长疾病名上的效果')
+    vectors_parser.add_argument('--diseases', type=int, default=30000,
+                                help='合成 ICD 风格疾病名数 (默认: 30000)')
+    vectors_parser.add_argument('--texts', type=int, default=500,
+                                help='长名称变体查询数 (默认: 500)')
+    vectors_parser.add_argument('--threshold', type=int, default=70,
+                                help='匹配阈值 (默认: 70)')
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    ontology = load_ontology(args.data_dir)
+    if not ontology:
+        print("❌ 本体数据为空，请先生成 ontology/data/*.json", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'trie-memory':
+        result = report_trie_memory(ontology)
+        printer = print_trie_memory
+    elif args.command == 'mentions':
+        result = report_mentions(ontology, args.size_mb)
+        printer = print_mentions
+    elif args.command == 'parallel':
+        result = report_parallel(ontology, args.texts, args.processes, args.chunk_size)
+        printer = print_parallel
+    elif args.command == 'prefilter':
+        result = report_prefilter(ontology, args.texts, args.thresholds)
+        printer = print_prefilter
+    elif args.command == 'symspell':
+        result = report_symspell(ontology, args.texts, args.max_distance, args.threshold)
+        printer = print_symspell
+    elif args.command == 'ngram-filter':
+        result = report_ngram_filter(ontology, args.texts, args.non_entity_ratio,
+                                     args.fpr, args.threshold)
+        printer = print_ngram_filter
+    elif args.command == 'pinyin':
+        result = report_pinyin(ontology, args.texts, args.threshold)
+        printer = print_pinyin
+    elif args.command == 'stages':
+        result = report_stages(ontology, args.texts, args.non_entity_ratio,
+                               args.sample_rate, args.threshold)
+        printer = print_stages
+    elif args.command == 'async-batch':
+        result = report_async_batch(ontology, args.texts, args.hot_names, args.window_ms,
+                                    args.max_batch_size, args.threshold)
+        printer = print_async_batch
+    elif args.command == 'vectors':
+        result = report_vectors(ontology, args.diseases, args.texts, args.threshold)
+        printer = print_vectors
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        printer(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,70 @@
 测试实体链接器
 """
 
+import asyncio
+import json
+import sqlite3
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytest
+from rapidfuzz import fuzz, process
+
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from benchmarks.bench_linker import run_benchmark
+from benchmarks.synthetic_ontology import generate_gold, generate_ontology
+from ontology.async_batcher import AsyncLinkerBatcher
+from ontology.compact_trie import CompactTrie
+from ontology.db_loader import MedicalKnowledgeGraphDB
+from ontology.entity_linker import EntityLinker as OntologyEntityLinker
+from ontology.link_stream import link_file
+from ontology.ontology_loader import OntologyLoader
+from ontology.parallel_linker import ParallelLinker
+from scripts.annotate_corpus import BratWriter, JsonlWriter, annotate_corpus, annotate_text
+from scripts.evaluate_linker import evaluate, evaluate_pipelines, load_gold, pareto_front
 from src.core.entity_linker import EntityLinker
+from src.core.ontology_loader import OntologyLoader as CoreOntologyLoader
+
+# 小型药物本体（测试用）
+SAMPLE_DRUGS = {
+    "帕博利珠单抗": {
+        "standard_name": "帕博利珠单抗",
+        "type": "Drug",
+        "aliases": ["可瑞达", "Keytruda", "K药"],
+    },
+    "阿司匹林": {
+        "standard_name": "阿司匹林",
+        "generic_name": "阿司匹林",
+        "type": "Drug",
+        "aliases": ["Aspirin", "乙酰水杨酸"],
+    },
+    "阿司匹林肠溶片": {
+        "standard_name": "阿司匹林肠溶片",
+        "generic_name": "阿司匹林",
+        "type": "Drug",
+        "aliases": [],
+    },
+    "盐酸二甲双胍": {
+        "standard_name": "盐酸二甲双胍",
+        "generic_name": "二甲双胍",
+        "type": "Drug",
+        "aliases": ["Metformin"],
+    },
+    "二甲双胍恩格列净片": {
+        "standard_name": "二甲双胍恩格列净片",
+        "generic_name": "二甲双胍恩格列净",
+        "type": "Drug",
+        "aliases": [],
+    },
+    "胰岛素": {
+        "standard_name": "胰岛素",
+        "type": "Drug",
+        "aliases": ["Insulin"],
+    },
+}
 
 
 def test_entity_linker_basic():
@@ -36,6 +93,808 @@ def test_entity_linker_basic():
     print(f"疾病匹配测试: {result}")
 
 
+def _partial_match_bruteforce(linker, entity_text):
+    """逐条扫描本体的部分匹配（索引化之前的参考实现）"""
+    entity_text_lower = entity_text.lower()
+    best = None
+    for entity_name, entity_info in linker.ontology.items():
+        score = 0
+        if entity_text_lower in entity_name.lower():
+            similarity = len(entity_text) / len(entity_name)
+            if similarity >= 0.3:
+                score = similarity * (1 - min(0.3, (len(entity_name) - len(entity_text)) / 50.0))
+        generic_name = entity_info.get("generic_name", "")
+        if generic_name and entity_text_lower in generic_name.lower():
+            similarity = len(entity_text) / len(generic_name)
+            if similarity >= 0.3:
+                score = max(score, similarity * (1 - min(0.3, (len(generic_name) - len(entity_text)) / 50.0)) * 0.9)
+        if score > 0 and (best is None or score > best[0]):
+            best = (score, entity_name)
+    return best[1] if best else None
+
+
+def test_partial_match_uses_ngram_index():
+    """部分匹配：倒排索引召回的结果与逐条扫描一致"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    
+    for query in ["二甲双胍", "阿司匹", "单抗", "胰", "格列净", "肠溶", "不存在的药"]:
+        result = linker._partial_match(query)
+        expected = _partial_match_bruteforce(linker, query)
+        assert (result["matched_text"] if result else None) == expected, query
+    
+    result = linker.link("二甲双胍")
+    assert result["standard_name"] == "盐酸二甲双胍"
+    assert result["match_type"] == "partial_generic"
+
+
+def test_link_batch_matches_link():
+    """批量链接与逐条链接结果一致"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    texts = ["阿司匹林", "aspirin", "帕博利单抗", "二甲双胍", "帕博利单抗", "", "完全无关", "Insulim"]
+    
+    batch = linker.link_batch(texts, threshold=80, workers=2)
+    single = [linker.link(text, threshold=80) for text in texts]
+    
+    assert len(batch) == len(texts)
+    for got, expected in zip(batch, single):
+        if expected is None:
+            assert got is None
+        else:
+            assert got["standard_name"] == expected["standard_name"]
+            assert got["match_type"] == expected["match_type"]
+            assert got["confidence"] == expected["confidence"]
+
+
+def test_compact_trie_insert_search():
+    """紧凑前缀树：与 Trie 相同的 insert/search 语义"""
+    trie = CompactTrie()
+    aspirin, insulin = {"name": "阿司匹林"}, {"name": "胰岛素"}
+    trie.insert("阿司匹林", aspirin)
+    trie.insert("阿司匹林肠溶片", aspirin)
+    trie.insert("胰岛素", insulin)
+    trie.freeze()
+    
+    assert trie.search("阿司匹林") is aspirin
+    assert trie.search("阿司匹林肠溶片") is aspirin
+    assert trie.search("阿司匹") is None
+    assert trie.search("阿司匹林肠溶片剂") is None
+    assert len(trie.entities) == 2  # 同一实体只存一份
+    
+    # 编译后继续插入：后插入的覆盖先插入的
+    trie.insert("胰岛素", aspirin)
+    trie.insert("aspirin", aspirin)
+    assert trie.search("胰岛素") is aspirin
+    assert trie.search("aspirin") is aspirin
+    trie.freeze()
+    assert trie.search("胰岛素") is aspirin
+    assert len(trie) == 4
+    assert dict(trie.items())["aspirin"] is aspirin
+
+
+def test_index_snapshot_roundtrip(tmp_path):
+    """索引快照：内存映射打开后的链接结果与原链接器一致"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    index_path = tmp_path / "drugs.idx"
+    linker.save_index(index_path)
+    
+    mapped = OntologyEntityLinker.open_index(index_path)
+    assert mapped.get_statistics() == linker.get_statistics()
+    
+    queries = ["帕博利珠单抗", "KEYTRUDA", "可瑞达", "二甲双胍", "胰", "帕博利单抗", "完全无关"]
+    for query in queries:
+        expected = linker.link(query, threshold=80)
+        got = mapped.link(query, threshold=80)
+        if expected is None:
+            assert got is None, query
+        else:
+            assert got["standard_name"] == expected["standard_name"], query
+            assert got["match_type"] == expected["match_type"], query
+    
+    batch = mapped.link_batch(queries, threshold=80, workers=1)
+    assert [r and r["standard_name"] for r in batch] == [
+        r and r["standard_name"] for r in linker.link_batch(queries, threshold=80, workers=1)
+    ]
+    assert mapped.alias_map["keytruda"] == "帕博利珠单抗"
+    assert "confidence" not in mapped.ontology["帕博利珠单抗"]
+
+
+def test_extract_mentions_longest_match():
+    """文本提及抽取：互不重叠的最长匹配，位置对应原文"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    text = "患者长期服用阿司匹林肠溶片，现改用KEYTRUDA（可瑞达）联合盐酸二甲双胍治疗。"
+    
+    mentions = linker.extract_mentions(text)
+    
+    assert [m["mention"] for m in mentions] == ["阿司匹林肠溶片", "KEYTRUDA", "可瑞达", "盐酸二甲双胍"]
+    for mention in mentions:
+        assert text[mention["start"]:mention["end"]] == mention["mention"]
+    assert mentions[1]["entity"]["standard_name"] == "帕博利珠单抗"
+    assert linker.extract_mentions("无关文本") == []
+
+
+def test_parallel_linker_preserves_order():
+    """多进程链接：结果顺序与输入一致，并统计各进程吞吐量"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    texts = ["阿司匹林", "可瑞达", "二甲双胍", "完全无关", "帕博利单抗"] * 20
+    
+    with ParallelLinker(linker, processes=2, chunk_size=7) as parallel:
+        results = list(parallel.link_iter(iter(texts), threshold=80))
+        stats = parallel.get_statistics()
+    
+    expected = linker.link_batch(texts, threshold=80)
+    assert [r and r["standard_name"] for r in results] == [r and r["standard_name"] for r in expected]
+    assert stats["total_texts"] == len(texts)
+    assert sum(w["chunks"] for w in stats["workers"].values()) == 15
+
+
+def test_link_cache_statistics_and_immutability():
+    """LRU 缓存：命中/未命中/淘汰统计，返回结果不可修改"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS, cache_size=2)
+    
+    first = linker.link("可瑞达")
+    assert linker.link("可瑞达") is first
+    with pytest.raises(TypeError):
+        first["standard_name"] = "被篡改"
+    assert SAMPLE_DRUGS["帕博利珠单抗"]["aliases"] == ["可瑞达", "Keytruda", "K药"]
+    
+    linker.link("阿司匹林")
+    linker.link("胰岛素")  # 淘汰最久未使用的 "可瑞达"
+    linker.link("可瑞达")
+    
+    cache = linker.get_statistics()["cache"]
+    assert cache == {
+        "capacity": 2, "size": 2, "hits": 1, "misses": 4, "evictions": 2, "hit_rate": 0.2,
+    }
+    assert linker.link_batch(["胰岛素", "可瑞达"])[0] is linker.link("胰岛素")
+
+
+def test_fuzzy_prefilter_never_drops_best_match():
+    """模糊匹配预过滤：结果与全量打分一致，且能剪掉不可能达到阈值的候选"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    keys = linker._fuzzy_choices()
+    
+    for query in ["帕博利单抗", "阿斯匹林", "Metformn", "二甲双胍恩格列净", "胰岛", "K"]:
+        for threshold in (50, 70, 85, 95):
+            expected = process.extractOne(query, keys, scorer=fuzz.ratio, score_cutoff=threshold)
+            result = linker._fuzzy_match(query, threshold)
+            assert (result["matched_text"] if result else None) == (expected[0] if expected else None)
+    
+    assert len(linker._fuzzy_candidates("帕博利单抗", 85)) < len(keys)
+
+
+def test_typo_stage_uses_deletion_index():
+    """拼写纠错：删除邻域索引在模糊匹配之前命中"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS, typo_max_distance=2)
+    
+    result = linker.link("帕博利单抗")
+    assert result["standard_name"] == "帕博利珠单抗"
+    assert result["match_type"] == "typo"
+    assert linker.link("keytrada")["standard_name"] == "帕博利珠单抗"
+    assert linker.link_batch(["帕博利单抗"])[0]["match_type"] == "typo"
+    
+    # 未启用时仍由模糊匹配兜底
+    assert OntologyEntityLinker(SAMPLE_DRUGS).link("帕博利单抗")["match_type"] == "fuzzy"
+
+
+def test_typed_link_searches_single_partition(tmp_path):
+    """统一链接器：指定类型只搜索对应分区，不指定时搜索全部分区"""
+    linker = OntologyEntityLinker()
+    linker.load_partitions({
+        "drugs": SAMPLE_DRUGS,
+        "diseases": {
+            "非小细胞肺癌": {"standard_name": "非小细胞肺癌", "type": "Disease", "aliases": ["NSCLC"]},
+            "2型糖尿病": {"standard_name": "2型糖尿病", "type": "Disease", "aliases": []},
+        },
+        "Gene_Target": {
+            "INS": {"standard_name": "INS", "type": "Gene_Target", "aliases": ["胰岛素"]},
+        },
+    })
+    
+    # 多个分区共有的词条：不指定类型时后加载的覆盖先加载的
+    assert linker.link("胰岛素")["standard_name"] == "INS"
+    assert linker.link("胰岛素", entity_type="drug")["standard_name"] == "胰岛素"
+    assert linker.link("胰岛素", entity_type="Gene_Target")["standard_name"] == "INS"
+    
+    assert linker.link("非小细胞肺癌", entity_type="disease")["match_type"] == "exact"
+    assert linker.link("非小细胞肺癌", entity_type="drug") is None
+    assert linker.link("非小细胞癌", entity_type="disease", threshold=80)["standard_name"] == "非小细胞肺癌"
+    assert linker.link("帕博利单抗", entity_type="disease", threshold=80) is None
+    assert linker.link("阿司匹林", entity_type="manufacturer") is None
+    assert linker.link_batch(["帕博利单抗", "胰岛素"], threshold=80, entity_type="drug")[1]["type"] == "Drug"
+    
+    text = "胰岛素联合二甲双胍治疗2型糖尿病"
+    assert [m["entity"]["type"] for m in linker.extract_mentions(text, entity_type="drug")] == ["Drug"]
+    assert [m["mention"] for m in linker.extract_mentions(text)] == ["胰岛素", "2型糖尿病"]
+    assert linker.get_statistics()["partitions"] == {"drug": 6, "disease": 2, "gene": 1}
+    
+    linker.save_index(tmp_path / "all.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "all.idx")
+    assert mapped.link("胰岛素", entity_type="drug")["standard_name"] == "胰岛素"
+    assert mapped.link("NSCLC", entity_type="gene") is None
+    assert mapped.get_statistics() == linker.get_statistics()
+
+
+def test_link_topk_merges_stages_and_dedupes():
+    """Top-k 检索：合并各阶段候选，按实体去重，提前停止不改变结果"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    
+    # 阿司匹林同时被精确、部分、模糊匹配命中，只保留置信度最高的一次
+    results = linker.link_topk("阿司匹林", k=3)
+    assert [(r["standard_name"], r["match_type"]) for r in results] == [
+        ("阿司匹林", "exact"), ("阿司匹林肠溶片", "partial_generic"),
+    ]
+    
+    # 只有模糊匹配命中的查询：与对全部候选键打分后按实体去重的结果一致
+    keys = linker._fuzzy_choices()
+    for query in ["帕博利单抗", "Metformn", "阿斯匹林", "Keytrud"]:
+        for k in (1, 2, 4):
+            best = {}
+            for key_id, key in enumerate(keys):
+                score = fuzz.ratio(query, key)
+                entity_id = int(linker._key_entity_ids[key_id])
+                if score >= 20 and score > best.get(entity_id, (0,))[0]:
+                    best[entity_id] = (score, key_id)
+            expected = sorted(best.values(), key=lambda item: (-item[0], item[1]))[:k]
+            got = linker.link_topk(query, k=k, threshold=20)
+            assert [(r["confidence"], r["matched_text"]) for r in got] == [
+                (score / 100.0, keys[key_id]) for score, key_id in expected
+            ], query
+    
+    assert linker.link_topk("帕博利单抗", k=1)[0]["standard_name"] == linker.link("帕博利单抗")["standard_name"]
+    assert linker.link_topk("完全无关", k=5) == []
+
+
+def test_incremental_updates_match_rebuild(tmp_path):
+    """增量添加/删除/改别名后，各匹配阶段的结果与按更新后本体重新构建的一致"""
+    ontology = {name: dict(info) for name, info in SAMPLE_DRUGS.items()}
+    linker = OntologyEntityLinker(ontology, cache_size=16, typo_max_distance=1)
+    assert linker.link("Keytruda")["standard_name"] == "帕博利珠单抗"  # 写入缓存
+    
+    linker.add_entity("信迪利单抗", {"standard_name": "信迪利单抗", "type": "Drug", "aliases": ["达伯舒"]})
+    linker.add_entity("阿司匹林泡腾片", {"standard_name": "阿司匹林泡腾片", "type": "Drug", "aliases": ["Aspirin"]})
+    assert linker.link("Aspirin")["standard_name"] == "阿司匹林泡腾片"
+    # 删除后同名别名交还给仍带有它的实体
+    assert linker.remove_entity("阿司匹林泡腾片") == 1
+    assert linker.link("Aspirin")["standard_name"] == "阿司匹林"
+    linker.add_entity("阿司匹林泡腾片", {"standard_name": "阿司匹林泡腾片", "type": "Drug", "aliases": ["乙酰水杨酸"]})
+    assert linker.remove_entity("阿司匹林") == 1
+    assert linker.link("乙酰水杨酸")["standard_name"] == "阿司匹林泡腾片"
+    assert linker.remove_entity("不存在") == 0
+    assert linker.update_aliases("帕博利珠单抗", ["K药", "派姆单抗"]) == 1
+    assert "阿司匹林" not in ontology and "信迪利单抗" in ontology
+    
+    rebuilt = OntologyEntityLinker(ontology, typo_max_distance=1)
+    queries = ["Keytruda", "派姆单抗", "K药", "达伯舒", "信迪利单抗", "信迪利单", "阿司匹林",
+               "Aspirin", "乙酰水杨酸", "肠溶片", "二甲双胍", "帕博利单抗", "Metformn"]
+    for query in queries:
+        expected = rebuilt.link(query, threshold=60)
+        got = linker.link(query, threshold=60)
+        assert (got and (got["standard_name"], got["match_type"])) == \
+            (expected and (expected["standard_name"], expected["match_type"])), query
+    assert [r and r["standard_name"] for r in linker.link_batch(queries, threshold=60)] == \
+        [r and r["standard_name"] for r in rebuilt.link_batch(queries, threshold=60)]
+    assert [r["standard_name"] for r in linker.link_topk("阿司匹林", k=5, threshold=30)] == \
+        [r["standard_name"] for r in rebuilt.link_topk("阿司匹林", k=5, threshold=30)]
+    assert [m["mention"] for m in linker.extract_mentions("达伯舒和阿司匹林")] == ["达伯舒"]
+    
+    stats = linker.get_statistics()
+    assert stats["total_entities"] == len(ontology) and stats["updates"] == 6
+    assert stats["total_keys"] == rebuilt.get_statistics()["total_keys"]
+    
+    # 保存快照时压缩掉删除标记
+    linker.save_index(tmp_path / "updated.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "updated.idx", typo_max_distance=1)
+    assert mapped.get_statistics() == rebuilt.get_statistics()
+    assert mapped.link("派姆单抗")["standard_name"] == "帕博利珠单抗"
+    with pytest.raises(RuntimeError):
+        mapped.remove_entity("信迪利单抗")
+
+
+def test_incremental_updates_keep_insertion_order(tmp_path):
+    """改别名、替换实体后沿用原插入次序：多个实体共有的别名仍归重新构建时的那个实体"""
+    diseases = {
+        name: {"standard_name": name, "type": "Disease", "aliases": ["化脓性X"]}
+        for name in ("化脓性阑尾炎", "化脓性胆囊炎", "化脓性扁桃体炎")
+    }
+    partitions = {
+        "disease": diseases,
+        "drug": {"化脓性X": {"standard_name": "化脓性X", "type": "Drug", "aliases": []}},
+    }
+    linker = OntologyEntityLinker()
+    linker.load_partitions(partitions)
+    
+    assert linker.update_aliases("化脓性阑尾炎", ["化脓性X", "阑尾脓肿"]) == 1
+    linker.add_entity("化脓性胆囊炎", {"standard_name": "化脓性胆囊炎", "type": "Disease",
+                                    "aliases": ["化脓性X", "胆囊积脓"]})
+    assert list(diseases) == ["化脓性阑尾炎", "化脓性胆囊炎", "化脓性扁桃体炎"]
+    assert linker.link("化脓性X", entity_type="disease")["standard_name"] == "化脓性扁桃体炎"
+    # 删除后交还给排在它之前的最后一个实体，而不是最近更新的实体
+    assert linker.remove_entity("化脓性扁桃体炎") == 1
+    
+    rebuilt = OntologyEntityLinker()
+    rebuilt.load_partitions(partitions)
+    assert linker.alias_map == rebuilt.alias_map
+    queries = ["化脓性X", "化脓性x", "阑尾脓肿", "胆囊积脓", "化脓性胆囊"]
+    for entity_type in (None, "disease", "drug"):
+        for query in queries:
+            expected = rebuilt.link(query, threshold=60, entity_type=entity_type)
+            got = linker.link(query, threshold=60, entity_type=entity_type)
+            assert (got and (got["standard_name"], got["match_type"])) == \
+                (expected and (expected["standard_name"], expected["match_type"])), (query, entity_type)
+    assert linker.link("化脓性X", entity_type="disease")["standard_name"] == "化脓性胆囊炎"
+    
+    linker.save_index(tmp_path / "updated.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "updated.idx")
+    assert mapped.link("化脓性X", entity_type="disease")["standard_name"] == "化脓性胆囊炎"
+    assert mapped.get_statistics() == rebuilt.get_statistics()
+
+
+def test_canonical_keys_fold_surface_variants(tmp_path):
+    """规范键匹配：全半角、括号、繁简体、空白标点差异在部分/模糊匹配之前命中"""
+    ontology = dict(SAMPLE_DRUGS)
+    ontology["注射用紫杉醇(白蛋白结合型)"] = {
+        "standard_name": "注射用紫杉醇(白蛋白结合型)", "type": "Drug", "aliases": ["PD-1抑制剂"],
+    }
+    linker = OntologyEntityLinker(ontology)
+    
+    for query in ["注射用紫杉醇（白蛋白结合型）", "注射用紫杉醇【白蛋白结合型】", "注射用紫杉醇 (白蛋白結合型)",
+                  "ＰＤ－１抑制剂", "pd1抑制剂"]:
+        result = linker.link(query)
+        assert result["standard_name"] == "注射用紫杉醇(白蛋白结合型)", query
+        assert result["match_type"] == "canonical", query
+    assert linker.link("阿司匹林腸溶片")["standard_name"] == "阿司匹林肠溶片"
+    assert linker.link_batch(["ＫＥＹＴＲＵＤＡ"])[0]["match_type"] == "canonical"
+    assert linker.link_topk("ＫＥＹＴＲＵＤＡ", k=1)[0]["match_type"] == "canonical"
+    assert linker.canonical_index.get_statistics()["hits"] == 7
+    
+    linker.save_index(tmp_path / "canonical.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "canonical.idx")
+    assert mapped.link("注射用紫杉醇（白蛋白结合型）")["match_type"] == "canonical"
+    
+    # 不启用时退回部分/模糊匹配
+    plain = OntologyEntityLinker(ontology, normalization=None)
+    assert plain.link("ＰＤ－１抑制剂") is None
+
+
+def test_generic_stage_strips_dosage_form(tmp_path):
+    """剂型后缀剥离：制剂名未收录时按通用名命中，早于部分匹配和模糊匹配"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    
+    result = linker.link("阿司匹林泡腾片")
+    assert (result["standard_name"], result["match_type"]) == ("阿司匹林", "generic")
+    # 没有名称即通用名的实体时，指向同一通用名的制剂
+    assert linker.link("二甲双胍缓释片")["standard_name"] == "盐酸二甲双胍"
+    assert linker.link_batch(["二甲双胍恩格列净胶囊"])[0]["match_type"] == "generic"
+    assert linker.link_topk("阿司匹林泡腾片", k=1)[0]["match_type"] == "generic"
+    assert linker.link("阿司匹林肠溶片")["match_type"] == "exact"
+    assert linker.link("阿司匹林泡腾片", entity_type="disease") is None
+    
+    linker.save_index(tmp_path / "generic.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "generic.idx")
+    assert mapped.link("二甲双胍缓释片")["standard_name"] == "盐酸二甲双胍"
+
+
+def test_ngram_filter_skips_unlinkable_queries(tmp_path):
+    """查询预过滤：跳过不可能达到阈值的查询，链接结果与不启用时一致"""
+    plain = OntologyEntityLinker(SAMPLE_DRUGS, typo_max_distance=1)
+    linker = OntologyEntityLinker(dict(SAMPLE_DRUGS), typo_max_distance=1, ngram_filter_fpr=0.01)
+    
+    queries = ["帕博利单抗", "Keytrud", "阿司匹", "二甲双胍", "肠溶", "阿斯匹林", "Metformn",
+               "患者自诉头痛三天", "血常规未见异常", "随访观察", "qwerty", "胰岛"]
+    for threshold in (50, 70, 85, 95):
+        assert linker.link_batch(queries, threshold=threshold) == plain.link_batch(queries, threshold=threshold)
+        for query in queries:
+            assert linker.link(query, threshold=threshold) == plain.link(query, threshold=threshold), query
+            assert linker.link_topk(query, k=3, threshold=threshold) == \
+                plain.link_topk(query, k=3, threshold=threshold), query
+    stats = linker.ngram_filter.get_statistics()
+    assert stats["fuzzy_rejected"] > 0
+    
+    # 增量添加的词条同步加入过滤器
+    linker.add_entity("信迪利单抗", {"standard_name": "信迪利单抗", "type": "Drug", "aliases": []})
+    assert linker.link("信笛利单抗", threshold=75)["standard_name"] == "信迪利单抗"
+    
+    linker.save_index(tmp_path / "filtered.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "filtered.idx")
+    assert mapped.link("患者自诉头痛三天") is None
+    assert mapped.ngram_filter.get_statistics()["fuzzy_rejected"] == 1
+    assert mapped.link("信笛利单抗", threshold=75)["standard_name"] == "信迪利单抗"
+
+
+def test_pinyin_stage_matches_homophone_typos(tmp_path):
+    """拼音键匹配：同音字输入错误在模糊匹配之前命中"""
+    linker = OntologyEntityLinker(dict(SAMPLE_DRUGS), pinyin_index=True)
+    
+    result = linker.link("盐酸二甲双呱")  # 呱 为多音字，首选读音 gu
+    assert result["standard_name"] == "盐酸二甲双胍"
+    assert result["match_type"] == "pinyin" and result["confidence"] == 0.85
+    assert linker.link("阿斯匹林")["match_type"] == "pinyin"
+    assert linker.link_batch(["乙酰水扬酸"])[0]["standard_name"] == "阿司匹林"
+    assert linker.link_topk("阿斯匹林", k=1)[0]["match_type"] == "pinyin"
+    
+    # 全部换成同音字的不匹配；未启用时模糊匹配达不到阈值
+    assert linker.link("已先水阳酸") is None
+    assert OntologyEntityLinker(SAMPLE_DRUGS).link("盐酸二甲双呱") is None
+    
+    linker.add_entity("替雷利珠单抗", {"standard_name": "替雷利珠单抗", "type": "Drug", "aliases": []})
+    assert linker.link("替雷力珠单抗")["match_type"] == "pinyin"
+    
+    linker.save_index(tmp_path / "pinyin.idx")
+    mapped = OntologyEntityLinker.open_index(tmp_path / "pinyin.idx", pinyin_index=True)
+    assert mapped.link("替雷力珠单抗")["standard_name"] == "替雷利珠单抗"
+
+
+def test_link_result_shares_record_without_leaking():
+    """链接结果引用本体记录而不复制，且不会把匹配信息写回共享记录"""
+    ontology = {name: dict(info) for name, info in SAMPLE_DRUGS.items()}
+    linker = OntologyEntityLinker(ontology)
+    
+    exact = linker.link("阿司匹林")
+    partial = linker.link("帕博利珠")
+    assert exact["confidence"] == 1.0 and "matched_text" not in exact
+    assert partial["match_type"] == "partial" and partial["matched_text"] == "帕博利珠单抗"
+    assert "confidence" not in ontology["阿司匹林"] and "match_type" not in ontology["帕博利珠单抗"]
+    assert linker.link("ASPIRIN")["match_type"] == "case_insensitive"
+    assert exact.entity["aliases"] is ontology["阿司匹林"]["aliases"]
+    
+    with pytest.raises(TypeError):
+        exact["confidence"] = 0.5
+    with pytest.raises(AttributeError):
+        exact.confidence = 0.5
+    assert dict(exact) == {**ontology["阿司匹林"], "confidence": 1.0, "match_type": "exact"}
+    
+    # 取值原样返回（不逐次复制），用法与原先的 dict 结果相同，可直接序列化
+    ontology["阿司匹林"]["metadata"] = {"atc": ["B01AC06", "N02BA01"], "source": {"name": "WHO"}}
+    result = linker.link("阿司匹林")
+    assert result["aliases"] is ontology["阿司匹林"]["aliases"]
+    assert result["aliases"] + ["ASA"] == ["Aspirin", "乙酰水杨酸", "ASA"]
+    assert json.loads(json.dumps(dict(result), ensure_ascii=False))["metadata"]["source"] == {"name": "WHO"}
+    assert json.loads(json.dumps(result.copy()))["confidence"] == 1.0
+    copied = result.to_dict()
+    copied["aliases"].append("ASA")
+    copied["metadata"]["atc"].clear()
+    assert ontology["阿司匹林"]["aliases"] == ["Aspirin", "乙酰水杨酸"]
+    assert ontology["阿司匹林"]["metadata"]["atc"] == ["B01AC06", "N02BA01"]
+
+
+def test_link_metrics_record_stage_outcomes():
+    """阶段统计：调用结局分布、各阶段执行次数与耗时直方图，支持采样"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS, cache_size=8, metrics_sample_rate=1.0)
+    for query in ["阿司匹林", "Keytruda", "帕博利珠", "帕博利单抗", "完全无关", "阿司匹林"]:
+        linker.link(query)
+    
+    metrics = linker.get_statistics()["metrics"]
+    assert metrics["calls"] == metrics["sampled_calls"] == 6
+    assert {outcome: row["count"] for outcome, row in metrics["outcomes"].items()} == {
+        "exact": 1, "case_insensitive": 1, "partial": 1, "fuzzy": 1, "none": 1, "cache": 1,
+    }
+    stages = metrics["stages"]
+    assert stages["exact"]["runs"] == 5 and stages["exact"]["hits"] == 1
+    assert stages["fuzzy"]["runs"] == 2 and stages["fuzzy"]["hit_rate"] == 0.5
+    assert "typo" not in stages  # 未启用的阶段不计入
+    assert sum(stages["partial"]["latency"]["buckets"].values()) == stages["partial"]["runs"]
+    assert metrics["latency"]["count"] == 6
+    
+    sampled = OntologyEntityLinker(SAMPLE_DRUGS, metrics_sample_rate=0.25)
+    for _ in range(8):
+        sampled.link("阿司匹林")
+    assert sampled.metrics.get_statistics()["sampled_calls"] == 2
+    sampled.metrics.reset()
+    assert sampled.metrics.calls == 0
+    with pytest.raises(ValueError):
+        OntologyEntityLinker(SAMPLE_DRUGS, metrics_sample_rate=2)
+
+
+def test_async_batcher_merges_concurrent_calls():
+    """异步微批处理：窗口内的并发调用合并为一次 link_batch，结果与逐条 link() 一致"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    texts = ["阿司匹林", "可瑞达", "阿司匹林", "帕博利单抗", "可瑞达", "完全无关", "", "完全无关"]
+    
+    async def run():
+        async with AsyncLinkerBatcher(linker, window_ms=50, max_batch_size=4) as batcher:
+            results = await asyncio.gather(*(batcher.link(text) for text in texts))
+            typed = await asyncio.gather(batcher.link("胰岛素", entity_type="drug"),
+                                         batcher.link("阿斯匹林", threshold=70))
+            return results, typed, batcher.get_statistics()
+    
+    results, typed, stats = asyncio.run(run())
+    assert results == [linker.link(text) for text in texts]
+    assert results[0] is results[2]  # 同一批内相同文本只链接一次
+    assert typed == [linker.link("胰岛素", entity_type="drug"), linker.link("阿斯匹林", threshold=70)]
+    # 第一批收满 4 个不同文本立即提交，其余由窗口到期提交；不同阈值 / 类型各自成批
+    assert stats["requests"] == 10 and stats["unique_texts"] == 8 and stats["batches"] == 4
+
+
+def test_link_file_streams_jsonl_and_csv(tmp_path):
+    """文件流式链接：分块读写，结果与 link_batch 一致，行顺序和原有字段保持不变"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    texts = ["阿司匹林", "可瑞达", "完全无关", "", "Keytruda", "帕博利单抗", "阿司匹林"]
+    assert list(linker.link_stream(iter(texts), chunk_size=3)) == linker.link_batch(texts)
+    
+    source = tmp_path / "mentions.jsonl"
+    with open(source, "w", encoding="utf-8") as f:
+        for index, text in enumerate(texts):
+            f.write(json.dumps({"id": index, "text": text}, ensure_ascii=False) + "\n")
+        f.write("\n")
+    
+    stats = link_file(linker, source, tmp_path / "linked.csv", chunk_size=2, report_every=0)
+    assert stats["rows"] == len(texts)
+    assert stats["linked"] == 5
+    
+    stats = link_file(linker, tmp_path / "linked.csv", tmp_path / "relinked.jsonl", chunk_size=4)
+    assert stats["rows"] == len(texts)
+    with open(tmp_path / "relinked.jsonl", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == [str(index) for index in range(len(texts))]
+    assert rows[1]["link_standard_name"] == "帕博利珠单抗"
+    assert rows[1]["link_match_type"] == "exact"
+    assert rows[2]["link_standard_name"] is None
+    
+    with pytest.raises(ValueError):
+        link_file(linker, tmp_path / "linked.csv", tmp_path / "out.jsonl", text_field="mention")
+    with pytest.raises(ValueError):
+        link_file(linker, source, tmp_path / "linked.txt")
+    with pytest.raises(ValueError):
+        link_file(linker, source, tmp_path / "linked.json")
+    assert link_file(linker, source, tmp_path / "linked.json", output_format="jsonl")["rows"] == len(texts)
+    
+    # CSV 的列由第一行确定，后续行多出的字段报错而不是静默丢弃
+    with open(source, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"id": 99, "text": "阿司匹林", "note": "extra"}, ensure_ascii=False) + "\n")
+    with pytest.raises(ValueError, match="note"):
+        link_file(linker, source, tmp_path / "extra.csv", report_every=0)
+
+
+def test_annotate_corpus_resumes_and_writes_brat(tmp_path):
+    """语料标注：多进程结果与单篇抽取一致，续跑跳过已完成文档，BRAT 偏移对应原文"""
+    linker = OntologyEntityLinker(SAMPLE_DRUGS)
+    notes = tmp_path / "notes"
+    (notes / "ward").mkdir(parents=True)
+    documents = {
+        "a.txt": "患者长期口服阿司匹林，\r\n近期加用可瑞达。",
+        "ward/b.txt": "无特殊用药",
+        "ward/c.txt": "Keytruda 200mg q3w",
+    }
+    for doc_id, text in documents.items():
+        with open(notes / doc_id, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    
+    output = tmp_path / "annotations.jsonl"
+    stats = annotate_corpus(linker, notes, JsonlWriter(output), processes=2)
+    assert (stats["documents"], stats["mentions"]) == (3, 3)
+    with open(output, encoding="utf-8") as f:
+        records = {record["doc_id"]: record for record in map(json.loads, f)}
+    assert records["a.txt"]["annotations"] == annotate_text(linker, documents["a.txt"])
+    assert records["ward/c.txt"]["annotations"][0]["standard_name"] == "帕博利珠单抗"
+    
+    # 模拟中断：末行只写了一半
+    with open(output, "r+b") as f:
+        lines = f.readlines()
+        f.seek(0)
+        f.truncate()
+        f.writelines(lines[:2] + [lines[2][:10]])
+    stats = annotate_corpus(linker, notes, JsonlWriter(output), processes=1)
+    assert (stats["documents"], stats["skipped"]) == (1, 2)
+    with open(output, encoding="utf-8") as f:
+        assert sorted(json.loads(line)["doc_id"] for line in f) == sorted(documents)
+    
+    brat = tmp_path / "brat"
+    annotate_corpus(linker, notes, BratWriter(brat), processes=1)
+    ann = (brat / "a.ann").read_text(encoding="utf-8").splitlines()
+    text = (brat / "a.txt").read_bytes().decode("utf-8")
+    tag, span, mention = ann[2].split("\t")
+    entity_type, start, end = span.split()
+    assert (entity_type, text[int(start):int(end)], mention) == ("Drug", "可瑞达", "可瑞达")
+    assert ann[3] == "#2\tAnnotatorNotes T2\t帕博利珠单抗"
+    assert annotate_corpus(linker, notes, BratWriter(brat), processes=1)["skipped"] == 3
+    
+    # "a" 与 "a.txt" 会写到同一对 .txt/.ann，开始标注前即报错
+    (notes / "a").write_text("阿司匹林", encoding="utf-8")
+    with pytest.raises(ValueError):
+        annotate_corpus(linker, notes, BratWriter(tmp_path / "brat2"), pattern="*", processes=1)
+
+
+LONG_DISEASES = {
+    name: {"standard_name": name, "type": "Disease", "aliases": aliases}
+    for name, aliases in {
+        "2型糖尿病性周围神经病变": ["糖尿病周围神经病"],
+        "2型糖尿病性视网膜病变": [],
+        "2型糖尿病伴有并发症": [],
+        "慢性阻塞性肺疾病伴有急性加重": ["COPD急性加重"],
+        "慢性阻塞性肺疾病": ["COPD", "慢阻肺"],
+        "十二指肠溃疡伴穿孔": [],
+    }.items()
+}
+
+
+def test_vector_index_ranks_long_names(tmp_path):
+    """向量检索：近邻与精确余弦一致，长查询走 vector 阶段，增量更新与数据库检索可用"""
+    linker = OntologyEntityLinker(dict(LONG_DISEASES), vector_index=True)
+    index = linker._vector_index
+    keys = [key.lower() for key in linker._fuzzy_choices()]
+    query = "2型糖尿病性周围神经病变，未特指"
+    indices, data = index.vectorizer.transform_one(query)
+    exact = index._cosine(np.arange(len(keys), dtype=np.uint32), indices, data)
+    key_ids, similarities = index.search(query, k=3)
+    assert key_ids.tolist() == np.argsort(-exact, kind="stable")[:3].tolist()
+    assert np.allclose(similarities, np.sort(exact)[::-1][:3], atol=1e-6)
+    
+    result = linker.link(query, threshold=60)
+    assert (result["standard_name"], result["match_type"]) == ("2型糖尿病性周围神经病变", "vector")
+    assert result["confidence"] == pytest.approx(float(similarities[0]), abs=1e-6)
+    # 余弦相似度未达阈值时只对近邻候选做模糊匹配
+    assert linker.link(query, threshold=85)["match_type"] == "fuzzy"
+    queries = [query, "十二指肠球部溃疡伴穿孔", "慢阻肺", "完全无关的一段长文本"]
+    assert linker.link_batch(queries, threshold=60) == [linker.link(q, threshold=60) for q in queries]
+    assert [r["standard_name"] for r in linker.vector_search("糖尿病神经病变", k=2)] == \
+        ["2型糖尿病性周围神经病变", "2型糖尿病性视网膜病变"]
+    assert linker.link_topk(query, k=2, threshold=60)[0]["standard_name"] == "2型糖尿病性周围神经病变"
+    
+    linker.add_entity("2型糖尿病性肾病", {"standard_name": "2型糖尿病性肾病", "type": "Disease", "aliases": []})
+    assert linker.vector_search("2型糖尿病性肾脏病变", k=1)[0]["standard_name"] == "2型糖尿病性肾病"
+    linker.remove_entity("2型糖尿病性肾病")
+    assert linker.vector_search("2型糖尿病性肾脏病变", k=1)[0]["standard_name"] != "2型糖尿病性肾病"
+    
+    db_path = tmp_path / "kg.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE entities (id INTEGER PRIMARY KEY, name TEXT, standard_name TEXT, type TEXT, data TEXT);
+        CREATE TABLE aliases (id INTEGER PRIMARY KEY, entity_id INTEGER, alias TEXT);
+    ''')
+    for entity_id, (name, info) in enumerate(LONG_DISEASES.items(), 1):
+        conn.execute("INSERT INTO entities VALUES (?, ?, ?, ?, NULL)", (entity_id, name, name, "Disease"))
+        conn.executemany("INSERT INTO aliases (entity_id, alias) VALUES (?, ?)",
+                         [(entity_id, alias) for alias in info["aliases"]])
+    conn.execute("INSERT INTO entities VALUES (99, '二甲双胍', '二甲双胍', 'Drug', NULL)")
+    conn.commit()
+    conn.close()
+    db = MedicalKnowledgeGraphDB(db_path)
+    found = db.fuzzy_search("慢性阻塞性肺疾病急性加重期", "Disease", limit=2, method="vector")
+    assert [row["name"] for row in found] == ["慢性阻塞性肺疾病伴有急性加重", "慢性阻塞性肺疾病"]
+    assert found[0]["similarity"] > found[1]["similarity"]
+    assert db.fuzzy_search("慢性阻塞性肺疾病急性加重期", "Drug", method="vector") == []
+    db.close()
+
+
+def test_vector_stage_falls_back_to_full_fuzzy():
+    """向量阶段只增加候选：近邻探测漏掉的查询仍由全量模糊匹配找到，结果与不启用向量索引一致"""
+    diseases = generate_ontology(3000)["disease"]
+    plain = OntologyEntityLinker(diseases)
+    linker = OntologyEntityLinker(diseases, vector_index=True)
+    linker._vector_index.nprobe = 1  # 只探测一个簇，放大近邻漏召回
+    
+    queries = [name[:2] + "的" + name[2:] for name in diseases if len(name) >= 8][:200]
+    missed = [q for q in queries if linker._vector_match(q, 85) is None and plain.link(q, 85) is not None]
+    assert missed
+    for query in missed:
+        assert linker.link(query, 85) == plain.link(query, 85)
+        assert linker.link(query, 85)["match_type"] == "fuzzy"
+    assert linker.link_batch(missed, 85, workers=1) == [plain.link(q, 85) for q in missed]
+    assert linker.link_batch(missed, 85, workers=2) == [plain.link(q, 85) for q in missed]
+
+
+def test_vector_index_handles_empty_ontology(tmp_path):
+    """向量索引：空本体、无数据文件、空数据库都不报错，检索无结果；之后增量添加的键可检索"""
+    linker = OntologyEntityLinker({}, vector_index=True)
+    assert linker.link("慢性阻塞性肺疾病伴急性加重") is None
+    assert linker.vector_search("慢性阻塞性肺疾病") == []
+    linker.add_entity("慢性阻塞性肺疾病", {"standard_name": "慢性阻塞性肺疾病", "type": "Disease", "aliases": []})
+    assert linker.vector_search("慢性阻塞性肺病", k=1)[0]["standard_name"] == "慢性阻塞性肺疾病"
+    
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+    linker = OntologyEntityLinker(vector_index=True)
+    linker.load_ontology(empty_dir)
+    assert linker.link("慢性阻塞性肺疾病伴急性加重") is None
+    
+    db_path = tmp_path / "empty.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE entities (id INTEGER PRIMARY KEY, name TEXT, standard_name TEXT, type TEXT, data TEXT);
+        CREATE TABLE aliases (id INTEGER PRIMARY KEY, entity_id INTEGER, alias TEXT);
+    ''')
+    conn.close()
+    db = MedicalKnowledgeGraphDB(db_path)
+    assert db.fuzzy_search("慢性阻塞性肺疾病", "Disease", method="vector") == []
+    db.close()
+
+
+def test_synthetic_ontology_benchmark_hits_each_path():
+    """合成本体：同一种子结果确定且小规模是大规模的前缀；各基准查询落在对应阶段"""
+    small = generate_ontology(2000)
+    large = generate_ontology(5000)
+    assert small == generate_ontology("2000")
+    assert {name: len(entities) for name, entities in small.items()} == {"drug": 700, "disease": 1300}
+    for partition, entities in small.items():
+        assert list(large[partition])[:len(entities)] == list(entities)
+    assert generate_ontology(2000, seed=1) != small
+    
+    run = run_benchmark(small, "2k", queries=100, fuzzy_queries=20, workers=1)
+    assert run["entities"] == 2000
+    workloads = run["workloads"]
+    assert set(workloads) == {"exact", "case_insensitive", "partial", "fuzzy", "batch"}
+    assert workloads["exact"]["match_types"] == {"exact": 100}
+    assert workloads["case_insensitive"]["match_types"] == {"case_insensitive": 100}
+    assert workloads["partial"]["match_types"] == {"partial": 100}
+    assert set(workloads["fuzzy"]["match_types"]) <= {"fuzzy", "none"}
+    assert workloads["exact"]["p50_us"] <= workloads["exact"]["p99_us"]
+    json.dumps(run)
+
+
+def test_evaluate_linker_scores_gold_and_marks_pareto(tmp_path):
+    """评估：精确率按链接数、召回率按非 NIL 提及数计算；帕累托前沿排除被支配的组合"""
+    gold_path = tmp_path / "gold.csv"
+    gold_path.write_text(
+        "text,name,entity_type\n"
+        "可瑞达,帕博利珠单抗,\n"
+        "aspirin,阿司匹林,drug\n"
+        "帕博利单抗,帕博利珠单抗,\n"
+        "二甲双胍,二甲双胍恩格列净片,\n"
+        "阿司匹林泡腾片,,\n"
+        ",阿司匹林,\n",
+        encoding="utf-8",
+    )
+    gold = load_gold(gold_path, mention_field="text", expected_field="name")
+    assert len(gold) == 5 and gold[4]["standard_name"] is None and gold[1]["entity_type"] == "drug"
+    
+    run = evaluate(OntologyEntityLinker(SAMPLE_DRUGS), gold, threshold=85)
+    # 二甲双胍 -> 盐酸二甲双胍（错误），阿司匹林泡腾片 -> 阿司匹林（NIL 误链）
+    assert (run["linked"], run["correct"], run["nil_linked"]) == (5, 3, 1)
+    assert run["precision"] == 0.6 and run["recall"] == 0.75
+    assert run["errors"] == {"wrong:partial_generic": 1, "nil": 1}
+    assert run["p50_ms"] <= run["p99_ms"]
+    
+    runs = pareto_front([
+        {"precision": 0.9, "recall": 0.8, "p95_ms": 1.0},
+        {"precision": 0.9, "recall": 0.7, "p95_ms": 1.0},   # 被第一个支配
+        {"precision": 0.8, "recall": 0.9, "p95_ms": 2.0},
+        {"precision": 0.9, "recall": 0.8, "p95_ms": 1.0},   # 与第一个相同，互不支配
+    ])
+    assert [r["pareto"] for r in runs] == [True, False, True, True]
+    
+    partitions = generate_ontology(3000)
+    synthetic_gold = generate_gold(partitions, 200)
+    assert synthetic_gold == generate_gold(partitions, 200)
+    for item in synthetic_gold:
+        item["entity_type"] = None
+    runs = evaluate_pipelines(partitions, synthetic_gold, {"plain": {}, "typo": {"typo_max_distance": 1}},
+                              [80, 95])
+    assert [(r["pipeline"], r["threshold"]) for r in runs] == [("plain", 80), ("plain", 95),
+                                                              ("typo", 80), ("typo", 95)]
+    assert runs[0]["recall"] > runs[1]["recall"] and any(r["pareto"] for r in runs)
+
+
+def test_ontology_loader_loads_collections_lazily(tmp_path):
+    """本体加载器：集合在首次访问时才解析，preload() 按类型预热；链接器可只加载部分类型"""
+    (tmp_path / "drugs.json").write_text(json.dumps(SAMPLE_DRUGS, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "diseases.json").write_text(json.dumps({
+        "2型糖尿病": {"standard_name": "2型糖尿病", "type": "Disease", "aliases": []},
+    }, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "genes.json").write_text("{ 不是 JSON", encoding="utf-8")
+    
+    assert CoreOntologyLoader is OntologyLoader  # src.core 只做转导出
+    loader = OntologyLoader(tmp_path)
+    assert not any(loader.is_loaded(name) for name in ("drugs", "diseases", "genes", "relations"))
+    assert loader.drugs["阿司匹林"]["generic_name"] == "阿司匹林"
+    assert loader.drugs is loader.drugs
+    assert loader.is_loaded("Drug") and not loader.is_loaded("disease")
+    assert loader.get_entity_by_type("Disease") == {"2型糖尿病": loader.diseases["2型糖尿病"]}
+    # 缺失的文件加载为空字典；未访问的损坏文件不影响其他集合
+    assert loader.preload(["manufacturer", "relations"]) is loader
+    assert loader.manufacturers == {} and loader.validate_relation("treats", "Drug", "Disease") is False
+    with pytest.raises(json.JSONDecodeError):
+        loader.preload(["Gene_Target"])
+    with pytest.raises(ValueError):
+        loader.preload(["symptom"])
+    loader.genes = {}
+    assert loader.is_loaded("genes") and loader.preload() is loader
+    
+    linker = OntologyEntityLinker()
+    linker.load_ontology(tmp_path, entity_types=["Drug"])
+    assert linker.get_statistics()["partitions"] == {"drug": 6}
+    with pytest.raises(ValueError):
+        linker.load_ontology(tmp_path, entity_types=["symptom"])
+
+
 if __name__ == "__main__":
     test_entity_linker_basic()
-